@@ -4,6 +4,11 @@ CTAS AI Model API Server
 FastAPI server providing real-time AI predictions for coastal threat assessment
 """
 
+import asyncio
+import threading
+import time
+_IMPORT_STARTED = time.perf_counter()
+
 import logging
 logging.basicConfig(
     level=logging.INFO,
@@ -11,84 +16,44 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 from typing import Dict, List, Optional, Any
 
-import uvicorn
-from fastapi import APIRouter
-from fastapi.responses import JSONResponse
-import importlib.util
-
-# Try to import predict_alert_api as a router
-predict_alert_router = None
-try:
-    import sys
-    import os
-    spec = importlib.util.spec_from_file_location("predict_alert_api", os.path.join(os.path.dirname(__file__), "predict_alert_api.py"))
-    predict_alert_api = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(predict_alert_api)
-    if hasattr(predict_alert_api, "app"):
-        predict_alert_router = predict_alert_api.app
-except Exception as e:
-    logger.warning(f"Could not import predict_alert_api: {e}")
-
 import sys
 import os
 from datetime import datetime, timedelta
-import asyncio
-import json
-import requests
 from dotenv import load_dotenv
 
+# requests, numpy, joblib and the model modules are imported on first use so
+# the server binds its port quickly on cold start (see startup_profile.py)
+
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env'))
 
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
-OPENAI_API_URL = "https://api.openai.com/v1/chat/completions"
+OPENAI_API_URL = os.environ.get("OPENAI_API_URL", "https://api.openai.com/v1/chat/completions")
 
 # Add the parent directory to Python path for model imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# Import all AI models (try importing and handle missing models gracefully)
-try:
-    from algal_bloom_predictor import AlgalBloomPredictor
-except ImportError:
-    AlgalBloomPredictor = None
-    
-try:
-    from blue_carbon_health_monitor import BlueCarbonHealthMonitor
-except ImportError:
-    BlueCarbonHealthMonitor = None
-    
-try:
-    from cyclone_trajectory_model import CycloneTrajectoryModel
-except ImportError:
-    CycloneTrajectoryModel = None
-    
-try:
-    from pollution_event_classifier import PollutionEventClassifier
-except ImportError:
-    PollutionEventClassifier = None
-    
-try:
-    from sea_level_anomaly_detector import SeaLevelAnomalyDetector
-except ImportError:
-    SeaLevelAnomalyDetector = None
-
-
-# Import coastal threat model (renamed to use underscores)
-try:
-    from coastal_threat_model import CoastalThreatModel
-except ImportError:
-    CoastalThreatModel = None
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
+from model_registry import registry, class_factory, module_available
+from model_store import load_time_report
+from retrain_jobs import RetrainManager, DEFAULT_NICE
+from metrics import instrument, uptime_seconds
+from json_response import FastJSONRoute
+import profiling
+from profiling import span, traced
+
+# AI model modules, registered lazily in initialize_models()
+MODEL_MODULES = {
+    'coastal_threat': ('coastal-threat-model', 'CoastalThreatModel'),
+    'algal_bloom': ('algal_bloom_predictor', 'AlgalBloomPredictor'),
+    'sea_level': ('sea_level_anomaly_detector', 'SeaLevelAnomalyDetector'),
+    'cyclone': ('cyclone_trajectory_model', 'CycloneTrajectoryModel'),
+    'pollution': ('pollution_event_classifier', 'PollutionEventClassifier'),
+    'blue_carbon': ('blue_carbon_health_monitor', 'BlueCarbonHealthMonitor'),
+}
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -98,6 +63,7 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc"
 )
+app.router.route_class = FastJSONRoute
 
 
 # Add CORS middleware (must be before endpoints)
@@ -116,20 +82,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Opt-in per-request profiling (CTAS_PROFILE_TOKEN), request latency histograms
+# per route and the Prometheus /metrics endpoint
+profiling.install(app)
+instrument(app, 'main')
+
 # Note: We'll add /api/predict_alert and /api/health endpoints directly below
 # instead of mounting a sub-app to avoid route conflicts
 
-# Load alert prediction model
-alert_prediction_model = None
-try:
-    import joblib
-    import numpy as np
-    # Model is in parent directory (ai-models/alert_model.pkl)
-    model_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'alert_model.pkl')
-    alert_prediction_model = joblib.load(model_path)
-    logger.info("✅ Alert prediction model loaded successfully")
-except Exception as e:
-    logger.warning(f"⚠️ Could not load alert prediction model: {e}")
+# Alert prediction model, loaded on first /api/predict_alert (or by prewarm).
+# Model is in parent directory (ai-models/alert_model.pkl); a published
+# model_store/alert_model artifact takes precedence and is memory-mapped.
+# predict_alert_api registers the same file, so the process holds one copy.
+ALERT_MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'alert_model.pkl')
+
+registry.register_file('alert_model', ALERT_MODEL_PATH)
+
+# Decimal places each feature is rounded to in prediction cache keys (prediction_cache.py)
+ALERT_FEATURES = ['water_level_m', 'wind_speed_m_s', 'air_pressure_hpa', 'chlorophyll_mg_m3', 'rainfall']
+ALERT_CACHE_PRECISION = {'water_level_m': 3, 'wind_speed_m_s': 2, 'air_pressure_hpa': 1,
+                         'chlorophyll_mg_m3': 3, 'rainfall': 2}
+COASTAL_CACHE_PRECISION = {'wave_height': 2, 'wind_speed': 1, 'atmospheric_pressure': 1, 'tide_level': 2,
+                           'water_temperature': 1, 'rainfall_24h': 1, 'storm_distance': 1, 'moon_phase': 3,
+                           'season': 0, 'coastal_elevation': 2, 'vegetation_cover': 3, 'human_population': 0}
 
 # Pydantic models for API requests/responses
 class CoastalThreatInput(BaseModel):
@@ -250,10 +225,60 @@ class AlertPredictionOutput(BaseModel):
     humidity_predicted: Optional[float] = None
     water_level_predicted: Optional[float] = None
 
-# Global model instances
-# Global model instances
-models = {}
+# Model status for models that are not registered (missing modules, failures)
 model_status = {}
+cold_start = {}
+
+# Comma-separated model names (or "all") to build in the background at startup
+PREWARM_ENV = 'CTAS_PREWARM_MODELS'
+
+# Retraining runs in a niced worker process and swaps the finished artifact in
+retrainer = RetrainManager(registry)
+RETRAIN_CORES_ENV = 'CTAS_RETRAIN_CORES'
+
+
+async def get_model_with_version(name: str):
+    """Return (model, registry version) of a registered model, materializing it on first use
+
+    A first-use load (import, unpickle or training) runs in the default executor,
+    so other requests keep being served while it is built.
+    """
+    if name not in registry:
+        raise HTTPException(status_code=503, detail=f"Model '{name}' not available")
+    try:
+        if registry.is_loaded(name):
+            return registry.get_with_version(name)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, registry.get_with_version, name)
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+async def get_model(name: str):
+    """Return a registered model, materializing it on first use"""
+    return (await get_model_with_version(name))[0]
+
+
+_auto_train_lock = threading.Lock()
+
+
+def train_on_synthetic_data(model, n_samples: int) -> None:
+    """Demo auto-training for an untrained model (run in an executor; concurrent callers train it once)"""
+    with _auto_train_lock:
+        if not getattr(model, 'is_trained', False):
+            model.train(model.generate_synthetic_data(n_samples))
+
+
+def all_model_status() -> Dict[str, Dict[str, Any]]:
+    """Registry status (registered/loading/ready/error) merged with model_status overrides"""
+    statuses = {name: dict(info) for name, info in registry.statuses().items()}
+    for name, info in model_status.items():
+        statuses.setdefault(name, {}).update(info)
+    for name, info in statuses.items():
+        last_retrain = retrainer.latest(name)
+        if last_retrain is not None:
+            info['last_retrain'] = last_retrain
+    return statuses
 
 
 # LLM Chat endpoint
@@ -293,6 +318,7 @@ async def chat_with_llm(request: ChatRequest):
             "Authorization": f"Bearer {OPENAI_API_KEY}",
             "Content-Type": "application/json"
         }
+        import requests
         resp = requests.post(OPENAI_API_URL, headers=headers, json=payload, timeout=30)
         if resp.status_code != 200:
             logger.error(f"OpenAI API error: {resp.status_code} {resp.text}")
@@ -306,100 +332,43 @@ async def chat_with_llm(request: ChatRequest):
         raise HTTPException(status_code=500, detail=f"LLM chat error: {str(e)}")
 
 async def initialize_models():
-    """Initialize all AI models on startup"""
+    """Register AI models for lazy loading; nothing is imported or trained here"""
     try:
-        logger.info("Initializing AI models...")
-        
-        # Initialize available models with graceful error handling
-        
-        # Initialize Coastal Threat Model
-        if CoastalThreatModel:
-            try:
-                models['coastal_threat'] = CoastalThreatModel()
-                model_status['coastal_threat'] = {'status': 'ready', 'last_trained': datetime.now()}
-                logger.info("✓ Coastal Threat Model initialized")
-            except Exception as e:
-                logger.warning(f"Coastal Threat model initialization failed: {e}")
-                model_status['coastal_threat'] = {'status': 'error', 'error': str(e)}
-        else:
-            logger.warning("Coastal Threat Model not available")
-            model_status['coastal_threat'] = {'status': 'unavailable', 'error': 'Module not found'}
+        logger.info("Registering AI models...")
+
+        for name, (module_name, class_name) in MODEL_MODULES.items():
+            if module_available(module_name):
+                if name not in registry:
+                    registry.register(name, class_factory(module_name, class_name, artifact=name))
+                model_status.pop(name, None)
+                logger.info(f"✓ {class_name} registered (loads on first use)")
+            else:
+                logger.warning(f"{class_name} not available")
+                model_status[name] = {'status': 'unavailable', 'error': 'Module not found'}
 
-        # Initialize Algal Bloom Predictor
-        if AlgalBloomPredictor:
-            try:
-                models['algal_bloom'] = AlgalBloomPredictor()
-                # Skip training for now to get the service up quickly
-                model_status['algal_bloom'] = {'status': 'ready', 'last_trained': datetime.now()}
-                logger.info("✓ Algal Bloom Predictor initialized")
-            except Exception as e:
-                logger.warning(f"Algal Bloom model initialization failed: {e}")
-                model_status['algal_bloom'] = {'status': 'error', 'error': str(e)}
-        else:
-            logger.warning("Algal Bloom Predictor not available")
-            model_status['algal_bloom'] = {'status': 'unavailable', 'error': 'Module not found'}
-        
-        # Initialize other available models
-        if SeaLevelAnomalyDetector:
-            try:
-                models['sea_level'] = SeaLevelAnomalyDetector()
-                model_status['sea_level'] = {'status': 'ready', 'last_trained': datetime.now()}
-                logger.info("✓ Sea Level Anomaly Detector initialized")
-            except Exception as e:
-                logger.warning(f"Sea Level model initialization failed: {e}")
-                model_status['sea_level'] = {'status': 'error', 'error': str(e)}
-        else:
-            model_status['sea_level'] = {'status': 'unavailable', 'error': 'Module not found'}
-        
-        if CycloneTrajectoryModel:
-            try:
-                models['cyclone'] = CycloneTrajectoryModel()
-                model_status['cyclone'] = {'status': 'ready', 'last_trained': datetime.now()}
-                logger.info("✓ Cyclone Trajectory Model initialized")
-            except Exception as e:
-                logger.warning(f"Cyclone model initialization failed: {e}")
-                model_status['cyclone'] = {'status': 'error', 'error': str(e)}
-        else:
-            model_status['cyclone'] = {'status': 'unavailable', 'error': 'Module not found'}
-        
-        if PollutionEventClassifier:
-            try:
-                models['pollution'] = PollutionEventClassifier()
-                model_status['pollution'] = {'status': 'ready', 'last_trained': datetime.now()}
-                logger.info("✓ Pollution Event Classifier initialized")
-            except Exception as e:
-                logger.warning(f"Pollution model initialization failed: {e}")
-                model_status['pollution'] = {'status': 'error', 'error': str(e)}
-        else:
-            model_status['pollution'] = {'status': 'unavailable', 'error': 'Module not found'}
-        
-        if BlueCarbonHealthMonitor:
-            try:
-                models['blue_carbon'] = BlueCarbonHealthMonitor()
-                model_status['blue_carbon'] = {'status': 'ready', 'last_trained': datetime.now()}
-                logger.info("✓ Blue Carbon Health Monitor initialized")
-            except Exception as e:
-                logger.warning(f"Blue Carbon model initialization failed: {e}")
-                model_status['blue_carbon'] = {'status': 'error', 'error': str(e)}
-        else:
-            model_status['blue_carbon'] = {'status': 'unavailable', 'error': 'Module not found'}
-        
         # Add basic status for missing models
-        if 'coastal_threat' not in model_status:
-            model_status['coastal_threat'] = {'status': 'unavailable', 'error': 'Model file with hyphens - needs manual loading'}
-        if 'mangrove_health' not in model_status:
+        if 'mangrove_health' not in registry:
             model_status['mangrove_health'] = {'status': 'unavailable', 'error': 'Model file with hyphens - needs manual loading'}
-        
-        logger.info("🌊 AI models initialization completed!")
-        
+
+        # Optional background prewarm: CTAS_PREWARM_MODELS=all or a comma separated list
+        prewarm = os.environ.get(PREWARM_ENV, '').strip()
+        if prewarm:
+            names = None if prewarm.lower() == 'all' else [n.strip() for n in prewarm.split(',') if n.strip()]
+            registry.prewarm(names, background=True)
+            logger.info(f"Prewarming models in background: {prewarm}")
+
+        logger.info("🌊 AI models registration completed!")
+
     except Exception as e:
         logger.error(f"Failed to initialize models: {e}")
         # Don't raise - let the service start even with failed models
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize models on startup"""
+    """Register models on startup"""
     await initialize_models()
+    cold_start['ready_seconds'] = time.perf_counter() - _IMPORT_STARTED
+    logger.info(f"Cold start to ready: {cold_start['ready_seconds']:.2f}s")
 
 @app.get("/")
 async def root():
@@ -409,7 +378,7 @@ async def root():
         "version": "1.0.0",
         "status": "operational",
         "timestamp": datetime.now(),
-        "models": {name: status['status'] for name, status in model_status.items()},
+        "models": {name: status['status'] for name, status in all_model_status().items()},
         "endpoints": {
             "coastal_threat": "/predict/coastal-threat",
             "mangrove_health": "/predict/mangrove-health",
@@ -422,14 +391,18 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    healthy_models = sum(1 for status in model_status.values() if status['status'] == 'ready')
-    total_models = len(model_status)
+    statuses = all_model_status()
+    # Registered models load on first use, so they count as healthy until they fail
+    healthy_models = sum(1 for status in statuses.values() if status['status'] in ('ready', 'registered', 'loading'))
+    total_models = len(statuses)
     
+    uptime = uptime_seconds()
     return {
         "status": "healthy" if healthy_models == total_models else "degraded",
         "models_ready": f"{healthy_models}/{total_models}",
         "timestamp": datetime.now(),
-        "uptime": "up"
+        "uptime": str(timedelta(seconds=int(uptime))),
+        "uptime_seconds": round(uptime, 3)
     }
 
 @app.get("/api/health")
@@ -438,19 +411,21 @@ async def api_health_check():
     return await health_check()
 
 @app.post("/api/predict_alert", response_model=AlertPredictionOutput)
+@traced('handler')
 async def api_predict_alert(data: AlertPredictionInput):
     """Alert prediction endpoint using pre-trained model"""
-    if alert_prediction_model is None:
-        raise HTTPException(status_code=503, detail="Alert prediction model not available")
+    alert_prediction_model, alert_version = await get_model_with_version('alert_model')
     
     try:
-        import numpy as np
+        from micro_batcher import get_batcher, predict_with_proba
+        from prediction_cache import cached_prediction
         
         # If latitude/longitude provided, try to fetch real weather data
         if data.latitude is not None and data.longitude is not None:
             try:
                 from live_weather import fetch_current_conditions
-                weather = fetch_current_conditions(data.latitude, data.longitude)
+                with span('live_weather'):
+                    weather = fetch_current_conditions(data.latitude, data.longitude)
                 
                 if weather:
                     logger.info(f"Fetched live weather for ({data.latitude}, {data.longitude}): {weather}")
@@ -482,17 +457,15 @@ async def api_predict_alert(data: AlertPredictionInput):
             chlorophyll = data.chlorophyll_mg_m3
             rainfall = data.rainfall
         
-        features = np.array([
-            [
-                water_level,
-                wind_speed,
-                air_pressure,
-                chlorophyll,
-                rainfall
-            ]
-        ])
-        pred = alert_prediction_model.predict(features)[0]
-        prob = float(alert_prediction_model.predict_proba(features)[0][int(pred)])
+        features = [water_level, wind_speed, air_pressure, chlorophyll, rainfall]
+        # Repeated inputs are answered from the cache; concurrent misses share one
+        # predict_proba call (see micro_batcher.py)
+        with span('alert_model'):
+            pred, proba = await cached_prediction(
+                'alert_model', registry, features,
+                lambda: get_batcher('alert_model', predict_with_proba).submit(alert_prediction_model, features),
+                version=alert_version, feature_names=ALERT_FEATURES, precision=ALERT_CACHE_PRECISION)
+        prob = float(proba[int(pred)])
         
         # Fetch live weather predictions if location is available
         rain_pred = None
@@ -504,7 +477,8 @@ async def api_predict_alert(data: AlertPredictionInput):
         if data.latitude is not None and data.longitude is not None:
             try:
                 from live_weather import fetch_current_conditions
-                weather = fetch_current_conditions(data.latitude, data.longitude)
+                with span('live_weather'):
+                    weather = fetch_current_conditions(data.latitude, data.longitude)
                 
                 if weather:
                     # Extract weather predictions from live data
@@ -632,30 +606,40 @@ async def api_forecast(data: ForecastInput):
 @app.get("/models/status")
 async def get_model_status():
     """Get detailed status of all AI models"""
+    from micro_batcher import batcher_stats
+    from prediction_cache import cache_stats
     return {
-        "models": model_status,
+        "models": all_model_status(),
+        "cold_start": dict(cold_start, model_load_seconds=load_time_report()),
+        "memory": registry.memory_report(),
+        "prediction_cache": cache_stats(),
+        "batching": batcher_stats(),
         "timestamp": datetime.now()
     }
 
 @app.post("/predict/coastal-threat", response_model=ThreatPredictionResponse)
+@traced('handler')
 async def predict_coastal_threat(input_data: CoastalThreatInput):
     """Predict coastal threats based on environmental conditions"""
     try:
-        if 'coastal_threat' not in models:
-            raise HTTPException(status_code=503, detail="Coastal threat model not available")
-        model = models['coastal_threat']
+        model, version = await get_model_with_version('coastal_threat')
         # Ensure model is trained (for demo, auto-train on first use)
         if not getattr(model, 'is_trained', False):
             # Try to train with synthetic data if available
             if hasattr(model, 'generate_synthetic_data') and hasattr(model, 'train'):
-                data = model.generate_synthetic_data(1000)
-                model.train(data)
+                await asyncio.get_running_loop().run_in_executor(None, train_on_synthetic_data, model, 1000)
             else:
                 raise HTTPException(status_code=503, detail="Coastal threat model is not trained and cannot be auto-trained.")
+        from micro_batcher import get_batcher, predict_threats
+        from prediction_cache import cached_prediction
         # Convert input to dict
         features = input_data.dict()
-        # Get prediction
-        prediction = model.predict_threat(features)
+        # Get prediction (cached per model version, batched with concurrent requests)
+        with span('coastal_threat_model'):
+            prediction = await cached_prediction(
+                'coastal_threat', registry, features,
+                lambda: get_batcher('coastal_threat', predict_threats).submit(model, features),
+                version=version, precision=COASTAL_CACHE_PRECISION)
         # Generate recommendations based on threat type
         recommendations = generate_threat_recommendations(prediction['primary_threat'], prediction['severity_score'])
         return ThreatPredictionResponse(
@@ -673,17 +657,16 @@ async def predict_coastal_threat(input_data: CoastalThreatInput):
 async def predict_mangrove_health(input_data: MangroveHealthInput):
     """Assess mangrove ecosystem health"""
     try:
-        if 'mangrove_health' not in models:
-            raise HTTPException(status_code=503, detail="Mangrove health model not available")
+        model = await get_model('mangrove_health')
         
         # Convert input to dict
         features = input_data.dict()
         
         # Get health prediction
-        prediction = models['mangrove_health'].predict_health(features)
+        prediction = model.predict_health(features)
         
         # Get threats assessment
-        threats = models['mangrove_health'].assess_threats(features, prediction['health_score'])
+        threats = model.assess_threats(features, prediction['health_score'])
         
         return HealthAssessmentResponse(
             health_score=prediction['health_score'],
@@ -702,14 +685,13 @@ async def predict_mangrove_health(input_data: MangroveHealthInput):
 async def predict_algal_bloom(input_data: AlgalBloomInput):
     """Predict algal bloom occurrence and severity"""
     try:
-        if 'algal_bloom' not in models:
-            raise HTTPException(status_code=503, detail="Algal bloom model not available")
+        model = await get_model('algal_bloom')
         
         # Convert input to dict
         features = input_data.dict()
         
         # Get bloom prediction
-        prediction = models['algal_bloom'].predict_bloom(features)
+        prediction = model.predict_bloom(features)
         
         # Determine risk level
         risk_level = determine_bloom_risk_level(prediction.get('bloom_probability', 0))
@@ -742,11 +724,16 @@ async def predict_ensemble(input_data: EnsemblePredictionInput):
         # Extract environmental data
         env_data = input_data.environmental_data
         
+        # Only models that are already loaded can be trained; peek() never triggers a load
+        coastal_model = registry.peek('coastal_threat')
+        mangrove_model = registry.peek('mangrove_health')
+        bloom_model = registry.peek('algal_bloom')
+        
         # Run coastal threat prediction if model available
-        if 'coastal_threat' in models and models['coastal_threat'].is_trained:
+        if coastal_model is not None and coastal_model.is_trained:
             try:
                 coastal_input = extract_coastal_features(env_data)
-                coastal_pred = models['coastal_threat'].predict_threat(coastal_input)
+                coastal_pred = coastal_model.predict_threat(coastal_input)
                 individual_predictions['coastal_threat'] = coastal_pred
                 severity_scores.append(coastal_pred['severity_score'])
                 if coastal_pred['threat_type'] != 'none':
@@ -755,10 +742,10 @@ async def predict_ensemble(input_data: EnsemblePredictionInput):
                 logger.warning(f"Coastal threat ensemble prediction failed: {e}")
         
         # Run mangrove health assessment if model available
-        if 'mangrove_health' in models and models['mangrove_health'].is_trained:
+        if mangrove_model is not None and mangrove_model.is_trained:
             try:
                 mangrove_input = extract_mangrove_features(env_data)
-                mangrove_pred = models['mangrove_health'].predict_health(mangrove_input)
+                mangrove_pred = mangrove_model.predict_health(mangrove_input)
                 individual_predictions['mangrove_health'] = mangrove_pred
                 # Convert health score to severity (inverse relationship)
                 severity_scores.append(100 - mangrove_pred['health_score'])
@@ -768,10 +755,10 @@ async def predict_ensemble(input_data: EnsemblePredictionInput):
                 logger.warning(f"Mangrove ensemble prediction failed: {e}")
         
         # Run algal bloom prediction if model available
-        if 'algal_bloom' in models and models['algal_bloom'].is_trained:
+        if bloom_model is not None and bloom_model.is_trained:
             try:
                 bloom_input = extract_bloom_features(env_data)
-                bloom_pred = models['algal_bloom'].predict_bloom(bloom_input)
+                bloom_pred = bloom_model.predict_bloom(bloom_input)
                 individual_predictions['algal_bloom'] = bloom_pred
                 severity_scores.append(bloom_pred.get('severity_score', 0))
                 if bloom_pred.get('bloom_type', 'no_bloom') != 'no_bloom':
@@ -984,39 +971,63 @@ def generate_ensemble_recommendations(threats: List[str], severity: float) -> Li
     return recommendations
 
 @app.post("/models/retrain/{model_name}")
-async def retrain_model(model_name: str, background_tasks: BackgroundTasks):
-    """Retrain a specific model with new data"""
-    if model_name not in models:
+async def retrain_model(model_name: str, nice: int = DEFAULT_NICE, cores: Optional[str] = None):
+    """Retrain a model in a background worker process and hot-swap it when done
+
+    `nice` (0-19) lowers the worker's CPU priority; `cores` (e.g. "0,1" or "2-3") pins it to
+    those CPUs, defaulting to CTAS_RETRAIN_CORES. Poll /models/retrain/jobs/{job_id}.
+    """
+    if model_name not in registry:
         raise HTTPException(status_code=404, detail=f"Model '{model_name}' not found")
+    if model_name not in MODEL_MODULES:
+        raise HTTPException(status_code=400, detail=f"Model '{model_name}' is trained offline and cannot be retrained here")
     
-    def retrain_task():
-        try:
-            logger.info(f"Starting retraining for {model_name}")
-            model_status[model_name]['status'] = 'retraining'
-            
-            # Retrain the model
-            result = models[model_name].train()
-            
-            model_status[model_name]['status'] = 'ready'
-            model_status[model_name]['last_trained'] = datetime.now()
-            model_status[model_name]['training_result'] = result
-            
-            logger.info(f"Retraining completed for {model_name}")
-            
-        except Exception as e:
-            model_status[model_name]['status'] = 'error'
-            model_status[model_name]['error'] = str(e)
-            logger.error(f"Retraining failed for {model_name}: {e}")
-    
-    background_tasks.add_task(retrain_task)
+    module_name, class_name = MODEL_MODULES[model_name]
+    try:
+        job = retrainer.submit(model_name, module_name, class_name, nice=nice,
+                               cores=cores or os.environ.get(RETRAIN_CORES_ENV))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid nice or cores: {e}")
     
+    logger.info(f"Starting retraining for {model_name} (job {job.job_id})")
     return {
         "message": f"Retraining started for {model_name}",
         "status": "in_progress",
+        "job_id": job.job_id,
+        "job": job.describe(),
         "timestamp": datetime.now()
     }
 
+@app.get("/models/retrain/jobs")
+async def list_retrain_jobs():
+    """Recent retraining jobs, newest first"""
+    return {"jobs": retrainer.jobs(), "timestamp": datetime.now()}
+
+@app.get("/models/retrain/jobs/{job_id}")
+async def get_retrain_job(job_id: str):
+    """Progress, duration and outcome of a retraining job"""
+    job = retrainer.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Retraining job '{job_id}' not found")
+    return job.describe()
+
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="CTAS AI Model API server")
+    parser.add_argument("--profile-imports", action="store_true",
+                        help="Print the -X importtime breakdown and time to first request, then exit")
+    parser.add_argument("--top", type=int, default=25, help="Rows to show with --profile-imports")
+    args = parser.parse_args()
+
+    if args.profile_imports:
+        import startup_profile
+        sys.exit(startup_profile.main(["--module", "api.main", "--top", str(args.top),
+                                       "--first-request", "GET /api/health"]))
+
+    import uvicorn
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
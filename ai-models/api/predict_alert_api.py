@@ -1,12 +1,23 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
-import joblib
 import numpy as np
+import os
+import sys
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if HERE not in sys.path:
+    sys.path.insert(0, HERE)
+
+from model_registry import registry
+from fast_forest import accelerate
+from json_response import FastJSONRoute
 
 app = FastAPI()
+app.router.route_class = FastJSONRoute
 
-# Load the trained model
-model = joblib.load('alert_model.pkl')
+# The trained model lives in the process-wide registry; api/main registers the
+# same file, so mounting both apps in one process loads alert_model.pkl once
+registry.register_file('alert_model', os.path.join(HERE, 'alert_model.pkl'))
 
 # Define the input data model
 class PredictionInput(BaseModel):
@@ -22,6 +33,10 @@ class PredictionOutput(BaseModel):
 
 @app.post("/predict_alert")
 def predict_alert(data: PredictionInput):
+    try:
+        model = accelerate(registry.get('alert_model'))
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     features = np.array([
         [
             data.water_level_m,
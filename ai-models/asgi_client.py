@@ -0,0 +1,113 @@
+"""
+Minimal in-process ASGI client
+Drives the FastAPI apps without a network socket or extra test dependencies
+"""
+
+import asyncio
+import json
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+
+class ASGIResponse:
+    __slots__ = ('status_code', 'headers', 'content')
+
+    def __init__(self, status_code: int, headers: Dict[str, str], content: bytes):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+
+class ASGIClient:
+    """Send requests straight into an ASGI app; use as an async context manager to run lifespan events"""
+
+    def __init__(self, app):
+        self.app = app
+        self._lifespan_task = None
+        self._lifespan_queue = None
+        self._lifespan_events = None
+
+    async def __aenter__(self):
+        self._lifespan_queue = asyncio.Queue()
+        self._lifespan_events = asyncio.Queue()
+
+        async def receive():
+            return await self._lifespan_queue.get()
+
+        async def send(message):
+            await self._lifespan_events.put(message)
+
+        self._lifespan_task = asyncio.ensure_future(self.app({'type': 'lifespan', 'asgi': {'version': '3.0'}}, receive, send))
+        await self._lifespan_queue.put({'type': 'lifespan.startup'})
+        message = await self._lifespan_events.get()
+        if message['type'] == 'lifespan.startup.failed':
+            raise RuntimeError(f"ASGI startup failed: {message.get('message')}")
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._lifespan_queue.put({'type': 'lifespan.shutdown'})
+        await self._lifespan_events.get()
+        await self._lifespan_task
+
+    async def request(self, method: str, url: str, json_body: Any = None,
+                      headers: Optional[Dict[str, str]] = None) -> ASGIResponse:
+        parts = urlsplit(url)
+        body = b'' if json_body is None else json.dumps(json_body).encode('utf-8')
+        raw_headers = [(b'host', b'testserver')]
+        if json_body is not None:
+            raw_headers.append((b'content-type', b'application/json'))
+            raw_headers.append((b'content-length', str(len(body)).encode('ascii')))
+        for key, value in (headers or {}).items():
+            raw_headers.append((key.lower().encode('latin-1'), str(value).encode('latin-1')))
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': method.upper(),
+            'scheme': 'http',
+            'path': parts.path or '/',
+            'raw_path': (parts.path or '/').encode('utf-8'),
+            'query_string': parts.query.encode('utf-8'),
+            'root_path': '',
+            'headers': raw_headers,
+            'client': ('127.0.0.1', 50000),
+            'server': ('testserver', 80),
+        }
+        request_sent = False
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {'type': 'http.request', 'body': body, 'more_body': False}
+            await asyncio.Event().wait()
+
+        status_code, response_headers, chunks = 500, {}, []
+
+        async def send(message):
+            nonlocal status_code, response_headers
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+                response_headers = {k.decode('latin-1'): v.decode('latin-1') for k, v in message.get('headers', [])}
+            elif message['type'] == 'http.response.body':
+                chunks.append(message.get('body', b''))
+
+        await self.app(scope, receive, send)
+        return ASGIResponse(status_code, response_headers, b''.join(chunks))
+
+    async def get(self, url: str, headers: Optional[Dict[str, str]] = None) -> ASGIResponse:
+        return await self.request('GET', url, headers=headers)
+
+    async def post(self, url: str, json_body: Any = None, headers: Optional[Dict[str, str]] = None) -> ASGIResponse:
+        return await self.request('POST', url, json_body=json_body, headers=headers)
+
+
+def split_target(target: str) -> Tuple[str, str]:
+    """'POST /api/predict_alert' -> ('POST', '/api/predict_alert'); bare paths default to GET"""
+    method, _, path = target.strip().partition(' ')
+    if not path:
+        return 'GET', method
+    return method.upper(), path.strip()
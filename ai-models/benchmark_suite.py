@@ -0,0 +1,814 @@
+"""
+CTAS Benchmark Suite
+Offline, reproducible timings of the ai-models hot paths, stored per commit for comparison
+
+Everything runs against synthetic data in a temporary directory: CSVs for the
+feature vector, freshly trained models, a stubbed HTTP layer for the live-weather
+fetch and in-process ASGI requests (no network, no server). Each benchmark is
+timed asv-style: calls per repeat are auto-ranged to at least --min-time seconds,
+and the per-call min / median / mean / stdev over --repeat repeats are recorded.
+
+Results are written to benchmark_results/<commit>.json (with "-dirty" for
+uncommitted trees) together with library versions and the CPU count, and two
+result files can be compared:
+
+    python benchmark_suite.py                         # full run
+    python benchmark_suite.py --quick --filter models  # smoke run of a subset
+    python benchmark_suite.py --compare benchmark_results/abc1234.json benchmark_results/def5678.json
+"""
+
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+if HERE not in sys.path:
+    sys.path.insert(0, HERE)
+
+RESULTS_DIR = os.path.join(HERE, 'benchmark_results')
+DEFAULT_REPEAT = 5
+DEFAULT_MIN_TIME = 0.2
+BATCH_ROWS = 256
+REGRESSION_THRESHOLD = 0.10
+
+CITIES = {
+    'Mumbai': (19.0760, 72.8777),
+    'Delhi': (28.7041, 77.1025),
+    'Bangalore': (12.9716, 77.5946),
+    'Chennai': (13.0827, 80.2707),
+    'Kolkata': (22.5726, 88.3639),
+}
+
+
+class Benchmark:
+    __slots__ = ('name', 'setup', 'requires')
+
+    def __init__(self, name: str, setup: Callable[['BenchEnv'], Callable[[], Any]], requires: tuple = ()):
+        self.name = name
+        self.setup = setup
+        self.requires = requires
+
+
+BENCHMARKS: List[Benchmark] = []
+
+
+def benchmark(name: str, requires: tuple = ()):
+    """Register setup(env) -> zero-argument callable that is timed"""
+    def decorate(setup):
+        BENCHMARKS.append(Benchmark(name, setup, requires))
+        return setup
+    return decorate
+
+
+# --- Synthetic environment -------------------------------------------------
+
+class BenchEnv:
+    """Temporary working directory with synthetic CSVs and lazily trained models shared by benchmarks"""
+
+    def __init__(self, quick: bool = False, seed: int = 0, blank_current: bool = False):
+        self.quick = quick
+        self.blank_current = blank_current
+        self.rng = np.random.default_rng(seed)
+        self.workdir = tempfile.mkdtemp(prefix='ctas-bench-')
+        self._previous_cwd = os.getcwd()
+        self._saved_env = {}
+        self._models: Dict[str, Any] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._clients: Dict[str, Any] = {}
+        self.cleanups: List[Callable[[], Any]] = []
+
+    def samples(self, full: int, quick: int) -> int:
+        return quick if self.quick else full
+
+    def __enter__(self) -> 'BenchEnv':
+        os.chdir(self.workdir)
+        for key, value in {'CTAS_MODEL_STORE': os.path.join(self.workdir, 'model_store'),
+                           'USE_LIVE_WEATHER': 'false', 'OPENWEATHER_API_KEY': None}.items():
+            self._saved_env[key] = os.environ.get(key)
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        self.write_csvs()
+        return self
+
+    def __exit__(self, *exc_info):
+        for cleanup in reversed(self.cleanups):
+            cleanup()
+        for client in self._clients.values():
+            with contextlib.suppress(Exception):
+                self.run(client.__aexit__(None, None, None))
+        if self._loop is not None:
+            self._loop.close()
+        os.chdir(self._previous_cwd)
+        for key, value in self._saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def write_csvs(self):
+        """Current observations (hourly, 2 days) and history (daily, 30 days) for a few cities
+
+        With blank_current the current readings are left empty, which makes
+        create_feature_vector fetch them from live_weather when USE_LIVE_WEATHER is set.
+        """
+        now = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+        current, history = [], []
+        for city, (lat, lon) in CITIES.items():
+            for hour in range(48):
+                current.append({'city': city, 'timestamp': now - timedelta(hours=hour), 'latitude': lat,
+                                'longitude': lon, 'temperature': 300 + self.rng.normal(0, 3),
+                                'humidity': self.rng.uniform(40, 95), 'wind_speed': self.rng.gamma(2, 2),
+                                'rainfall': self.rng.exponential(2)})
+            for day in range(30):
+                history.append({'city': city, 'date': (now - timedelta(days=day)).date().isoformat(),
+                                'latitude': lat, 'longitude': lon, 'temperature': 300 + self.rng.normal(0, 3),
+                                'humidity': self.rng.uniform(40, 95), 'wind_speed': self.rng.gamma(2, 2),
+                                'rainfall': self.rng.exponential(2)})
+        current = pd.DataFrame(current)
+        if self.blank_current:
+            current[['temperature', 'humidity', 'wind_speed', 'rainfall']] = np.nan
+        current.to_csv('weather_data_with_rainfall.csv', index=False)
+        pd.DataFrame(history).to_csv('final_training_dataset.csv', index=False)
+
+    def model(self, name: str):
+        if name not in self._models:
+            self._models[name] = getattr(self, f'_build_{name}')()
+        return self._models[name]
+
+    def _synthetic_model(self, module_name: str, class_name: str, n_samples: int):
+        from model_registry import import_model_module
+        model = getattr(import_model_module(module_name), class_name)()
+        model.train(model.generate_synthetic_data(n_samples))
+        return model
+
+    def _build_coastal_threat(self):
+        return self._synthetic_model('coastal-threat-model', 'CoastalThreatModel', self.samples(2000, 400))
+
+    def _build_mangrove_health(self):
+        return self._synthetic_model('mangrove-health-model', 'MangroveHealthModel', self.samples(1000, 300))
+
+    def _build_cyclone(self):
+        return self._synthetic_model('cyclone_trajectory_model', 'CycloneTrajectoryModel', self.samples(1000, 100))
+
+    def _build_sea_level(self):
+        return self._synthetic_model('sea_level_anomaly_detector', 'SeaLevelAnomalyDetector', self.samples(5000, 500))
+
+    def _build_alert_model(self):
+        from sklearn.ensemble import RandomForestClassifier
+        X = self.alert_rows(2000)
+        y = ((X[:, 0] > 2.0) | (X[:, 1] > 15)).astype(int)
+        return RandomForestClassifier(n_estimators=self.samples(100, 10), random_state=0).fit(X, y)
+
+    def _build_weather_models(self):
+        """rain classifier, temperature, humidity and water-level regressors saved as the API's pkl files"""
+        import joblib
+        from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+        n_trees = self.samples(100, 10)
+        t = 300 + self.rng.normal(0, 3, 2000)
+        h = self.rng.uniform(40, 95, 2000)
+        w = self.rng.gamma(2, 2, 2000)
+        r = self.rng.exponential(2, 2000)
+        models = {
+            'rain_classifier': RandomForestClassifier(n_estimators=n_trees, random_state=0).fit(
+                np.column_stack([t, h, w]), (h > 75).astype(int)),
+            'temperature_regressor': RandomForestRegressor(n_estimators=n_trees, random_state=0).fit(
+                np.column_stack([h, w]), t),
+            'humidity_regressor': RandomForestRegressor(n_estimators=n_trees, random_state=0).fit(
+                np.column_stack([h, w]), h),
+            'water_level_regressor': RandomForestRegressor(n_estimators=n_trees, random_state=0).fit(
+                np.column_stack([w, h, r]), 1 + 0.05 * w + 0.1 * r),
+        }
+        for name, model in models.items():
+            joblib.dump(model, os.path.join(self.workdir, f'{name}.pkl'))
+        return models
+
+    def alert_rows(self, n: int) -> np.ndarray:
+        return np.column_stack([self.rng.uniform(0, 4, n), self.rng.gamma(2, 5, n), self.rng.normal(1013, 10, n),
+                                self.rng.uniform(0, 20, n), self.rng.exponential(5, n)])
+
+    def coastal_input(self) -> Dict[str, float]:
+        return {'wave_height': 4.0, 'wind_speed': 60.0, 'atmospheric_pressure': 985.0, 'tide_level': 1.2,
+                'water_temperature': 27.0, 'rainfall_24h': 40.0, 'storm_distance': 150.0, 'moon_phase': 0.6,
+                'season': 1, 'coastal_elevation': 2.0, 'vegetation_cover': 0.25, 'human_population': 20000.0}
+
+    # ASGI helpers: one event loop and one client per app for the whole run
+    def run(self, awaitable):
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+        return self._loop.run_until_complete(awaitable)
+
+    def client(self, name: str, app):
+        if name not in self._clients:
+            from asgi_client import ASGIClient
+            self._clients[name] = self.run(ASGIClient(app).__aenter__())
+        return self._clients[name]
+
+
+class StubResponse:
+    def __init__(self, payload: Dict[str, Any]):
+        self._payload = payload
+        self.status_code = 200
+
+    def raise_for_status(self):
+        return None
+
+    def json(self):
+        return self._payload
+
+
+OPEN_METEO_PAYLOAD = {
+    'generationtime_ms': 0.5,
+    'current_weather': {'temperature': 28.4, 'windspeed': 14.4},
+    'hourly': {'time': [f'2024-01-01T{h:02d}:00' for h in range(24)],
+               'relativehumidity_2m': list(range(60, 84)), 'precipitation': [0.1] * 24},
+}
+
+
+@contextlib.contextmanager
+def stub_http(module):
+    """Replace module.requests.get with an in-memory Open-Meteo response"""
+    original = module.requests.get
+    module.requests.get = lambda *args, **kwargs: StubResponse(OPEN_METEO_PAYLOAD)
+    try:
+        yield
+    finally:
+        module.requests.get = original
+
+
+# --- Benchmarks -------------------------------------------------------------
+
+@benchmark('feature_vector.create_feature_vector')
+def bench_feature_vector(env):
+    from feature_vector import create_feature_vector
+    lat, lon = CITIES['Chennai']
+    return lambda: create_feature_vector(lat=lat, lon=lon)
+
+
+@benchmark('live_weather.fetch_current_conditions.miss')
+def bench_fetch_miss(env):
+    import live_weather
+    stack = contextlib.ExitStack()
+    stack.enter_context(stub_http(live_weather))
+    env.cleanups.append(stack.close)
+
+    def call():
+        live_weather._CACHE.clear()
+        return live_weather.fetch_current_conditions(13.08, 80.27)
+    return call
+
+
+@benchmark('live_weather.fetch_current_conditions.hit')
+def bench_fetch_hit(env):
+    import live_weather
+    with stub_http(live_weather):
+        live_weather._CACHE.clear()
+        live_weather.fetch_current_conditions(13.08, 80.27)
+    return lambda: live_weather.fetch_current_conditions(13.08, 80.27)
+
+
+def _register_estimator_benchmarks(name: str, build: Callable[['BenchEnv'], Any], n_features: Callable[[Any], int]):
+    """Single-row and BATCH_ROWS-row predict (compiled path) for a bare sklearn estimator"""
+    def single(env):
+        from fast_forest import accelerate
+        model = build(env)
+        row = env.rng.normal(size=(1, n_features(model)))
+        return lambda: accelerate(model).predict(row)
+
+    def batch(env):
+        from fast_forest import accelerate
+        model = build(env)
+        rows = env.rng.normal(size=(BATCH_ROWS, n_features(model)))
+        return lambda: accelerate(model).predict(rows)
+
+    benchmark(f'models.{name}.single')(single)
+    benchmark(f'models.{name}.batch{BATCH_ROWS}')(batch)
+
+
+_register_estimator_benchmarks('alert_model', lambda env: env.model('alert_model'), lambda m: m.n_features_in_)
+for _weather_name in ('rain_classifier', 'temperature_regressor', 'humidity_regressor', 'water_level_regressor'):
+    _register_estimator_benchmarks(_weather_name, lambda env, n=_weather_name: env.model('weather_models')[n],
+                                   lambda m: m.n_features_in_)
+
+
+@benchmark('models.coastal_threat.single')
+def bench_coastal_single(env):
+    model = env.model('coastal_threat')
+    features = env.coastal_input()
+    return lambda: model.predict_threat(features)
+
+
+@benchmark(f'models.coastal_threat.batch{BATCH_ROWS}')
+def bench_coastal_batch(env):
+    model = env.model('coastal_threat')
+    rows = [dict(env.coastal_input(), wave_height=float(h)) for h in env.rng.uniform(0, 8, BATCH_ROWS)]
+    return lambda: model.predict_threats(rows)
+
+
+@benchmark('models.coastal_threat.forecast_threat')
+def bench_coastal_forecast(env):
+    model = env.model('coastal_threat')
+    features = env.coastal_input()
+    return lambda: model.forecast_threat(features, hours_ahead=24)
+
+
+@benchmark('models.mangrove_health.single')
+def bench_mangrove_single(env):
+    model = env.model('mangrove_health')
+    features = {'ndvi': 0.6, 'chlorophyll': 12.0, 'water_temp': 28.0, 'salinity': 30.0, 'turbidity': 15.0,
+                'rainfall': 150.0, 'tidal_range': 1.5, 'distance_to_shore': 2.0, 'human_activity_index': 40.0}
+    return lambda: model.predict_health(features)
+
+
+@benchmark(f'models.mangrove_health.batch{BATCH_ROWS}')
+def bench_mangrove_batch(env):
+    model = env.model('mangrove_health')
+    data = model.generate_synthetic_data(BATCH_ROWS)
+    X = model.preprocess_data(data)
+
+    def call():
+        X_scaled = model.scaler.transform(X)
+        return model.health_model.predict(X_scaled), model.anomaly_detector.predict(X_scaled)
+    return call
+
+
+@benchmark('models.mangrove_health.raster')
+def bench_mangrove_raster(env):
+    model = env.model('mangrove_health')
+    side = env.samples(256, 32)
+    rows = model.generate_synthetic_data(side * side)
+    bands = np.stack([rows[feature].to_numpy().reshape(side, side) for feature in model.feature_names])
+    return lambda: model.score_raster(bands)
+
+
+@benchmark('models.sea_level.single')
+def bench_sea_level_single(env):
+    model = env.model('sea_level')
+    features = model.generate_synthetic_data(10).iloc[0].to_dict()
+    return lambda: model.detect_anomaly(features)
+
+
+@benchmark(f'models.sea_level.batch{BATCH_ROWS}')
+def bench_sea_level_batch(env):
+    model = env.model('sea_level')
+    X = model.preprocess_data(model.generate_synthetic_data(BATCH_ROWS))
+
+    def call():
+        X_scaled = model.scaler.transform(X)
+        return model.anomaly_detector.predict(X_scaled), model.anomaly_detector.decision_function(X_scaled)
+    return call
+
+
+@benchmark('models.cyclone.predict_trajectory')
+def bench_cyclone_trajectory(env):
+    model = env.model('cyclone')
+    data = model.generate_synthetic_data(5)
+    features = data[model.feature_names].iloc[0].to_dict()
+    return lambda: model.predict_trajectory(features, forecast_hours=72)
+
+
+@benchmark(f'models.cyclone.batch{BATCH_ROWS}')
+def bench_cyclone_batch(env):
+    model = env.model('cyclone')
+    X = model.preprocess_data(model.generate_synthetic_data(max(BATCH_ROWS // 10, 5)).head(BATCH_ROWS))
+
+    def call():
+        X_scaled = model.scaler.transform(X)
+        return (model.path_regressor_lat.predict(X_scaled), model.path_regressor_lon.predict(X_scaled),
+                model.intensity_classifier.predict(X_scaled))
+    return call
+
+
+def _generator_benchmark(key: str, module_name: str, class_name: str, full: int, quick: int):
+    def setup(env):
+        from model_registry import import_model_module
+        model = getattr(import_model_module(module_name), class_name)()
+        n_samples = env.samples(full, quick)
+        return lambda: model.generate_synthetic_data(n_samples)
+    benchmark(f'generators.{key}')(setup)
+
+
+_generator_benchmark('coastal_threat', 'coastal-threat-model', 'CoastalThreatModel', 2000, 200)
+_generator_benchmark('mangrove_health', 'mangrove-health-model', 'MangroveHealthModel', 1000, 100)
+_generator_benchmark('cyclone', 'cyclone_trajectory_model', 'CycloneTrajectoryModel', 500, 20)
+_generator_benchmark('sea_level', 'sea_level_anomaly_detector', 'SeaLevelAnomalyDetector', 5000, 500)
+
+
+def noaa_currents_xml(n_rows: int, station_id: str = 'cb0102', start: str = '2025-08-30T00:00',
+                      step_minutes: int = 6) -> str:
+    """NOAA datagetter currents XML with n_rows <cu> observations"""
+    times = (np.datetime64(start) + np.arange(n_rows) * np.timedelta64(step_minutes, 'm')).astype(str)
+    rows = ''.join(f'<cu t="{t[:10]} {t[11:16]}" s="{0.2 + (i % 90) / 100:.3f}" d="{(i * 7) % 360}" b="4"/>\n'
+                   for i, t in enumerate(times))
+    return ('<?xml version="1.0" encoding="UTF-8"?>\n<data>\n'
+            f'<metadata id="{station_id}" name="Station {station_id}" lat="36.9594" lon="-76.0128"/>\n'
+            f'<observations>\n{rows}</observations>\n</data>\n')
+
+
+@benchmark('noaa.parse_xml_current_data')
+def bench_noaa_parse(env):
+    from noaa_current_parser import NOAACurrentDataParser
+    xml = noaa_currents_xml(env.samples(20000, 1000)).encode()
+    parser = NOAACurrentDataParser()
+    return lambda: parser.parse_xml_current_data(xml)
+
+
+@benchmark('noaa.analyze_current_patterns')
+def bench_noaa_analyze(env):
+    from noaa_current_parser import NOAACurrentDataParser
+    parser = NOAACurrentDataParser()
+    df = parser.parse_xml_current_data(noaa_currents_xml(241))
+    return lambda: parser.analyze_current_patterns(df)
+
+
+@benchmark('noaa.analytics.update')
+def bench_noaa_analytics_update(env):
+    from current_analytics import StationCurrentAnalytics
+    from noaa_current_parser import NOAACurrentDataParser
+    df = NOAACurrentDataParser().parse_xml_current_data(noaa_currents_xml(241))
+    engine = StationCurrentAnalytics()
+    engine.update_frame(df)
+    state = {'t': engine.last_ns, 'i': 0}
+    step = 6 * 60 * 10 ** 9
+
+    def update():
+        state['t'] += step
+        state['i'] += 1
+        engine.update(state['t'], 0.4 + (state['i'] % 90) / 100, float((state['i'] * 7) % 360))
+        return engine.threat_indicators(), engine.anomaly_detection()
+    return update
+
+
+@benchmark('noaa.generate_current_forecast')
+def bench_noaa_forecast(env):
+    from noaa_current_parser import NOAACurrentDataParser
+    parser = NOAACurrentDataParser()
+    df = parser.parse_xml_current_data(noaa_currents_xml(241))
+    parser.generate_current_forecast(df)  # warm the station's cached harmonic model
+    return lambda: parser.generate_current_forecast(df, hours_ahead=6)
+
+
+def noaa_profile_observations(n_times: int, n_bins: int, missing: float = 0.05):
+    """CurrentObservations for an n_bins ADCP at 6-minute cadence, with a fraction of cells missing"""
+    from current_observations import CurrentObservations, StationInfo
+    rng = np.random.default_rng(0)
+    times = np.datetime64('2025-06-01', 'ns').astype(np.int64) + np.arange(n_times) * 360 * 10 ** 9
+    phase = 2 * np.pi * np.arange(n_times) / 124.2  # M2 at 6-minute steps
+    bins = np.arange(1, n_bins + 1)
+    flow = np.sin(phase)[:, None] * (1.2 - bins / (2 * n_bins))[None, :]
+    keep = rng.random(flow.shape) >= missing
+    return CurrentObservations.for_station(
+        StationInfo('cb0102', 'Cape Henry LB 2CH', 36.9594, -76.0128),
+        np.repeat(times, n_bins).reshape(flow.shape)[keep], np.abs(flow)[keep] / 0.514444,
+        np.where(flow >= 0, 105.0, 285.0)[keep], np.broadcast_to(bins, flow.shape)[keep])
+
+
+@benchmark('noaa.current_profile')
+def bench_noaa_current_profile(env):
+    from current_profiles import CurrentProfile
+    observations = noaa_profile_observations(env.samples(7200, 480), 40)  # 30 days (quick: 2 days) x 40 bins
+
+    def call():
+        profile = CurrentProfile.from_observations(observations)
+        return profile.depth_statistics(), profile.depth_averaged(), profile.shear()
+    return call
+
+
+def _legacy_sanitize(obj):
+    """The recursive NaN / NumPy pass predict_weather_api ran before json_response.py"""
+    if isinstance(obj, float):
+        return None if np.isnan(obj) or np.isinf(obj) else float(obj)
+    if isinstance(obj, (np.floating, np.integer)):
+        return obj.item()
+    if isinstance(obj, dict):
+        return {k: _legacy_sanitize(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_legacy_sanitize(v) for v in obj]
+    return obj
+
+
+def _alerts_payload(env):
+    """Shaped like /api/predict_alerts output: feature vector (NumPy floats, NaN, Timestamp) plus alerts"""
+    from feature_vector import create_feature_vector
+    lat, lon = CITIES['Chennai']
+    features = create_feature_vector(lat=lat, lon=lon)
+    alerts = [{'id': f"alert-{i}", 'metric': metric, 'value': np.float64(v), 'unit': unit,
+               'confidence': np.float64(0.8), 'text': f"{metric} above threshold", 'suggested_action': 'Monitor',
+               'model_meta': {'model': 'RandomForestRegressor', 'n_estimators': np.int64(100)}}
+              for i, (metric, v, unit) in enumerate([('rain_probability', 0.91, '%'), ('temperature', np.nan, 'K'),
+                                                     ('humidity', 88.5, '%'), ('water_level', 1.7, 'm')])]
+    return {'features_used': features, 'rain_probability': np.float64(0.91), 'rain_prediction': np.int64(1),
+            'temperature_prediction': np.float64(301.2), 'humidity_prediction': np.nan,
+            'water_level_prediction': np.float64(1.7), 'alerts': [a['text'] for a in alerts],
+            'structured_alerts': alerts, '_model_meta': {'generated_at': datetime.utcnow().isoformat()}}
+
+
+def _forecast_payload(env):
+    """72 hourly entries shaped like /api/forecast output"""
+    now = datetime.utcnow()
+    return {'location': {'latitude': 13.08, 'longitude': 80.27}, 'generated_at': now.isoformat(), 'hours': 72,
+            'forecast': [{'timestamp': (now + timedelta(hours=i)).isoformat(), 'temperature': round(300 + i % 5, 2),
+                          'humidity': round(70.0 + i % 7, 2), 'rain_probability': round(0.1 * (i % 10), 3),
+                          'water_level': np.nan if i % 12 == 0 else 1.2}
+                         for i in range(72)]}
+
+
+def _serialization_benchmarks(key: str, build_payload):
+    def legacy(env):
+        from fastapi.encoders import jsonable_encoder
+        from fastapi.responses import JSONResponse
+        payload = build_payload(env)
+        # sanitize, then FastAPI's jsonable_encoder and stdlib json rendering
+        return lambda: JSONResponse(jsonable_encoder(_legacy_sanitize(payload))).body
+
+    def fast(env):
+        from json_response import FastJSONResponse
+        payload = build_payload(env)
+        return lambda: FastJSONResponse(payload).body
+
+    benchmark(f'serialization.{key}.legacy')(legacy)
+    benchmark(f'serialization.{key}.fast_json')(fast)
+
+
+_serialization_benchmarks('predict_alerts', _alerts_payload)
+_serialization_benchmarks('forecast72', _forecast_payload)
+
+
+@benchmark('region_api.get_region_data', requires=('flask', 'shapely'))
+def bench_region_api(env):
+    """backend/region_api.py point-in-polygon query over the synthetic CSVs (Flask test client)"""
+    import importlib.util
+    path = os.path.join(os.path.dirname(HERE), 'backend', 'region_api.py')
+    spec = importlib.util.spec_from_file_location('region_api', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    client = module.app.test_client()
+    lat, lon = CITIES['Chennai']
+    polygon = {'type': 'FeatureCollection', 'features': [{'type': 'Feature', 'properties': {}, 'geometry': {
+        'type': 'Polygon', 'coordinates': [[[lon - 1, lat - 1], [lon + 1, lat - 1], [lon + 1, lat + 1],
+                                            [lon - 1, lat + 1], [lon - 1, lat - 1]]]}}]}
+    return lambda: client.post('/get-region-data', json={'geojson': polygon})
+
+
+def main_client(env):
+    """ASGI client for api/main.py with the synthetic alert and coastal threat models swapped in"""
+    api_dir = os.path.join(HERE, 'api')
+    if api_dir not in sys.path:
+        sys.path.insert(0, api_dir)
+    from model_registry import registry
+    import main
+    if 'coastal_threat' not in registry:
+        registry.register('coastal_threat', lambda: env.model('coastal_threat'))
+    if 'main' not in env._clients:
+        env.client('main', main.app)
+        registry.swap('alert_model', env.model('alert_model'))
+        registry.swap('coastal_threat', env.model('coastal_threat'))
+    return env._clients['main']
+
+
+@benchmark('asgi.main.predict_alert.distinct')
+def bench_asgi_alert_distinct(env):
+    client = main_client(env)
+    counter = iter(range(10 ** 9))
+
+    def call():
+        # A new rainfall value each call: misses the prediction cache
+        body = {'water_level_m': 1.5, 'wind_speed_m_s': 10.0, 'air_pressure_hpa': 1013.0,
+                'chlorophyll_mg_m3': 5.0, 'rainfall': next(counter) / 100.0}
+        return env.run(client.post('/api/predict_alert', body))
+    return call
+
+
+@benchmark('asgi.main.predict_alert.repeated')
+def bench_asgi_alert_repeated(env):
+    client = main_client(env)
+    return lambda: env.run(client.post('/api/predict_alert', {}))
+
+
+@benchmark('asgi.main.predict_alert.concurrent16')
+def bench_asgi_alert_concurrent(env):
+    client = main_client(env)
+    counter = iter(range(10 ** 9))
+
+    async def burst():
+        start = next(counter) * 16
+        return await asyncio.gather(*(client.post('/api/predict_alert', {'rainfall': (start + i) / 100.0})
+                                      for i in range(16)))
+    return lambda: env.run(burst())
+
+
+@benchmark('asgi.main.coastal_threat')
+def bench_asgi_coastal(env):
+    client = main_client(env)
+    counter = iter(range(10 ** 9))
+    return lambda: env.run(client.post('/predict/coastal-threat',
+                                       dict(env.coastal_input(), human_population=float(next(counter)))))
+
+
+@benchmark('asgi.main.health')
+def bench_asgi_health(env):
+    client = main_client(env)
+    return lambda: env.run(client.get('/health'))
+
+
+def weather_client(env):
+    """ASGI client for predict_weather_api.py serving the synthetic weather models"""
+    if 'weather' not in env._clients:
+        models = env.model('weather_models')
+        import predict_weather_api
+        from model_registry import registry
+        for name, model in models.items():
+            registry.swap(name, model)
+        env.client('weather', predict_weather_api.app)
+    return env._clients['weather']
+
+
+@benchmark('asgi.weather.predict_alerts')
+def bench_asgi_predict_alerts(env):
+    client = weather_client(env)
+    lat, lon = CITIES['Chennai']
+    return lambda: env.run(client.post('/api/predict_alerts', {'latitude': lat, 'longitude': lon}))
+
+
+# --- Runner -----------------------------------------------------------------
+
+def _missing(requires: tuple) -> List[str]:
+    import importlib.util
+    return [name for name in requires if importlib.util.find_spec(name) is None]
+
+
+def time_callable(fn: Callable[[], Any], repeat: int, min_time: float) -> Dict[str, Any]:
+    """asv-style timing: auto-range calls per repeat to >= min_time, report per-call seconds"""
+    start = time.perf_counter()
+    fn()  # warm-up (lazy compilation, caches)
+    first = time.perf_counter() - start
+    number = max(1, int(min_time / first)) if first > 0 and min_time > 0 else 1
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        timings.append((time.perf_counter() - start) / number)
+    return {
+        'number': number,
+        'repeat': repeat,
+        'min': min(timings),
+        'median': statistics.median(timings),
+        'mean': statistics.fmean(timings),
+        'stdev': statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        'first_call': first,
+    }
+
+
+def git_revision() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=HERE,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        commit, dirty = 'unknown', True
+    return {'commit': commit, 'dirty': dirty}
+
+
+def machine_info() -> Dict[str, Any]:
+    import sklearn
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'sklearn': sklearn.__version__,
+    }
+
+
+def run_suite(patterns: Optional[List[str]] = None, quick: bool = False, repeat: int = DEFAULT_REPEAT,
+              min_time: float = DEFAULT_MIN_TIME, verbose: bool = True) -> Dict[str, Any]:
+    """Run every benchmark whose name contains one of `patterns`; returns the result document"""
+    if quick:
+        repeat, min_time = 1, 0.0
+    selected = [b for b in BENCHMARKS if not patterns or any(p in b.name for p in patterns)]
+    results: Dict[str, Any] = {}
+    with BenchEnv(quick=quick) as env:
+        for bench in selected:
+            missing = _missing(bench.requires)
+            if missing:
+                results[bench.name] = {'skipped': f"requires {', '.join(missing)}"}
+            else:
+                try:
+                    # Training reports and model chatter would drown the results table
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        fn = bench.setup(env)
+                    results[bench.name] = time_callable(fn, repeat, min_time)
+                except Exception as e:
+                    results[bench.name] = {'error': f"{type(e).__name__}: {e}"}
+            if verbose:
+                print(format_result(bench.name, results[bench.name]))
+    return dict(git_revision(), created=datetime.now().isoformat(timespec='seconds'), quick=quick,
+                machine=machine_info(), benchmarks=results)
+
+
+def format_result(name: str, result: Dict[str, Any]) -> str:
+    if 'error' in result:
+        return f"{name:55s} ERROR {result['error']}"
+    if 'skipped' in result:
+        return f"{name:55s} skipped ({result['skipped']})"
+    return (f"{name:55s} median {1000 * result['median']:10.3f} ms  min {1000 * result['min']:10.3f} ms  "
+            f"(x{result['number']}, {result['repeat']} repeats)")
+
+
+def save_results(document: Dict[str, Any], output_dir: str = RESULTS_DIR) -> str:
+    os.makedirs(output_dir, exist_ok=True)
+    name = document['commit'] + ('-dirty' if document['dirty'] else '')
+    path = os.path.join(output_dir, f"{name}.json")
+    with open(path, 'w') as f:
+        json.dump(document, f, indent=2)
+    return path
+
+
+def compare(base: Dict[str, Any], head: Dict[str, Any], threshold: float = REGRESSION_THRESHOLD) -> List[Dict[str, Any]]:
+    """Median ratio head/base per benchmark present in both; `regression` when slower by more than threshold"""
+    rows = []
+    for name, head_result in head['benchmarks'].items():
+        base_result = base['benchmarks'].get(name)
+        if not base_result or 'median' not in base_result or 'median' not in head_result:
+            continue
+        ratio = head_result['median'] / base_result['median'] if base_result['median'] > 0 else float('inf')
+        rows.append({'name': name, 'base': base_result['median'], 'head': head_result['median'], 'ratio': ratio,
+                     'regression': ratio > 1 + threshold, 'improvement': ratio < 1 - threshold})
+    return rows
+
+
+def print_comparison(rows: List[Dict[str, Any]], base_label: str, head_label: str):
+    print(f"{'benchmark':55s} {base_label:>12s} {head_label:>12s}   ratio")
+    for row in sorted(rows, key=lambda r: -r['ratio']):
+        flag = '  REGRESSION' if row['regression'] else ('  faster' if row['improvement'] else '')
+        print(f"{row['name']:55s} {1000 * row['base']:10.3f}ms {1000 * row['head']:10.3f}ms {row['ratio']:7.2f}x{flag}")
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Offline benchmark suite for ai-models')
+    parser.add_argument('--filter', nargs='*', default=None, help='Only run benchmarks whose name contains one of these')
+    parser.add_argument('--quick', action='store_true', help='Small data, one call per benchmark (smoke test)')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    parser.add_argument('--min-time', type=float, default=DEFAULT_MIN_TIME, help='Seconds per repeat (auto-ranged)')
+    parser.add_argument('--output-dir', default=RESULTS_DIR)
+    parser.add_argument('--no-save', action='store_true')
+    parser.add_argument('--list', action='store_true', help='List benchmark names and exit')
+    parser.add_argument('--compare', nargs='+', metavar='RESULT_JSON',
+                        help='Compare BASE.json against HEAD.json (or against a fresh run)')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD)
+    parser.add_argument('--fail-on-regression', action='store_true')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    if args.list:
+        for bench in BENCHMARKS:
+            print(bench.name)
+        return 0
+
+    if args.compare and len(args.compare) >= 2:
+        with open(args.compare[0]) as f:
+            base = json.load(f)
+        with open(args.compare[1]) as f:
+            head = json.load(f)
+    else:
+        head = run_suite(args.filter, quick=args.quick, repeat=args.repeat, min_time=args.min_time)
+        if not args.no_save:
+            print(f"\nResults written to {save_results(head, args.output_dir)}")
+        if not args.compare:
+            return 0
+        with open(args.compare[0]) as f:
+            base = json.load(f)
+
+    rows = compare(base, head, args.threshold)
+    print()
+    print_comparison(rows, base.get('commit', 'base'), head.get('commit', 'head'))
+    regressions = [row['name'] for row in rows if row['regression']]
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}")
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,15 +1,38 @@
 """
 Simple NOAA Current Data Analysis for CTAS - Cape Henry Data
-Analysis of your real NOAA buoy data without external dependencies
+Analysis of your real NOAA buoy data
+
+The embedded sample is parsed into the same compact CurrentObservations
+container NOAACurrentDataParser uses (numpy/pandas are imported only then);
+the batch mode below needs only the standard library.
+
+Run without arguments to analyze the embedded Cape Henry sample. Pass files,
+directories or glob patterns of archived datagetter XML / CSV exports to
+analyze them in batch, in parallel across cores:
+
+    python cape_henry_analysis.py archive/ 'exports/**/*.csv' --workers 8
+
+Each file is streamed once into per-day CurrentAccumulators (running sums,
+Welford moments and boundary values, never the observations themselves).
+The results are merged per station and day and written to a summary CSV
+(--summary) plus the CTAS integration JSON (--json) with the per-station
+analysis.
 """
 
+import csv
+import glob
+import os
+import sys
+import time
 import xml.etree.ElementTree as ET
 import json
 import math
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
 
 def parse_cape_henry_data():
     """Parse and analyze your Cape Henry current data"""
+    from current_observations import parse_current_xml
     
     # Your XML data
     xml_data = """<?xml version="1.0" encoding="UTF-8"?>
@@ -45,34 +68,18 @@ def parse_cape_henry_data():
 </data>"""
     
     try:
-        root = ET.fromstring(xml_data)
-        
-        # Extract metadata
-        metadata = root.find('metadata')
-        station_id = metadata.get('id')
-        station_name = metadata.get('name')
-        lat = float(metadata.get('lat'))
-        lon = float(metadata.get('lon'))
-        
-        # Extract observations
-        observations = []
-        obs_element = root.find('observations')
-        
-        for cu_element in obs_element.findall('cu'):
-            observation = {
-                'timestamp': cu_element.get('t'),
-                'speed_knots': float(cu_element.get('s')),
-                'direction_degrees': float(cu_element.get('d')),
-                'bin_depth': int(cu_element.get('b'))
-            }
-            # Convert speed from knots to m/s
-            observation['speed_ms'] = observation['speed_knots'] * 0.514444
-            observations.append(observation)
+        observations = parse_current_xml(xml_data)
+        station = observations.stations[0]
+        station_id = station.id
+        station_name = station.name
+        lat = station.latitude
+        lon = station.longitude
         
         # Calculate statistics
-        speeds_knots = [obs['speed_knots'] for obs in observations]
-        speeds_ms = [obs['speed_ms'] for obs in observations]
-        directions = [obs['direction_degrees'] for obs in observations]
+        rows = observations.to_dicts()
+        speeds_knots = [obs['speed_knots'] for obs in rows]
+        speeds_ms = [obs['speed_ms'] for obs in rows]
+        directions = [obs['direction_degrees'] for obs in rows]
         
         analysis = {
             'station_info': {
@@ -83,9 +90,9 @@ def parse_cape_henry_data():
                 'location': 'Chesapeake Bay entrance'
             },
             'data_summary': {
-                'total_measurements': len(observations),
-                'time_span': f"{observations[0]['timestamp']} to {observations[-1]['timestamp']}",
-                'duration_minutes': 2.6 * len(observations),  # 6-minute intervals
+                'total_measurements': len(rows),
+                'time_span': f"{rows[0]['timestamp']} to {rows[-1]['timestamp']}",
+                'duration_minutes': 2.6 * len(rows),  # 6-minute intervals
             },
             'current_statistics': {
                 'mean_speed_knots': sum(speeds_knots) / len(speeds_knots),
@@ -96,9 +103,9 @@ def parse_cape_henry_data():
                 'min_speed_ms': min(speeds_ms),
                 'mean_direction': sum(directions) / len(directions),
             },
-            'trend_analysis': analyze_current_trend(observations),
-            'threat_assessment': assess_threats(observations),
-            'tidal_indicators': analyze_tidal_pattern(observations)
+            'trend_analysis': analyze_current_trend(rows),
+            'threat_assessment': assess_threats(rows),
+            'tidal_indicators': analyze_tidal_pattern(rows)
         }
         
         return observations, analysis
@@ -121,15 +128,16 @@ def analyze_current_trend(observations):
     # Linear regression slope
     slope = (n * sum_xy - sum_x * sum_y) / (n * sum_x2 - sum_x * sum_x)
     
-    trend_description = "increasing" if slope > 0.001 else "decreasing" if slope < -0.001 else "stable"
-    
     return {
         'trend_slope_ms_per_measurement': slope,
-        'trend_description': trend_description,
+        'trend_description': describe_trend(slope),
         'speed_change_over_period': speeds[-1] - speeds[0],
         'largest_speed_jump': max(abs(speeds[i+1] - speeds[i]) for i in range(len(speeds)-1))
     }
 
+def describe_trend(slope):
+    return "increasing" if slope > 0.001 else "decreasing" if slope < -0.001 else "stable"
+
 def analyze_tidal_pattern(observations):
     """Analyze tidal patterns in the current data"""
     speeds = [obs['speed_ms'] for obs in observations]
@@ -161,10 +169,13 @@ def analyze_tidal_pattern(observations):
         'speed_peaks_count': len(peaks),
         'speed_troughs_count': len(troughs),
         'avg_direction_change': avg_direction_change,
-        'direction_stability': 'stable' if avg_direction_change < 20 else 'variable',
+        'direction_stability': describe_direction_stability(avg_direction_change),
         'tidal_phase': determine_tidal_phase(speeds)
     }
 
+def describe_direction_stability(avg_direction_change):
+    return 'stable' if avg_direction_change < 20 else 'variable'
+
 def determine_tidal_phase(speeds):
     """Determine current tidal phase based on speed pattern"""
     recent_speeds = speeds[-5:]  # Last 5 measurements
@@ -188,10 +199,13 @@ def assess_threats(observations):
     latest = observations[-1]
     speeds = [obs['speed_ms'] for obs in observations]
     
-    current_speed = latest['speed_ms']
-    avg_speed = sum(speeds) / len(speeds)
-    max_speed = max(speeds)
-    
+    # Strong persistent currents are navigation hazards
+    strong_currents = sum(1 for s in speeds if s > 0.8)
+    return threat_levels(latest['speed_ms'], sum(speeds) / len(speeds), max(speeds),
+                         strong_currents / len(speeds))
+
+def threat_levels(current_speed, avg_speed, max_speed, strong_fraction):
+    """Threat levels from the latest, mean and max speed (m/s) and the fraction of readings above 0.8 m/s"""
     threats = {
         'rip_current_risk': 'low',
         'erosion_potential': 'low',
@@ -216,9 +230,7 @@ def assess_threats(observations):
     elif current_speed > 0.5:
         threats['pollutant_transport'] = 'moderate'
     
-    # Strong persistent currents are navigation hazards
-    strong_currents = sum(1 for s in speeds if s > 0.8)
-    if strong_currents > len(speeds) * 0.5:
+    if strong_fraction > 0.5:
         threats['navigation_hazard'] = 'high'
     
     return threats
@@ -300,7 +312,416 @@ def generate_ctas_integration():
     print("   - Integrate with pollution transport modeling")
     print("   - Feed into coastal erosion risk assessment")
 
-if __name__ == "__main__":
+# --- Batch analysis of archived observations ---------------------------------
+
+KNOTS_TO_MS = 0.514444
+STRONG_CURRENT_MS = 0.8
+SUMMARY_FIELDS = [
+    'station_id', 'station_name', 'date', 'measurements', 'first_timestamp', 'last_timestamp',
+    'mean_speed_ms', 'std_speed_ms', 'min_speed_ms', 'max_speed_ms', 'mean_speed_knots', 'max_speed_knots',
+    'mean_direction', 'avg_direction_change', 'strong_current_fraction', 'trend_slope_ms_per_measurement',
+    'speed_peaks_count', 'speed_troughs_count', 'tidal_phase',
+]
+CSV_COLUMNS = {
+    'timestamp': ('timestamp', 't', 'time'),
+    'speed_knots': ('current_speed_knots', 'speed_knots', 's'),
+    'direction': ('current_direction_degrees', 'direction_degrees', 'd'),
+    'bin_depth': ('bin_depth', 'b'),
+}
+
+
+class CurrentAccumulator:
+    """One-pass statistics for a time-ordered run of observations
+
+    Everything the per-station analysis reports is kept as running sums,
+    Welford moments and a few boundary values, so memory does not grow with
+    the number of observations. Two accumulators for consecutive runs can be
+    merged exactly with merge().
+    """
+
+    __slots__ = ('n', 'mean', 'm2', 'sum_ms', 'sum_knots', 'min_knots', 'max_knots', 'sum_direction',
+                 'sum_direction_change', 'strong', 'sum_xy', 'largest_jump', 'peaks', 'troughs',
+                 'head', 'tail', 'first_direction', 'last_direction', 'first_timestamp', 'last_timestamp')
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.sum_ms = 0.0
+        self.sum_knots = 0.0
+        self.min_knots = math.inf
+        self.max_knots = -math.inf
+        self.sum_direction = 0.0
+        self.sum_direction_change = 0.0
+        self.strong = 0
+        self.sum_xy = 0.0  # x is the measurement index within the run
+        self.largest_jump = 0.0
+        self.peaks = 0
+        self.troughs = 0
+        self.head = []  # first two speeds (m/s), for peaks across a merge boundary
+        self.tail = []  # last five speeds (m/s), for the tidal phase
+        self.first_direction = None
+        self.last_direction = None
+        self.first_timestamp = None
+        self.last_timestamp = None
+
+    def add(self, timestamp, speed_knots, direction):
+        speed_ms = speed_knots * KNOTS_TO_MS
+        tail = self.tail
+        if tail:
+            self.largest_jump = max(self.largest_jump, abs(speed_ms - tail[-1]))
+            if len(tail) >= 2:
+                before, middle = tail[-2], tail[-1]
+                if middle > before and middle > speed_ms:
+                    self.peaks += 1
+                elif middle < before and middle < speed_ms:
+                    self.troughs += 1
+            self.sum_direction_change += abs(_wrapped_change(direction - self.last_direction))
+        else:
+            self.first_direction = direction
+            self.first_timestamp = timestamp
+        if len(self.head) < 2:
+            self.head.append(speed_ms)
+        tail.append(speed_ms)
+        if len(tail) > 5:
+            del tail[0]
+
+        self.sum_xy += self.n * speed_ms
+        self.n += 1
+        delta = speed_ms - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (speed_ms - self.mean)
+        self.sum_ms += speed_ms
+        self.sum_knots += speed_knots
+        self.min_knots = min(self.min_knots, speed_knots)
+        self.max_knots = max(self.max_knots, speed_knots)
+        self.sum_direction += direction
+        self.strong += speed_ms > STRONG_CURRENT_MS
+        self.last_direction = direction
+        self.last_timestamp = timestamp
+
+    def merge(self, other):
+        """Fold in the accumulator of the run that immediately follows this one"""
+        if not other.n:
+            return self
+        if not self.n:
+            for name in self.__slots__:
+                value = getattr(other, name)
+                setattr(self, name, list(value) if isinstance(value, list) else value)
+            return self
+        # Peaks/troughs and jumps at the boundary between the two runs
+        joined = self.tail[-2:] + other.head
+        boundary = len(self.tail[-2:])
+        for i in (boundary - 1, boundary):
+            if 0 < i < len(joined) - 1:
+                if joined[i] > joined[i - 1] and joined[i] > joined[i + 1]:
+                    self.peaks += 1
+                elif joined[i] < joined[i - 1] and joined[i] < joined[i + 1]:
+                    self.troughs += 1
+        self.largest_jump = max(self.largest_jump, other.largest_jump, abs(other.head[0] - self.tail[-1]))
+        self.sum_direction_change += (other.sum_direction_change
+                                      + abs(_wrapped_change(other.first_direction - self.last_direction)))
+
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.n * other.n / n
+        self.mean += delta * other.n / n
+        self.sum_xy += other.sum_xy + self.n * other.sum_ms
+        self.n = n
+        self.sum_ms += other.sum_ms
+        self.sum_knots += other.sum_knots
+        self.min_knots = min(self.min_knots, other.min_knots)
+        self.max_knots = max(self.max_knots, other.max_knots)
+        self.sum_direction += other.sum_direction
+        self.strong += other.strong
+        self.peaks += other.peaks
+        self.troughs += other.troughs
+        self.head = (self.head + other.head)[:2]
+        self.tail = (self.tail + other.tail)[-5:]
+        self.last_direction = other.last_direction
+        self.last_timestamp = other.last_timestamp
+        return self
+
+    def trend_slope(self):
+        n = self.n
+        if n < 2:
+            return 0.0
+        sum_x = n * (n - 1) / 2
+        sum_x2 = (n - 1) * n * (2 * n - 1) / 6
+        return (n * self.sum_xy - sum_x * self.sum_ms) / (n * sum_x2 - sum_x * sum_x)
+
+    def avg_direction_change(self):
+        return self.sum_direction_change / (self.n - 1) if self.n > 1 else 0
+
+    def std_speed_ms(self):
+        return math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else 0.0
+
+    def summary_row(self, station):
+        return {
+            'station_id': station.get('id'),
+            'station_name': station.get('name'),
+            'date': (self.first_timestamp or '')[:10],
+            'measurements': self.n,
+            'first_timestamp': self.first_timestamp,
+            'last_timestamp': self.last_timestamp,
+            'mean_speed_ms': round(self.sum_ms / self.n, 6),
+            'std_speed_ms': round(self.std_speed_ms(), 6),
+            'min_speed_ms': round(self.min_knots * KNOTS_TO_MS, 6),
+            'max_speed_ms': round(self.max_knots * KNOTS_TO_MS, 6),
+            'mean_speed_knots': round(self.sum_knots / self.n, 6),
+            'max_speed_knots': self.max_knots,
+            'mean_direction': round(self.sum_direction / self.n, 3),
+            'avg_direction_change': round(self.avg_direction_change(), 3),
+            'strong_current_fraction': round(self.strong / self.n, 6),
+            'trend_slope_ms_per_measurement': round(self.trend_slope(), 9),
+            'speed_peaks_count': self.peaks,
+            'speed_troughs_count': self.troughs,
+            'tidal_phase': determine_tidal_phase(self.tail),
+        }
+
+    def analysis(self, station):
+        """The parse_cape_henry_data analysis dict, built from the running statistics"""
+        slope = self.trend_slope()
+        avg_change = self.avg_direction_change()
+        return {
+            'station_info': {
+                'id': station.get('id'),
+                'name': station.get('name'),
+                'latitude': station.get('latitude'),
+                'longitude': station.get('longitude'),
+            },
+            'data_summary': {
+                'total_measurements': self.n,
+                'time_span': f"{self.first_timestamp} to {self.last_timestamp}",
+                'duration_minutes': _minutes_between(self.first_timestamp, self.last_timestamp),
+            },
+            'current_statistics': {
+                'mean_speed_knots': self.sum_knots / self.n,
+                'max_speed_knots': self.max_knots,
+                'min_speed_knots': self.min_knots,
+                'mean_speed_ms': self.sum_ms / self.n,
+                'max_speed_ms': self.max_knots * KNOTS_TO_MS,
+                'min_speed_ms': self.min_knots * KNOTS_TO_MS,
+                'mean_direction': self.sum_direction / self.n,
+            },
+            'trend_analysis': {
+                'trend_slope_ms_per_measurement': slope,
+                'trend_description': describe_trend(slope),
+                'speed_change_over_period': self.tail[-1] - self.head[0],
+                'largest_speed_jump': self.largest_jump,
+            },
+            'threat_assessment': threat_levels(self.tail[-1], self.sum_ms / self.n,
+                                               self.max_knots * KNOTS_TO_MS, self.strong / self.n),
+            'tidal_indicators': {
+                'speed_peaks_count': self.peaks,
+                'speed_troughs_count': self.troughs,
+                'avg_direction_change': avg_change,
+                'direction_stability': describe_direction_stability(avg_change),
+                'tidal_phase': determine_tidal_phase(self.tail),
+            },
+        }
+
+
+def _wrapped_change(change):
+    if change > 180:
+        return change - 360
+    if change < -180:
+        return change + 360
+    return change
+
+
+def _minutes_between(start, end):
+    try:
+        return (datetime.fromisoformat(end) - datetime.fromisoformat(start)).total_seconds() / 60
+    except (TypeError, ValueError):
+        return None
+
+
+def _float(value):
+    try:
+        result = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(result) else result
+
+
+def _iter_xml_observations(path, station):
+    """Yield (timestamp, speed knots, direction) from a datagetter XML file, streaming"""
+    observations = None
+    for event, elem in ET.iterparse(path, events=('start', 'end')):
+        if event == 'start':
+            if elem.tag == 'observations':
+                observations = elem
+            continue
+        if elem.tag == 'cu':
+            speed, direction = _float(elem.get('s')), _float(elem.get('d'))
+            timestamp = elem.get('t')
+            if timestamp and speed is not None and direction is not None:
+                yield timestamp, speed, direction
+            # Drop parsed elements so the tree never grows with the file
+            if observations is not None:
+                del observations[:]
+        elif elem.tag == 'metadata':
+            station.update(id=elem.get('id'), name=elem.get('name'),
+                           latitude=_float(elem.get('lat')), longitude=_float(elem.get('lon')))
+
+
+def _iter_csv_observations(path, station):
+    """Yield (timestamp, speed knots, direction) from a CSV export (e.g. noaa_current_parser's)"""
+    with open(path, newline='') as f:
+        reader = csv.DictReader(f)
+        fields = reader.fieldnames or []
+        columns = {key: next((name for name in names if name in fields), None)
+                   for key, names in CSV_COLUMNS.items()}
+        if not (columns['timestamp'] and columns['speed_knots'] and columns['direction']):
+            raise ValueError(f"{path}: needs timestamp, speed (knots) and direction columns")
+        for row in reader:
+            if 'id' not in station:
+                station.update(id=row.get('station_id') or os.path.splitext(os.path.basename(path))[0],
+                               name=row.get('station_name'), latitude=_float(row.get('latitude')),
+                               longitude=_float(row.get('longitude')))
+            speed, direction = _float(row[columns['speed_knots']]), _float(row[columns['direction']])
+            timestamp = row[columns['timestamp']]
+            if timestamp and speed is not None and direction is not None:
+                yield timestamp, speed, direction
+
+
+def analyze_file(path):
+    """(station metadata, {day: CurrentAccumulator}) for one archived XML or CSV file"""
+    station = {}
+    iterate = _iter_csv_observations if path.lower().endswith('.csv') else _iter_xml_observations
+    days = {}
+    day, accumulator = None, None
+    for timestamp, speed, direction in iterate(path, station):
+        if timestamp[:10] != day:
+            day = timestamp[:10]
+            accumulator = days.get(day)
+            if accumulator is None:
+                accumulator = days[day] = CurrentAccumulator()
+        accumulator.add(timestamp, speed, direction)
+    if 'id' not in station:
+        station['id'] = os.path.splitext(os.path.basename(path))[0]
+    return station, days
+
+
+def find_archive_files(inputs):
+    """XML/CSV files from paths, directories (searched recursively) and glob patterns"""
+    files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, names in os.walk(item):
+                files.extend(os.path.join(root, name) for name in names
+                             if name.lower().endswith(('.xml', '.csv')))
+        elif any(char in item for char in '*?['):
+            files.extend(glob.glob(item, recursive=True))
+        elif os.path.isfile(item):
+            files.append(item)
+    return sorted(set(files))
+
+
+def analyze_archives(files, workers=None):
+    """Analyze files in parallel; returns (stations, {(station_id, day): accumulator}, errors)
+
+    Each file is reduced to per-day accumulators in a worker process. The
+    parent merges accumulators for the same station and day in time order, so
+    a station's data may be spread over any number of files. Overlapping
+    files are not de-duplicated.
+    """
+    stations, errors = {}, {}
+    parts = {}
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(files) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(files))) as pool:
+            futures = {pool.submit(analyze_file, path): path for path in files}
+            results = []
+            for future in as_completed(futures):
+                try:
+                    results.append((futures[future], future.result()))
+                except Exception as e:
+                    errors[futures[future]] = str(e)
+    else:
+        results = []
+        for path in files:
+            try:
+                results.append((path, analyze_file(path)))
+            except Exception as e:
+                errors[path] = str(e)
+
+    for _, (station, days) in results:
+        station_id = station['id']
+        known = stations.setdefault(station_id, {})
+        known.update({key: value for key, value in station.items() if value is not None})
+        for day, accumulator in days.items():
+            parts.setdefault((station_id, day), []).append(accumulator)
+
+    merged = {}
+    for key, accumulators in parts.items():
+        total = CurrentAccumulator()
+        for accumulator in sorted(accumulators, key=lambda a: a.first_timestamp):
+            total.merge(accumulator)
+        merged[key] = total
+    return stations, merged, errors
+
+
+def write_batch_outputs(stations, days, summary_path, json_path, files=(), errors=None):
+    """Per-station/per-day CSV summary and the CTAS integration JSON (per-station analysis)"""
+    with open(summary_path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+        writer.writeheader()
+        for (station_id, day) in sorted(days):
+            writer.writerow(days[(station_id, day)].summary_row(stations[station_id]))
+
+    analyses = {}
+    for station_id in sorted(stations):
+        total = CurrentAccumulator()
+        for key in sorted(key for key in days if key[0] == station_id):
+            total.merge(days[key])
+        if total.n:
+            analyses[station_id] = total.analysis(stations[station_id])
+    with open(json_path, 'w') as f:
+        json.dump({
+            'generated_at': datetime.now().isoformat(timespec='seconds'),
+            'files_processed': len(files),
+            'errors': errors or {},
+            'stations': analyses,
+        }, f, indent=2)
+    return analyses
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Analyze archived NOAA current observations (XML or CSV) per station and day. '
+                    'Without inputs, analyzes the embedded Cape Henry sample.')
+    parser.add_argument('inputs', nargs='*', help='Files, directories or glob patterns')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--summary', default='current_daily_summary.csv', help='Per-station/per-day CSV')
+    parser.add_argument('--json', default='ctas_current_analysis.json', help='CTAS integration JSON')
+    args = parser.parse_args(argv)
+
+    if not args.inputs:
+        return run_sample()
+
+    files = find_archive_files(args.inputs)
+    if not files:
+        print("❌ No XML or CSV files found")
+        return 1
+    started = time.perf_counter()
+    stations, days, errors = analyze_archives(files, args.workers)
+    analyses = write_batch_outputs(stations, days, args.summary, args.json, files, errors)
+    measurements = sum(accumulator.n for accumulator in days.values())
+    print(f"Processed {len(files)} files, {measurements} measurements, {len(analyses)} stations, "
+          f"{len(days)} station-days in {time.perf_counter() - started:.1f}s")
+    for path, error in errors.items():
+        print(f"  ⚠️  {path}: {error}")
+    print(f"💾 Summary: {args.summary}")
+    print(f"💾 CTAS integration: {args.json}")
+    return 0
+
+
+def run_sample():
+    """Analyze the embedded Cape Henry sample (the original single-file report)"""
     # Parse and analyze your data
     observations, analysis = parse_cape_henry_data()
     
@@ -311,11 +732,16 @@ if __name__ == "__main__":
         # Save analysis to JSON
         with open('cape_henry_analysis.json', 'w') as f:
             json.dump({
-                'observations': observations,
+                'observations': observations.to_dicts(),
                 'analysis': analysis
             }, f, indent=2)
         
         print(f"\n💾 Analysis saved to: cape_henry_analysis.json")
         print(f"📁 Location: d:\\HackOut\\CTAS\\Hackout\\ai-models\\")
+        return 0
     else:
         print("❌ Failed to parse current data")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,7 +4,9 @@ from sklearn.ensemble import RandomForestClassifier, GradientBoostingRegressor
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report, mean_squared_error
-import joblib
+from model_store import dump_artifact, load_file
+from fast_forest import accelerate
+from metrics import timed
 import logging
 from datetime import datetime, timedelta
 
@@ -190,38 +192,53 @@ class CoastalThreatModel:
             'feature_importance': dict(zip(self.feature_names, self.threat_classifier.feature_importances_))
         }
 
+    @timed('coastal_threat.predict_threat')
     def predict_threat(self, features):
         """Predict coastal threat type and severity"""
+        if isinstance(features, dict):
+            return self.predict_threats([features])[0]
+        return self.predict_threats(self.preprocess_data(features)[:1])[0]
+
+    @timed('coastal_threat.predict_threats')
+    def predict_threats(self, rows):
+        """Predict threat type and severity for many inputs (feature dicts or a 2D array) at once"""
         if not self.is_trained:
             raise ValueError("Model must be trained before making predictions")
         
-        X = self.preprocess_data(features)
+        if len(rows) and isinstance(rows[0], dict):
+            X = np.array([[row.get(feature, 0) for feature in self.feature_names] for row in rows])
+        else:
+            X = self.preprocess_data(rows)
         X_scaled = self.scaler.transform(X)
         
-        # Predict threat type
-        threat_proba = self.threat_classifier.predict_proba(X_scaled)[0]
+        # Predict threat type and severity for all rows in one call each
+        all_threat_proba = accelerate(self.threat_classifier).predict_proba(X_scaled)
+        all_severity = self.severity_regressor.predict(X_scaled)
         threat_classes = self.label_encoder.classes_
-        threat_predictions = dict(zip(threat_classes, threat_proba))
-        
-        # Get most likely threat
-        most_likely_threat = max(threat_predictions, key=threat_predictions.get)
-        threat_confidence = max(threat_proba) * 100
+        timestamp = datetime.now().isoformat()
         
-        # Predict severity
-        severity_score = max(0, min(100, self.severity_regressor.predict(X_scaled)[0]))
-        
-        # Calculate overall risk level
-        risk_level = self.calculate_risk_level(severity_score, threat_confidence)
-        
-        return {
-            'primary_threat': most_likely_threat,
-            'threat_confidence': threat_confidence,
-            'severity_score': severity_score,
-            'risk_level': risk_level,
-            'all_threat_probabilities': threat_predictions,
-            'timestamp': datetime.now().isoformat(),
-            'warnings': self.generate_warnings(most_likely_threat, severity_score)
-        }
+        predictions = []
+        for threat_proba, severity in zip(all_threat_proba, all_severity):
+            threat_predictions = dict(zip(threat_classes, threat_proba))
+            
+            # Get most likely threat
+            most_likely_threat = max(threat_predictions, key=threat_predictions.get)
+            threat_confidence = max(threat_proba) * 100
+            severity_score = max(0, min(100, severity))
+            
+            # Calculate overall risk level
+            risk_level = self.calculate_risk_level(severity_score, threat_confidence)
+            
+            predictions.append({
+                'primary_threat': most_likely_threat,
+                'threat_confidence': threat_confidence,
+                'severity_score': severity_score,
+                'risk_level': risk_level,
+                'all_threat_probabilities': threat_predictions,
+                'timestamp': timestamp,
+                'warnings': self.generate_warnings(most_likely_threat, severity_score)
+            })
+        return predictions
 
     def calculate_risk_level(self, severity, confidence):
         """Calculate overall risk level"""
@@ -364,8 +381,8 @@ class CoastalThreatModel:
             'peak_threat': peak_forecast['threat']
         }
 
-    def save_model(self, filepath):
-        """Save trained model to file"""
+    def save_model(self, filepath, metrics=None):
+        """Save trained model to file (uncompressed, with a manifest sidecar)"""
         if not self.is_trained:
             raise ValueError("Model must be trained before saving")
         
@@ -379,12 +396,12 @@ class CoastalThreatModel:
             'is_trained': self.is_trained
         }
         
-        joblib.dump(model_data, filepath)
+        dump_artifact(model_data, filepath, feature_names=self.feature_names, metrics=metrics)
         self.logger.info(f"Model saved to {filepath}")
 
-    def load_model(self, filepath):
-        """Load trained model from file"""
-        model_data = joblib.load(filepath)
+    def load_model(self, filepath, mmap_mode='r'):
+        """Load trained model from file (memory-mapped when the file is uncompressed)"""
+        model_data = load_file(filepath, mmap_mode=mmap_mode)
         
         self.threat_classifier = model_data['threat_classifier']
         self.severity_regressor = model_data['severity_regressor']
@@ -0,0 +1,309 @@
+"""
+CTAS Current Analytics
+Per-station running statistics for NOAA currents, updated in O(1) per observation
+
+`StationCurrentAnalytics` holds the state behind `analyze_current_patterns`
+for one station's trailing window (default 24 h) and updates it as each
+6-minute reading arrives, instead of rescanning the whole DataFrame:
+
+  * windowed Welford mean/variance for speed, direction and the wrapped
+    direction changes (values leaving the window are subtracted back out)
+  * monotonic deques for the window's max/min speed
+  * running sums for the least-squares speed trend over the window
+  * exponentially weighted speed level and trend
+  * ring buffers of strong-current and anomaly flags with running counts
+
+Readings are anomalous when they fall outside mean +/- 2 std of the window
+before they arrived. The batch `detect_current_anomalies` instead rescans
+every reading against the thresholds of the whole window, so its counts can
+differ slightly; the reported thresholds are the same. The flood/ebb split
+needs the window median, which is evaluated when `analysis()` is called,
+not on update.
+
+Observations must arrive in time order; older ones are ignored.
+"""
+
+import math
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+NS_PER_HOUR = 3_600 * 10 ** 9
+DEFAULT_WINDOW_HOURS = 24.0
+DEFAULT_EWMA_HALFLIFE_HOURS = 1.0
+STRONG_CURRENT_MS = 0.7
+ANOMALY_SIGMA = 2.0
+
+
+class RollingMoments:
+    """Mean and variance of a sliding window (Welford updates with removal)"""
+
+    __slots__ = ('n', 'mean', 'm2')
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, x: float):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+
+    def remove(self, x: float):
+        if self.n <= 1:
+            self.n, self.mean, self.m2 = 0, 0.0, 0.0
+            return
+        old_mean = self.mean
+        self.n -= 1
+        self.mean = (old_mean * (self.n + 1) - x) / self.n
+        self.m2 = max(0.0, self.m2 - (x - old_mean) * (x - self.mean))
+
+    def var(self, ddof: int = 1) -> float:
+        return self.m2 / (self.n - ddof) if self.n > ddof else float('nan')
+
+    def std(self, ddof: int = 1) -> float:
+        return math.sqrt(self.var(ddof))
+
+
+def _wrap_degrees(change: float) -> float:
+    if change > 180:
+        return change - 360
+    if change < -180:
+        return change + 360
+    return change
+
+
+class StationCurrentAnalytics:
+    """Streaming analyze_current_patterns for one station; feed it with update() or update_frame()"""
+
+    def __init__(self, window_hours: float = DEFAULT_WINDOW_HOURS,
+                 ewma_halflife_hours: float = DEFAULT_EWMA_HALFLIFE_HOURS):
+        self.window_ns = int(window_hours * NS_PER_HOUR)
+        self.halflife_ns = ewma_halflife_hours * NS_PER_HOUR
+        self.station_info: Dict = {}
+        # (epoch ns, speed m/s, direction, strong, anomaly: 1 high / -1 low / 0) per reading in the window
+        self._window: Deque[Tuple[int, float, float, bool, int]] = deque()
+        self._changes: Deque[float] = deque()
+        self._speed = RollingMoments()
+        self._direction = RollingMoments()
+        self._change = RollingMoments()
+        self._max: Deque[Tuple[int, float]] = deque()
+        self._min: Deque[Tuple[int, float]] = deque()
+        self._count = 0  # readings seen, used as the regression x coordinate
+        self._sum_y = 0.0
+        self._sum_xy = 0.0  # x counted from the oldest reading in the window
+        self._strong = 0
+        self._anomalous = 0
+        self._high = 0
+        self._low = 0
+        self._ewma: Optional[float] = None
+        self._ewma_trend = 0.0
+        self.last_ns: Optional[int] = None
+        self.latest_is_anomaly = False
+
+    def __len__(self) -> int:
+        return len(self._window)
+
+    @property
+    def last_timestamp(self) -> Optional[pd.Timestamp]:
+        return None if self.last_ns is None else pd.Timestamp(self.last_ns)
+
+    def _thresholds(self) -> Tuple[float, float]:
+        std = self._speed.std() if self._speed.n > 1 else 0.0
+        return self._speed.mean + ANOMALY_SIGMA * std, max(0.0, self._speed.mean - ANOMALY_SIGMA * std)
+
+    def update(self, timestamp_ns: int, speed_ms: float, direction: float) -> bool:
+        """Add one reading; returns whether it is anomalous against the window before it"""
+        if self.last_ns is not None and timestamp_ns <= self.last_ns:
+            return False
+        if math.isnan(speed_ms) or math.isnan(direction):
+            return False
+
+        high = low = False
+        if self._speed.n > 1:
+            threshold_high, threshold_low = self._thresholds()
+            high, low = speed_ms > threshold_high, speed_ms < threshold_low
+        anomalous = high or low
+        flag = 1 if high else -1 if low else 0
+
+        if self._window:
+            self._add_change(_wrap_degrees(direction - self._window[-1][2]))
+        strong = speed_ms > STRONG_CURRENT_MS
+        self._window.append((timestamp_ns, speed_ms, direction, strong, flag))
+        self._speed.add(speed_ms)
+        self._direction.add(direction)
+        n = len(self._window)
+        self._sum_xy += (n - 1) * speed_ms
+        self._sum_y += speed_ms
+        self._strong += strong
+        self._anomalous += anomalous
+        self._high += high
+        self._low += low
+        index = self._count
+        self._count += 1
+        while self._max and self._max[-1][1] <= speed_ms:
+            self._max.pop()
+        self._max.append((index, speed_ms))
+        while self._min and self._min[-1][1] >= speed_ms:
+            self._min.pop()
+        self._min.append((index, speed_ms))
+
+        if self._ewma is None:
+            self._ewma = speed_ms
+        else:
+            alpha = 1.0 - 0.5 ** ((timestamp_ns - self.last_ns) / self.halflife_ns)
+            previous = self._ewma
+            self._ewma += alpha * (speed_ms - previous)
+            hours = (timestamp_ns - self.last_ns) / NS_PER_HOUR
+            self._ewma_trend += alpha * ((self._ewma - previous) / hours - self._ewma_trend)
+        self.last_ns = timestamp_ns
+        self.latest_is_anomaly = anomalous
+
+        cutoff = timestamp_ns - self.window_ns
+        while self._window[0][0] < cutoff:
+            self._evict()
+        return anomalous
+
+    def _add_change(self, change: float):
+        self._changes.append(change)
+        self._change.add(change)
+
+    def _evict(self):
+        _, speed_ms, direction, strong, flag = self._window.popleft()
+        first_index = self._count - len(self._window) - 1
+        self._speed.remove(speed_ms)
+        self._direction.remove(direction)
+        # Every remaining reading moves one step closer to x = 0
+        self._sum_y -= speed_ms
+        self._sum_xy -= self._sum_y
+        self._strong -= strong
+        self._anomalous -= flag != 0
+        self._high -= flag == 1
+        self._low -= flag == -1
+        if self._changes:
+            self._change.remove(self._changes.popleft())
+        if self._max and self._max[0][0] <= first_index:
+            self._max.popleft()
+        if self._min and self._min[0][0] <= first_index:
+            self._min.popleft()
+
+    def update_frame(self, df: pd.DataFrame) -> int:
+        """Feed parser-shaped rows in time order; returns how many were added"""
+        if df.empty:
+            return 0
+        if not self.station_info:
+            first = df.iloc[0]
+            self.station_info = {'station_id': first['station_id'], 'station_name': first['station_name'],
+                                 'latitude': first['latitude'], 'longitude': first['longitude']}
+        order = np.argsort(df['timestamp'].to_numpy(), kind='stable')
+        times = df['timestamp'].to_numpy('datetime64[ns]').view(np.int64)[order].tolist()
+        speeds = df['current_speed_ms'].to_numpy(np.float64)[order].tolist()
+        directions = df['current_direction_degrees'].to_numpy(np.float64)[order].tolist()
+        before = self._count
+        for t, speed_ms, direction in zip(times, speeds, directions):
+            self.update(t, speed_ms, direction)
+        return self._count - before
+
+    def current_statistics(self) -> Dict:
+        return {
+            'mean_speed_ms': self._speed.mean if self._speed.n else float('nan'),
+            'max_speed_ms': self._max[0][1] if self._max else float('nan'),
+            'min_speed_ms': self._min[0][1] if self._min else float('nan'),
+            'std_speed_ms': self._speed.std(),
+            'mean_direction': self._direction.mean if self._direction.n else float('nan'),
+            'direction_variability': self._direction.std(),
+        }
+
+    def _speed_slope(self) -> float:
+        """np.polyfit(range(n), speeds, 1)[0] for the window, from running sums"""
+        n = len(self._window)
+        if n < 2:
+            return 0.0
+        sum_x = n * (n - 1) / 2
+        sum_xx = (n - 1) * n * (2 * n - 1) / 6
+        return (n * self._sum_xy - sum_x * self._sum_y) / (n * sum_xx - sum_x ** 2)
+
+    def tidal_analysis(self) -> Dict:
+        speeds = np.fromiter((row[1] for row in self._window), dtype=np.float64, count=len(self._window))
+        median = np.median(speeds) if len(speeds) else float('nan')
+        flood = speeds[speeds > median]
+        ebb = speeds[speeds <= median]
+        change_std = self._change.std(ddof=0) if self._change.n else 0.0
+        stats = self.current_statistics()
+        return {
+            'speed_trend_ms_per_hour': float(self._speed_slope() * len(self._window)),
+            'mean_flood_speed': float(flood.mean()) if len(flood) else float('nan'),
+            'mean_ebb_speed': float(ebb.mean()) if len(ebb) else float('nan'),
+            'direction_stability': float(1 / (1 + change_std)),
+            'tidal_range_indicator': float(stats['max_speed_ms'] - stats['min_speed_ms']),
+            'ewma_speed_ms': float(self._ewma) if self._ewma is not None else float('nan'),
+            'ewma_trend_ms_per_hour': float(self._ewma_trend),
+        }
+
+    def anomaly_detection(self) -> Dict:
+        n = len(self._window)
+        threshold_high, threshold_low = self._thresholds()
+        return {
+            'anomaly_count': self._anomalous,
+            'anomaly_percentage': float(self._anomalous / n * 100) if n else 0.0,
+            'high_speed_anomalies': self._high,
+            'low_speed_anomalies': self._low,
+            'latest_is_anomaly': self.latest_is_anomaly,
+            'thresholds': {
+                'high_speed_ms': float(threshold_high),
+                'low_speed_ms': float(threshold_low)
+            }
+        }
+
+    def threat_indicators(self) -> Dict:
+        """Same rules as NOAACurrentDataParser.assess_current_threats"""
+        threats = {
+            'rip_current_risk': 'low',
+            'erosion_risk': 'low',
+            'navigation_hazard': 'low',
+            'pollution_transport_risk': 'low'
+        }
+        if not self._window:
+            return threats
+        current_speed = self._window[-1][1]
+        speed_variability = self._speed.std()
+        if current_speed > 1.0:
+            threats['rip_current_risk'] = 'high'
+        elif current_speed > 0.5:
+            threats['rip_current_risk'] = 'moderate'
+        strong_current_percentage = self._strong / len(self._window) * 100
+        if strong_current_percentage > 70:
+            threats['erosion_risk'] = 'high'
+        elif strong_current_percentage > 40:
+            threats['erosion_risk'] = 'moderate'
+        if current_speed > 1.5 or speed_variability > 0.3:
+            threats['navigation_hazard'] = 'high'
+        elif current_speed > 1.0 or speed_variability > 0.2:
+            threats['navigation_hazard'] = 'moderate'
+        if current_speed > 0.8:
+            threats['pollution_transport_risk'] = 'high'
+        elif current_speed > 0.4:
+            threats['pollution_transport_risk'] = 'moderate'
+        return threats
+
+    def analysis(self) -> Dict:
+        """The analyze_current_patterns result for the current window"""
+        if not self._window:
+            return {}
+        start, end = self._window[0][0], self._window[-1][0]
+        return {
+            'station_info': dict(self.station_info),
+            'time_range': {
+                'start': pd.Timestamp(start).isoformat(),
+                'end': pd.Timestamp(end).isoformat(),
+                'duration_hours': (end - start) / NS_PER_HOUR
+            },
+            'current_statistics': {key: float(value) for key, value in self.current_statistics().items()},
+            'tidal_analysis': self.tidal_analysis(),
+            'anomaly_detection': self.anomaly_detection(),
+            'threat_indicators': self.threat_indicators()
+        }
@@ -0,0 +1,379 @@
+"""
+CTAS Current Observations
+Compact columnar container for NOAA current observations
+
+`CurrentObservations` is the one in-memory form shared by the datagetter
+XML parser, the local observation store, NOAACurrentDataParser and the Cape
+Henry report. It is a struct of arrays:
+
+    station_codes   int8     index into `stations` (int16/int32 past 127 stations)
+    timestamp_ns    int64    epoch nanoseconds, NaT as int64 min
+    speed_knots     float32
+    direction       float32  degrees
+    bin_depth       int16    -1 when missing
+
+That is 19 bytes per observation. Station id, name, latitude and longitude are
+kept once per station in `stations`, not repeated on every row. Speed in m/s
+and the u/v components are computed on demand.
+
+`to_pandas()` builds the parser's DataFrame without copying the raw columns.
+station_id and station_name become categoricals that share the station
+code array; latitude and longitude stay float64 (gathered from the
+per-station values), so numeric code can keep doing maths on them.
+Iterating yields the row dicts the Cape Henry report works with.
+"""
+
+import io
+import xml.etree.ElementTree as ET
+from typing import BinaryIO, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+KNOTS_TO_MS = 0.514444
+CHUNK_ROWS = 65536
+TIMESTAMP_WIDTH = 19  # bytes kept per raw timestamp ('YYYY-MM-DD HH:MM' is 16)
+NAT = np.iinfo(np.int64).min
+
+
+class CurrentColumns:
+    """Preallocated typed column chunks filled one <cu> observation at a time
+
+    Columns are int64 epoch nanoseconds (NaT where missing or unparseable),
+    float32 speed and direction and int16 bin depth (-1 when missing). Raw
+    timestamps are collected as fixed-width bytes in a scratch buffer and
+    converted once per chunk of CHUNK_ROWS rows with a single vectorized cast,
+    so no per-row datetime objects are ever created.
+    """
+
+    def __init__(self, chunk_rows: int = CHUNK_ROWS):
+        self.chunk_rows = chunk_rows
+        self._raw_times = np.zeros(chunk_rows, dtype=f'S{TIMESTAMP_WIDTH}')
+        self._full: List[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = []
+        self._size = 0
+        self._new_chunk()
+
+    def _new_chunk(self):
+        self._t = np.empty(self.chunk_rows, dtype=np.int64)
+        self._s = np.empty(self.chunk_rows, dtype=np.float32)
+        self._d = np.empty(self.chunk_rows, dtype=np.float32)
+        self._b = np.empty(self.chunk_rows, dtype=np.int16)
+        self._i = 0
+
+    def _close_chunk(self):
+        n = self._i
+        self._t[:n] = _epoch_ns(self._raw_times[:n])
+        self._raw_times[:n] = b''
+        self._full.append((self._t[:n], self._s[:n], self._d[:n], self._b[:n]))
+        self._new_chunk()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, t: Optional[str], s: Optional[str], d: Optional[str], b: Optional[str]):
+        if self._i == self.chunk_rows:
+            self._close_chunk()
+        i = self._i
+        if t:
+            self._raw_times[i] = t
+        self._s[i] = _to_float(s)
+        self._d[i] = _to_float(d)
+        self._b[i] = _to_int(b)
+        self._i = i + 1
+        self._size += 1
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """(epoch ns, speed, direction, bin depth) for all rows appended so far"""
+        if self._i:
+            self._close_chunk()
+        if len(self._full) > 1:
+            # One column at a time, dropping each column's chunks as it is merged
+            merged = []
+            for column in range(4):
+                merged.append(np.concatenate([chunk[column] for chunk in self._full]))
+                self._full = [tuple(None if j == column else part for j, part in enumerate(chunk))
+                              for chunk in self._full]
+            self._full = [tuple(merged)]
+        if not self._full:
+            return (np.empty(0, np.int64), np.empty(0, np.float32), np.empty(0, np.float32), np.empty(0, np.int16))
+        return self._full[0]
+
+    def timestamps(self) -> np.ndarray:
+        """datetime64[ns] view of the epoch column"""
+        return self.arrays()[0].view('datetime64[ns]')
+
+
+def _epoch_ns(raw: np.ndarray) -> np.ndarray:
+    """int64 epoch nanoseconds for fixed-width timestamp bytes (empty -> NaT)"""
+    try:
+        return raw.astype('datetime64[ns]').view(np.int64)
+    except ValueError:
+        # A malformed value fails numpy's cast; let pandas coerce it to NaT
+        parsed = pd.to_datetime(pd.Series(raw.astype('U')), errors='coerce')
+        return parsed.to_numpy('datetime64[ns]').view(np.int64)
+
+
+def _to_float(value: Optional[str]) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _to_int(value: Optional[str]) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return -1
+
+
+def _code_dtype(n_stations: int) -> np.dtype:
+    # Categorical codes are signed (-1 is missing)
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_stations <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def _station_column(codes: np.ndarray, values: List) -> pd.Categorical:
+    """Categorical of a per-station attribute, sharing `codes` when the values are distinct and present"""
+    present = [value for value in values if not pd.isna(value)]
+    if len(present) == len(values) and len(set(values)) == len(values):
+        return pd.Categorical.from_codes(codes, values)
+    # Repeated or missing values (two stations at one position, no name): remap the codes
+    categories = list(dict.fromkeys(present))
+    position = {value: i for i, value in enumerate(categories)}
+    remap = np.array([-1 if pd.isna(value) else position[value] for value in values] or [-1], dtype=codes.dtype)
+    return pd.Categorical.from_codes(remap[codes], categories)
+
+
+def _station_floats(codes: np.ndarray, values: List) -> np.ndarray:
+    """float64 column of a per-station number, NaN where it is missing"""
+    return np.take(np.array([_float_or_nan(value) for value in values], dtype=np.float64), codes)
+
+
+def _float_or_nan(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float('nan')
+
+
+class StationInfo:
+    """Id, name and position of one current station"""
+
+    __slots__ = ('id', 'name', 'latitude', 'longitude')
+
+    def __init__(self, id: str, name: Optional[str] = None, latitude: float = float('nan'),
+                 longitude: float = float('nan')):
+        self.id = id
+        self.name = name
+        self.latitude = _float_or_nan(latitude)
+        self.longitude = _float_or_nan(longitude)
+
+    @classmethod
+    def from_metadata(cls, metadata: Dict[str, str]) -> 'StationInfo':
+        """From datagetter <metadata> attributes (id, name, lat, lon)"""
+        return cls(metadata.get('id'), metadata.get('name'), metadata.get('lat'), metadata.get('lon'))
+
+    def metadata(self) -> Dict[str, str]:
+        return {'id': self.id, 'name': self.name, 'lat': str(self.latitude), 'lon': str(self.longitude)}
+
+    def __repr__(self) -> str:
+        return f"StationInfo({self.id!r}, {self.name!r}, {self.latitude}, {self.longitude})"
+
+
+class CurrentObservations:
+    """Current observations for one or more stations as typed column arrays"""
+
+    __slots__ = ('stations', 'station_codes', 'timestamp_ns', 'speed_knots', 'direction', 'bin_depth')
+
+    def __init__(self, stations: Sequence[StationInfo], station_codes: np.ndarray, timestamp_ns: np.ndarray,
+                 speed_knots: np.ndarray, direction: np.ndarray, bin_depth: np.ndarray):
+        self.stations: Tuple[StationInfo, ...] = tuple(stations)
+        self.station_codes = np.asarray(station_codes, dtype=_code_dtype(len(self.stations)))
+        self.timestamp_ns = np.asarray(timestamp_ns, dtype=np.int64)
+        self.speed_knots = np.asarray(speed_knots, dtype=np.float32)
+        self.direction = np.asarray(direction, dtype=np.float32)
+        self.bin_depth = np.asarray(bin_depth, dtype=np.int16)
+        n = len(self.timestamp_ns)
+        if not (len(self.station_codes) == len(self.speed_knots) == len(self.direction)
+                == len(self.bin_depth) == n):
+            raise ValueError("CurrentObservations columns must all have the same length")
+
+    @classmethod
+    def for_station(cls, station: StationInfo, timestamp_ns: np.ndarray, speed_knots: np.ndarray,
+                    direction: np.ndarray, bin_depth: np.ndarray) -> 'CurrentObservations':
+        """Observations that all belong to one station"""
+        return cls([station], np.zeros(len(timestamp_ns), dtype=np.int8), timestamp_ns, speed_knots,
+                   direction, bin_depth)
+
+    @classmethod
+    def from_records(cls, station: StationInfo, records: np.ndarray) -> 'CurrentObservations':
+        """From the observation store's packed (t, s, d, b) records"""
+        return cls.for_station(station, records['t'].copy(), records['s'].copy(), records['d'].copy(),
+                               records['b'].copy())
+
+    @classmethod
+    def empty(cls) -> 'CurrentObservations':
+        return cls([], np.empty(0, np.int8), np.empty(0, np.int64), np.empty(0, np.float32),
+                   np.empty(0, np.float32), np.empty(0, np.int16))
+
+    @classmethod
+    def concat(cls, batches: Sequence['CurrentObservations']) -> 'CurrentObservations':
+        """Row-wise concatenation; stations with the same id share one entry"""
+        batches = list(batches)
+        if not batches:
+            return cls.empty()
+        stations: List[StationInfo] = []
+        index: Dict[str, int] = {}
+        codes = []
+        for batch in batches:
+            remap = np.empty(max(1, len(batch.stations)), dtype=np.int64)
+            for i, station in enumerate(batch.stations):
+                if station.id not in index:
+                    index[station.id] = len(stations)
+                    stations.append(station)
+                remap[i] = index[station.id]
+            codes.append(remap[batch.station_codes] if len(batch) else np.empty(0, np.int64))
+        return cls(stations, np.concatenate(codes),
+                   np.concatenate([batch.timestamp_ns for batch in batches]),
+                   np.concatenate([batch.speed_knots for batch in batches]),
+                   np.concatenate([batch.direction for batch in batches]),
+                   np.concatenate([batch.bin_depth for batch in batches]))
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'CurrentObservations':
+        """From a parser-shaped DataFrame (station columns plus timestamp, knots, direction and bin)"""
+        codes, ids = pd.factorize(df['station_id'], use_na_sentinel=False)
+        first = np.unique(codes, return_index=True)[1]
+        names, lats, lons = (df[column].to_numpy(object)[first] for column in ('station_name', 'latitude',
+                                                                                'longitude'))
+        stations = [StationInfo(ids[i], names[i], lats[i], lons[i]) for i in range(len(ids))]
+        return cls(stations, codes, df['timestamp'].to_numpy('datetime64[ns]').view(np.int64),
+                   df['current_speed_knots'].to_numpy(np.float32), df['current_direction_degrees'].to_numpy(np.float32),
+                   df['bin_depth'].to_numpy(np.int16))
+
+    def __len__(self) -> int:
+        return len(self.timestamp_ns)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the column arrays (station metadata excluded)"""
+        return (self.station_codes.nbytes + self.timestamp_ns.nbytes + self.speed_knots.nbytes
+                + self.direction.nbytes + self.bin_depth.nbytes)
+
+    def speed_ms(self) -> np.ndarray:
+        return self.speed_knots.astype(np.float64) * KNOTS_TO_MS
+
+    def components(self) -> Tuple[np.ndarray, np.ndarray]:
+        """East (u) and north (v) components in m/s"""
+        speed_ms = self.speed_ms()
+        radians = np.radians(self.direction.astype(np.float64))
+        return speed_ms * np.sin(radians), speed_ms * np.cos(radians)
+
+    def take(self, index) -> 'CurrentObservations':
+        """Rows selected by a slice, boolean mask or integer index array"""
+        return CurrentObservations(self.stations, self.station_codes[index], self.timestamp_ns[index],
+                                   self.speed_knots[index], self.direction[index], self.bin_depth[index])
+
+    def to_pandas(self, derived: bool = True) -> pd.DataFrame:
+        """Parser-shaped DataFrame; the raw columns are shared with this container, not copied
+
+        With derived=False the float64 m/s speed and u/v columns are left out.
+        """
+        codes = self.station_codes
+        columns = {
+            'station_id': _station_column(codes, [s.id for s in self.stations]),
+            'station_name': _station_column(codes, [s.name for s in self.stations]),
+            'latitude': _station_floats(codes, [s.latitude for s in self.stations]),
+            'longitude': _station_floats(codes, [s.longitude for s in self.stations]),
+            'timestamp': self.timestamp_ns.view('datetime64[ns]'),
+            'current_speed_knots': self.speed_knots,
+            'current_direction_degrees': self.direction,
+            'bin_depth': self.bin_depth,
+        }
+        if derived:
+            speed_ms = self.speed_ms()
+            u, v = self.components()
+            columns.update({'current_speed_ms': speed_ms, 'current_u': u, 'current_v': v})
+        return pd.DataFrame(columns, copy=False)
+
+    def _rows(self, start: int, stop: int) -> List[Dict]:
+        times = self.timestamp_ns[start:stop]
+        stamps = np.datetime_as_string(times.view('datetime64[ns]'), unit='m')
+        # Through the float32 repr, so a reading of 0.809 knots comes back as 0.809
+        speeds = self.speed_knots[start:stop].astype(str).astype(np.float64).tolist()
+        directions = self.direction[start:stop].astype(str).astype(np.float64).tolist()
+        bins = self.bin_depth[start:stop].tolist()
+        rows = []
+        for t, stamp, speed, direction, bin_depth in zip(times.tolist(), stamps.tolist(), speeds, directions, bins):
+            rows.append({
+                'timestamp': None if t == NAT else stamp.replace('T', ' '),
+                'speed_knots': speed,
+                'direction_degrees': direction,
+                'bin_depth': bin_depth,
+                'speed_ms': speed * KNOTS_TO_MS,
+            })
+        return rows
+
+    def __getitem__(self, index):
+        """Row dict for an integer index; a CurrentObservations for a slice"""
+        if isinstance(index, slice):
+            return self.take(index)
+        n = len(self)
+        position = index + n if index < 0 else index
+        if not 0 <= position < n:
+            raise IndexError('observation index out of range')
+        return self._rows(position, position + 1)[0]
+
+    def __iter__(self) -> Iterator[Dict]:
+        for start in range(0, len(self), CHUNK_ROWS):
+            yield from self._rows(start, start + CHUNK_ROWS)
+
+    def to_dicts(self) -> List[Dict]:
+        """Every row as {timestamp, speed_knots, direction_degrees, bin_depth, speed_ms}"""
+        return self._rows(0, len(self))
+
+    def __repr__(self) -> str:
+        return f"CurrentObservations({len(self)} rows, stations={[s.id for s in self.stations]})"
+
+
+def _stream_current_observations(source) -> Tuple[Dict[str, str], CurrentColumns]:
+    """Station metadata attributes and the <cu> observations of a NOAA currents document"""
+    metadata: Dict[str, str] = {}
+    columns = CurrentColumns()
+    observations = None
+    for event, elem in ET.iterparse(source, events=('start', 'end')):
+        if event == 'start':
+            if elem.tag == 'observations':
+                observations = elem
+            continue
+        if elem.tag == 'cu':
+            get = elem.get
+            columns.append(get('t'), get('s'), get('d'), get('b'))
+            # Drop parsed elements so the tree never grows with the document
+            elem.clear()
+            if observations is not None:
+                del observations[:]
+        elif elem.tag == 'metadata':
+            metadata = dict(elem.attrib)
+    return metadata, columns
+
+
+def parse_current_xml(xml_data: Union[str, bytes, BinaryIO]) -> CurrentObservations:
+    """Stream a datagetter currents document (text, bytes or binary file) into CurrentObservations
+
+    Raises ValueError when the document has no station metadata or no
+    observations, and ET.ParseError when it is not well-formed XML.
+    """
+    if isinstance(xml_data, str):
+        source = io.BytesIO(xml_data.encode('utf-8'))
+    elif isinstance(xml_data, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(xml_data)
+    else:
+        source = xml_data
+    metadata, columns = _stream_current_observations(source)
+    if not metadata or not len(columns):
+        raise ValueError("no station metadata or observations")
+    return CurrentObservations.for_station(StationInfo.from_metadata(metadata), *columns.arrays())
@@ -0,0 +1,219 @@
+"""
+CTAS Current Profiles
+Multi-bin ADCP current profiles as a time x depth matrix
+
+`CurrentProfile` holds one station's observations on a dense grid:
+
+    times_ns       (T,)    int64 epoch ns, sorted and unique
+    depths         (D,)    int16 bin numbers, sorted and unique
+    speed_knots    (T, D)  float32, NaN where missing
+    direction      (T, D)  float32 degrees (toward), NaN where missing
+    mask           (T, D)  bool, True where there is no observation
+
+That is 9 bytes per cell, so three months of 6-minute data over 40 bins
+(864k cells) take about 8 MB. The east/north components are derived once
+and cached. Per-depth statistics, the depth-averaged series and the
+vertical shear are each a few whole-matrix NumPy reductions, never a loop
+over bins or rows.
+
+`query()` selects a time window and depth range by binary search on the
+sorted axes. It returns views, not copies, so narrowing a months-long
+profile costs nothing until the result is reduced.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from current_observations import KNOTS_TO_MS, NAT, CurrentObservations, StationInfo
+
+
+def _epoch_ns(value) -> int:
+    return pd.Timestamp(value).value
+
+
+def _masked_sum(values: np.ndarray, valid: np.ndarray, axis: int) -> np.ndarray:
+    return np.where(valid, values, 0.0).sum(axis=axis, dtype=np.float64)
+
+
+class CurrentProfile:
+    """Time x depth matrix of one station's ADCP currents"""
+
+    __slots__ = ('station', 'times_ns', 'depths', 'speed_knots', 'direction', 'mask', '_uv')
+
+    def __init__(self, station: StationInfo, times_ns: np.ndarray, depths: np.ndarray, speed_knots: np.ndarray,
+                 direction: np.ndarray, mask: Optional[np.ndarray] = None):
+        self.station = station
+        self.times_ns = np.asarray(times_ns, dtype=np.int64)
+        self.depths = np.asarray(depths, dtype=np.int16)
+        self.speed_knots = np.asarray(speed_knots, dtype=np.float32)
+        self.direction = np.asarray(direction, dtype=np.float32)
+        shape = (len(self.times_ns), len(self.depths))
+        if self.speed_knots.shape != shape or self.direction.shape != shape:
+            raise ValueError(f"profile matrices must be shaped {shape}")
+        if mask is None:
+            mask = ~(np.isfinite(self.speed_knots) & np.isfinite(self.direction))
+        self.mask = np.asarray(mask, dtype=bool)
+        self._uv: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    @classmethod
+    def from_observations(cls, observations: CurrentObservations) -> 'CurrentProfile':
+        """Grid one station's observations by timestamp and bin; a repeated (time, bin) keeps one reading"""
+        if len(np.unique(observations.station_codes)) > 1:
+            raise ValueError("a CurrentProfile holds a single station")
+        station = observations.stations[0] if observations.stations else StationInfo(None)
+        valid = observations.timestamp_ns != NAT
+        times, rows = np.unique(observations.timestamp_ns[valid], return_inverse=True)
+        depths, columns = np.unique(observations.bin_depth[valid], return_inverse=True)
+        speed = np.full((len(times), len(depths)), np.nan, dtype=np.float32)
+        direction = np.full_like(speed, np.nan)
+        speed[rows, columns] = observations.speed_knots[valid]
+        direction[rows, columns] = observations.direction[valid]
+        return cls(station, times, depths, speed, direction)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'CurrentProfile':
+        """From a parser-shaped DataFrame of one station"""
+        return cls.from_observations(CurrentObservations.from_frame(df))
+
+    def __len__(self) -> int:
+        return len(self.times_ns)
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.mask.shape
+
+    @property
+    def nbytes(self) -> int:
+        return (self.times_ns.nbytes + self.depths.nbytes + self.speed_knots.nbytes + self.direction.nbytes
+                + self.mask.nbytes)
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self.times_ns.view('datetime64[ns]')
+
+    def speed_ms(self) -> np.ndarray:
+        return self.speed_knots * np.float32(KNOTS_TO_MS)
+
+    def components(self) -> Tuple[np.ndarray, np.ndarray]:
+        """East (u) and north (v) components in m/s, NaN where missing"""
+        if self._uv is None:
+            speed_ms = self.speed_ms()
+            radians = np.radians(self.direction)
+            self._uv = (speed_ms * np.sin(radians), speed_ms * np.cos(radians))
+        return self._uv
+
+    def query(self, start=None, end=None, min_depth: Optional[int] = None,
+              max_depth: Optional[int] = None) -> 'CurrentProfile':
+        """The cells between start and end (inclusive) and bins min_depth..max_depth, as views"""
+        t0 = 0 if start is None else int(np.searchsorted(self.times_ns, _epoch_ns(start), 'left'))
+        t1 = len(self.times_ns) if end is None else int(np.searchsorted(self.times_ns, _epoch_ns(end), 'right'))
+        d0 = 0 if min_depth is None else int(np.searchsorted(self.depths, min_depth, 'left'))
+        d1 = len(self.depths) if max_depth is None else int(np.searchsorted(self.depths, max_depth, 'right'))
+        rows, columns = slice(t0, max(t0, t1)), slice(d0, max(d0, d1))
+        profile = CurrentProfile(self.station, self.times_ns[rows], self.depths[columns],
+                                 self.speed_knots[rows, columns], self.direction[rows, columns],
+                                 self.mask[rows, columns])
+        if self._uv is not None:
+            profile._uv = (self._uv[0][rows, columns], self._uv[1][rows, columns])
+        return profile
+
+    def at_depth(self, bin_depth: int) -> CurrentObservations:
+        """The single-bin series for one depth (observed cells only)"""
+        matches = np.flatnonzero(self.depths == bin_depth)
+        if not len(matches):
+            raise KeyError(f"no bin {bin_depth} in profile")
+        column = matches[0]
+        rows = np.flatnonzero(~self.mask[:, column])
+        return CurrentObservations.for_station(self.station, self.times_ns[rows], self.speed_knots[rows, column],
+                                               self.direction[rows, column],
+                                               np.full(len(rows), bin_depth, dtype=np.int16))
+
+    def to_observations(self) -> CurrentObservations:
+        """Observed cells back in long form, ordered by time then bin"""
+        rows, columns = np.nonzero(~self.mask)
+        return CurrentObservations.for_station(self.station, self.times_ns[rows], self.speed_knots[rows, columns],
+                                               self.direction[rows, columns], self.depths[columns])
+
+    def depth_statistics(self) -> pd.DataFrame:
+        """Per-bin count, coverage, speed moments and extremes, mean u/v and the vector-mean direction"""
+        valid = ~self.mask
+        speed = self.speed_ms()
+        u, v = self.components()
+        n = valid.sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = _masked_sum(speed, valid, 0) / n
+            variance = _masked_sum((speed - mean.astype(np.float32)) ** 2, valid, 0) / (n - 1)
+            mean_u = _masked_sum(u, valid, 0) / n
+            mean_v = _masked_sum(v, valid, 0) / n
+            residual = np.hypot(mean_u, mean_v)
+            return pd.DataFrame({
+                'observations': n,
+                'coverage': n / max(len(self.times_ns), 1),
+                'mean_speed_ms': mean,
+                'std_speed_ms': np.where(n > 1, np.sqrt(variance), np.nan),
+                'max_speed_ms': np.where(n > 0, np.where(valid, speed, -np.inf).max(axis=0, initial=-np.inf), np.nan),
+                'min_speed_ms': np.where(n > 0, np.where(valid, speed, np.inf).min(axis=0, initial=np.inf), np.nan),
+                'mean_u_ms': mean_u,
+                'mean_v_ms': mean_v,
+                'residual_speed_ms': residual,
+                'residual_direction': np.degrees(np.arctan2(mean_u, mean_v)) % 360,
+                # 1 when the flow always sets the same way, 0 for a balanced flood/ebb
+                'steadiness': residual / mean,
+            }, index=pd.Index(self.depths, name='bin_depth'))
+
+    def depth_averaged(self, min_bins: int = 1) -> CurrentObservations:
+        """Series of the mean u/v over the observed bins at each time (bin_depth -1)
+
+        Times with fewer than min_bins observed bins are left out.
+        """
+        valid = ~self.mask
+        u, v = self.components()
+        count = valid.sum(axis=1)
+        keep = count >= max(min_bins, 1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean_u = _masked_sum(u, valid, 1)[keep] / count[keep]
+            mean_v = _masked_sum(v, valid, 1)[keep] / count[keep]
+        return CurrentObservations.for_station(
+            self.station, self.times_ns[keep], np.hypot(mean_u, mean_v) / KNOTS_TO_MS,
+            np.degrees(np.arctan2(mean_u, mean_v)) % 360, np.full(int(keep.sum()), -1, dtype=np.int16))
+
+    def shear(self, bin_size_m: float = 1.0) -> np.ndarray:
+        """(T, D-1) magnitude of the vertical shear between adjacent bins, in 1/s
+
+        Column i is between depths[i] and depths[i + 1]; bin_size_m converts the
+        bin spacing to metres. NaN where either bin is missing.
+        """
+        u, v = self.components()
+        dz = np.diff(self.depths).astype(np.float32) * np.float32(bin_size_m)
+        return np.hypot(np.diff(u, axis=1), np.diff(v, axis=1)) / dz
+
+    def summary(self, bin_size_m: float = 1.0) -> Dict:
+        """JSON-ready overview: bins, coverage, per-depth statistics and the strongest mean shear layer"""
+        if not len(self.times_ns):
+            return {}
+        stats = self.depth_statistics()
+        result = {
+            'bins': self.depths.tolist(),
+            'time_steps': len(self.times_ns),
+            'coverage': float((~self.mask).mean()),
+            'depth_statistics': {
+                int(depth): {key: float(value) for key, value in row.items()}
+                for depth, row in stats.to_dict('index').items()
+            },
+        }
+        if len(self.depths) > 1:
+            shear = self.shear(bin_size_m)
+            present = np.isfinite(shear)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                layer_mean = _masked_sum(shear, present, 0) / present.sum(axis=0)
+            layers: List[str] = [f"{a}-{b}" for a, b in zip(self.depths[:-1], self.depths[1:])]
+            result['mean_shear_per_s'] = {layer: float(value) for layer, value in zip(layers, layer_mean)}
+            if np.isfinite(layer_mean).any():
+                strongest = int(np.nanargmax(layer_mean))
+                result['max_mean_shear'] = {'layer': layers[strongest], 'shear_per_s': float(layer_mean[strongest])}
+        return result
+
+    def __repr__(self) -> str:
+        return f"CurrentProfile({self.station.id!r}, {len(self.times_ns)} times x {len(self.depths)} bins)"
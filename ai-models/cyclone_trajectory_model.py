@@ -4,7 +4,8 @@ from sklearn.ensemble import RandomForestRegressor, GradientBoostingClassifier
 from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_squared_error, classification_report
-import joblib
+from model_store import dump_artifact, load_file
+from metrics import timed
 import logging
 from datetime import datetime, timedelta
 import warnings
@@ -91,6 +92,9 @@ class CycloneTrajectoryModel:
                     current_lon = start_lon
                     prev_lat = start_lat
                     prev_lon = start_lon
+                    # Mean drift until the track has moved (targets below need a value)
+                    lat_movement = 0.2
+                    lon_movement = -0.3
                 else:
                     # Typical cyclone movement patterns
                     lat_movement = np.random.normal(0.2, 0.1)  # Generally poleward
@@ -284,6 +288,7 @@ class CycloneTrajectoryModel:
             'feature_importance_lon': dict(zip(self.feature_names, self.path_regressor_lon.feature_importances_))
         }
 
+    @timed('cyclone.predict_trajectory')
     def predict_trajectory(self, features, forecast_hours=72):
         """Predict cyclone trajectory and intensity"""
         if not self.is_trained:
@@ -646,8 +651,8 @@ class CycloneTrajectoryModel:
         bearing = np.degrees(np.arctan2(y, x))
         return (bearing + 360) % 360
 
-    def save_model(self, filepath):
-        """Save trained model"""
+    def save_model(self, filepath, metrics=None):
+        """Save trained model (uncompressed, with a manifest sidecar)"""
         if not self.is_trained:
             raise ValueError("Model must be trained before saving")
         
@@ -661,12 +666,12 @@ class CycloneTrajectoryModel:
             'prediction_horizons': self.prediction_horizons
         }
         
-        joblib.dump(model_data, filepath)
+        dump_artifact(model_data, filepath, feature_names=self.feature_names, metrics=metrics)
         self.logger.info(f"Model saved to {filepath}")
 
-    def load_model(self, filepath):
-        """Load trained model"""
-        model_data = joblib.load(filepath)
+    def load_model(self, filepath, mmap_mode='r'):
+        """Load trained model (memory-mapped when the file is uncompressed)"""
+        model_data = load_file(filepath, mmap_mode=mmap_mode)
         
         self.path_regressor_lat = model_data['path_regressor_lat']
         self.path_regressor_lon = model_data['path_regressor_lon']
@@ -0,0 +1,205 @@
+"""
+CTAS Compiled Forest Inference
+Flat NumPy evaluation of trained sklearn forests for the single-row API hot path
+
+A forest's trees are concatenated into flat node arrays (feature, threshold,
+children, missing-value direction, leaf outputs). Prediction walks all trees
+for all rows at once: one vectorized step per tree level instead of one
+sklearn/joblib call per tree, which removes most of the per-call overhead of
+predict_proba on a single row. Batches larger than SKLEARN_BATCH_ROWS are
+handed to sklearn, whose compiled traversal is faster at that size.
+
+Results are bit-identical to sklearn (checked by tests/test_fast_forest.py):
+inputs are cast to float32 exactly like sklearn's validation, split tests
+and NaN routing mirror the Cython traversal, and per-tree outputs are summed
+in estimator order before dividing by the number of trees.
+
+Use accelerate(model) at call sites; it returns a cached CompiledForest for
+supported single-output RandomForest/ExtraTrees models and the model itself
+for anything else, or when CTAS_TREE_BACKEND=sklearn.
+"""
+
+import logging
+import os
+import weakref
+from typing import Any, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BACKEND_ENV = 'CTAS_TREE_BACKEND'
+# Above this many rows sklearn's Cython traversal wins over the vectorized walk
+SKLEARN_BATCH_ROWS = 256
+_TREE_LEAF = -1
+
+
+def _normalizes_leaf_values() -> bool:
+    """sklearn < 1.4 stored class counts in tree_.value and normalized them in predict_proba"""
+    import sklearn
+    major, minor = (int(part) for part in sklearn.__version__.split('.')[:2])
+    return (major, minor) < (1, 4)
+
+
+class CompiledForest:
+    """Flat-array copy of a fitted single-output forest with sklearn-compatible predict/predict_proba"""
+
+    def __init__(self, model):
+        from sklearn.ensemble._forest import ForestClassifier
+
+        self.model = model
+        self.is_classifier = isinstance(model, ForestClassifier)
+        self.n_features_in_ = model.n_features_in_
+        self.n_estimators = len(model.estimators_)
+        if self.is_classifier:
+            self.classes_ = model.classes_
+            self.n_classes_ = model.n_classes_
+
+        features, thresholds, lefts, rights, missing_left, values, roots = [], [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        normalize = self.is_classifier and _normalizes_leaf_values()
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            left = tree.children_left.astype(np.intp)
+            right = tree.children_right.astype(np.intp)
+            leaf = left == _TREE_LEAF
+            index = np.arange(n_nodes, dtype=np.intp)
+            # Leaves point at themselves so every row can take the same number of steps
+            lefts.append(np.where(leaf, index, left) + offset)
+            rights.append(np.where(leaf, index, right) + offset)
+            features.append(np.where(leaf, 0, tree.feature).astype(np.intp))
+            thresholds.append(tree.threshold.astype(np.float64))
+            nodes = tree.__getstate__()['nodes']
+            if 'missing_go_to_left' in nodes.dtype.names:
+                missing_left.append(nodes['missing_go_to_left'].astype(bool))
+            else:
+                missing_left.append(np.zeros(n_nodes, dtype=bool))
+            if self.is_classifier:
+                value = tree.value[:, 0, :self.n_classes_].astype(np.float64)
+                if normalize:
+                    normalizer = value.sum(axis=1)[:, np.newaxis]
+                    normalizer[normalizer == 0.0] = 1.0
+                    value = value / normalizer
+            else:
+                value = tree.value[:, 0, 0].astype(np.float64)
+            values.append(value)
+            roots.append(offset)
+            offset += n_nodes
+            max_depth = max(max_depth, tree.max_depth)
+
+        self.feature = np.concatenate(features)
+        self.threshold = np.concatenate(thresholds)
+        self.left = np.concatenate(lefts)
+        self.right = np.concatenate(rights)
+        self.missing_go_to_left = np.concatenate(missing_left)
+        self.value = np.concatenate(values)
+        self.roots = np.asarray(roots, dtype=np.intp)
+        self.max_depth = max_depth
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.feature, self.threshold, self.left, self.right,
+                                      self.missing_go_to_left, self.value, self.roots))
+
+    def _validate(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2:
+            raise ValueError(f"Expected 2D array, got {X.ndim}D array instead")
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has {X.shape[1]} features, but {type(self.model).__name__} "
+                             f"is expecting {self.n_features_in_} features as input.")
+        return X
+
+    def apply(self, X) -> np.ndarray:
+        """Leaf index (into the flat arrays) reached by every row in every tree: (n_rows, n_trees)"""
+        X = self._validate(X)
+        n_rows = X.shape[0]
+        rows = np.arange(n_rows)[:, np.newaxis]
+        node = np.broadcast_to(self.roots, (n_rows, self.n_estimators)).copy()
+        check_nan = bool(np.isnan(X).any())
+        for _ in range(self.max_depth):
+            x = X[rows, self.feature[node]]
+            go_left = x <= self.threshold[node]
+            if check_nan:
+                missing = np.isnan(x)
+                go_left = np.where(missing, self.missing_go_to_left[node], go_left)
+            node = np.where(go_left, self.left[node], self.right[node])
+        return node
+
+    def _accumulate(self, X) -> np.ndarray:
+        leaves = self.value[self.apply(X)]
+        # Sequential sum over trees (cumsum), the same order and rounding as sklearn's accumulation
+        total = np.cumsum(leaves, axis=1)[:, -1]
+        total /= self.n_estimators
+        return total
+
+    def predict_proba(self, X) -> np.ndarray:
+        if not self.is_classifier:
+            raise AttributeError("predict_proba is only available for classifiers")
+        if len(X) > SKLEARN_BATCH_ROWS:
+            return self.model.predict_proba(X)
+        return self._accumulate(X)
+
+    def predict(self, X) -> np.ndarray:
+        if len(X) > SKLEARN_BATCH_ROWS:
+            return self.model.predict(X)
+        if self.is_classifier:
+            return self.classes_.take(np.argmax(self._accumulate(X), axis=1), axis=0)
+        return self._accumulate(X)
+
+    def __getattr__(self, name: str) -> Any:
+        # Anything not compiled (feature_importances_, get_params, ...) comes from the sklearn model
+        if name == 'model':
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+
+def supports(model) -> bool:
+    """Whether compile_forest can handle this model"""
+    try:
+        from sklearn.ensemble._forest import ForestClassifier, ForestRegressor
+    except ImportError:
+        return False
+    if not isinstance(model, (ForestClassifier, ForestRegressor)):
+        return False
+    return hasattr(model, 'estimators_') and getattr(model, 'n_outputs_', 1) == 1
+
+
+def compile_forest(model) -> Optional[CompiledForest]:
+    """CompiledForest for a supported model, else None"""
+    if not supports(model):
+        return None
+    try:
+        return CompiledForest(model)
+    except Exception as e:
+        logger.warning(f"Could not compile {type(model).__name__}, using sklearn: {e}")
+        return None
+
+
+def backend() -> str:
+    return os.environ.get(BACKEND_ENV, 'compiled').strip().lower()
+
+
+# model -> (estimators_ identity, compiled forest or None); entries go away with the model
+_compiled = weakref.WeakKeyDictionary()
+
+
+def accelerate(model):
+    """Compiled version of `model` if possible (cached per fitted state), otherwise `model` itself"""
+    if model is None or backend() == 'sklearn':
+        return model
+    try:
+        cached = _compiled.get(model)
+    except TypeError:
+        return model
+    estimators = getattr(model, 'estimators_', None)
+    signature = (id(estimators), len(estimators) if estimators is not None else 0)
+    if cached is None or cached[0] != signature:
+        cached = (signature, compile_forest(model))
+        try:
+            _compiled[model] = cached
+        except TypeError:
+            return cached[1] or model
+    return cached[1] or model
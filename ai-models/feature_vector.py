@@ -14,19 +14,25 @@ except Exception:
         def fetch_current_conditions(lat, lon):
             return None
 
+try:
+    from .metrics import read_csv, timed
+except Exception:
+    from metrics import read_csv, timed
+
 # --- CONFIG ---
 CURRENT_WEATHER_PATH = 'weather_data_with_rainfall.csv'
 HISTORICAL_WEATHER_PATH = 'final_training_dataset.csv'
 
 # --- MAIN FUNCTION ---
+@timed('feature_vector.create_feature_vector')
 def create_feature_vector(city=None, lat=None, lon=None, timestamp=None, days_history=7):
     """
     Build a feature vector for a given city or lat/lon and timestamp.
     Combines current and recent historical data (rolling averages, trends, etc).
     """
     # Load data
-    current_df = pd.read_csv(CURRENT_WEATHER_PATH)
-    hist_df = pd.read_csv(HISTORICAL_WEATHER_PATH)
+    current_df = read_csv(CURRENT_WEATHER_PATH)
+    hist_df = read_csv(HISTORICAL_WEATHER_PATH)
 
     # Parse timestamp
     if timestamp is None:
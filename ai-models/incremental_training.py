@@ -0,0 +1,256 @@
+"""
+CTAS Incremental Training
+Update the alert and rain classifiers from newly appended CSV rows instead of the full history
+
+Every published version records how far into its training CSV it has read (a
+byte offset), the fill values used for missing features, and a rolling holdout
+set stored next to the artifact as holdout.npz. An update then:
+
+1. reads only the bytes appended since that offset,
+2. moves a slice of the new rows into the rolling holdout (keeping the newest rows),
+3. extends the current model with the rest of the new rows:
+   - forests (warm start): adds `trees_per_window` trees fitted on the window,
+     dropping the oldest trees beyond `max_trees`
+   - OnlineClassifier (partial_fit): one more pass of SGD over the window
+4. scores the current and candidate models on the updated holdout and publishes
+   the candidate as the next store version only if the metric did not regress.
+
+Running API servers load file-backed models through model_registry, which
+notices the new LATEST version and swaps it in (see CTAS_MODEL_REFRESH_SECONDS),
+so the CLIs need no handle on the server. A `registry` passed in-process is
+reloaded immediately.
+
+Update cost is proportional to the new window, not to the size of the CSV.
+"""
+
+import copy
+import io
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import accuracy_score
+from sklearn.preprocessing import StandardScaler
+
+from model_store import artifact_path, latest_version, load_artifact, save_artifact
+
+logger = logging.getLogger(__name__)
+
+HOLDOUT_FILENAME = 'holdout.npz'
+DEFAULT_HOLDOUT_FRACTION = 0.2
+DEFAULT_HOLDOUT_SIZE = 5000
+DEFAULT_TREES_PER_WINDOW = 10
+DEFAULT_MAX_TREES = 300
+
+
+class OnlineClassifier:
+    """StandardScaler + logistic-loss SGD, updatable with partial_fit (sklearn-style predict/predict_proba)"""
+
+    def __init__(self, alpha: float = 1e-4, random_state: int = 42):
+        self.alpha = alpha
+        self.random_state = random_state
+        self.scaler = StandardScaler()
+        self.classifier = SGDClassifier(loss='log_loss', alpha=alpha, random_state=random_state)
+        self.classes_ = None
+        self.n_features_in_ = None
+
+    def partial_fit(self, X, y, classes=None):
+        X = np.asarray(X, dtype=np.float64)
+        if self.classes_ is None:
+            self.classes_ = np.unique(y) if classes is None else np.asarray(classes)
+        self.scaler.partial_fit(X)
+        self.classifier.partial_fit(self.scaler.transform(X), y, classes=self.classes_)
+        self.n_features_in_ = X.shape[1]
+        return self
+
+    def fit(self, X, y):
+        self.__init__(self.alpha, self.random_state)
+        return self.partial_fit(X, y)
+
+    def predict(self, X):
+        return self.classifier.predict(self.scaler.transform(np.asarray(X, dtype=np.float64)))
+
+    def predict_proba(self, X):
+        return self.classifier.predict_proba(self.scaler.transform(np.asarray(X, dtype=np.float64)))
+
+    def score(self, X, y):
+        return accuracy_score(y, self.predict(X))
+
+
+def build_model(family: str = 'forest', n_estimators: int = 100, random_state: int = 42):
+    """Fresh estimator for a full (bootstrap) training run"""
+    if family == 'sgd':
+        return OnlineClassifier(random_state=random_state)
+    from sklearn.ensemble import RandomForestClassifier
+    return RandomForestClassifier(n_estimators=n_estimators, random_state=random_state)
+
+
+def prepare_frame(df: pd.DataFrame, features: List[str], target: str,
+                  derive: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None,
+                  fill_values: Optional[Dict[str, float]] = None):
+    """Apply a script's cleaning rules to raw rows; returns (X, y) arrays"""
+    if derive is not None:
+        df = derive(df)
+    df = df[features + [target]]
+    if fill_values:
+        df = df.assign(**{col: df[col].fillna(value) for col, value in fill_values.items()})
+    df = df.dropna(subset=features + [target])
+    return df[features].to_numpy(dtype=np.float64), df[target].to_numpy()
+
+
+def split_window(X, y, holdout_fraction: float, seed: int):
+    """Shuffle a window and split it into (train rows, holdout rows)"""
+    order = np.random.default_rng(seed).permutation(len(y))
+    n_holdout = int(round(len(y) * holdout_fraction))
+    holdout_idx, train_idx = order[:n_holdout], order[n_holdout:]
+    return X[train_idx], y[train_idx], X[holdout_idx], y[holdout_idx]
+
+
+def _holdout_path(name: str, version: str, store_dir: Optional[str] = None) -> str:
+    return os.path.join(os.path.dirname(artifact_path(name, version, store_dir)), HOLDOUT_FILENAME)
+
+
+def publish(name: str, model: Any, features: List[str], metrics: Dict, csv_path: str, byte_offset: int,
+            X_holdout, y_holdout, columns: List[str], fill_values: Optional[Dict[str, float]] = None,
+            training_data: Any = None, store_dir: Optional[str] = None, windows: int = 0) -> Dict:
+    """Save model as the next store version together with the state the next update needs"""
+    state = {
+        'csv_path': os.path.abspath(csv_path),
+        'byte_offset': int(byte_offset),
+        'columns': list(columns),
+        'fill_values': {k: float(v) for k, v in (fill_values or {}).items()},
+        'holdout_rows': int(len(y_holdout)),
+        'windows': windows,
+    }
+    manifest = save_artifact(name, model, feature_names=features, metrics=metrics,
+                             training_data=training_data, extra={'incremental': state}, store_dir=store_dir)
+    np.savez(_holdout_path(name, manifest['version'], store_dir), X=np.asarray(X_holdout, dtype=np.float64),
+             y=np.asarray(y_holdout))
+    return manifest
+
+
+def read_appended_rows(csv_path: str, byte_offset: int, columns: List[str]):
+    """Rows appended to csv_path after byte_offset; returns (DataFrame, new offset)
+
+    A trailing line without a newline is left for the next update.
+    """
+    with open(csv_path, 'rb') as f:
+        f.seek(byte_offset)
+        data = f.read()
+    complete = data.rfind(b'\n') + 1
+    if complete == 0:
+        return pd.DataFrame(columns=columns), byte_offset
+    df = pd.read_csv(io.BytesIO(data[:complete]), header=None, names=columns)
+    return df, byte_offset + complete
+
+
+def _model_input(model, X):
+    """Give X the column names the model was fitted with, if any (avoids sklearn feature-name warnings)"""
+    names = getattr(model, 'feature_names_in_', None)
+    return pd.DataFrame(X, columns=names) if names is not None else X
+
+
+def _extend_forest(model, X, y, trees_per_window: int, max_trees: int):
+    candidate = copy.deepcopy(model)
+    candidate.set_params(warm_start=True, n_estimators=len(candidate.estimators_) + trees_per_window)
+    candidate.fit(X, y)
+    if max_trees and len(candidate.estimators_) > max_trees:
+        candidate.estimators_ = candidate.estimators_[-max_trees:]
+    candidate.set_params(warm_start=False, n_estimators=len(candidate.estimators_))
+    return candidate
+
+
+def incremental_update(name: str, features: List[str], target: str,
+                       derive: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None,
+                       trees_per_window: int = DEFAULT_TREES_PER_WINDOW, max_trees: int = DEFAULT_MAX_TREES,
+                       holdout_fraction: float = DEFAULT_HOLDOUT_FRACTION,
+                       holdout_size: int = DEFAULT_HOLDOUT_SIZE, tolerance: float = 0.0,
+                       store_dir: Optional[str] = None, registry=None) -> Dict[str, Any]:
+    """Fold rows appended since the last published version into the model; see module docstring"""
+    start = time.perf_counter()
+    version = latest_version(name, store_dir)
+    if version is None:
+        raise FileNotFoundError(f"No published '{name}' model; run a full training first")
+    model, manifest = load_artifact(name, version, mmap_mode=None, store_dir=store_dir)
+    state = manifest.get('incremental')
+    if not state:
+        raise ValueError(f"{name}/{version} has no incremental state; run a full training first")
+
+    csv_path = state['csv_path']
+    if os.path.getsize(csv_path) < state['byte_offset']:
+        raise ValueError(f"{csv_path} shrank since {name}/{version} was trained; run a full training")
+    raw, new_offset = read_appended_rows(csv_path, state['byte_offset'], state['columns'])
+    X_new, y_new = prepare_frame(raw, features, target, derive, state.get('fill_values'))
+    result = {'model': name, 'base_version': version, 'new_rows': int(len(y_new)), 'published': False}
+    if len(y_new) == 0:
+        result.update(status='no_new_data', seconds=round(time.perf_counter() - start, 3))
+        return result
+
+    with np.load(_holdout_path(name, version, store_dir), allow_pickle=False) as holdout:
+        X_holdout, y_holdout = holdout['X'], holdout['y']
+    X_train, y_train, X_hold_new, y_hold_new = split_window(X_new, y_new, holdout_fraction, seed=new_offset)
+    X_holdout = np.concatenate([X_holdout, X_hold_new])[-holdout_size:]
+    y_holdout = np.concatenate([y_holdout, y_hold_new])[-holdout_size:]
+    X_train, X_eval = _model_input(model, X_train), _model_input(model, X_holdout)
+
+    fit_start = time.perf_counter()
+    if hasattr(model, 'partial_fit'):
+        candidate = copy.deepcopy(model).partial_fit(X_train, y_train)
+        result['mode'] = 'partial_fit'
+    else:
+        missing = set(model.classes_.tolist()) - set(np.unique(y_train).tolist())
+        if missing:
+            # Warm-started trees must see every class; wait for a larger window
+            result.update(status='deferred', reason=f"window lacks classes {sorted(missing)}",
+                          seconds=round(time.perf_counter() - start, 3))
+            return result
+        candidate = _extend_forest(model, X_train, y_train, trees_per_window, max_trees)
+        result['mode'] = 'warm_start'
+    result['fit_seconds'] = round(time.perf_counter() - fit_start, 3)
+
+    current_score = accuracy_score(y_holdout, model.predict(X_eval))
+    candidate_score = accuracy_score(y_holdout, candidate.predict(X_eval))
+    result.update(holdout_rows=int(len(y_holdout)), current_accuracy=current_score,
+                  candidate_accuracy=candidate_score)
+
+    if candidate_score + tolerance < current_score:
+        result.update(status='rejected', seconds=round(time.perf_counter() - start, 3))
+        logger.warning(f"{name}: candidate accuracy {candidate_score:.4f} < {current_score:.4f}; not published")
+        return result
+
+    published = publish(name, candidate, features, {'holdout_accuracy': candidate_score}, csv_path, new_offset,
+                        X_holdout, y_holdout, state['columns'], state.get('fill_values'),
+                        store_dir=store_dir, windows=state.get('windows', 0) + 1)
+    if registry is not None and name in registry:
+        registry.reload(name)
+    result.update(status='published', published=True, version=published['version'],
+                  seconds=round(time.perf_counter() - start, 3))
+    return result
+
+
+def add_arguments(parser):
+    """Command-line options shared by train_alert_model.py and train_rain_classifier.py"""
+    parser.add_argument('--incremental', action='store_true',
+                        help='Update the published model with rows appended since it was trained')
+    parser.add_argument('--family', choices=['forest', 'sgd'], default='forest',
+                        help='Model family for a full training run (sgd supports partial_fit updates)')
+    parser.add_argument('--trees-per-window', type=int, default=DEFAULT_TREES_PER_WINDOW)
+    parser.add_argument('--max-trees', type=int, default=DEFAULT_MAX_TREES)
+    parser.add_argument('--tolerance', type=float, default=0.0,
+                        help='Allowed drop in holdout accuracy before an update is rejected')
+    return parser
+
+
+def print_update(result: Dict[str, Any]):
+    print(f"{result['model']}: {result['status']} ({result['new_rows']} new rows, {result.get('seconds', 0):.3f}s)")
+    if 'candidate_accuracy' in result:
+        print(f"  holdout accuracy {result['current_accuracy']:.4f} -> {result['candidate_accuracy']:.4f} "
+              f"on {result['holdout_rows']} rows ({result['mode']})")
+    if result.get('published'):
+        print(f"  published as {result['model']}/{result['version']}")
+    if 'reason' in result:
+        print(f"  {result['reason']}")
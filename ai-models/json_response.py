@@ -0,0 +1,128 @@
+"""
+CTAS JSON Responses
+Fast JSON encoding for the API servers with native NumPy and NaN handling
+
+`dumps()` encodes handler output with orjson: NumPy scalars and arrays are
+serialized natively, NaN and +/-inf become null, datetimes (including pandas
+Timestamps) become ISO-8601 strings and non-string dict keys are stringified.
+Handlers can therefore return model outputs as-is, without a recursive
+sanitize pass.
+
+`FastJSONRoute` is the route class for the ai-models apps. When a handler that
+has no explicit `response_model` returns plain data, the route wraps it in a
+`FastJSONResponse` directly. This skips FastAPI's `jsonable_encoder` walk, which
+is slower than the encoder itself and rejects NumPy integers. Handlers declared
+with a `response_model` are left to FastAPI, which validates them and
+serializes them with pydantic.
+
+Without orjson the module falls back to the standard library, with a Python
+pass that does the same conversions.
+"""
+
+import dataclasses
+import datetime
+import decimal
+import enum
+import functools
+import inspect
+import json
+import logging
+import math
+from typing import Any
+
+import numpy as np
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from starlette.responses import Response
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+    _ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+except ImportError:  # pragma: no cover - exercised only without orjson
+    orjson = None
+    logger.warning("orjson not installed; JSON responses use the slower standard library encoder")
+
+
+def _default(obj: Any) -> Any:
+    """Conversions for types orjson (or json) cannot encode natively"""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        # Object / datetime arrays that OPT_SERIALIZE_NUMPY does not handle
+        return obj.tolist()
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        # pandas Timestamp is a datetime subclass; NaT has no valid isoformat
+        return None if obj != obj else obj.isoformat()
+    if hasattr(obj, 'model_dump'):
+        return obj.model_dump(mode='json')
+    if hasattr(obj, 'dict') and hasattr(obj, '__fields__'):
+        return obj.dict()
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, enum.Enum):
+        return obj.value
+    if type(obj).__name__ == 'NAType':  # pandas.NA
+        return None
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _plain(obj: Any) -> Any:
+    """Standard-library fallback: NaN/inf to None and NumPy/other types to JSON-native values"""
+    if obj is None or isinstance(obj, (str, bool, int)):
+        return obj
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {str(k) if not isinstance(k, str) else k: _plain(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_plain(v) for v in obj]
+    return _plain(_default(obj))
+
+
+def dumps(obj: Any) -> bytes:
+    """JSON bytes for `obj`; NaN/inf are written as null"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS)
+    return json.dumps(_plain(obj), ensure_ascii=False, allow_nan=False, separators=(',', ':')).encode('utf-8')
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with dumps()"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class FastJSONRoute(APIRoute):
+    """APIRoute that sends handler output without a response_model straight to FastJSONResponse"""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        response_model = kwargs.get('response_model')
+        if response_model is None or isinstance(response_model, DefaultPlaceholder):
+            endpoint = _respond_with_fast_json(endpoint, kwargs.get('status_code'))
+        super().__init__(path, endpoint, **kwargs)
+
+
+def _respond_with_fast_json(endpoint, status_code):
+    status = status_code if isinstance(status_code, int) else 200
+
+    # functools.wraps keeps the signature (and __wrapped__) FastAPI inspects for parameters
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def async_wrapper(*args, **kwargs):
+            result = await endpoint(*args, **kwargs)
+            return result if isinstance(result, Response) else FastJSONResponse(result, status_code=status)
+        return async_wrapper
+
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        result = endpoint(*args, **kwargs)
+        return result if isinstance(result, Response) else FastJSONResponse(result, status_code=status)
+    return wrapper
@@ -3,10 +3,21 @@ import requests
 import time
 from urllib.parse import urlencode
 
+try:
+    from .metrics import UPSTREAM_CACHE, UPSTREAM_SECONDS, timed
+except Exception:
+    from metrics import UPSTREAM_CACHE, UPSTREAM_SECONDS, timed
+
 # Simple in-memory TTL cache
 _CACHE = {}
 _TTL = 300  # seconds
 
+# Upstream endpoints; override to point at a local stand-in (see upstream_stub.py)
+OPEN_METEO_URL_ENV = 'OPEN_METEO_URL'
+OPENWEATHER_URL_ENV = 'OPENWEATHER_URL'
+DEFAULT_OPEN_METEO_URL = 'https://api.open-meteo.com/v1/forecast'
+DEFAULT_OPENWEATHER_URL = 'https://api.openweathermap.org/data/2.5/weather'
+
 def _cache_key(lat, lon):
     # coarse rounding to reduce unique keys (approx ~1km precision)
     return f"{round(lat,3)}:{round(lon,3)}"
@@ -19,7 +30,8 @@ def _fetch_open_meteo(lat, lon):
         'hourly': 'relativehumidity_2m,precipitation',
         'timezone': 'UTC'
     }
-    url = f"https://api.open-meteo.com/v1/forecast?{urlencode(params)}"
+    base_url = os.environ.get(OPEN_METEO_URL_ENV) or DEFAULT_OPEN_METEO_URL
+    url = f"{base_url}?{urlencode(params)}"
     r = requests.get(url, timeout=10)
     r.raise_for_status()
     data = r.json()
@@ -55,7 +67,7 @@ def _fetch_open_meteo(lat, lon):
 
 def _fetch_openweather(lat, lon, api_key):
     # OpenWeather current weather endpoint (metric units)
-    url = 'https://api.openweathermap.org/data/2.5/weather'
+    url = os.environ.get(OPENWEATHER_URL_ENV) or DEFAULT_OPENWEATHER_URL
     params = {
         'lat': lat,
         'lon': lon,
@@ -89,6 +101,7 @@ def _fetch_openweather(lat, lon, api_key):
     result['fetched_at'] = data.get('dt', None)
     return result
 
+@timed('live_weather.fetch_current_conditions')
 def fetch_current_conditions(lat, lon):
     """Fetch current conditions from OpenWeather (if API key provided) or fallback to Open-Meteo.
     Returns dict: { 'temperature': C, 'humidity': %, 'wind_speed': m/s, 'rainfall': mm }
@@ -99,15 +112,21 @@ def fetch_current_conditions(lat, lon):
     if key in _CACHE:
         ts, val = _CACHE[key]
         if now - ts < _TTL:
+            UPSTREAM_CACHE.inc(service='live_weather', result='hit')
             return val
+    UPSTREAM_CACHE.inc(service='live_weather', result='miss')
 
     api_key = os.environ.get('OPENWEATHER_API_KEY')
+    service = 'openweather' if api_key else 'open_meteo'
+    start = time.perf_counter()
     try:
         if api_key:
             val = _fetch_openweather(lat, lon, api_key)
         else:
             val = _fetch_open_meteo(lat, lon)
+        UPSTREAM_SECONDS.observe(time.perf_counter() - start, service=service, outcome='ok')
         _CACHE[key] = (now, val)
         return val
     except Exception:
+        UPSTREAM_SECONDS.observe(time.perf_counter() - start, service=service, outcome='error')
         return None
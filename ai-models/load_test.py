@@ -0,0 +1,356 @@
+"""
+CTAS Load Test
+Drive the FastAPI apps with steady, burst and many-distinct-coordinate scenarios
+
+The upstream services are replaced by upstream_stub.py, so runs are offline and
+repeatable and upstream latency / failures can be dialled in. Two targets:
+
+- in-process (default): api/main.py and predict_weather_api.py are served through
+  asgi_client with the synthetic models and CSVs of benchmark_suite.BenchEnv,
+  USE_LIVE_WEATHER=true, and live_weather / /ai/chat pointed at an embedded stub
+- over HTTP (--url): requests go to a running server; start it with the
+  environment printed by `python upstream_stub.py` and pass --stub-url to
+  report the upstream call counts
+
+Scenarios:
+- steady:   open-loop arrivals at --rate req/s for --duration seconds over a few cities
+- burst:    --waves waves of --burst-size simultaneous requests, --interval seconds apart
+- distinct: --requests requests, each at a new coordinate (defeats the weather and
+            prediction caches), --concurrency at a time
+
+Each run reports throughput, latency percentiles, error rate, status counts and
+the number of upstream calls the stub received per service:
+
+    python load_test.py --scenario steady --endpoint alert --rate 50 --duration 10 --latency-ms 80
+    python load_test.py --scenario distinct --endpoint alerts --requests 500 --concurrency 32 --json out.json
+    python load_test.py --url http://localhost:8000 --stub-url http://localhost:8090 --scenario burst
+"""
+
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+if HERE not in sys.path:
+    sys.path.insert(0, HERE)
+
+from benchmark_suite import CITIES, BenchEnv, main_client, weather_client
+from upstream_stub import UpstreamStub
+
+# endpoint -> (app, method, path)
+ENDPOINTS = {
+    'alert': ('main', 'POST', '/api/predict_alert'),
+    'alerts': ('weather', 'POST', '/api/predict_alerts'),
+    'chat': ('main', 'POST', '/ai/chat'),
+}
+SCENARIOS = ('steady', 'burst', 'distinct')
+PERCENTILES = (50, 90, 95, 99)
+GOLDEN = 0.6180339887498949
+
+
+def distinct_coordinate(i: int) -> Tuple[float, float]:
+    """Low-discrepancy coordinates: every i maps to a different ~1 km cell"""
+    return (round(-60.0 + 120.0 * ((i * GOLDEN) % 1.0), 4),
+            round(-180.0 + 360.0 * ((i * 0.7548776662466927) % 1.0), 4))
+
+
+def request_body(endpoint: str, lat: float, lon: float) -> Dict[str, Any]:
+    if endpoint == 'alert':
+        return {'latitude': lat, 'longitude': lon, 'water_level_m': 1.5, 'wind_speed_m_s': 8.0,
+                'air_pressure_hpa': 1010.0, 'chlorophyll_mg_m3': 5.0, 'rainfall': 2.0}
+    if endpoint == 'alerts':
+        return {'latitude': lat, 'longitude': lon}
+    return {'message': f"Coastal risk summary for {lat:.3f}, {lon:.3f}?"}
+
+
+class InProcessTarget:
+    """Requests through asgi_client against the apps loaded with synthetic models"""
+
+    def __init__(self, env: BenchEnv, stub_env: Dict[str, str]):
+        self.env = env
+        self.stub_env = stub_env
+        self._clients: Dict[str, Any] = {}
+
+    def client(self, app: str):
+        if app not in self._clients:
+            with contextlib.redirect_stdout(io.StringIO()):
+                if app == 'main':
+                    self._clients[app] = main_client(self.env)
+                    import main
+                    # Read at import time in api/main.py
+                    main.OPENAI_API_URL = self.stub_env['OPENAI_API_URL']
+                    main.OPENAI_API_KEY = main.OPENAI_API_KEY or 'stub'
+                else:
+                    self._clients[app] = weather_client(self.env)
+        return self._clients[app]
+
+    async def send(self, app: str, method: str, path: str, body: Dict[str, Any]) -> int:
+        response = await self.client(app).request(method, path, json_body=body)
+        return response.status_code
+
+    def run(self, awaitable):
+        return self.env.run(awaitable)
+
+
+class HttpTarget:
+    """Requests over HTTP with one pooled requests.Session per worker thread"""
+
+    def __init__(self, base_url: str, max_workers: int = 64, timeout: float = 30.0):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ctas-load')
+        self._local = threading.local()
+
+    def client(self, app: str):
+        return None
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            import requests
+            session = self._local.session = requests.Session()
+        return session
+
+    def _request(self, method: str, path: str, body: Dict[str, Any]) -> int:
+        return self._session().request(method, self.base_url + path, json=body, timeout=self.timeout).status_code
+
+    async def send(self, app: str, method: str, path: str, body: Dict[str, Any]) -> int:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._request, method, path, body)
+
+    def run(self, awaitable):
+        return asyncio.run(awaitable)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+
+Sample = Tuple[float, Optional[int], Optional[str]]  # (seconds, status, error)
+
+
+async def _timed_send(target, endpoint: str, lat: float, lon: float) -> Sample:
+    app, method, path = ENDPOINTS[endpoint]
+    start = time.perf_counter()
+    try:
+        status = await target.send(app, method, path, request_body(endpoint, lat, lon))
+        return time.perf_counter() - start, status, None
+    except Exception as e:
+        return time.perf_counter() - start, None, type(e).__name__
+
+
+async def run_steady(target, endpoint: str, rate: float, duration: float, max_in_flight: int = 256) -> List[Sample]:
+    """Open-loop arrivals every 1/rate seconds, cycling through a few cities"""
+    coordinates = list(CITIES.values())
+    limit = asyncio.Semaphore(max_in_flight)
+    n_requests = max(1, int(rate * duration))
+    start = time.perf_counter()
+
+    async def one(i: int):
+        async with limit:
+            return await _timed_send(target, endpoint, *coordinates[i % len(coordinates)])
+
+    tasks = []
+    for i in range(n_requests):
+        delay = start + i / rate - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.ensure_future(one(i)))
+    return list(await asyncio.gather(*tasks))
+
+
+async def run_burst(target, endpoint: str, burst_size: int, waves: int, interval: float) -> List[Sample]:
+    """`waves` waves of `burst_size` simultaneous requests"""
+    coordinates = list(CITIES.values())
+    samples: List[Sample] = []
+    for wave in range(waves):
+        wave_start = time.perf_counter()
+        samples.extend(await asyncio.gather(*(_timed_send(target, endpoint, *coordinates[i % len(coordinates)])
+                                              for i in range(burst_size))))
+        if wave < waves - 1:
+            await asyncio.sleep(max(0.0, interval - (time.perf_counter() - wave_start)))
+    return samples
+
+
+async def run_distinct(target, endpoint: str, n_requests: int, concurrency: int) -> List[Sample]:
+    """Closed loop of `concurrency` workers, every request at a new coordinate"""
+    counter = iter(range(n_requests))
+    samples: List[Sample] = []
+
+    async def worker():
+        for i in counter:
+            samples.append(await _timed_send(target, endpoint, *distinct_coordinate(i)))
+
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    return samples
+
+
+def summarize(samples: List[Sample], wall_seconds: float) -> Dict[str, Any]:
+    latencies = np.array([seconds for seconds, _, _ in samples]) * 1000.0
+    statuses = Counter(str(status) if status is not None else error for _, status, error in samples)
+    errors = sum(1 for _, status, error in samples if error is not None or status >= 400)
+    latency = {f"p{p}": round(float(v), 3) for p, v in zip(PERCENTILES, np.percentile(latencies, PERCENTILES))} \
+        if len(latencies) else {}
+    if len(latencies):
+        latency.update(mean=round(float(latencies.mean()), 3), max=round(float(latencies.max()), 3))
+    return {
+        'requests': len(samples),
+        'duration_s': round(wall_seconds, 3),
+        'throughput_rps': round(len(samples) / wall_seconds, 2) if wall_seconds > 0 else 0.0,
+        'latency_ms': latency,
+        'errors': errors,
+        'error_rate': round(errors / len(samples), 4) if samples else 0.0,
+        'status_counts': dict(statuses),
+    }
+
+
+def _counts_delta(before: Dict[str, Dict[str, int]], after: Dict[str, Dict[str, int]]) -> Dict[str, Dict[str, int]]:
+    return {service: {key: value - before.get(service, {}).get(key, 0) for key, value in counts.items()}
+            for service, counts in after.items()}
+
+
+def remote_stub_counts(stub_url: str) -> Dict[str, Dict[str, int]]:
+    import requests
+    return requests.get(f"{stub_url.rstrip('/')}/__stub/stats", timeout=5).json()['counts']
+
+
+def run_scenario(target, scenario: str, endpoint: str, stub_counts: Optional[Callable[[], Dict]] = None,
+                 **options) -> Dict[str, Any]:
+    """Run one scenario against `target`; options are the scenario's parameters"""
+    if scenario == 'steady':
+        job = run_steady(target, endpoint, options.get('rate', 20.0), options.get('duration', 5.0))
+    elif scenario == 'burst':
+        job = run_burst(target, endpoint, options.get('burst_size', 50), options.get('waves', 5),
+                        options.get('interval', 1.0))
+    elif scenario == 'distinct':
+        job = run_distinct(target, endpoint, options.get('requests', 200), options.get('concurrency', 16))
+    else:
+        raise ValueError(f"Unknown scenario {scenario!r}; expected one of {', '.join(SCENARIOS)}")
+
+    target.client(ENDPOINTS[endpoint][0])  # app start-up is not part of the measurement
+    before = stub_counts() if stub_counts else None
+    start = time.perf_counter()
+    samples = target.run(job)
+    report = dict(summarize(samples, time.perf_counter() - start), scenario=scenario, endpoint=endpoint,
+                  options=options)
+    if stub_counts:
+        report['upstream_calls'] = _counts_delta(before, stub_counts())
+    return report
+
+
+@contextlib.contextmanager
+def patched_environ(values: Dict[str, Optional[str]]):
+    saved = {key: os.environ.get(key) for key in values}
+    for key, value in values.items():
+        if value is None:
+            os.environ.pop(key, None)
+        else:
+            os.environ[key] = value
+    try:
+        yield
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def run_in_process(scenarios: List[str], endpoint: str, stub_config: Dict[str, Any],
+                   upstream: str = 'open_meteo', **options) -> List[Dict[str, Any]]:
+    """Run scenarios against the in-process apps with an embedded upstream stub"""
+    import live_weather
+    reports = []
+    # Blank current readings: create_feature_vector only asks live_weather for missing values
+    with UpstreamStub(config=stub_config, seed=0) as stub, BenchEnv(quick=True, blank_current=True) as env:
+        environ = dict(stub.environ(), USE_LIVE_WEATHER='true',
+                       OPENWEATHER_API_KEY='stub' if upstream == 'openweather' else None)
+        with patched_environ(environ):
+            target = InProcessTarget(env, stub.environ())
+            for scenario in scenarios:
+                live_weather._CACHE.clear()
+                reports.append(run_scenario(target, scenario, endpoint, stub_counts=stub.counts, **options))
+    return reports
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    latency = report['latency_ms']
+    lines = [
+        f"{report['scenario']} / {report['endpoint']}: {report['requests']} requests in {report['duration_s']}s "
+        f"= {report['throughput_rps']} req/s",
+        "  latency ms  " + '  '.join(f"{key} {value}" for key, value in latency.items()),
+        f"  errors      {report['errors']} ({100 * report['error_rate']:.1f}%)  statuses {report['status_counts']}",
+    ]
+    if 'upstream_calls' in report:
+        calls = ', '.join(f"{service} {counts['requests']} ({counts['errors']} failed)"
+                          for service, counts in report['upstream_calls'].items() if counts['requests'])
+        lines.append(f"  upstream    {calls or 'none'}")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    import argparse
+    import logging
+
+    parser = argparse.ArgumentParser(description='Load test the CTAS APIs against a local upstream stub')
+    parser.add_argument('--scenario', nargs='+', choices=SCENARIOS + ('all',), default=['all'])
+    parser.add_argument('--endpoint', choices=sorted(ENDPOINTS), default='alert')
+    parser.add_argument('--url', help='Base URL of a running server (default: in-process)')
+    parser.add_argument('--stub-url', help='Upstream stub used by that server, for upstream call counts')
+    parser.add_argument('--upstream', choices=('open_meteo', 'openweather'), default='open_meteo',
+                        help='Weather service used in-process (openweather sets a stub API key)')
+    parser.add_argument('--rate', type=float, default=20.0, help='steady: requests per second')
+    parser.add_argument('--duration', type=float, default=5.0, help='steady: seconds')
+    parser.add_argument('--burst-size', type=int, default=50)
+    parser.add_argument('--waves', type=int, default=5)
+    parser.add_argument('--interval', type=float, default=1.0, help='burst: seconds between wave starts')
+    parser.add_argument('--requests', type=int, default=200, help='distinct: total requests')
+    parser.add_argument('--concurrency', type=int, default=16, help='distinct: requests in flight')
+    parser.add_argument('--latency-ms', type=float, default=50.0, help='Embedded stub latency')
+    parser.add_argument('--jitter-ms', type=float, default=20.0, help='Embedded stub extra random latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Embedded stub failure fraction')
+    parser.add_argument('--stub-config', help='JSON settings file for the embedded stub (see upstream_stub.py)')
+    parser.add_argument('--json', help='Write the reports to this file')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    scenarios = list(SCENARIOS) if 'all' in args.scenario else args.scenario
+    options = {'rate': args.rate, 'duration': args.duration, 'burst_size': args.burst_size, 'waves': args.waves,
+               'interval': args.interval, 'requests': args.requests, 'concurrency': args.concurrency}
+
+    if args.url:
+        target = HttpTarget(args.url, max_workers=max(args.concurrency, args.burst_size, 16))
+        stub_counts = (lambda: remote_stub_counts(args.stub_url)) if args.stub_url else None
+        try:
+            reports = [run_scenario(target, scenario, args.endpoint, stub_counts=stub_counts, **options)
+                       for scenario in scenarios]
+        finally:
+            target.close()
+    else:
+        stub_config: Dict[str, Any] = {}
+        if args.stub_config:
+            with open(args.stub_config) as f:
+                stub_config = json.load(f)
+        stub_config['default'] = dict(stub_config.get('default', {}), latency_ms=args.latency_ms,
+                                      jitter_ms=args.jitter_ms, error_rate=args.error_rate)
+        reports = run_in_process(scenarios, args.endpoint, stub_config, upstream=args.upstream, **options)
+
+    for report in reports:
+        print(format_report(report))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(reports, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
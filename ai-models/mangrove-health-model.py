@@ -3,10 +3,62 @@ import pandas as pd
 from sklearn.ensemble import RandomForestRegressor, IsolationForest
 from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
-import joblib
+from model_store import dump_artifact, load_file
+from metrics import timed
 import logging
 from datetime import datetime, timedelta
 
+HEALTH_CATEGORIES = ('critical', 'poor', 'fair', 'good', 'excellent')
+HEALTH_CATEGORY_BOUNDS = (20, 40, 60, 80)  # lower bounds of poor, fair, good, excellent
+THREAT_SEVERITIES = ('none', 'medium', 'high')
+THREAT_LEVELS = ('low', 'medium', 'high', 'critical')
+# (type, feature, value when missing, (low, high) medium bounds, (low, high) high bounds, description):
+# a value below low or above high raises the threat to that severity
+THREAT_RULES = (
+    ('vegetation_stress', 'ndvi', 0, (0.5, np.inf), (0.3, np.inf),
+     'Low vegetation index indicates plant stress'),
+    ('water_pollution', 'turbidity', 0, (-np.inf, 20), (-np.inf, 40),
+     'High water turbidity indicates pollution'),
+    ('human_pressure', 'human_activity_index', 0, (-np.inf, 70), (-np.inf, 85),
+     'High human activity pressure'),
+    ('temperature_stress', 'water_temp', 27, (22, 32), (20, 34),
+     'Water temperature outside optimal range'),
+)
+THREAT_TYPES = tuple(rule[0] for rule in THREAT_RULES)
+# Range checks behind calculate_confidence
+CONFIDENCE_RANGES = {'ndvi': (0, 1), 'water_temp': (20, 35), 'salinity': (20, 50)}
+RASTER_TILE_SIZE = 512
+
+
+def threat_severity(values):
+    """Severity codes (0 none, 1 medium, 2 high) of each THREAT_RULES threat, shaped (n, threats)
+
+    `values` maps each rule's feature to an array (or scalar); NaN raises no threat.
+    """
+    columns = []
+    for _, feature, _, (low, high), (severe_low, severe_high), _ in THREAT_RULES:
+        x = np.asarray(values[feature], dtype=np.float64)
+        medium = (x < low) | (x > high)
+        severe = (x < severe_low) | (x > severe_high)
+        columns.append(np.where(severe, 2, np.where(medium, 1, 0)).astype(np.int8))
+    return np.stack(np.broadcast_arrays(*columns), axis=-1)
+
+
+def overall_threat_level(severity):
+    """calculate_overall_threat_level over the last axis of severity codes (index into THREAT_LEVELS)"""
+    high = (severity == 2).sum(axis=-1)
+    medium = (severity == 1).sum(axis=-1)
+    return np.select([high > 1, (high > 0) | (medium > 2), medium > 0], [3, 2, 1], 0).astype(np.int8)
+
+
+def health_category_codes(scores):
+    """categorize_health as indices into HEALTH_CATEGORIES (-1 where the score is NaN)"""
+    scores = np.asarray(scores, dtype=np.float64)
+    codes = np.searchsorted(HEALTH_CATEGORY_BOUNDS, scores, side='right').astype(np.int8)
+    codes[np.isnan(scores)] = -1
+    return codes
+
+
 class MangroveHealthModel:
     def __init__(self):
         self.health_model = RandomForestRegressor(n_estimators=100, random_state=42)
@@ -116,6 +168,7 @@ class MangroveHealthModel:
             'feature_importance': dict(zip(self.feature_names, self.health_model.feature_importances_))
         }
 
+    @timed('mangrove_health.predict_health')
     def predict_health(self, features):
         """Predict mangrove health score"""
         if not self.is_trained:
@@ -138,6 +191,111 @@ class MangroveHealthModel:
             'timestamp': datetime.now().isoformat()
         }
 
+    @timed('mangrove_health.score_batch')
+    def score_batch(self, data):
+        """Score every row of a DataFrame or (n, features) array in one pass
+
+        The scaler, the health forest and the anomaly forest each run once over
+        all rows. Returns compact arrays:
+
+            health_score     float32, clipped to 0-100
+            health_category  int8 index into HEALTH_CATEGORIES
+            anomaly_score    float32 IsolationForest decision (< 0 is anomalous)
+            is_anomaly       bool
+            confidence       float32 (calculate_confidence per row)
+            threats          int8 (n, len(THREAT_TYPES)) severity, index into THREAT_SEVERITIES
+            threat_level     int8 index into THREAT_LEVELS
+
+        Rows with a missing (NaN) feature are not scored: their score and
+        anomaly score are NaN, their category -1, and only their threats and
+        confidence are filled in.
+        """
+        if not self.is_trained:
+            raise ValueError("Model must be trained before making predictions")
+        X = np.asarray(self.preprocess_data(data), dtype=np.float64)
+        n = len(X)
+        valid = np.isfinite(X).all(axis=1)
+        health = np.full(n, np.nan, dtype=np.float32)
+        anomaly_score = np.full(n, np.nan, dtype=np.float32)
+        if valid.any():
+            X_scaled = self.scaler.transform(X[valid] if not valid.all() else X)
+            health[valid] = np.clip(self.health_model.predict(X_scaled), 0, 100)
+            anomaly_score[valid] = self.anomaly_detector.decision_function(X_scaled)
+        columns = {feature: X[:, i] for i, feature in enumerate(self.feature_names)}
+        threats = threat_severity({rule[1]: columns.get(rule[1], rule[2]) for rule in THREAT_RULES}).reshape(n, -1)
+        return {
+            'health_score': health,
+            'health_category': health_category_codes(health),
+            'anomaly_score': anomaly_score,
+            'is_anomaly': anomaly_score < 0,
+            'confidence': self._confidence_batch(X),
+            'threats': threats,
+            'threat_level': overall_threat_level(threats),
+        }
+
+    def _confidence_batch(self, X):
+        present = np.isfinite(X)
+        completeness = present.mean(axis=1)
+        checks = np.zeros(len(X))
+        passed = np.zeros(len(X))
+        for feature, (low, high) in CONFIDENCE_RANGES.items():
+            if feature in self.feature_names:
+                x = X[:, self.feature_names.index(feature)]
+                checks += np.isfinite(x)
+                passed += (x >= low) & (x <= high)
+        quality = passed / np.maximum(1, checks)
+        return np.minimum(100, (completeness * 0.6 + quality * 0.4) * 100).astype(np.float32)
+
+    def score_raster(self, bands, tile_size=RASTER_TILE_SIZE):
+        """Score a 2-D grid of feature bands, tile by tile
+
+        `bands` is an array shaped (features, height, width) in feature_names
+        order, or a mapping of feature name to a (height, width) array or a
+        scalar applied to the whole grid (e.g. one rainfall value for the
+        scene). NaN marks nodata cells (cloud, land, outside the swath). Each
+        tile_size x tile_size tile is flattened and scored by score_batch in
+        one pass. The result has the score_batch keys reshaped to (height,
+        width), with threats as (height, width, threats).
+        """
+        if isinstance(bands, dict):
+            missing = [feature for feature in self.feature_names if feature not in bands]
+            if missing:
+                raise ValueError(f"Missing raster bands: {', '.join(missing)}")
+            grids = [np.asarray(bands[feature], dtype=np.float64) for feature in self.feature_names]
+            shape = np.broadcast_shapes(*(grid.shape for grid in grids))
+            grids = [np.broadcast_to(grid, shape) for grid in grids]
+        else:
+            bands = np.asarray(bands, dtype=np.float64)
+            if bands.ndim != 3 or len(bands) != len(self.feature_names):
+                raise ValueError(f"Raster must be shaped ({len(self.feature_names)}, height, width)")
+            grids, shape = list(bands), bands.shape[1:]
+        if len(shape) != 2:
+            raise ValueError("Raster bands must be 2-D")
+
+        height, width = shape
+        result = {
+            'health_score': np.empty(shape, dtype=np.float32),
+            'health_category': np.empty(shape, dtype=np.int8),
+            'anomaly_score': np.empty(shape, dtype=np.float32),
+            'is_anomaly': np.empty(shape, dtype=bool),
+            'confidence': np.empty(shape, dtype=np.float32),
+            'threats': np.empty(shape + (len(THREAT_TYPES),), dtype=np.int8),
+            'threat_level': np.empty(shape, dtype=np.int8),
+        }
+        for top in range(0, height, tile_size):
+            for left in range(0, width, tile_size):
+                window = (slice(top, top + tile_size), slice(left, left + tile_size))
+                tile = np.stack([grid[window] for grid in grids], axis=-1)
+                scores = self.score_batch(tile.reshape(-1, len(grids)))
+                for key, values in scores.items():
+                    result[key][window] = values.reshape(tile.shape[:2] + values.shape[1:])
+        return result
+
+    def score_tiles(self, tiles, tile_size=RASTER_TILE_SIZE):
+        """score_raster over (tile_id, bands) pairs, yielding (tile_id, result) as each tile finishes"""
+        for tile_id, bands in tiles:
+            yield tile_id, self.score_raster(bands, tile_size)
+
     def categorize_health(self, score):
         """Categorize health score into levels"""
         if score >= 80:
@@ -184,7 +342,29 @@ class MangroveHealthModel:
         return 75  # Default confidence
 
     def assess_threats(self, features, health_score=None):
-        """Assess potential threats to mangrove health"""
+        """Assess potential threats to mangrove health
+
+        For a DataFrame, returns one assessment per row (flags computed for all
+        rows at once; health scores from score_batch unless given).
+        """
+        if isinstance(features, pd.DataFrame):
+            if health_score is None:
+                health_score = self.score_batch(features)['health_score']
+            health_scores = np.broadcast_to(np.asarray(health_score, dtype=np.float64), (len(features),))
+            values = {rule[1]: features[rule[1]].to_numpy(np.float64) if rule[1] in features else rule[2]
+                      for rule in THREAT_RULES}
+            severity = threat_severity(values).reshape(len(features), -1)
+            levels = overall_threat_level(severity)
+            assessments = []
+            for row, level, score in zip(severity, levels, health_scores.tolist()):
+                threats = self._threat_list(row)
+                assessments.append({
+                    'threats': threats,
+                    'overall_threat_level': THREAT_LEVELS[level],
+                    'recommendations': self.generate_recommendations(threats, score)
+                })
+            return assessments
+
         if health_score is None:
             prediction = self.predict_health(features)
             health_score = prediction['health_score']
@@ -193,34 +373,8 @@ class MangroveHealthModel:
         
         if isinstance(features, dict):
             # Check various threat indicators
-            if features.get('ndvi', 0) < 0.5:
-                threats.append({
-                    'type': 'vegetation_stress',
-                    'severity': 'high' if features['ndvi'] < 0.3 else 'medium',
-                    'description': 'Low vegetation index indicates plant stress'
-                })
-            
-            if features.get('turbidity', 0) > 20:
-                threats.append({
-                    'type': 'water_pollution',
-                    'severity': 'high' if features['turbidity'] > 40 else 'medium',
-                    'description': 'High water turbidity indicates pollution'
-                })
-            
-            if features.get('human_activity_index', 0) > 70:
-                threats.append({
-                    'type': 'human_pressure',
-                    'severity': 'high' if features['human_activity_index'] > 85 else 'medium',
-                    'description': 'High human activity pressure'
-                })
-            
-            temp = features.get('water_temp', 27)
-            if temp < 22 or temp > 32:
-                threats.append({
-                    'type': 'temperature_stress',
-                    'severity': 'high' if temp < 20 or temp > 34 else 'medium',
-                    'description': 'Water temperature outside optimal range'
-                })
+            values = {rule[1]: features.get(rule[1], rule[2]) for rule in THREAT_RULES}
+            threats = self._threat_list(threat_severity(values).reshape(-1))
         
         return {
             'threats': threats,
@@ -228,6 +382,10 @@ class MangroveHealthModel:
             'recommendations': self.generate_recommendations(threats, health_score)
         }
 
+    def _threat_list(self, severity):
+        return [{'type': threat_type, 'severity': THREAT_SEVERITIES[code], 'description': rule[5]}
+                for threat_type, rule, code in zip(THREAT_TYPES, THREAT_RULES, severity.tolist()) if code]
+
     def calculate_overall_threat_level(self, threats):
         """Calculate overall threat level"""
         if not threats:
@@ -269,8 +427,8 @@ class MangroveHealthModel:
         
         return list(set(recommendations))  # Remove duplicates
 
-    def save_model(self, filepath):
-        """Save trained model to file"""
+    def save_model(self, filepath, metrics=None):
+        """Save trained model to file (uncompressed, with a manifest sidecar)"""
         if not self.is_trained:
             raise ValueError("Model must be trained before saving")
         
@@ -282,12 +440,12 @@ class MangroveHealthModel:
             'is_trained': self.is_trained
         }
         
-        joblib.dump(model_data, filepath)
+        dump_artifact(model_data, filepath, feature_names=self.feature_names, metrics=metrics)
         self.logger.info(f"Model saved to {filepath}")
 
-    def load_model(self, filepath):
-        """Load trained model from file"""
-        model_data = joblib.load(filepath)
+    def load_model(self, filepath, mmap_mode='r'):
+        """Load trained model from file (memory-mapped when the file is uncompressed)"""
+        model_data = load_file(filepath, mmap_mode=mmap_mode)
         
         self.health_model = model_data['health_model']
         self.anomaly_detector = model_data['anomaly_detector']
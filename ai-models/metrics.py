@@ -0,0 +1,344 @@
+"""
+CTAS Metrics
+Prometheus text-format metrics for the API servers, without extra dependencies
+
+instrument(app, name) adds a /metrics endpoint and per-route request latency
+histograms to a FastAPI app. Hot paths are timed with the @timed decorator
+(sync or async functions) or the Histogram.time() context manager. Values that
+already live elsewhere (prediction cache hit rates, micro-batch queue depth,
+model load times, process RSS) are read when /metrics is scraped.
+
+All metrics are process-wide, so apps mounted in one process share them; the
+`app` label tells them apart.
+"""
+
+import functools
+import inspect
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4'
+# Seconds; covers sub-millisecond cache hits up to slow upstream calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PROCESS_STARTED = time.time()
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[Any], extra: str = '') -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _number(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 collect: Optional[Callable[[], Dict[Tuple, float]]] = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple, Any] = {}
+
+    def _current(self) -> Dict[Tuple, Any]:
+        """Stored values merged with those computed by `collect` at scrape time"""
+        with self._lock:
+            values = dict(self._values)
+        if self.collect is not None:
+            try:
+                values.update(self.collect())
+            except Exception as e:
+                logger.warning(f"Could not collect {self.name}: {e}")
+        return values
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Incremented directly, or read at scrape time from `collect` returning {label tuple: total}"""
+    kind = 'counter'
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}_total{_labels(self.labelnames, key)} {_number(value)}"
+                for key, value in sorted(self._current().items())]
+
+
+class Gauge(_Metric):
+    """Set directly, or computed at scrape time by `collect` returning {label tuple: value}"""
+    kind = 'gauge'
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}"
+                for key, value in sorted(self._current().items()) if value is not None]
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            counts = state[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, ([*state[0]], state[1], state[2])) for key, state in self._values.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def add(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.header())
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = (),
+            collect: Optional[Callable[[], Dict[Tuple, float]]] = None) -> Counter:
+    return REGISTRY.add(Counter(name, documentation, labelnames, collect))
+
+
+def gauge(name: str, documentation: str, labelnames: Sequence[str] = (),
+          collect: Optional[Callable[[], Dict[Tuple, float]]] = None) -> Gauge:
+    return REGISTRY.add(Gauge(name, documentation, labelnames, collect))
+
+
+def histogram(name: str, documentation: str, labelnames: Sequence[str] = (),
+              buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    return REGISTRY.add(Histogram(name, documentation, labelnames, buckets))
+
+
+REQUEST_SECONDS = histogram('ctas_http_request_duration_seconds', 'HTTP request latency by route',
+                            ('app', 'method', 'route', 'status'))
+FUNCTION_SECONDS = histogram('ctas_function_duration_seconds', 'Duration of instrumented hot-path functions',
+                             ('function', 'outcome'))
+INFERENCE_SECONDS = histogram('ctas_model_inference_seconds', 'Model call duration per (micro-)batch', ('model',))
+BATCH_ROWS = histogram('ctas_model_batch_rows', 'Rows scored per model call', ('model',),
+                       buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256))
+UPSTREAM_SECONDS = histogram('ctas_upstream_request_duration_seconds', 'Latency of external API calls',
+                             ('service', 'outcome'))
+UPSTREAM_CACHE = counter('ctas_upstream_cache_lookups', 'Live-weather TTL cache lookups', ('service', 'result'))
+CSV_LOAD_SECONDS = histogram('ctas_csv_load_seconds', 'CSV / feature store read time', ('file',))
+
+
+def timed(name: Optional[str] = None, metric: Histogram = FUNCTION_SECONDS):
+    """Decorator recording a function's duration (and whether it raised) under `function=name`"""
+    def decorate(fn):
+        label = name or fn.__qualname__
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                outcome = 'error'
+                try:
+                    result = await fn(*args, **kwargs)
+                    outcome = 'ok'
+                    return result
+                finally:
+                    metric.observe(time.perf_counter() - start, function=label, outcome=outcome)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            outcome = 'error'
+            try:
+                result = fn(*args, **kwargs)
+                outcome = 'ok'
+                return result
+            finally:
+                metric.observe(time.perf_counter() - start, function=label, outcome=outcome)
+        return wrapper
+    return decorate
+
+
+def read_csv(path, *args, **kwargs):
+    """pandas.read_csv, recording the load time under ctas_csv_load_seconds{file=basename}"""
+    import pandas as pd
+    with CSV_LOAD_SECONDS.time(file=os.path.basename(str(path))):
+        return pd.read_csv(path, *args, **kwargs)
+
+
+def uptime_seconds() -> float:
+    return time.time() - PROCESS_STARTED
+
+
+def resident_memory_bytes() -> Optional[int]:
+    """Current RSS of this process (psutil if installed, else /proc, else peak RSS)"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except Exception:
+        pass
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except Exception:
+        pass
+    try:
+        import resource
+        import sys
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+    except Exception:
+        return None
+
+
+def _collect_cache(field: str) -> Dict[Tuple, float]:
+    from prediction_cache import cache_stats
+    return {(name,): stats[field] for name, stats in cache_stats().items()}
+
+
+def _collect_batcher(field: str) -> Dict[Tuple, float]:
+    from micro_batcher import batcher_stats
+    return {(name,): stats[field] for name, stats in batcher_stats().items()}
+
+
+def _collect_load_times() -> Dict[Tuple, float]:
+    from model_store import load_time_report
+    return {(path,): seconds for path, seconds in load_time_report().items()}
+
+
+gauge('ctas_process_resident_memory_bytes', 'Resident set size of the server process',
+      collect=lambda: {(): resident_memory_bytes()})
+gauge('ctas_process_uptime_seconds', 'Seconds since the metrics module was imported',
+      collect=lambda: {(): round(uptime_seconds(), 3)})
+gauge('ctas_prediction_cache_hit_ratio', 'Prediction cache hits / lookups', ('model',),
+      collect=lambda: _collect_cache('hit_rate'))
+counter('ctas_prediction_cache_hits', 'Prediction cache hits', ('model',),
+        collect=lambda: _collect_cache('hits'))
+counter('ctas_prediction_cache_misses', 'Prediction cache misses', ('model',),
+        collect=lambda: _collect_cache('misses'))
+gauge('ctas_prediction_cache_entries', 'Entries held by each prediction cache', ('model',),
+      collect=lambda: _collect_cache('size'))
+gauge('ctas_batch_queue_depth', 'Rows waiting for their micro-batch to run', ('model',),
+      collect=lambda: _collect_batcher('queue_depth'))
+gauge('ctas_batch_in_flight', 'Micro-batches submitted to the executor and not finished', ('model',),
+      collect=lambda: _collect_batcher('in_flight'))
+gauge('ctas_model_load_seconds', 'Time taken to load each model file', ('file',), collect=_collect_load_times)
+
+
+class MetricsMiddleware:
+    """ASGI middleware observing request latency labelled by route template (not raw path)"""
+
+    def __init__(self, app, app_name: str):
+        self.app = app
+        self.app_name = app_name
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = {'code': 500}
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                status['code'] = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get('route')
+            template = getattr(route, 'path', None) or 'unmatched'
+            REQUEST_SECONDS.observe(time.perf_counter() - start, app=self.app_name, method=scope.get('method', ''),
+                                    route=template, status=status['code'])
+
+
+def instrument(app, app_name: str, path: str = '/metrics'):
+    """Add request latency metrics and a Prometheus scrape endpoint to a FastAPI app"""
+    from fastapi.responses import Response
+
+    app.add_middleware(MetricsMiddleware, app_name=app_name)
+
+    @app.get(path, include_in_schema=False)
+    def metrics_endpoint():
+        return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+    return app
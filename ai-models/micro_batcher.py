@@ -0,0 +1,209 @@
+"""
+CTAS Micro-Batching
+Coalesce concurrent single-row predictions into one vectorized model call
+
+Handlers `await batcher.submit(model, row)` instead of calling the model. The
+first row to arrive opens a batching window of `max_wait_ms`; rows submitted
+for the same model object during the window join it, and the batch is flushed
+when the window closes or `max_batch_size` rows are waiting. One call of the
+batch function runs on the whole batch in a worker thread (so the event loop
+keeps accepting requests meanwhile) and each awaiting coroutine receives its
+own row of the result.
+
+Rows are grouped by model identity, so a request that took its model before a
+registry swap is never scored by the replacement. Latency added per request is
+bounded by the window; under concurrency many requests share one model call.
+
+Defaults come from CTAS_BATCH_MAX_WAIT_MS and CTAS_BATCH_MAX_SIZE; a max size
+of 1 turns batching off (rows are scored one by one, inline).
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from fast_forest import accelerate, supports
+from metrics import BATCH_ROWS, INFERENCE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+MAX_WAIT_ENV = 'CTAS_BATCH_MAX_WAIT_MS'
+MAX_SIZE_ENV = 'CTAS_BATCH_MAX_SIZE'
+DEFAULT_MAX_WAIT_MS = 2.0
+DEFAULT_MAX_BATCH_SIZE = 64
+
+
+def _env_number(name: str, default, cast):
+    try:
+        return cast(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        logger.warning(f"Ignoring invalid {name}={os.environ.get(name)!r}; using {default}")
+        return default
+
+
+class _Batch:
+    __slots__ = ('model', 'rows', 'futures', 'opened', 'timer')
+
+    def __init__(self, model: Any):
+        self.model = model
+        self.rows: List[Any] = []
+        self.futures: List[asyncio.Future] = []
+        self.opened = time.perf_counter()
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class MicroBatcher:
+    """Collect rows per model for up to max_wait_ms and score them with one call of fn(model, rows)
+
+    fn must return a sequence with one result per row, in order.
+    """
+
+    def __init__(self, fn: Callable[[Any, List[Any]], Sequence[Any]], name: str = 'batch',
+                 max_batch_size: Optional[int] = None, max_wait_ms: Optional[float] = None):
+        self.fn = fn
+        self.name = name
+        self.max_batch_size = max(1, max_batch_size if max_batch_size is not None
+                                  else _env_number(MAX_SIZE_ENV, DEFAULT_MAX_BATCH_SIZE, int))
+        self.max_wait_ms = max(0.0, max_wait_ms if max_wait_ms is not None
+                               else _env_number(MAX_WAIT_ENV, DEFAULT_MAX_WAIT_MS, float))
+        self._pending: Dict[int, _Batch] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self._counters = {'rows': 0, 'batches': 0, 'max_batch': 0, 'wait_seconds': 0.0, 'run_seconds': 0.0}
+        self._in_flight = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """Rows waiting for their batch to be flushed"""
+        return sum(len(batch.rows) for batch in list(self._pending.values()))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+        batches = counters['batches']
+        return {
+            'name': self.name,
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait_ms,
+            'rows': counters['rows'],
+            'batches': batches,
+            'mean_batch_size': round(counters['rows'] / batches, 2) if batches else 0.0,
+            'max_batch': counters['max_batch'],
+            'mean_wait_ms': round(1000 * counters['wait_seconds'] / batches, 3) if batches else 0.0,
+            'mean_run_ms': round(1000 * counters['run_seconds'] / batches, 3) if batches else 0.0,
+            'queue_depth': self.queue_depth,
+            'in_flight': self._in_flight,
+        }
+
+    def _record(self, n_rows: int, waited: float, ran: float):
+        with self._lock:
+            self._counters['rows'] += n_rows
+            self._counters['batches'] += 1
+            self._counters['max_batch'] = max(self._counters['max_batch'], n_rows)
+            self._counters['wait_seconds'] += waited
+            self._counters['run_seconds'] += ran
+        INFERENCE_SECONDS.observe(ran, model=self.name)
+        BATCH_ROWS.observe(n_rows, model=self.name)
+
+    async def submit(self, model: Any, row: Any) -> Any:
+        """Result of fn(model, [..., row, ...]) for this row"""
+        if self.max_batch_size == 1:
+            start = time.perf_counter()
+            result = self.fn(model, [row])[0]
+            self._record(1, 0.0, time.perf_counter() - start)
+            return result
+
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # A new event loop (server restart, tests): batches from the old one can never flush
+            self._loop = loop
+            self._pending = {}
+        key = id(model)
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = self._pending[key] = _Batch(model)
+            batch.timer = loop.call_later(self.max_wait_ms / 1000.0, self._flush, key, batch)
+        future = loop.create_future()
+        batch.rows.append(row)
+        batch.futures.append(future)
+        if len(batch.rows) >= self.max_batch_size:
+            self._flush(key, batch)
+        return await future
+
+    def _flush(self, key: int, batch: _Batch):
+        if self._pending.get(key) is not batch:
+            return
+        del self._pending[key]
+        if batch.timer is not None:
+            batch.timer.cancel()
+        asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch: _Batch):
+        waited = time.perf_counter() - batch.opened
+        start = time.perf_counter()
+        self._in_flight += 1
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(None, self.fn, batch.model, batch.rows)
+            if len(results) != len(batch.rows):
+                raise RuntimeError(f"{self.name}: batch function returned {len(results)} results "
+                                   f"for {len(batch.rows)} rows")
+        except Exception as e:
+            for future in batch.futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._in_flight -= 1
+            self._record(len(batch.rows), waited, time.perf_counter() - start)
+        for future, result in zip(batch.futures, results):
+            if not future.done():
+                future.set_result(result)
+
+
+def predict_with_proba(model: Any, rows: List[Any]) -> List[Any]:
+    """(prediction, class probabilities) per row from a single predict_proba call where possible"""
+    X = np.asarray(rows, dtype=np.float64)
+    fast = accelerate(model)
+    proba = fast.predict_proba(X)
+    if supports(model):
+        # Forest classifiers predict the arg-max class of predict_proba
+        predictions = model.classes_.take(np.argmax(proba, axis=1), axis=0)
+    else:
+        predictions = fast.predict(X)
+    return list(zip(predictions, proba))
+
+
+def predict_rows(model: Any, rows: List[Any]) -> np.ndarray:
+    """model.predict on stacked rows"""
+    return accelerate(model).predict(np.asarray(rows, dtype=np.float64))
+
+
+def predict_threats(model: Any, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Coastal threat predictions for feature dicts (vectorized when the model supports it)"""
+    if hasattr(model, 'predict_threats'):
+        return model.predict_threats(rows)
+    return [model.predict_threat(row) for row in rows]
+
+
+_batchers: Dict[str, MicroBatcher] = {}
+_batchers_lock = threading.Lock()
+
+
+def get_batcher(name: str, fn: Callable[[Any, List[Any]], Sequence[Any]]) -> MicroBatcher:
+    """Process-wide batcher for `name` (created with the environment defaults on first use)"""
+    with _batchers_lock:
+        batcher = _batchers.get(name)
+        if batcher is None:
+            batcher = _batchers[name] = MicroBatcher(fn, name=name)
+        return batcher
+
+
+def batcher_stats() -> Dict[str, Dict[str, Any]]:
+    with _batchers_lock:
+        batchers = list(_batchers.values())
+    return {batcher.name: batcher.stats() for batcher in batchers}
@@ -0,0 +1,457 @@
+"""
+CTAS Model Registry
+Process-wide, lazily materialized models shared by every API server in ai-models/
+
+Models are registered with a zero-argument factory (or a file path). Nothing is
+imported or loaded until the first get(); concurrent first calls wait on a
+per-model lock so each model is built exactly once. File-backed models are
+deduplicated by resolved path and content hash, so two apps (or two names)
+pointing at the same pickle share one object in memory.
+
+swap()/reload() replace a model atomically: get() hands out a reference, so
+requests already running keep the object they started with while new requests
+see the new version. Listeners registered with on_swap() are told about every
+replacement (e.g. to invalidate prediction caches).
+
+A failed load is remembered, and get() fails fast with the recorded error
+until a backoff has passed (CTAS_MODEL_RETRY_SECONDS, default 30, doubling
+with each consecutive failure up to 10 minutes); the next get() after that
+tries the factory again, so a model whose artifact appears later recovers
+without a restart.
+
+File-backed models also pick up new versions published by other processes
+(e.g. `train_alert_model.py --incremental`): at most every
+CTAS_MODEL_REFRESH_SECONDS (default 10, 0 disables) a get() checks in a
+background thread whether the file the entry would load has changed (a new
+store LATEST or a rewritten pickle) and, if so, reloads and swaps it in. The
+request that noticed keeps the model it already had.
+"""
+
+import importlib
+import importlib.util
+import logging
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+if HERE not in sys.path:
+    sys.path.insert(0, HERE)
+
+RETRY_ENV = 'CTAS_MODEL_RETRY_SECONDS'
+DEFAULT_RETRY_SECONDS = 30.0
+MAX_RETRY_SECONDS = 600.0
+REFRESH_ENV = 'CTAS_MODEL_REFRESH_SECONDS'
+DEFAULT_REFRESH_SECONDS = 10.0
+
+
+def _env_seconds(env: str, default: float) -> float:
+    try:
+        return max(0.0, float(os.environ.get(env, default)))
+    except ValueError:
+        logger.warning(f"Ignoring invalid {env}={os.environ.get(env)!r}; using {default}")
+        return default
+
+
+def _retry_seconds() -> float:
+    return _env_seconds(RETRY_ENV, DEFAULT_RETRY_SECONDS)
+
+
+def _refresh_seconds() -> float:
+    return _env_seconds(REFRESH_ENV, DEFAULT_REFRESH_SECONDS)
+
+
+def module_available(module_name: str) -> bool:
+    """Check whether a model module can be imported, without importing it"""
+    if os.path.isfile(os.path.join(HERE, f"{module_name}.py")):
+        return True
+    try:
+        return importlib.util.find_spec(module_name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def import_model_module(module_name: str):
+    """Import a model module from ai-models/, including hyphenated file names"""
+    filename = os.path.join(HERE, f"{module_name}.py")
+    if '-' not in module_name:
+        return importlib.import_module(module_name)
+    spec = importlib.util.spec_from_file_location(module_name.replace('-', '_'), filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def class_factory(module_name: str, class_name: str, artifact: Optional[str] = None) -> Callable[[], Any]:
+    """Factory that imports module_name and instantiates class_name on first use
+
+    With `artifact`, the LATEST published version of that store model is loaded into the instance.
+    """
+    def factory():
+        model = getattr(import_model_module(module_name), class_name)()
+        if artifact is not None and hasattr(model, 'load_model'):
+            from model_store import artifact_path
+            path = artifact_path(artifact)
+            if path is not None:
+                model.load_model(path)
+        return model
+    factory.__qualname__ = f"{module_name}.{class_name}"
+    return factory
+
+
+def model_nbytes(obj: Any) -> Dict[str, int]:
+    """Approximate memory held by a model: numpy buffers (resident vs memory-mapped) plus object overhead"""
+    import numpy as np
+
+    totals = {'resident_bytes': 0, 'mapped_bytes': 0}
+    seen = set()
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen or item is None:
+            continue
+        seen.add(id(item))
+        if isinstance(item, np.ndarray):
+            base = item
+            while isinstance(base, np.ndarray) and not isinstance(base, np.memmap) and base.base is not None:
+                base = base.base
+            key = 'mapped_bytes' if isinstance(base, (np.memmap, memoryview)) or type(base).__name__ == 'mmap' else 'resident_bytes'
+            totals[key] += item.nbytes
+            if item.dtype == object:
+                stack.extend(item.ravel().tolist())
+            continue
+        if isinstance(item, (str, bytes, int, float, bool)):
+            totals['resident_bytes'] += sys.getsizeof(item)
+            continue
+        totals['resident_bytes'] += sys.getsizeof(item, 0)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+        elif hasattr(item, '__dict__'):
+            stack.append(vars(item))
+        elif type(item).__module__.startswith('sklearn'):
+            # Cython objects such as sklearn's Tree expose their arrays only through pickling state
+            try:
+                state = item.__getstate__()
+            except Exception:
+                state = None
+            if isinstance(state, dict):
+                stack.append(state)
+    return totals
+
+
+class ModelEntry:
+    __slots__ = ('name', 'factory', 'lock', 'model', 'status', 'error', 'loaded_at', 'load_seconds',
+                 'source', 'digest', 'version', 'footprint', 'failures', 'retry_at', 'watch', 'token',
+                 'check_at')
+
+    def __init__(self, name: str, factory: Callable[[], Any], source: Optional[str] = None,
+                 watch: Optional[Callable[[], Any]] = None):
+        self.name = name
+        self.factory = factory
+        self.lock = threading.Lock()
+        self.model = None
+        self.status = 'registered'
+        self.error = None
+        self.loaded_at = None
+        self.load_seconds = None
+        self.source = source
+        self.digest = None
+        self.version = 0
+        self.footprint = None
+        self.failures = 0
+        self.retry_at = None
+        # watch() identifies what the factory would load now; token is its value at the last load
+        self.watch = watch
+        self.token = None
+        self.check_at = 0.0
+
+    def describe(self) -> Dict[str, Any]:
+        info = {'status': self.status}
+        if self.source is not None:
+            info['source'] = self.source
+        if self.loaded_at is not None:
+            info['version'] = self.version
+            info['loaded_at'] = self.loaded_at
+            info['load_seconds'] = round(self.load_seconds, 4)
+        if self.digest is not None:
+            info['sha256'] = self.digest[:16]
+        if self.footprint is not None:
+            info.update(self.footprint)
+        if self.error is not None:
+            info['error'] = self.error
+        if self.status == 'error' and self.retry_at is not None:
+            info['retry_in_seconds'] = round(max(0.0, self.retry_at - time.monotonic()), 1)
+        return info
+
+
+class ModelRegistry:
+    def __init__(self, retry_seconds: Optional[float] = None, refresh_seconds: Optional[float] = None):
+        self.retry_seconds = retry_seconds if retry_seconds is not None else _retry_seconds()
+        self.refresh_seconds = refresh_seconds if refresh_seconds is not None else _refresh_seconds()
+        self._entries: Dict[str, ModelEntry] = {}
+        self._lock = threading.Lock()
+        self._files_lock = threading.Lock()
+        self._digests: Dict[tuple, str] = {}
+        self._shared: Dict[str, Any] = {}
+        self._listeners: List[Callable[[str, int], None]] = []
+        self._prewarm_thread: Optional[threading.Thread] = None
+
+    def register(self, name: str, factory: Callable[[], Any], source: Optional[str] = None,
+                 watch: Optional[Callable[[], Any]] = None) -> None:
+        """Register (or replace) a lazily built model
+
+        `watch`, if given, returns a value that changes whenever the factory would build
+        a different model; a change is picked up by the periodic refresh check.
+        """
+        with self._lock:
+            self._entries[name] = ModelEntry(name, factory, source, watch)
+
+    def register_file(self, name: str, path: str, loader: Optional[Callable[[str], Any]] = None) -> None:
+        """Register a model loaded from `path` (a published store artifact of the same name wins)
+
+        Registering the same name and path again is a no-op, so several apps can declare
+        the models they use without reloading them.
+        """
+        source = os.path.abspath(path)
+        entry = self._entries.get(name)
+        if entry is not None and entry.source == source:
+            return
+
+        def factory():
+            return self._load_shared(name, source, loader)
+        factory.__qualname__ = f"file:{os.path.basename(path)}"
+
+        def watch():
+            from model_store import resolve_model_file
+            resolved = os.path.realpath(resolve_model_file(source))
+            stat = os.stat(resolved)
+            return resolved, stat.st_mtime_ns, stat.st_size
+        self.register(name, factory, source, watch)
+
+    def _load_shared(self, name: str, path: str, loader: Optional[Callable[[str], Any]]) -> Any:
+        from model_store import data_fingerprint, load_file, resolve_model_file
+
+        resolved = os.path.realpath(resolve_model_file(path))
+        stat = os.stat(resolved)
+        key = (resolved, stat.st_mtime_ns, stat.st_size)
+        with self._files_lock:
+            digest = self._digests.get(key)
+            if digest is None:
+                digest = data_fingerprint(resolved)
+                self._digests[key] = digest
+            model = self._shared.get(digest)
+            if model is None:
+                model = (loader or load_file)(resolved)
+                self._shared[digest] = model
+            else:
+                logger.info(f"Model '{name}' shares an already loaded copy of {os.path.basename(resolved)}")
+        self._entries[name].digest = digest
+        return model
+
+    def _prune_shared(self) -> None:
+        """Forget shared file loads no entry points at any more, so swapped-out models can be freed"""
+        live = {id(entry.model) for entry in self._entries.values() if entry.model is not None}
+        with self._files_lock:
+            for digest in [d for d, model in self._shared.items() if id(model) not in live]:
+                del self._shared[digest]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._entries
+
+    def names(self) -> List[str]:
+        return list(self._entries)
+
+    def is_loaded(self, name: str) -> bool:
+        entry = self._entries.get(name)
+        return entry is not None and entry.status == 'ready'
+
+    def get(self, name: str) -> Any:
+        """Return the model, building it on first use; raises KeyError/RuntimeError"""
+        entry = self._entries[name]
+        model = entry.model
+        if model is not None:
+            self._schedule_refresh(entry)
+            return model
+        return self.get_with_version(name)[0]
+
+    def get_with_version(self, name: str) -> Tuple[Any, int]:
+        """(model, version) read together, building the model on first use
+
+        Use this when the version labels results of the model (e.g. cache keys):
+        reading them separately could pair one model with a swapped-in version.
+        """
+        entry = self._entries[name]
+        with entry.lock:
+            if entry.model is not None:
+                self._schedule_refresh(entry)
+                return entry.model, entry.version
+            if entry.status == 'error' and time.monotonic() < entry.retry_at:
+                raise RuntimeError(f"Model '{name}' failed to load: {entry.error}")
+            entry.status = 'loading'
+            start = time.perf_counter()
+            try:
+                token = self._token(entry)
+                model = entry.factory()
+            except Exception as e:
+                entry.failures += 1
+                backoff = min(self.retry_seconds * 2 ** (entry.failures - 1), MAX_RETRY_SECONDS)
+                entry.retry_at = time.monotonic() + backoff
+                entry.status = 'error'
+                entry.error = str(e)
+                logger.warning(f"Model '{name}' failed to load (retrying after {backoff:.0f}s): {e}")
+                raise RuntimeError(f"Model '{name}' failed to load: {e}") from e
+            entry.failures = 0
+            entry.retry_at = None
+            entry.error = None
+            entry.token = token
+            entry.check_at = time.monotonic() + self.refresh_seconds
+            entry.load_seconds = time.perf_counter() - start
+            entry.footprint = model_nbytes(model)
+            entry.loaded_at = datetime.now()
+            entry.version += 1
+            entry.model = model
+            entry.status = 'ready'
+            logger.info(f"Model '{name}' loaded in {entry.load_seconds:.2f}s")
+            return model, entry.version
+
+    def peek(self, name: str) -> Any:
+        """Return the model if it is already built, without triggering a load"""
+        entry = self._entries.get(name)
+        return entry.model if entry is not None else None
+
+    def version(self, name: str) -> int:
+        """Monotonic counter bumped on every load or swap of `name` (0 = never loaded)"""
+        return self._entries[name].version
+
+    def on_swap(self, callback: Callable[[str, int], None]) -> None:
+        """Call callback(name, version) after a model is replaced"""
+        self._listeners.append(callback)
+
+    def swap(self, name: str, model: Any, digest: Optional[str] = None) -> int:
+        """Atomically point `name` at a new model object and return its version
+
+        In-flight requests hold the reference get() gave them and finish on the old model.
+        """
+        entry = self._entries[name]
+        footprint = model_nbytes(model)
+        with entry.lock:
+            entry.model = model
+            entry.digest = digest
+            entry.footprint = footprint
+            entry.loaded_at = datetime.now()
+            entry.load_seconds = entry.load_seconds or 0.0
+            entry.error = None
+            entry.failures = 0
+            entry.retry_at = None
+            entry.status = 'ready'
+            entry.version += 1
+            version = entry.version
+        self._prune_shared()
+        logger.info(f"Model '{name}' swapped to version {version}")
+        for callback in list(self._listeners):
+            try:
+                callback(name, version)
+            except Exception as e:
+                logger.warning(f"Swap listener failed for '{name}': {e}")
+        return version
+
+    def reload(self, name: str) -> int:
+        """Rebuild `name` from its factory (e.g. after a new artifact is published) and swap it in"""
+        entry = self._entries[name]
+        start = time.perf_counter()
+        token = self._token(entry)
+        model = entry.factory()
+        elapsed = time.perf_counter() - start
+        version = self.swap(name, model, digest=entry.digest)
+        entry.token = token
+        entry.load_seconds = elapsed
+        return version
+
+    @staticmethod
+    def _token(entry: ModelEntry) -> Any:
+        if entry.watch is None:
+            return None
+        try:
+            return entry.watch()
+        except OSError:
+            return None
+
+    def refresh(self, name: str) -> bool:
+        """Reload `name` if what its factory would load has changed since the last load; True if it did"""
+        entry = self._entries[name]
+        if entry.watch is None or entry.model is None:
+            return False
+        token = self._token(entry)
+        if token is None or token == entry.token:
+            return False
+        logger.info(f"Model '{name}' changed on disk; reloading")
+        self.reload(name)
+        return True
+
+    def _schedule_refresh(self, entry: ModelEntry) -> None:
+        """Start a background refresh() of a loaded, watched entry once its check interval has passed"""
+        if entry.watch is None or self.refresh_seconds <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if now < entry.check_at:
+                return
+            entry.check_at = now + self.refresh_seconds
+
+        def run():
+            try:
+                self.refresh(entry.name)
+            except Exception as e:
+                logger.warning(f"Refreshing model '{entry.name}' failed: {e}")
+        threading.Thread(target=run, name=f"refresh-{entry.name}", daemon=True).start()
+
+    def status(self, name: str) -> Dict[str, Any]:
+        return self._entries[name].describe()
+
+    def statuses(self) -> Dict[str, Dict[str, Any]]:
+        return {name: entry.describe() for name, entry in self._entries.items()}
+
+    def memory_report(self) -> Dict[str, Any]:
+        """Per-model footprint and the process total, counting shared objects once"""
+        per_model, counted, total = {}, set(), {'resident_bytes': 0, 'mapped_bytes': 0}
+        for name, entry in self._entries.items():
+            if entry.footprint is None:
+                continue
+            per_model[name] = dict(entry.footprint)
+            if id(entry.model) not in counted:
+                counted.add(id(entry.model))
+                for key in total:
+                    total[key] += entry.footprint[key]
+        return {'models': per_model, 'total': total}
+
+    def prewarm(self, names: Optional[Iterable[str]] = None, background: bool = True) -> Optional[threading.Thread]:
+        """Build models ahead of the first request; failures are recorded, not raised"""
+        targets = list(names) if names is not None else self.names()
+
+        def run():
+            for name in targets:
+                if name not in self._entries:
+                    continue
+                try:
+                    self.get(name)
+                except Exception:
+                    pass
+
+        if not background:
+            run()
+            return None
+        self._prewarm_thread = threading.Thread(target=run, name='model-prewarm', daemon=True)
+        self._prewarm_thread.start()
+        return self._prewarm_thread
+
+
+# Process-wide registry used by the API servers
+registry = ModelRegistry()
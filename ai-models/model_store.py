@@ -0,0 +1,396 @@
+"""
+CTAS Model Store
+Versioned on-disk format for trained models with fast, mmap-friendly loading
+
+Layout of the store (default: ai-models/model_store, override with CTAS_MODEL_STORE):
+
+    <store>/<name>/LATEST                 -> text file holding the current version, e.g. "v3"
+    <store>/<name>/v3/model.joblib        -> uncompressed joblib pickle
+    <store>/<name>/v3/manifest.json       -> feature names, library versions, data hash, metrics
+
+Artifacts are written with compress=0 so numpy arrays inside them can be opened
+with mmap_mode='r' and shared between worker processes through the page cache.
+Note that sklearn tree nodes are copied into the estimator on unpickle, so only
+the plain arrays (scalers, encoders, cached feature matrices) stay mapped.
+The flat node arrays of fast_forest.CompiledForest are not stored either:
+accelerate() builds them from the loaded trees in each process, so every
+worker holds its own resident copy of both the trees and the compiled forest.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import joblib
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+MODEL_FILENAME = 'model.joblib'
+MANIFEST_FILENAME = 'manifest.json'
+LATEST_FILENAME = 'LATEST'
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_STORE_DIR = os.environ.get('CTAS_MODEL_STORE', os.path.join(HERE, 'model_store'))
+
+# Seconds spent in load_file, keyed by resolved path (cold start reporting)
+LOAD_TIMES: Dict[str, float] = {}
+
+
+def _library_versions() -> Dict[str, Optional[str]]:
+    versions = {'python': platform.python_version(), 'joblib': joblib.__version__}
+    for module_name in ('sklearn', 'numpy', 'pandas'):
+        try:
+            versions[module_name] = __import__(module_name).__version__
+        except Exception:
+            versions[module_name] = None
+    return versions
+
+
+def data_fingerprint(data: Any) -> Optional[str]:
+    """Return a sha256 hex digest identifying the training data (DataFrame, array or file path)"""
+    if data is None:
+        return None
+    digest = hashlib.sha256()
+    if isinstance(data, str):
+        if not os.path.isfile(data):
+            return None
+        with open(data, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+    try:
+        import pandas as pd
+        if isinstance(data, pd.DataFrame):
+            digest.update(','.join(map(str, data.columns)).encode('utf-8'))
+            digest.update(pd.util.hash_pandas_object(data, index=True).values.tobytes())
+            return digest.hexdigest()
+    except ImportError:
+        pass
+    try:
+        import numpy as np
+        arr = np.ascontiguousarray(data)
+        digest.update(str(arr.dtype).encode('utf-8'))
+        digest.update(str(arr.shape).encode('utf-8'))
+        digest.update(arr.tobytes())
+        return digest.hexdigest()
+    except Exception:
+        return None
+
+
+def _feature_names_of(obj: Any) -> Optional[List[str]]:
+    names = getattr(obj, 'feature_names', None)
+    if names is None:
+        names = getattr(obj, 'feature_names_in_', None)
+    if names is None and isinstance(obj, dict):
+        names = obj.get('feature_names')
+    return [str(n) for n in names] if names is not None else None
+
+
+def _json_safe(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {str(k): _json_safe(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(v) for v in value]
+    if hasattr(value, 'item') and not isinstance(value, (str, bytes)):
+        try:
+            return value.item()
+        except Exception:
+            pass
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+
+def build_manifest(obj: Any, feature_names: Optional[List[str]] = None,
+                   metrics: Optional[Dict] = None, training_data: Any = None,
+                   extra: Optional[Dict] = None) -> Dict:
+    """Describe a model object for manifest.json"""
+    if isinstance(obj, dict):
+        # save_model() bundles: record each fitted component
+        model_class = {key: type(value).__name__ for key, value in obj.items() if hasattr(value, 'fit')}
+    else:
+        model_class = type(obj).__name__
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'created_at': datetime.utcnow().isoformat(),
+        'model_class': model_class,
+        'feature_names': feature_names if feature_names is not None else _feature_names_of(obj),
+        'library_versions': _library_versions(),
+        'training_data_sha256': data_fingerprint(training_data),
+        'metrics': _json_safe(metrics or {}),
+    }
+    if extra:
+        manifest.update(_json_safe(extra))
+    return manifest
+
+
+def _atomic_write_text(path: str, text: str):
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def dump_artifact(obj: Any, filepath: str, feature_names: Optional[List[str]] = None,
+                  metrics: Optional[Dict] = None, training_data: Any = None,
+                  extra: Optional[Dict] = None) -> Dict:
+    """Write obj uncompressed to filepath plus a '<filepath>.manifest.json' sidecar"""
+    directory = os.path.dirname(os.path.abspath(filepath))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{filepath}.tmp.{os.getpid()}"
+    joblib.dump(obj, tmp_path, compress=0)
+    os.replace(tmp_path, filepath)
+
+    manifest = build_manifest(obj, feature_names, metrics, training_data, extra)
+    manifest['size_bytes'] = os.path.getsize(filepath)
+    _atomic_write_text(filepath + '.manifest.json', json.dumps(manifest, indent=2))
+    return manifest
+
+
+def read_manifest(filepath: str) -> Optional[Dict]:
+    """Read the manifest next to a model file (sidecar or store layout), if any"""
+    for candidate in (filepath + '.manifest.json',
+                      os.path.join(os.path.dirname(filepath), MANIFEST_FILENAME)):
+        if os.path.isfile(candidate):
+            with open(candidate, 'r', encoding='utf-8') as f:
+                return json.load(f)
+    return None
+
+
+def load_file(filepath: str, mmap_mode: Optional[str] = 'r') -> Any:
+    """joblib.load with memory mapping; compressed legacy pickles are loaded normally"""
+    start = time.perf_counter()
+    obj = joblib.load(filepath, mmap_mode=mmap_mode)
+    LOAD_TIMES[os.path.abspath(filepath)] = time.perf_counter() - start
+    return obj
+
+
+def load_time_report() -> Dict[str, float]:
+    """Seconds spent loading each model so far, labelled by model name"""
+    report = {}
+    for path, seconds in LOAD_TIMES.items():
+        if os.path.basename(path) == MODEL_FILENAME:
+            version_dir = os.path.dirname(path)
+            label = f"{os.path.basename(os.path.dirname(version_dir))}/{os.path.basename(version_dir)}"
+        else:
+            label = os.path.basename(path)
+        report[label] = round(seconds, 4)
+    return report
+
+
+# --- Versioned store -------------------------------------------------------
+
+def _store_dir(store_dir: Optional[str]) -> str:
+    return store_dir or DEFAULT_STORE_DIR
+
+
+def list_versions(name: str, store_dir: Optional[str] = None) -> List[str]:
+    """Versions of a model in ascending order"""
+    model_dir = os.path.join(_store_dir(store_dir), name)
+    if not os.path.isdir(model_dir):
+        return []
+    versions = [d for d in os.listdir(model_dir)
+                if d.startswith('v') and d[1:].isdigit()
+                and os.path.isfile(os.path.join(model_dir, d, MODEL_FILENAME))]
+    return sorted(versions, key=lambda v: int(v[1:]))
+
+
+def latest_version(name: str, store_dir: Optional[str] = None) -> Optional[str]:
+    latest_path = os.path.join(_store_dir(store_dir), name, LATEST_FILENAME)
+    if os.path.isfile(latest_path):
+        with open(latest_path, 'r', encoding='utf-8') as f:
+            version = f.read().strip()
+        if version:
+            return version
+    versions = list_versions(name, store_dir)
+    return versions[-1] if versions else None
+
+
+def artifact_path(name: str, version: Optional[str] = None, store_dir: Optional[str] = None) -> Optional[str]:
+    version = version or latest_version(name, store_dir)
+    if version is None:
+        return None
+    path = os.path.join(_store_dir(store_dir), name, version, MODEL_FILENAME)
+    return path if os.path.isfile(path) else None
+
+
+def reserve_version(name: str, store_dir: Optional[str] = None) -> Tuple[str, str]:
+    """Create the next empty version directory of `name`; returns (version, model file path)"""
+    model_dir = os.path.join(_store_dir(store_dir), name)
+    os.makedirs(model_dir, exist_ok=True)
+    existing = list_versions(name, store_dir)
+    next_number = int(existing[-1][1:]) + 1 if existing else 1
+    while True:
+        version = f"v{next_number}"
+        version_dir = os.path.join(model_dir, version)
+        try:
+            os.makedirs(version_dir)
+            break
+        except FileExistsError:
+            next_number += 1
+    return version, os.path.join(version_dir, MODEL_FILENAME)
+
+
+def publish_version(name: str, version: str, store_dir: Optional[str] = None, make_latest: bool = True) -> Dict:
+    """Finish a version written with dump_artifact: move its manifest into place and update LATEST"""
+    model_dir = os.path.join(_store_dir(store_dir), name)
+    model_file = os.path.join(model_dir, version, MODEL_FILENAME)
+    sidecar = model_file + '.manifest.json'
+    manifest_path = os.path.join(model_dir, version, MANIFEST_FILENAME)
+    if os.path.isfile(sidecar):
+        # The store layout keeps the manifest beside the model rather than as a sidecar
+        with open(sidecar, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        manifest.update(name=name, version=version)
+        _atomic_write_text(manifest_path, json.dumps(manifest, indent=2))
+        os.remove(sidecar)
+    else:
+        manifest = read_manifest(model_file) or {'name': name, 'version': version}
+
+    if make_latest:
+        _atomic_write_text(os.path.join(model_dir, LATEST_FILENAME), version)
+    logger.info(f"Saved model artifact {name}/{version} ({manifest.get('size_bytes')} bytes)")
+    return manifest
+
+
+def save_artifact(name: str, obj: Any, feature_names: Optional[List[str]] = None,
+                  metrics: Optional[Dict] = None, training_data: Any = None,
+                  extra: Optional[Dict] = None, store_dir: Optional[str] = None,
+                  make_latest: bool = True) -> Dict:
+    """Publish obj as the next version of `name` and (optionally) point LATEST at it"""
+    version, model_file = reserve_version(name, store_dir)
+    dump_artifact(obj, model_file, feature_names, metrics, training_data,
+                  dict(extra or {}, name=name, version=version))
+    return publish_version(name, version, store_dir, make_latest)
+
+
+def load_artifact(name: str, version: Optional[str] = None, mmap_mode: Optional[str] = 'r',
+                  store_dir: Optional[str] = None) -> Tuple[Any, Dict]:
+    """Load a model from the store, returning (model, manifest)"""
+    path = artifact_path(name, version, store_dir)
+    if path is None:
+        raise FileNotFoundError(f"No artifact for model '{name}' (version={version}) in {_store_dir(store_dir)}")
+    obj = load_file(path, mmap_mode=mmap_mode)
+    manifest = read_manifest(path) or {}
+    manifest['load_seconds'] = LOAD_TIMES[os.path.abspath(path)]
+    manifest['path'] = path
+    return obj, manifest
+
+
+def load_model_file(path: str, mmap_mode: Optional[str] = 'r', store_dir: Optional[str] = None) -> Any:
+    """Load a model by its legacy pickle path, preferring a published store artifact of the same name
+
+    'alert_model.pkl' resolves to <store>/alert_model/LATEST when present, otherwise the pickle itself.
+    """
+    return load_file(resolve_model_file(path, store_dir=store_dir), mmap_mode=mmap_mode)
+
+
+def resolve_model_file(path: str, store_dir: Optional[str] = None) -> str:
+    """The file load_model_file would read for `path`: the LATEST store artifact if published, else path"""
+    name = os.path.splitext(os.path.basename(path))[0]
+    store_path = artifact_path(name, store_dir=store_dir)
+    return store_path if store_path is not None else path
+
+
+# --- Cold start measurement ------------------------------------------------
+
+_COLD_START_SNIPPET = r"""
+import json, sys, time
+t0 = time.perf_counter()
+sys.path.insert(0, {here!r})
+import model_store
+t_import = time.perf_counter()
+model = model_store.load_model_file({path!r}, mmap_mode={mmap_mode!r})
+t_loaded = time.perf_counter()
+n_features = getattr(model, 'n_features_in_', None)
+if n_features is not None and hasattr(model, 'predict'):
+    import numpy as np
+    model.predict(np.zeros((1, n_features)))
+t_ready = time.perf_counter()
+print(json.dumps({{'import_s': t_import - t0, 'load_s': t_loaded - t_import,
+                  'first_predict_s': t_ready - t_loaded, 'ready_s': t_ready - t0}}))
+"""
+
+
+def measure_cold_start(path: str, mmap_mode: Optional[str] = 'r', repeats: int = 3) -> Dict:
+    """Time import -> load -> first prediction in fresh interpreters; reports the median run"""
+    runs = []
+    snippet = _COLD_START_SNIPPET.format(here=HERE, path=path, mmap_mode=mmap_mode)
+    for _ in range(max(1, repeats)):
+        start = time.perf_counter()
+        proc = subprocess.run([sys.executable, '-c', snippet], capture_output=True, text=True)
+        wall = time.perf_counter() - start
+        if proc.returncode != 0:
+            raise RuntimeError(f"Cold start run failed: {proc.stderr.strip()}")
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        result['process_wall_s'] = wall
+        runs.append(result)
+    runs.sort(key=lambda r: r['ready_s'])
+    return {'path': path, 'mmap_mode': mmap_mode, 'runs': len(runs), 'median': runs[len(runs) // 2]}
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='CTAS model store utilities')
+    parser.add_argument('--store', default=None, help='Store directory (default: %(default)s)')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    sub.add_parser('list', help='List models and versions')
+
+    publish = sub.add_parser('publish', help='Publish a legacy .pkl into the store')
+    publish.add_argument('pickle_path')
+    publish.add_argument('--name', default=None)
+    publish.add_argument('--data', default=None, help='Training CSV to fingerprint')
+
+    bench = sub.add_parser('bench', help='Measure cold start to ready for a model')
+    bench.add_argument('name_or_path')
+    bench.add_argument('--no-mmap', action='store_true')
+    bench.add_argument('--repeats', type=int, default=3)
+
+    args = parser.parse_args(argv)
+    store_dir = _store_dir(args.store)
+
+    if args.command == 'list':
+        if not os.path.isdir(store_dir):
+            print(f"No model store at {store_dir}")
+            return 0
+        for name in sorted(os.listdir(store_dir)):
+            versions = list_versions(name, store_dir)
+            if versions:
+                print(f"{name}: {', '.join(versions)} (latest: {latest_version(name, store_dir)})")
+        return 0
+
+    if args.command == 'publish':
+        obj = joblib.load(args.pickle_path)
+        name = args.name or os.path.splitext(os.path.basename(args.pickle_path))[0]
+        manifest = save_artifact(name, obj, training_data=args.data, store_dir=store_dir,
+                                 extra={'source': os.path.abspath(args.pickle_path)})
+        print(json.dumps(manifest, indent=2))
+        return 0
+
+    if args.command == 'bench':
+        path = args.name_or_path
+        if not os.path.isfile(path):
+            path = artifact_path(path, store_dir=store_dir)
+            if path is None:
+                print(f"Unknown model: {args.name_or_path}")
+                return 1
+        report = measure_cold_start(path, None if args.no_mmap else 'r', args.repeats)
+        print(json.dumps(report, indent=2))
+        return 0
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
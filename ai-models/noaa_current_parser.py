@@ -3,17 +3,29 @@ NOAA Real-Time Current Data Parser for CTAS
 Parses XML current data from NOAA buoys and integrates with coastal monitoring system
 """
 
-import xml.etree.ElementTree as ET
+import os
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-import requests
 import json
-from typing import Dict, List, Optional
+from typing import BinaryIO, Dict, Optional, Tuple, Union
+
+from current_analytics import StationCurrentAnalytics
+from current_observations import CurrentObservations, parse_current_xml
+from current_profiles import CurrentProfile
+from noaa_fetcher import DEFAULT_NOAA_API_URL, NOAA_API_URL_ENV, NOAACurrentFetcher, utcnow
+from noaa_store import CurrentObservationStore
+from tidal_harmonics import HarmonicTidalModel
+
 
 class NOAACurrentDataParser:
-    def __init__(self):
-        self.base_url = "https://tidesandcurrents.noaa.gov/api/datagetter"
+    def __init__(self, store_dir: Optional[str] = None):
+        self.base_url = os.environ.get(NOAA_API_URL_ENV, DEFAULT_NOAA_API_URL)
+        self.store_dir = store_dir
+        self._fetcher: Optional[NOAACurrentFetcher] = None
+        self._store: Optional[CurrentObservationStore] = None
+        self.analytics: Dict[Tuple[str, float], StationCurrentAnalytics] = {}
+        self.tidal_models: Dict[str, HarmonicTidalModel] = {}
         self.current_stations = {
             'cb0102': {'name': 'Cape Henry LB 2CH', 'lat': 36.9594, 'lon': -76.0128},
             'cb0201': {'name': 'Chesapeake Bay Bridge Tunnel', 'lat': 36.9667, 'lon': -76.1167},
@@ -22,81 +34,117 @@ class NOAACurrentDataParser:
             'sf0101': {'name': 'San Francisco Bay', 'lat': 37.8063, 'lon': -122.4659}
         }
         
-    def parse_xml_current_data(self, xml_data: str) -> pd.DataFrame:
-        """Parse XML current data from NOAA buoys"""
+    def parse_xml_current_data(self, xml_data: Union[str, bytes, BinaryIO]) -> pd.DataFrame:
+        """Parse XML current data from NOAA buoys
+
+        xml_data is the XML text (str or bytes) or an open binary file.
+        The document is streamed with iterparse: each <cu> element is copied into
+        typed column buffers and then discarded, so memory beyond the resulting
+        columns stays constant however large the response is. The DataFrame
+        shares those columns (see CurrentObservations.to_pandas).
+        """
+        observations = self.parse_xml_current_observations(xml_data)
+        return observations.to_pandas() if len(observations) else pd.DataFrame()
+
+    def parse_xml_current_observations(self, xml_data: Union[str, bytes, BinaryIO]) -> CurrentObservations:
+        """parse_xml_current_data as a compact CurrentObservations (empty on error)"""
         try:
-            root = ET.fromstring(xml_data)
-            
-            # Extract metadata
-            metadata = root.find('metadata')
-            station_id = metadata.get('id')
-            station_name = metadata.get('name')
-            lat = float(metadata.get('lat'))
-            lon = float(metadata.get('lon'))
-            
-            # Extract observations
-            observations = []
-            obs_element = root.find('observations')
-            
-            for cu_element in obs_element.findall('cu'):
-                observation = {
-                    'station_id': station_id,
-                    'station_name': station_name,
-                    'latitude': lat,
-                    'longitude': lon,
-                    'timestamp': pd.to_datetime(cu_element.get('t')),
-                    'current_speed_knots': float(cu_element.get('s')),
-                    'current_direction_degrees': float(cu_element.get('d')),
-                    'bin_depth': int(cu_element.get('b'))
-                }
-                observations.append(observation)
-            
-            df = pd.DataFrame(observations)
-            
-            # Convert speed from knots to m/s for standardization
-            df['current_speed_ms'] = df['current_speed_knots'] * 0.514444
-            
-            # Calculate current components (u, v)
-            df['current_u'] = df['current_speed_ms'] * np.sin(np.radians(df['current_direction_degrees']))
-            df['current_v'] = df['current_speed_ms'] * np.cos(np.radians(df['current_direction_degrees']))
-            
-            return df
-            
+            return parse_current_xml(xml_data)
         except Exception as e:
             print(f"Error parsing XML data: {e}")
-            return pd.DataFrame()
-    
+            return CurrentObservations.empty()
+
+    def parse_xml_current_file(self, path: Union[str, os.PathLike]) -> pd.DataFrame:
+        """parse_xml_current_data for an XML file on disk"""
+        with open(path, 'rb') as f:
+            return self.parse_xml_current_data(f)
+
+    @property
+    def fetcher(self) -> NOAACurrentFetcher:
+        """Pooled, rate-limited NOAA client shared by this parser's fetches"""
+        if self._fetcher is None:
+            self._fetcher = NOAACurrentFetcher(parser=self, base_url=self.base_url)
+        return self._fetcher
+
+    @property
+    def store(self) -> CurrentObservationStore:
+        """Local observation store that fetches are synced into and served from"""
+        if self._store is None:
+            self._store = CurrentObservationStore(self.store_dir)
+        return self._store
+
     def fetch_current_data(self, station_id: str, hours_back: int = 24) -> pd.DataFrame:
-        """Fetch current data from NOAA API"""
-        end_time = datetime.now()
-        start_time = end_time - timedelta(hours=hours_back)
-        
-        params = {
-            'product': 'currents',
-            'application': 'CTAS',
-            'begin_date': start_time.strftime('%Y%m%d %H:%M'),
-            'end_date': end_time.strftime('%Y%m%d %H:%M'),
-            'station': station_id,
-            'time_zone': 'GMT',
-            'units': 'metric',
-            'format': 'xml'
-        }
-        
-        try:
-            response = requests.get(self.base_url, params=params)
-            response.raise_for_status()
-            
-            return self.parse_xml_current_data(response.text)
-            
-        except requests.RequestException as e:
-            print(f"Error fetching data from NOAA: {e}")
-            return pd.DataFrame()
+        """Fetch current data from NOAA API
+
+        Only the observations newer than the local store's last timestamp are
+        downloaded; the window itself is read back from the store.
+        """
+        return self.fetch_stations([station_id], hours_back)[station_id]
+
+    def fetch_all_stations(self, hours_back: int = 24) -> Dict[str, pd.DataFrame]:
+        """Fetch every station in current_stations concurrently"""
+        return self.fetch_stations(self.current_stations, hours_back)
+
+    def fetch_stations(self, station_ids, hours_back: int = 24,
+                       end: Optional[datetime] = None) -> Dict[str, pd.DataFrame]:
+        """Sync the stations' missing observations into the store and return the last hours_back hours"""
+        end = end or utcnow()
+        self.store.sync(self.fetcher, station_ids, hours_back, end)
+        start = end - timedelta(hours=hours_back)
+        return {station_id: self.store.read(station_id, start, end) for station_id in station_ids}
+
+    def current_profile(self, station_id: str, hours_back: int = 24, end: Optional[datetime] = None) -> CurrentProfile:
+        """The station's stored observations for the last hours_back hours as a time x depth CurrentProfile"""
+        end = end or utcnow()
+        self.store.sync(self.fetcher, [station_id], hours_back, end)
+        return CurrentProfile.from_observations(
+            self.store.read_observations(station_id, end - timedelta(hours=hours_back), end))
+
+    @staticmethod
+    def depth_series(df: pd.DataFrame) -> pd.DataFrame:
+        """df itself when it holds a single bin, otherwise its depth-averaged series (bin_depth -1)
+
+        Statistics over rows from several bins would mix depths, so multi-bin
+        frames are reduced to one reading per timestamp first.
+        """
+        if df.empty or 'bin_depth' not in df:
+            return df
+        bins = df['bin_depth'].to_numpy()
+        if not (bins != bins[0]).any():
+            return df
+        return CurrentProfile.from_frame(df).depth_averaged().to_pandas()
+
+    def analyze_station(self, station_id: str, hours_back: int = 24, end: Optional[datetime] = None) -> Dict:
+        """analyze_current_patterns for the trailing window, kept up to date incrementally
+
+        Only the gap is fetched, and only readings newer than the station's
+        StationCurrentAnalytics state are read back from the store and fed to it.
+        """
+        end = end or utcnow()
+        self.store.sync(self.fetcher, [station_id], hours_back, end)
+        engine = self.analytics.get((station_id, hours_back))
+        if engine is None:
+            engine = self.analytics[(station_id, hours_back)] = StationCurrentAnalytics(window_hours=hours_back)
+        start = end - timedelta(hours=hours_back)
+        if engine.last_timestamp is not None and engine.last_timestamp >= start:
+            start = engine.last_timestamp + pd.Timedelta(1, 'ns')
+        engine.update_frame(self.depth_series(self.store.read(station_id, start, end)))
+        return engine.analysis()
     
     def analyze_current_patterns(self, df: pd.DataFrame) -> Dict:
-        """Analyze current patterns for coastal threat assessment"""
+        """Analyze current patterns for coastal threat assessment
+
+        With several bins, the statistics are over the depth-averaged series
+        and a 'depth_profile' section summarizes each bin and the shear.
+        """
         if df.empty:
             return {}
-        
+        profile = None
+        series = self.depth_series(df)
+        if series is not df:
+            profile = CurrentProfile.from_frame(df)
+            df = series
+
         analysis = {
             'station_info': {
                 'station_id': df['station_id'].iloc[0],
@@ -121,6 +169,8 @@ class NOAACurrentDataParser:
             'anomaly_detection': self.detect_current_anomalies(df),
             'threat_indicators': self.assess_current_threats(df)
         }
+        if profile is not None:
+            analysis['depth_profile'] = profile.summary()
         
         return analysis
     
@@ -212,56 +262,41 @@ class NOAACurrentDataParser:
         return threats
     
     def generate_current_forecast(self, df: pd.DataFrame, hours_ahead: int = 6) -> Dict:
-        """Generate simple current forecast based on tidal patterns"""
-        # This is a simplified forecast - real implementation would use harmonic analysis
-        
-        if len(df) < 24:  # Need at least 24 hours of data for decent prediction
+        """Forecast currents from the station's cached harmonic tidal model
+
+        Rows newer than the cached model are folded into its normal equations
+        (earlier ones were already absorbed), then the fitted constituents are
+        evaluated every 6 minutes after the latest observation.
+        """
+        if df.empty:
             return {'error': 'Insufficient data for forecasting'}
-        
-        # Calculate average tidal cycle
-        df_sorted = df.sort_values('timestamp')
-        speeds = df_sorted['current_speed_ms'].values
-        
-        # Simple sinusoidal fit for tidal prediction
-        time_hours = np.arange(len(speeds))
-        
-        # Fit a simple harmonic (12.42 hour tidal cycle)
-        tidal_period = 12.42  # Semi-diurnal tide period in hours
-        frequency = 2 * np.pi / (tidal_period * 6)  # Convert to measurement intervals
-        
-        try:
-            # Fit sinusoidal model
-            from scipy.optimize import curve_fit
-            
-            def tidal_model(t, amp, phase, offset):
-                return amp * np.sin(frequency * t + phase) + offset
-            
-            popt, _ = curve_fit(tidal_model, time_hours, speeds)
-            
-            # Forecast future values
-            future_times = np.arange(len(speeds), len(speeds) + hours_ahead * 6)  # 6 measurements per hour
-            forecast_speeds = tidal_model(future_times, *popt)
-            
-            return {
-                'forecast_hours': hours_ahead,
-                'predicted_speeds_ms': forecast_speeds.tolist(),
-                'model_parameters': {
-                    'amplitude': float(popt[0]),
-                    'phase': float(popt[1]),
-                    'offset': float(popt[2])
-                }
-            }
-            
-        except:
-            # Fallback to simple trend extrapolation
-            trend = np.polyfit(time_hours[-12:], speeds[-12:], 1)  # Last 2 hours trend
-            future_speeds = [trend[0] * (len(speeds) + i) + trend[1] for i in range(hours_ahead * 6)]
-            
-            return {
-                'forecast_hours': hours_ahead,
-                'predicted_speeds_ms': future_speeds,
-                'model_type': 'linear_trend'
+        df = self.depth_series(df)
+        station_id = str(df['station_id'].iloc[0])
+        model = self.tidal_models.get(station_id)
+        if model is None:
+            model = self.tidal_models[station_id] = HarmonicTidalModel()
+        times = df['timestamp'].to_numpy('datetime64[ns]').view(np.int64)
+        model.update(times, df['current_u'].to_numpy(), df['current_v'].to_numpy())
+
+        constituents = model.constituents()
+        if not constituents:
+            return {'error': 'Insufficient data for forecasting'}
+        _, coefficients = model.solve()
+        forecast = model.forecast(int(times.max()), hours_ahead)
+        return {
+            'forecast_hours': hours_ahead,
+            'timestamps': [str(t) for t in forecast['timestamps'].astype('datetime64[s]')],
+            'predicted_speeds_ms': forecast['speed'].tolist(),
+            'predicted_directions_degrees': forecast['direction'].tolist(),
+            'model_type': 'harmonic',
+            'model_parameters': {
+                'mean_u': float(coefficients[0, 0]),
+                'mean_v': float(coefficients[0, 1]),
+                'constituents': constituents,
+                'observations': model.n,
+                'span_hours': model.span_hours
             }
+        }
 
 def process_cape_henry_data():
     """Process the Cape Henry current data you provided"""
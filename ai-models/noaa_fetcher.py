@@ -0,0 +1,323 @@
+"""
+CTAS NOAA Fetcher
+Concurrent multi-station NOAA currents downloads over one pooled keep-alive session
+
+`NOAACurrentFetcher.fetch_stations()` pulls every configured station at once.
+Long `hours_back` windows are split into sub-requests, all stations x chunks
+run on a shared thread pool, and each station's chunks are merged back into
+one sorted, de-duplicated DataFrame. With `chunk_hours=0` (the default) each
+station's window is cut into max_workers // stations pieces (never shorter
+than MIN_CHUNK_HOURS or longer than MAX_CHUNK_HOURS), so all requests start in
+the first round: a request queued behind a busy worker costs a full extra
+round trip. All requests go through
+a single `requests.Session` whose connection pool is sized to the worker
+count, so connections to the NOAA host are reused instead of reopened.
+
+Each host gets a token bucket (`rate_per_host` requests per second), which
+keeps the burst of parallel requests within NOAA's fair-use limits.
+Connection errors, timeouts, 429 and 5xx responses are retried with
+full-jitter exponential backoff, and Retry-After is honoured. Nothing runs
+past the overall `deadline`: per-request timeouts shrink as it approaches,
+and chunks that cannot finish in time are dropped. A station whose chunks all
+fail comes back as an empty DataFrame. A station that loses only some chunks
+keeps the rows that arrived, and the shortfall is logged and counted in
+stats().
+
+Defaults come from CTAS_NOAA_MAX_WORKERS, CTAS_NOAA_RATE, CTAS_NOAA_RETRIES,
+CTAS_NOAA_TIMEOUT, CTAS_NOAA_DEADLINE and CTAS_NOAA_CHUNK_HOURS; the endpoint
+from NOAA_API_URL (see upstream_stub.py for a local stand-in).
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+NOAA_API_URL_ENV = 'NOAA_API_URL'
+DEFAULT_NOAA_API_URL = "https://tidesandcurrents.noaa.gov/api/datagetter"
+MAX_WORKERS_ENV = 'CTAS_NOAA_MAX_WORKERS'
+RATE_ENV = 'CTAS_NOAA_RATE'
+RETRIES_ENV = 'CTAS_NOAA_RETRIES'
+TIMEOUT_ENV = 'CTAS_NOAA_TIMEOUT'
+DEADLINE_ENV = 'CTAS_NOAA_DEADLINE'
+CHUNK_HOURS_ENV = 'CTAS_NOAA_CHUNK_HOURS'
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_RATE = 10.0
+DEFAULT_RETRIES = 3
+DEFAULT_TIMEOUT = 10.0
+DEFAULT_DEADLINE = 60.0
+DEFAULT_CHUNK_HOURS = 0.0
+MIN_CHUNK_HOURS = 6.0
+MAX_CHUNK_HOURS = 31 * 24.0  # the datagetter's longest range for 6-minute data
+BACKOFF_BASE = 0.25
+BACKOFF_CAP = 8.0
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+DATE_FORMAT = '%Y%m%d %H:%M'
+
+
+def _env_number(name: str, default, cast):
+    try:
+        return cast(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        logger.warning(f"Ignoring invalid {name}={os.environ.get(name)!r}; using {default}")
+        return default
+
+
+def utcnow() -> datetime:
+    """Naive UTC now; the datagetter is queried with time_zone=GMT"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class DeadlineExceeded(Exception):
+    """The fetch deadline passed before a request could complete"""
+
+
+class RateLimiter:
+    """Token bucket per host: `rate` requests per second with bursts of up to `burst`
+
+    A rate of 0 or less disables limiting.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.burst = max(1.0, burst if burst is not None else rate)
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+
+    def acquire(self, host: str, deadline: float = float('inf')):
+        """Block until a token for `host` is available; raises DeadlineExceeded if that is after deadline"""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                tokens, stamp = self._buckets.get(host, (self.burst, now))
+                tokens = min(self.burst, tokens + (now - stamp) * self.rate)
+                if tokens >= 1.0:
+                    self._buckets[host] = (tokens - 1.0, now)
+                    return
+                self._buckets[host] = (tokens, now)
+                delay = (1.0 - tokens) / self.rate
+            if now + delay > deadline:
+                raise DeadlineExceeded(f"rate limit for {host} would wait past the deadline")
+            time.sleep(delay)
+
+
+class NOAACurrentFetcher:
+    """Fetch NOAA currents for many stations concurrently; use as a context manager or close()"""
+
+    def __init__(self, parser=None, base_url: Optional[str] = None, max_workers: Optional[int] = None,
+                 rate_per_host: Optional[float] = None, burst: Optional[float] = None,
+                 retries: Optional[int] = None, timeout: Optional[float] = None,
+                 deadline: Optional[float] = None, chunk_hours: Optional[float] = None,
+                 session: Optional[requests.Session] = None, seed: Optional[int] = None):
+        if parser is None:
+            from noaa_current_parser import NOAACurrentDataParser
+            parser = NOAACurrentDataParser()
+        self.parser = parser
+        self.base_url = base_url or os.environ.get(NOAA_API_URL_ENV, DEFAULT_NOAA_API_URL)
+        self.max_workers = max(1, max_workers if max_workers is not None
+                               else _env_number(MAX_WORKERS_ENV, DEFAULT_MAX_WORKERS, int))
+        self.retries = max(0, retries if retries is not None else _env_number(RETRIES_ENV, DEFAULT_RETRIES, int))
+        self.timeout = timeout if timeout is not None else _env_number(TIMEOUT_ENV, DEFAULT_TIMEOUT, float)
+        self.deadline = deadline if deadline is not None else _env_number(DEADLINE_ENV, DEFAULT_DEADLINE, float)
+        self.chunk_hours = chunk_hours if chunk_hours is not None else _env_number(
+            CHUNK_HOURS_ENV, DEFAULT_CHUNK_HOURS, float)
+        self.limiter = RateLimiter(rate_per_host if rate_per_host is not None
+                                   else _env_number(RATE_ENV, DEFAULT_RATE, float), burst)
+        self._own_session = session is None
+        if session is None:
+            session = requests.Session()
+            # Retries are handled here (with jitter and the deadline), not by urllib3
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.max_workers, max_retries=0)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+        self.session = session
+        self._random = random.Random(seed)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._counters = {'requests': 0, 'retries': 0, 'failures': 0, 'bytes': 0}
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix='ctas-noaa')
+            return self._executor
+
+    def _count(self, key: str, n: int = 1):
+        with self._lock:
+            self._counters[key] += n
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters)
+
+    def windows(self, start: datetime, end: datetime, n_stations: int = 1) -> List[Tuple[datetime, datetime]]:
+        """Non-overlapping (begin, end) sub-windows covering [start, end]
+
+        The datagetter treats both dates as inclusive at minute resolution, so
+        each window ends one minute before the next one begins.
+        """
+        span = end - start
+        if self.chunk_hours > 0:
+            step = timedelta(hours=self.chunk_hours)
+        else:
+            pieces = max(1, self.max_workers // max(1, n_stations))
+            step = min(max(span / pieces, timedelta(hours=MIN_CHUNK_HOURS)), timedelta(hours=MAX_CHUNK_HOURS))
+            step = max(timedelta(minutes=1), step - step % timedelta(minutes=1))
+        windows = []
+        begin = start
+        while end - begin >= step + timedelta(minutes=1):
+            windows.append((begin, begin + step - timedelta(minutes=1)))
+            begin += step
+        windows.append((begin, end))
+        return windows
+
+    def _backoff(self, attempt: int, retry_after: Optional[str]) -> float:
+        delay = self._random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+        try:
+            return max(delay, float(retry_after)) if retry_after else delay
+        except ValueError:
+            return delay
+
+    def _get(self, params: Dict[str, str], deadline: float) -> bytes:
+        host = urlparse(self.base_url).netloc
+        attempt = 0
+        while True:
+            self.limiter.acquire(host, deadline)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise DeadlineExceeded("deadline passed before the request was sent")
+            self._count('requests')
+            retry_after = None
+            try:
+                response = self.session.get(self.base_url, params=params, timeout=min(self.timeout, remaining))
+                if response.status_code not in RETRY_STATUSES:
+                    response.raise_for_status()
+                    self._count('bytes', len(response.content))
+                    return response.content
+                retry_after = response.headers.get('Retry-After')
+                error: Exception = requests.HTTPError(f"{response.status_code} from NOAA", response=response)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            if attempt >= self.retries:
+                raise error
+            delay = self._backoff(attempt, retry_after)
+            if time.monotonic() + delay >= deadline:
+                raise DeadlineExceeded(f"no time left to retry after: {error}") from error
+            self._count('retries')
+            time.sleep(delay)
+            attempt += 1
+
+    def fetch_window(self, station_id: str, begin: datetime, end: datetime,
+                     deadline: Optional[float] = None) -> pd.DataFrame:
+        """Observations for one station between begin and end (inclusive, GMT)"""
+        params = {
+            'product': 'currents',
+            'application': 'CTAS',
+            'begin_date': begin.strftime(DATE_FORMAT),
+            'end_date': end.strftime(DATE_FORMAT),
+            'station': station_id,
+            'time_zone': 'GMT',
+            'units': 'metric',
+            'format': 'xml'
+        }
+        content = self._get(params, deadline if deadline is not None else time.monotonic() + self.deadline)
+        return self.parser.parse_xml_current_data(content)
+
+    def fetch_station(self, station_id: str, hours_back: float = 24, end: Optional[datetime] = None) -> pd.DataFrame:
+        return self.fetch_stations([station_id], hours_back, end)[station_id]
+
+    def fetch_stations(self, station_ids: Optional[Iterable[str]] = None, hours_back: float = 24,
+                       end: Optional[datetime] = None) -> Dict[str, pd.DataFrame]:
+        """{station_id: observations for the last hours_back hours}; defaults to every parser station"""
+        stations = list(station_ids if station_ids is not None else self.parser.current_stations)
+        end = end or utcnow()
+        start = end - timedelta(hours=hours_back)
+        return self.fetch_ranges({station: (start, end) for station in stations})
+
+    def fetch_ranges(self, ranges: Dict[str, Tuple[datetime, datetime]],
+                     contiguous: bool = False, backfill: bool = False) -> Dict[str, pd.DataFrame]:
+        """{station_id: observations between its own (begin, end)}, all stations fetched concurrently
+
+        With contiguous=True a station keeps only the rows before its first
+        failed chunk, so an incremental caller never skips over a hole. With
+        backfill=True it keeps only the rows after its last failed chunk
+        instead, for ranges that end where already stored data begins.
+        """
+        deadline = time.monotonic() + self.deadline
+        futures = {}
+        for station, (start, end) in ranges.items():
+            for begin, stop in self.windows(start, end, len(ranges)):
+                futures[self.executor.submit(self.fetch_window, station, begin, stop, deadline)] = (station, begin, stop)
+        done, pending = wait(futures, timeout=max(0.0, deadline - time.monotonic()))
+        for future in pending:
+            future.cancel()
+
+        parts: Dict[str, List[pd.DataFrame]] = {station: [] for station in ranges}
+        failed_from: Dict[str, datetime] = {}
+        failed_until: Dict[str, datetime] = {}
+        for future, (station, begin, stop) in futures.items():
+            error = None
+            if future not in done:
+                error = 'deadline exceeded'
+            elif future.exception() is not None:
+                error = future.exception()
+            if error is not None:
+                self._count('failures')
+                logger.warning(f"NOAA fetch for {station} from {begin:%Y-%m-%d %H:%M} failed: {error}")
+                failed_from[station] = min(begin, failed_from.get(station, begin))
+                failed_until[station] = max(stop, failed_until.get(station, stop))
+                continue
+            frame = future.result()
+            if not frame.empty:
+                parts[station].append(frame)
+        merged = {station: _merge_chunks(frames) for station, frames in parts.items()}
+        if contiguous:
+            for station, begin in failed_from.items():
+                df = merged[station]
+                if not df.empty:
+                    merged[station] = df[df['timestamp'] < begin].reset_index(drop=True)
+        if backfill:
+            for station, stop in failed_until.items():
+                df = merged[station]
+                if not df.empty:
+                    merged[station] = df[df['timestamp'] > stop].reset_index(drop=True)
+        return merged
+
+    def close(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        if self._own_session:
+            self.session.close()
+
+    def __enter__(self) -> 'NOAACurrentFetcher':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _merge_chunks(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate chunk frames in time order, keeping one row per (timestamp, bin_depth)"""
+    if not frames:
+        return pd.DataFrame()
+    if len(frames) == 1:
+        return frames[0]
+    merged = pd.concat(frames, ignore_index=True)
+    merged = merged.sort_values('timestamp', kind='stable')
+    return merged.drop_duplicates(['timestamp', 'bin_depth']).reset_index(drop=True)
@@ -0,0 +1,280 @@
+"""
+CTAS NOAA Observation Store
+Append-only, day-partitioned local store of NOAA current observations
+
+Layout (default: ai-models/noaa_store, override with CTAS_NOAA_STORE):
+
+    <store>/<station>/station.json        -> id, name, lat, lon from the first response
+    <store>/<station>/20250830.bin        -> packed records for that UTC day, in time order
+
+A record is the parser's typed columns packed together: int64 epoch ns,
+float32 speed (knots), float32 direction and int16 bin depth (18 bytes).
+Partitions are only ever appended to, and reading a time range opens just the
+days it covers, with np.fromfile.
+
+`sync()` asks the fetcher only for the gap between each station's last stored
+timestamp and now, so a poll every few minutes downloads a handful of rows
+instead of the whole trailing window. When a wider window than before is asked
+for, it also fetches the stretch between the window start and the first stored
+timestamp. On append, rows between the first and last stored timestamps are
+dropped, and so are rows at the last timestamp whose bin is already stored, so
+overlapping responses never duplicate observations while the other bins of a
+multi-bin profile at the last timestamp still get in. Rows older than the first
+stored timestamp are backfilled: the few partitions they land in are rewritten
+with them in front, which keeps every partition in time order.
+"""
+
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from current_observations import CurrentObservations, StationInfo
+
+logger = logging.getLogger(__name__)
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+STORE_ENV = 'CTAS_NOAA_STORE'
+DEFAULT_STORE_DIR = os.path.join(HERE, 'noaa_store')
+META_FILENAME = 'station.json'
+PARTITION_SUFFIX = '.bin'
+RECORD_DTYPE = np.dtype([('t', '<i8'), ('s', '<f4'), ('d', '<f4'), ('b', '<i2')])
+NS_PER_DAY = 86_400 * 10 ** 9
+
+
+def _epoch_ns(value) -> int:
+    return pd.Timestamp(value).value
+
+
+class CurrentObservationStore:
+    """Per-station observation partitions under `root`"""
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or os.environ.get(STORE_ENV, DEFAULT_STORE_DIR)
+        self._lock = threading.Lock()
+        # station -> (last stored timestamp, bins stored at it)
+        self._last: Dict[str, Tuple[Optional[int], frozenset]] = {}
+        # station -> first stored timestamp
+        self._first: Dict[str, Optional[int]] = {}
+
+    def _station_dir(self, station_id: str) -> str:
+        return os.path.join(self.root, station_id)
+
+    def stations(self) -> List[str]:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(d for d in os.listdir(self.root)
+                      if os.path.isfile(os.path.join(self.root, d, META_FILENAME)))
+
+    def metadata(self, station_id: str) -> Optional[Dict[str, str]]:
+        try:
+            with open(os.path.join(self._station_dir(station_id), META_FILENAME)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def partitions(self, station_id: str) -> List[Tuple[int, str]]:
+        """(UTC day number since the epoch, path) for every partition, oldest first"""
+        station_dir = self._station_dir(station_id)
+        if not os.path.isdir(station_dir):
+            return []
+        days = []
+        for name in os.listdir(station_dir):
+            stem, ext = os.path.splitext(name)
+            if ext == PARTITION_SUFFIX and stem.isdigit():
+                day = int(np.datetime64(f"{stem[:4]}-{stem[4:6]}-{stem[6:]}", 'D').astype(np.int64))
+                days.append((day, os.path.join(station_dir, name)))
+        return sorted(days)
+
+    @staticmethod
+    def _load(path: str) -> np.ndarray:
+        # A write interrupted mid-record leaves a partial tail; ignore it
+        count = os.path.getsize(path) // RECORD_DTYPE.itemsize
+        return np.fromfile(path, dtype=RECORD_DTYPE, count=count)
+
+    def _tail(self, station_id: str) -> Tuple[Optional[int], frozenset]:
+        """(last stored timestamp, bins stored at that timestamp)"""
+        if station_id not in self._last:
+            tail = (None, frozenset())
+            for _, path in reversed(self.partitions(station_id)):
+                records = self._load(path)
+                if len(records):
+                    last = int(records['t'][-1])
+                    tail = (last, frozenset(records['b'][records['t'] == last].tolist()))
+                    break
+            self._last[station_id] = tail
+        return self._last[station_id]
+
+    def _head(self, station_id: str) -> Optional[int]:
+        """First stored timestamp"""
+        if station_id not in self._first:
+            first = None
+            for _, path in self.partitions(station_id):
+                records = self._load(path)
+                if len(records):
+                    first = int(records['t'][0])
+                    break
+            self._first[station_id] = first
+        return self._first[station_id]
+
+    def last_timestamp(self, station_id: str) -> Optional[pd.Timestamp]:
+        with self._lock:
+            last = self._tail(station_id)[0]
+        return None if last is None else pd.Timestamp(last)
+
+    def first_timestamp(self, station_id: str) -> Optional[pd.Timestamp]:
+        with self._lock:
+            first = self._head(station_id)
+        return None if first is None else pd.Timestamp(first)
+
+    @staticmethod
+    def _by_day(records: np.ndarray):
+        """(partition filename, records) for each UTC day in time-ordered records"""
+        if not len(records):
+            return
+        days = records['t'] // NS_PER_DAY
+        bounds = np.flatnonzero(np.diff(days)) + 1
+        for start, stop in zip(np.r_[0, bounds], np.r_[bounds, len(records)]):
+            name = np.datetime64(int(days[start]), 'D').astype(str).replace('-', '') + PARTITION_SUFFIX
+            yield name, records[start:stop]
+
+    def _backfill(self, station_dir: str, records: np.ndarray):
+        """Put records older than everything stored in front of their partitions"""
+        for name, chunk in self._by_day(records):
+            path = os.path.join(station_dir, name)
+            if os.path.exists(path):
+                chunk = np.concatenate([chunk, self._load(path)])
+            tmp_path = path + '.tmp'
+            chunk.tofile(tmp_path)
+            os.replace(tmp_path, path)
+
+    def append(self, df: pd.DataFrame) -> int:
+        """Append one station's parsed observations; returns the number of new rows written"""
+        if df.empty:
+            return 0
+        station_id = str(df['station_id'].iloc[0])
+        t = df['timestamp'].to_numpy('datetime64[ns]').view(np.int64)
+        bins = df['bin_depth'].to_numpy(np.int16)
+        valid = t != np.iinfo(np.int64).min  # NaT
+        order = np.lexsort((bins[valid], t[valid]))
+        index = np.flatnonzero(valid)[order]
+
+        with self._lock:
+            head = self._head(station_id)
+            last, last_bins = self._tail(station_id)
+            if last is not None:
+                # Bins already stored at the last timestamp are duplicates; other bins there are new
+                at_last = t[index] == last
+                stored = at_last & np.isin(bins[index], list(last_bins))
+                index = index[(t[index] < head) | (t[index] > last) | (at_last & ~stored)]
+            if len(index):
+                # One row per (timestamp, bin) within the batch
+                keys = np.stack([t[index], bins[index].astype(np.int64)])
+                keep = np.ones(len(index), dtype=bool)
+                keep[1:] = (np.diff(keys, axis=1) != 0).any(axis=0)
+                index = index[keep]
+            if not len(index):
+                return 0
+
+            records = np.empty(len(index), dtype=RECORD_DTYPE)
+            records['t'] = t[index]
+            records['s'] = df['current_speed_knots'].to_numpy(np.float32)[index]
+            records['d'] = df['current_direction_degrees'].to_numpy(np.float32)[index]
+            records['b'] = bins[index]
+
+            station_dir = self._station_dir(station_id)
+            os.makedirs(station_dir, exist_ok=True)
+            meta_path = os.path.join(station_dir, META_FILENAME)
+            if not os.path.exists(meta_path):
+                first = df.iloc[0]
+                with open(meta_path, 'w') as f:
+                    json.dump({'id': station_id, 'name': str(first['station_name']),
+                               'lat': str(first['latitude']), 'lon': str(first['longitude'])}, f)
+
+            n_early = 0 if head is None else int(np.searchsorted(records['t'], head))
+            if n_early:
+                self._backfill(station_dir, records[:n_early])
+            for name, chunk in self._by_day(records[n_early:]):
+                with open(os.path.join(station_dir, name), 'ab') as f:
+                    chunk.tofile(f)
+            self._first[station_id] = int(records['t'][0]) if head is None else min(head, int(records['t'][0]))
+            new_last = int(records['t'][-1])
+            if last is None or new_last >= last:
+                new_bins = frozenset(records['b'][records['t'] == new_last].tolist())
+                self._last[station_id] = (new_last, new_bins | last_bins if new_last == last else new_bins)
+        return len(records)
+
+    def read(self, station_id: str, start: Optional[datetime] = None,
+             end: Optional[datetime] = None) -> pd.DataFrame:
+        """Stored observations between start and end (inclusive) as a parser-shaped DataFrame"""
+        observations = self.read_observations(station_id, start, end)
+        return observations.to_pandas() if len(observations) else pd.DataFrame()
+
+    def read_observations(self, station_id: str, start: Optional[datetime] = None,
+                          end: Optional[datetime] = None) -> CurrentObservations:
+        """read() as a compact CurrentObservations (empty when nothing is stored)"""
+        metadata = self.metadata(station_id)
+        if metadata is None:
+            return CurrentObservations.empty()
+        lo = _epoch_ns(start) if start is not None else None
+        hi = _epoch_ns(end) if end is not None else None
+        chunks = [self._load(path) for day, path in self.partitions(station_id)
+                  if (lo is None or day >= lo // NS_PER_DAY) and (hi is None or day <= hi // NS_PER_DAY)]
+        records = np.concatenate(chunks) if chunks else np.empty(0, dtype=RECORD_DTYPE)
+        mask = np.ones(len(records), dtype=bool)
+        if lo is not None:
+            mask &= records['t'] >= lo
+        if hi is not None:
+            mask &= records['t'] <= hi
+        return CurrentObservations.from_records(StationInfo.from_metadata(metadata), records[mask])
+
+    def gaps(self, station_ids: Iterable[str], hours_back: float, end: datetime
+             ) -> Tuple[Dict[str, Tuple[datetime, datetime]], Dict[str, Tuple[datetime, datetime]]]:
+        """({station_id: (begin, end)} missing before the first stored timestamp, and after the last one)
+        within the trailing hours_back window"""
+        start = end - timedelta(hours=hours_back)
+        before, after = {}, {}
+        for station_id in station_ids:
+            first, last = self.first_timestamp(station_id), self.last_timestamp(station_id)
+            if last is None or last < start:
+                after[station_id] = (start, end)
+                continue
+            stop = min(end, first.to_pydatetime() - timedelta(minutes=1))
+            if start <= stop:
+                before[station_id] = (start, stop)
+            begin = last.to_pydatetime() + timedelta(minutes=1)
+            if begin <= end:
+                after[station_id] = (begin, end)
+        return before, after
+
+    def sync(self, fetcher, station_ids: Iterable[str], hours_back: float = 24,
+             end: Optional[datetime] = None) -> Dict[str, int]:
+        """Fetch and append only what each station is missing; {station_id: rows added}"""
+        from noaa_fetcher import utcnow
+
+        before, after = self.gaps(station_ids, hours_back, end or utcnow())
+        added: Dict[str, int] = {}
+        for ranges, keep in ((before, {'backfill': True}), (after, {'contiguous': True})):
+            if ranges:
+                for station_id, df in fetcher.fetch_ranges(ranges, **keep).items():
+                    added[station_id] = added.get(station_id, 0) + self.append(df)
+        return added
+
+    def prune(self, before: datetime) -> int:
+        """Delete whole partitions for UTC days before `before`; returns the number removed"""
+        cutoff = _epoch_ns(before) // NS_PER_DAY
+        removed = 0
+        with self._lock:
+            for station_id in self.stations():
+                for day, path in self.partitions(station_id):
+                    if day < cutoff:
+                        os.remove(path)
+                        removed += 1
+                self._last.pop(station_id, None)
+                self._first.pop(station_id, None)
+        return removed
@@ -3,7 +3,6 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from typing import Dict, Optional
-import joblib
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
@@ -19,8 +18,18 @@ if HERE and HERE not in sys.path:
 
 # Local helper import
 from feature_vector import create_feature_vector
+from model_store import load_time_report
+from model_registry import registry
+from fast_forest import accelerate
+from micro_batcher import get_batcher, predict_rows, predict_with_proba
+import asyncio
+from metrics import instrument, read_csv
+from json_response import FastJSONRoute
+import profiling
+from profiling import span, traced, traced_await
 
 app = FastAPI(title="CTAS API")
+app.router.route_class = FastJSONRoute
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -28,24 +37,60 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
-router = APIRouter(prefix="/api")
+profiling.install(app)
+instrument(app, 'weather')
+router = APIRouter(prefix="/api", route_class=FastJSONRoute)
+
+# Models live in the process-wide registry so they are loaded once per process
+# and can be hot-swapped; handlers take a snapshot with current_models()
+WEATHER_MODELS = {
+    'rain_classifier': 'rain_classifier.pkl',
+    'temperature_regressor': 'temperature_regressor.pkl',
+    'humidity_regressor': 'humidity_regressor.pkl',
+    'water_level_regressor': 'water_level_regressor.pkl',
+}
 
 # Defensive model loading
-def load_model(path):
+def load_model(name):
     try:
-        return joblib.load(path)
+        return registry.get(name)
     except Exception as e:
-        print(f"[WARN] Could not load model {path}: {e}")
+        print(f"[WARN] Could not load model {WEATHER_MODELS.get(name, name)}: {e}")
+        return None
+
+for _name, _path in WEATHER_MODELS.items():
+    registry.register_file(_name, _path)
+    load_model(_name)
+
+def _model_or_none(name):
+    try:
+        return registry.get(name)
+    except RuntimeError:
+        # Load failed (the registry logged it); it is retried once the backoff has passed
         return None
 
-rain_clf = load_model('rain_classifier.pkl')
-temp_reg = load_model('temperature_regressor.pkl')
-humidity_reg = load_model('humidity_regressor.pkl')
-water_level_reg = load_model('water_level_regressor.pkl')
+def current_models():
+    """(rain_clf, temp_reg, humidity_reg, water_level_reg) as of this request
+
+    Models that are not built yet are loaded here, so one whose load failed at
+    import time recovers once the registry's retry backoff has passed; a model
+    that still cannot be loaded is None.
+    """
+    return tuple(_model_or_none(name) for name in WEATHER_MODELS)
+
+async def current_models_async():
+    """current_models() for async handlers: any load runs in the default executor, off the event loop"""
+    if all(registry.is_loaded(name) for name in WEATHER_MODELS):
+        return current_models()
+    return await asyncio.get_running_loop().run_in_executor(None, current_models)
+
+def fast(model):
+    """Compiled-forest view of a model for single-row predictions (falls back to the model)"""
+    return accelerate(model)
 
 # Simple data used across endpoints
 try:
-    weather_df = pd.read_csv("weatherHistory.csv", encoding="latin1", engine="python", on_bad_lines="skip")
+    weather_df = read_csv("weatherHistory.csv", encoding="latin1", engine="python", on_bad_lines="skip")
 except Exception:
     weather_df = pd.DataFrame()
 
@@ -76,7 +121,9 @@ class WeatherRequest(BaseModel):
 # Health endpoint
 @router.get('/health')
 def health():
-    return {"status": "ok", "models": {"rain": rain_clf is not None, "temp": temp_reg is not None, "humidity": humidity_reg is not None, "water_level": water_level_reg is not None}}
+    rain_clf, temp_reg, humidity_reg, water_level_reg = current_models()
+    return {"status": "ok", "models": {"rain": rain_clf is not None, "temp": temp_reg is not None, "humidity": humidity_reg is not None, "water_level": water_level_reg is not None},
+            "model_load_seconds": load_time_report(), "model_memory": registry.memory_report()}
 
 # Utility helpers
 def safe_float(x, default=np.nan):
@@ -103,7 +150,9 @@ def prepare_for_model(model, feats):
 
 # Main unified endpoint
 @router.post('/predict_alerts')
+@traced('handler')
 async def predict_alerts(req: AlertRequest, request: Request):
+    rain_clf, temp_reg, humidity_reg, water_level_reg = await current_models_async()
     # Build feature vector
     # If latitude/longitude not provided by Pydantic model, attempt to extract from raw JSON body
     lat = req.latitude
@@ -126,7 +175,8 @@ async def predict_alerts(req: AlertRequest, request: Request):
         raise HTTPException(status_code=422, detail={'error': 'latitude and longitude are required (accepted keys: latitude, longitude, lat, lon).', 'received_body': body if 'body' in locals() else None})
 
     try:
-        features = create_feature_vector(lat=lat, lon=lon, timestamp=req.timestamp)
+        with span('feature_vector'):
+            features = create_feature_vector(lat=lat, lon=lon, timestamp=req.timestamp)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -148,19 +198,40 @@ async def predict_alerts(req: AlertRequest, request: Request):
 
     errors = []
 
+    # Concurrent requests are scored together: one vectorized call per model per batching window
+    rain_batched = rain_clf is not None and hasattr(rain_clf, 'predict_proba') and len(getattr(rain_clf, 'classes_', [])) > 1
+    jobs = {}
+    if rain_clf is not None:
+        rain_batcher = get_batcher('rain_classifier', predict_with_proba) if rain_batched else \
+            get_batcher('rain_classifier.predict', predict_rows)
+        jobs['rain'] = rain_batcher.submit(rain_clf, prepare_for_model(rain_clf, [t, h, w]))
+    if temp_reg is not None:
+        jobs['temp'] = get_batcher('temperature_regressor', predict_rows).submit(temp_reg, prepare_for_model(temp_reg, [h, w]))
+    if humidity_reg is not None:
+        jobs['hum'] = get_batcher('humidity_regressor', predict_rows).submit(humidity_reg, prepare_for_model(humidity_reg, [h, w]))
+    if water_level_reg is not None:
+        jobs['water'] = get_batcher('water_level_regressor', predict_rows).submit(
+            water_level_reg, prepare_for_model(water_level_reg, [w, h, r]))
+    results = dict(zip(jobs, await asyncio.gather(*(traced_await(f'model_{name}', job) for name, job in jobs.items()),
+                                                  return_exceptions=True)))
+
+    def result(key):
+        value = results[key]
+        if isinstance(value, Exception):
+            raise value
+        return value
+
     # Rain
     if rain_clf is not None:
         try:
-            x = prepare_for_model(rain_clf, [t, h, w])
-            pred = rain_clf.predict([x])[0]
+            pred, probs = result('rain') if rain_batched else (result('rain'), None)
             try:
                 out['rain_predicted'] = bool(int(pred))
             except Exception:
                 out['rain_predicted'] = bool(pred)
             # probability
             try:
-                if hasattr(rain_clf, 'predict_proba') and hasattr(rain_clf, 'classes_') and len(getattr(rain_clf, 'classes_', [])) > 1:
-                    probs = rain_clf.predict_proba([x])[0]
+                if rain_batched:
                     classes = list(rain_clf.classes_)
                     if 1 in classes:
                         out['rain_probability'] = float(probs[classes.index(1)])
@@ -176,24 +247,21 @@ async def predict_alerts(req: AlertRequest, request: Request):
     # Temperature
     if temp_reg is not None:
         try:
-            x = prepare_for_model(temp_reg, [h, w])
-            out['temperature_predicted'] = float(temp_reg.predict([x])[0])
+            out['temperature_predicted'] = float(result('temp'))
         except Exception as e:
             errors.append(f'temp_pred: {e}')
 
     # Humidity
     if humidity_reg is not None:
         try:
-            x = prepare_for_model(humidity_reg, [h, w])
-            out['humidity_predicted'] = float(humidity_reg.predict([x])[0])
+            out['humidity_predicted'] = float(result('hum'))
         except Exception as e:
             errors.append(f'hum_pred: {e}')
 
     # Water level
     if water_level_reg is not None:
         try:
-            x = prepare_for_model(water_level_reg, [w, h, r])
-            out['water_level_predicted'] = float(water_level_reg.predict([x])[0])
+            out['water_level_predicted'] = float(result('water'))
         except Exception as e:
             errors.append(f'water_pred: {e}')
 
@@ -283,23 +351,6 @@ async def predict_alerts(req: AlertRequest, request: Request):
     }
     out['_model_meta'] = _model_meta
 
-    # Sanitize output: replace NaN/inf with None and convert numpy types
-    def sanitize(obj):
-        if obj is None:
-            return None
-        if isinstance(obj, float):
-            if np.isnan(obj) or np.isinf(obj):
-                return None
-            return float(obj)
-        if isinstance(obj, (np.floating, np.integer)):
-            return obj.item()
-        if isinstance(obj, dict):
-            return {k: sanitize(v) for k, v in obj.items()}
-        if isinstance(obj, (list, tuple)):
-            return [sanitize(v) for v in obj]
-        return obj
-
-    out = sanitize(out)
     # Indicate how features were sourced (proxy/direct/live). Feature vector may set '_live_source'.
     try:
         if isinstance(out.get('features_used'), dict) and out['features_used'].get('_live_source'):
@@ -315,6 +366,7 @@ async def predict_alerts(req: AlertRequest, request: Request):
 # Rain-specific endpoint (keeps previous behavior)
 @router.post('/predict_rain')
 def predict_rain(req: WeatherRequest) -> Dict:
+    rain_clf, temp_reg, humidity_reg, water_level_reg = current_models()
     # simple nearest-record usage
     if not hasattr(weather_df, 'columns') or weather_df.empty:
         raise HTTPException(status_code=500, detail='weatherHistory.csv not available')
@@ -336,8 +388,8 @@ def predict_rain(req: WeatherRequest) -> Dict:
             raise HTTPException(status_code=500, detail=f"Missing feature {name}")
         features.append(val)
     try:
-        pred = rain_clf.predict([features])[0] if rain_clf is not None else None
-        prob = rain_clf.predict_proba([features])[0][1] if (rain_clf is not None and hasattr(rain_clf, 'predict_proba')) else None
+        pred = fast(rain_clf).predict([features])[0] if rain_clf is not None else None
+        prob = fast(rain_clf).predict_proba([features])[0][1] if (rain_clf is not None and hasattr(rain_clf, 'predict_proba')) else None
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     return {
@@ -395,6 +447,7 @@ def forecast(req: WeatherRequest, hours: int = 24) -> Dict:
     This uses the existing models to produce a base prediction and then
     generates hourly values by applying a small diurnal variation.
     """
+    rain_clf, temp_reg, humidity_reg, water_level_reg = current_models()
     # clamp hours
     try:
         hours = int(hours)
@@ -424,13 +477,13 @@ def forecast(req: WeatherRequest, hours: int = 24) -> Dict:
     if temp_reg is not None:
         try:
             x = prepare_for_model(temp_reg, [h_base, w_base])
-            base_temp = float(temp_reg.predict([x])[0])
+            base_temp = float(fast(temp_reg).predict([x])[0])
         except Exception:
             base_temp = None
     if humidity_reg is not None:
         try:
             x = prepare_for_model(humidity_reg, [h_base, w_base])
-            base_hum = float(humidity_reg.predict([x])[0])
+            base_hum = float(fast(humidity_reg).predict([x])[0])
         except Exception:
             base_hum = None
     if rain_clf is not None:
@@ -438,7 +491,7 @@ def forecast(req: WeatherRequest, hours: int = 24) -> Dict:
             x = prepare_for_model(rain_clf, [t_base, h_base, w_base])
             # probability
             if hasattr(rain_clf, 'predict_proba'):
-                probs = rain_clf.predict_proba([x])[0]
+                probs = fast(rain_clf).predict_proba([x])[0]
                 classes = list(getattr(rain_clf, 'classes_', []))
                 if 1 in classes:
                     base_rain_prob = float(probs[classes.index(1)])
@@ -451,7 +504,7 @@ def forecast(req: WeatherRequest, hours: int = 24) -> Dict:
     if water_level_reg is not None:
         try:
             x = prepare_for_model(water_level_reg, [w_base, h_base, r_base])
-            base_water = float(water_level_reg.predict([x])[0])
+            base_water = float(fast(water_level_reg).predict([x])[0])
         except Exception:
             base_water = None
 
@@ -493,23 +546,8 @@ def forecast(req: WeatherRequest, hours: int = 24) -> Dict:
         'forecast': forecast_hours
     }
 
-    # sanitize before return
-    def sanitize_obj(o):
-        if o is None:
-            return None
-        if isinstance(o, float):
-            if np.isnan(o) or np.isinf(o):
-                return None
-            return float(o)
-        if isinstance(o, (np.integer, np.floating)):
-            return o.item()
-        if isinstance(o, dict):
-            return {k: sanitize_obj(v) for k, v in o.items()}
-        if isinstance(o, list):
-            return [sanitize_obj(v) for v in o]
-        return o
-
-    return sanitize_obj(result)
+    # NaN/inf and NumPy values are converted by the response encoder (json_response.py)
+    return result
 
 
 # Simple ping endpoint for quick GET checks (helps debug frontend proxy/404s)
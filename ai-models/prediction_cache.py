@@ -0,0 +1,216 @@
+"""
+CTAS Prediction Cache
+LRU + TTL cache of model outputs keyed by model version and a quantized feature vector
+
+Repeated requests (frontend defaults, clients polling the same location) map to
+the same key and are answered without touching the model. Each feature is
+rounded to a configurable number of decimals before it becomes part of the key,
+so inputs closer than that precision share one cached result; the result is the
+one computed for the first such input.
+
+Keys include the registry version of the model, and every cache listens to
+registry.on_swap(): a hot-swapped or retrained model drops its cached entries
+immediately, and entries computed by the previous model can never be served.
+
+Environment: CTAS_CACHE_SIZE (entries per cache, default 4096, 0 disables),
+CTAS_CACHE_TTL (seconds, default 300) and CTAS_CACHE_PRECISION, a comma
+separated list of feature=decimals overrides (e.g. "water_level_m=2,default=3").
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Mapping, Optional, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+SIZE_ENV = 'CTAS_CACHE_SIZE'
+TTL_ENV = 'CTAS_CACHE_TTL'
+PRECISION_ENV = 'CTAS_CACHE_PRECISION'
+DEFAULT_SIZE = 4096
+DEFAULT_TTL_SECONDS = 300.0
+DEFAULT_DECIMALS = 4
+
+_MISSING = object()
+
+
+def parse_precision(spec: str) -> Dict[str, int]:
+    """'water_level_m=2, default=3' -> {'water_level_m': 2, 'default': 3}"""
+    precision = {}
+    for item in (spec or '').split(','):
+        name, sep, decimals = item.partition('=')
+        if not sep or not name.strip():
+            continue
+        try:
+            precision[name.strip()] = int(decimals)
+        except ValueError:
+            logger.warning(f"Ignoring invalid cache precision {item.strip()!r}")
+    return precision
+
+
+def _env_number(name: str, default, cast):
+    try:
+        return cast(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        logger.warning(f"Ignoring invalid {name}={os.environ.get(name)!r}; using {default}")
+        return default
+
+
+def quantize(value: Any, decimals: int) -> Hashable:
+    """Integer bucket of value at `decimals` decimal places; non-numeric values are kept as-is"""
+    if value is None or isinstance(value, bool):
+        return value
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return value if isinstance(value, Hashable) else repr(value)
+    if math.isnan(number):
+        return 'nan'
+    if math.isinf(number):
+        return 'inf' if number > 0 else '-inf'
+    return round(number * 10 ** decimals)
+
+
+class PredictionCache:
+    """Cache of one model's predictions; keys are (model version, quantized features)"""
+
+    def __init__(self, name: str, feature_names: Optional[Sequence[str]] = None,
+                 precision: Optional[Mapping[str, int]] = None, maxsize: Optional[int] = None,
+                 ttl_seconds: Optional[float] = None):
+        self.name = name
+        self.feature_names = list(feature_names) if feature_names is not None else None
+        self.precision = dict(precision or {})
+        self.precision.update(parse_precision(os.environ.get(PRECISION_ENV, '')))
+        self.default_decimals = self.precision.pop('default', DEFAULT_DECIMALS)
+        self.maxsize = max(0, maxsize if maxsize is not None else _env_number(SIZE_ENV, DEFAULT_SIZE, int))
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else _env_number(TTL_ENV, DEFAULT_TTL_SECONDS, float)
+        self._entries: 'OrderedDict[Tuple, Tuple[float, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'invalidations': 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0
+
+    def key(self, version: int, features: Union[Mapping[str, Any], Sequence[Any]]) -> Tuple:
+        """(version, quantized features); dicts are read in feature_names (or sorted key) order"""
+        if isinstance(features, Mapping):
+            names = self.feature_names or sorted(features)
+            values = [features.get(name) for name in names]
+        else:
+            names = self.feature_names or [None] * len(features)
+            values = list(features)
+        quantized = tuple(quantize(value, self.precision.get(name, self.default_decimals))
+                          for name, value in zip(names, values))
+        return (version, quantized)
+
+    def get(self, key: Tuple, default: Any = None) -> Any:
+        if not self.enabled:
+            return default
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                self._counters['misses'] += 1
+                return default
+            expires, value = entry
+            if expires < now:
+                del self._entries[key]
+                self._counters['expirations'] += 1
+                self._counters['misses'] += 1
+                return default
+            self._entries.move_to_end(key)
+            self._counters['hits'] += 1
+            return value
+
+    def put(self, key: Tuple, value: Any) -> None:
+        if not self.enabled:
+            return
+        expires = time.monotonic() + self.ttl_seconds if self.ttl_seconds > 0 else math.inf
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._counters['evictions'] += 1
+
+    def invalidate(self, version: Optional[int] = None) -> int:
+        """Drop every entry (or only those not computed by model `version`); returns the number dropped"""
+        with self._lock:
+            if version is None:
+                dropped = len(self._entries)
+                self._entries.clear()
+            else:
+                stale = [key for key in self._entries if key[0] != version]
+                for key in stale:
+                    del self._entries[key]
+                dropped = len(stale)
+            self._counters['invalidations'] += 1
+        return dropped
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            size = len(self._entries)
+        lookups = counters['hits'] + counters['misses']
+        return dict(counters, name=self.name, size=size, maxsize=self.maxsize, ttl_seconds=self.ttl_seconds,
+                    hit_rate=round(counters['hits'] / lookups, 4) if lookups else 0.0)
+
+
+_caches: Dict[str, PredictionCache] = {}
+_caches_lock = threading.Lock()
+_listening = set()
+
+
+def get_cache(name: str, registry=None, **options) -> PredictionCache:
+    """Process-wide cache for model `name`, invalidated whenever `registry` swaps that model"""
+    with _caches_lock:
+        cache = _caches.get(name)
+        if cache is None:
+            cache = _caches[name] = PredictionCache(name, **options)
+        if registry is not None and id(registry) not in _listening:
+            _listening.add(id(registry))
+            registry.on_swap(_on_swap)
+        return cache
+
+
+def _on_swap(name: str, version: int) -> None:
+    cache = _caches.get(name)
+    if cache is not None:
+        dropped = cache.invalidate(version)
+        if dropped:
+            logger.info(f"Prediction cache '{name}': dropped {dropped} entries after swap to version {version}")
+
+
+async def cached_prediction(name: str, registry, features: Union[Mapping[str, Any], Sequence[Any]],
+                            compute: Callable[[], Awaitable[Any]], version: Optional[int] = None,
+                            **options) -> Any:
+    """Cached result for `features` under `version` of model `name`, else `await compute()`
+
+    Pass the version registry.get_with_version() returned with the model `compute`
+    uses; without it the registry's current version is read here, which is only
+    right if no swap can happen after the model was fetched.
+    """
+    cache = get_cache(name, registry, **options)
+    if version is None:
+        version = registry.version(name)
+    key = cache.key(version, features)
+    result = cache.get(key, _MISSING)
+    if result is _MISSING:
+        result = await compute()
+        # A swap while computing means the result may come from the old model
+        if registry.version(name) == version:
+            cache.put(key, result)
+    return result
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    with _caches_lock:
+        caches = list(_caches.values())
+    return {cache.name: cache.stats() for cache in caches}
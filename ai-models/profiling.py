@@ -0,0 +1,324 @@
+"""
+CTAS Request Profiling
+Opt-in per-request sampling profiles and span breakdowns for the API servers
+
+Profiling is enabled only when CTAS_PROFILE_TOKEN is set, and only for requests
+that present that token, either as an `X-CTAS-Profile` header or a `profile` query
+parameter. For such a request:
+
+- a sampling thread records the Python stacks of all threads every
+  CTAS_PROFILE_INTERVAL_MS (default 1) and writes them in collapsed-stack format
+  (`frame;frame;frame count`, readable by flamegraph.pl, speedscope, inferno) to
+  CTAS_PROFILE_DIR/<profile_id>.collapsed; fetch it from /debug/profiles/<profile_id>.
+  Only the newest CTAS_PROFILE_KEEP captures (default 100) are kept; older ones
+  are deleted each time a new one is written
+- code wrapped in `span(name)` / `@traced(name)` is timed, and the spans are returned
+  in a `Server-Timing` header and, for JSON object responses, a `_profile` key
+- `serialization` is the time from the end of the endpoint's `handler` span to the
+  response being sent (FastAPI encoding + JSON rendering)
+
+Other requests running in the same process at the same time appear in the
+samples too; profile on a quiet instance for clean flame graphs. When profiling
+is off, span() costs one context-variable lookup.
+"""
+
+import contextvars
+import functools
+import hmac
+import inspect
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+logger = logging.getLogger(__name__)
+
+TOKEN_ENV = 'CTAS_PROFILE_TOKEN'
+DIR_ENV = 'CTAS_PROFILE_DIR'
+INTERVAL_ENV = 'CTAS_PROFILE_INTERVAL_MS'
+KEEP_ENV = 'CTAS_PROFILE_KEEP'
+DEFAULT_KEEP = 100
+PROFILE_SUFFIX = '.collapsed'
+HEADER = 'x-ctas-profile'
+QUERY_PARAM = 'profile'
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.profiles')
+MAX_STACK_DEPTH = 128
+
+_current: contextvars.ContextVar = contextvars.ContextVar('ctas_request_profile', default=None)
+
+
+def profile_dir() -> str:
+    return os.environ.get(DIR_ENV) or DEFAULT_DIR
+
+
+def profiles_to_keep() -> int:
+    try:
+        return max(1, int(os.environ.get(KEEP_ENV, DEFAULT_KEEP)))
+    except ValueError:
+        logger.warning(f"Ignoring invalid {KEEP_ENV}={os.environ.get(KEEP_ENV)!r}; using {DEFAULT_KEEP}")
+        return DEFAULT_KEEP
+
+
+def prune_profiles(directory: str, keep: int) -> int:
+    """Delete all but the `keep` newest captures in directory; returns how many were removed"""
+    captures = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.name.endswith(PROFILE_SUFFIX) and entry.is_file():
+                try:
+                    captures.append((entry.stat().st_mtime_ns, entry.path))
+                except FileNotFoundError:
+                    continue
+    removed = 0
+    for _, path in sorted(captures, reverse=True)[keep:]:
+        try:
+            os.remove(path)
+            removed += 1
+        except FileNotFoundError:
+            # Another request pruned it first
+            pass
+    return removed
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    filename = os.path.basename(code.co_filename)
+    # ';' separates frames in collapsed stacks (the count follows the last space)
+    return f"{code.co_name} ({filename}:{frame.f_lineno})".replace(';', ':')
+
+
+class StackSampler:
+    """Background thread sampling every thread's Python stack into collapsed-stack counts"""
+
+    def __init__(self, interval_seconds: float = 0.001):
+        self.interval_seconds = interval_seconds
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='ctas-profiler', daemon=True)
+
+    def start(self) -> 'StackSampler':
+        self._thread.start()
+        return self
+
+    def stop(self) -> 'StackSampler':
+        self._stop.set()
+        self._thread.join()
+        return self
+
+    def _run(self):
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval_seconds):
+            frames = sys._current_frames()
+            for ident, frame in frames.items():
+                if ident == own:
+                    continue
+                if ident not in names:
+                    thread = next((t for t in threading.enumerate() if t.ident == ident), None)
+                    names[ident] = (thread.name if thread is not None else str(ident)).replace(';', ':')
+                stack = []
+                while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names[ident])
+                self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class RequestProfile:
+    """Spans (and optionally stack samples) for one request"""
+
+    def __init__(self, sample: bool = True, interval_seconds: float = 0.001):
+        self.id = uuid.uuid4().hex[:16]
+        self.started = time.perf_counter()
+        self.spans: List[Tuple[str, float, float]] = []
+        self.sampler = StackSampler(interval_seconds).start() if sample else None
+
+    def add_span(self, name: str, start: float, end: float):
+        self.spans.append((name, start - self.started, end - self.started))
+
+    def span_end(self, name: str) -> Optional[float]:
+        ends = [end for span_name, _, end in self.spans if span_name == name]
+        return max(ends) if ends else None
+
+    def finish(self) -> Optional[str]:
+        """Stop sampling and store the collapsed stacks, dropping the oldest captures; returns the file path"""
+        if self.sampler is None:
+            return None
+        self.sampler.stop()
+        directory = profile_dir()
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{self.id}{PROFILE_SUFFIX}")
+        with open(path, 'w') as f:
+            f.write(self.sampler.collapsed())
+        prune_profiles(directory, profiles_to_keep())
+        return path
+
+    def summary(self, total: float) -> Dict[str, Any]:
+        return {
+            'profile_id': self.id,
+            'total_ms': round(1000 * total, 3),
+            'spans': [{'name': name, 'start_ms': round(1000 * start, 3), 'duration_ms': round(1000 * (end - start), 3)}
+                      for name, start, end in self.spans],
+            'samples': self.sampler.samples if self.sampler is not None else 0,
+        }
+
+    def server_timing(self, total: float) -> str:
+        totals: Dict[str, float] = {}
+        for name, start, end in self.spans:
+            totals[name] = totals.get(name, 0.0) + (end - start)
+        parts = [f"{name.replace(' ', '_')};dur={1000 * seconds:.3f}" for name, seconds in totals.items()]
+        parts.append(f"total;dur={1000 * total:.3f}")
+        return ', '.join(parts)
+
+
+def current_profile() -> Optional[RequestProfile]:
+    return _current.get()
+
+
+@contextmanager
+def span(name: str):
+    """Time a block as `name` when the current request is being profiled"""
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add_span(name, start, time.perf_counter())
+
+
+def traced(name: str):
+    """Decorator form of span() for sync or async functions"""
+    def decorate(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+async def traced_await(name: str, awaitable):
+    """Await `awaitable` inside span(name); for timing jobs run concurrently with asyncio.gather"""
+    with span(name):
+        return await awaitable
+
+
+def _requested_token(scope) -> Optional[str]:
+    for key, value in scope.get('headers', []):
+        if key == HEADER.encode('latin-1'):
+            return value.decode('latin-1')
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    values = query.get(QUERY_PARAM)
+    return values[0] if values else None
+
+
+def is_authorized(scope) -> bool:
+    expected = os.environ.get(TOKEN_ENV)
+    if not expected:
+        return False
+    supplied = _requested_token(scope)
+    return supplied is not None and hmac.compare_digest(supplied.encode('utf-8'), expected.encode('utf-8'))
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles authorized requests and annotates their responses"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not is_authorized(scope):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            interval = float(os.environ.get(INTERVAL_ENV, 1.0)) / 1000.0
+        except ValueError:
+            interval = 0.001
+        profile = RequestProfile(interval_seconds=interval)
+        token = _current.set(profile)
+        start_message: Dict[str, Any] = {}
+        chunks: List[bytes] = []
+        response_started = {'at': None}
+
+        async def buffer(message):
+            if message['type'] == 'http.response.start':
+                response_started['at'] = time.perf_counter()
+                start_message.update(message)
+            elif message['type'] == 'http.response.body':
+                chunks.append(message.get('body', b''))
+            else:
+                await send(message)
+
+        try:
+            await self.app(scope, receive, buffer)
+        finally:
+            _current.reset(token)
+            path = profile.finish()
+
+        handler_end = profile.span_end('handler')
+        if handler_end is not None and response_started['at'] is not None:
+            profile.spans.append(('serialization', handler_end, response_started['at'] - profile.started))
+        total = time.perf_counter() - profile.started
+        summary = dict(profile.summary(total), profile_path=path, profile_url=f"/debug/profiles/{profile.id}")
+
+        body = b''.join(chunks)
+        headers = [(k, v) for k, v in start_message.get('headers', []) if k.lower() != b'content-length']
+        content_type = dict(start_message.get('headers', [])).get(b'content-type', b'')
+        if content_type.startswith(b'application/json'):
+            try:
+                payload = json.loads(body)
+                if isinstance(payload, dict):
+                    payload['_profile'] = summary
+                    body = json.dumps(payload).encode('utf-8')
+            except ValueError:
+                pass
+        headers.append((b'content-length', str(len(body)).encode('latin-1')))
+        headers.append((b'server-timing', profile.server_timing(total).encode('latin-1')))
+        headers.append((b'x-ctas-profile-id', profile.id.encode('latin-1')))
+        await send(dict(start_message, headers=headers))
+        await send({'type': 'http.response.body', 'body': body, 'more_body': False})
+
+
+def install(app):
+    """Add the profiling middleware and the /debug/profiles/{profile_id} download route"""
+    from fastapi import HTTPException, Request
+    from fastapi.responses import PlainTextResponse
+
+    app.add_middleware(ProfilingMiddleware)
+
+    @app.get('/debug/profiles/{profile_id}', include_in_schema=False)
+    def download_profile(profile_id: str, request: Request):
+        if not is_authorized(request.scope):
+            raise HTTPException(status_code=403, detail='Profiling token required')
+        if not profile_id.isalnum():
+            raise HTTPException(status_code=400, detail='Invalid profile id')
+        path = os.path.join(profile_dir(), f"{profile_id}{PROFILE_SUFFIX}")
+        if not os.path.isfile(path):
+            raise HTTPException(status_code=404, detail='Profile not found')
+        with open(path) as f:
+            return PlainTextResponse(f.read())
+
+    return app
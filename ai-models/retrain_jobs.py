@@ -0,0 +1,258 @@
+"""
+CTAS Retraining Jobs
+Background retraining in a separate, CPU-limited process with an atomic model swap
+
+The serving process never trains. A job launches this module as a worker
+subprocess which imports the model class, trains a fresh instance, and
+publishes it as the next version in the model store. When the worker exits
+successfully the server rebuilds the model from that artifact and swaps the
+registry pointer, so requests in flight finish on the old model and no request
+ever sees a half-trained one.
+
+Workers run under os.nice() and, where supported, a CPU affinity mask; BLAS
+and OpenMP thread pools are sized to match so training does not starve the
+event loop. Progress is reported on stdout as `CTAS_PROGRESS {json}` lines.
+
+Usage (worker, normally started by RetrainManager):
+    python retrain_jobs.py --name sea_level --module sea_level_anomaly_detector \\
+        --class SeaLevelAnomalyDetector --nice 10 --cores 0,1
+"""
+
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PROGRESS_PREFIX = 'CTAS_PROGRESS '
+DEFAULT_NICE = 10
+MAX_NICE = 19
+THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS', 'LOKY_MAX_CPU_COUNT')
+
+
+def parse_nice(nice) -> int:
+    """Niceness increment in 0..19; a negative one would raise the worker's priority"""
+    nice = int(nice)
+    if not 0 <= nice <= MAX_NICE:
+        raise ValueError(f"nice must be between 0 and {MAX_NICE}, got {nice}")
+    return nice
+
+
+def parse_cores(cores) -> Optional[List[int]]:
+    """'0,1,4-5' or [0, 1] -> sorted CPU ids; None/'' means no affinity limit"""
+    if cores is None or cores == '':
+        return None
+    if isinstance(cores, (list, tuple, set)):
+        return sorted({int(c) for c in cores})
+    result = set()
+    for part in str(cores).split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            low, high = part.split('-', 1)
+            result.update(range(int(low), int(high) + 1))
+        else:
+            result.add(int(part))
+    return sorted(result)
+
+
+class RetrainJob:
+    __slots__ = ('job_id', 'name', 'module_name', 'class_name', 'nice', 'cores', 'status', 'stage',
+                 'progress', 'created_at', 'started_at', 'finished_at', 'duration_seconds',
+                 'train_seconds', 'version', 'result', 'error', 'pid')
+
+    def __init__(self, name: str, module_name: str, class_name: str, nice: int, cores: Optional[List[int]]):
+        self.job_id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.module_name = module_name
+        self.class_name = class_name
+        self.nice = nice
+        self.cores = cores
+        self.status = 'queued'
+        self.stage = 'queued'
+        self.progress = 0.0
+        self.created_at = datetime.now()
+        self.started_at = None
+        self.finished_at = None
+        self.duration_seconds = None
+        self.train_seconds = None
+        self.version = None
+        self.result = None
+        self.error = None
+        self.pid = None
+
+    @property
+    def active(self) -> bool:
+        return self.status in ('queued', 'running', 'swapping')
+
+    def describe(self) -> Dict[str, Any]:
+        info = {slot: getattr(self, slot) for slot in self.__slots__}
+        if self.started_at is not None and self.duration_seconds is None:
+            info['elapsed_seconds'] = round((datetime.now() - self.started_at).total_seconds(), 2)
+        return info
+
+
+class RetrainManager:
+    """Run one retraining subprocess per model at a time and swap results into a ModelRegistry"""
+
+    def __init__(self, registry, max_history: int = 50):
+        self.registry = registry
+        self.max_history = max_history
+        self._jobs: Dict[str, RetrainJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, name: str, module_name: str, class_name: str,
+               nice: int = DEFAULT_NICE, cores=None) -> RetrainJob:
+        """Start retraining `name`; raises RuntimeError if a job for it is already running
+        and ValueError for an invalid nice or cores"""
+        job = RetrainJob(name, module_name, class_name, parse_nice(nice), parse_cores(cores))
+        with self._lock:
+            if any(j.name == name and j.active for j in self._jobs.values()):
+                raise RuntimeError(f"Retraining already in progress for '{name}'")
+            self._jobs[job.job_id] = job
+            self._trim_history()
+        threading.Thread(target=self._run, args=(job,), name=f"retrain-{name}", daemon=True).start()
+        return job
+
+    def _trim_history(self):
+        finished = [j for j in self._jobs.values() if not j.active]
+        for job in sorted(finished, key=lambda j: j.created_at)[:max(0, len(self._jobs) - self.max_history)]:
+            del self._jobs[job.job_id]
+
+    def get(self, job_id: str) -> Optional[RetrainJob]:
+        return self._jobs.get(job_id)
+
+    def jobs(self) -> List[Dict[str, Any]]:
+        return [job.describe() for job in sorted(self._jobs.values(), key=lambda j: j.created_at, reverse=True)]
+
+    def latest(self, name: str) -> Optional[Dict[str, Any]]:
+        """Most recent job for a model, if any"""
+        candidates = [j for j in self._jobs.values() if j.name == name]
+        return max(candidates, key=lambda j: j.created_at).describe() if candidates else None
+
+    def _command(self, job: RetrainJob) -> List[str]:
+        command = [sys.executable, os.path.abspath(__file__), '--name', job.name,
+                   '--module', job.module_name, '--class', job.class_name, '--nice', str(job.nice)]
+        if job.cores:
+            command += ['--cores', ','.join(map(str, job.cores))]
+        return command
+
+    def _run(self, job: RetrainJob):
+        job.status = 'running'
+        job.started_at = datetime.now()
+        start = time.perf_counter()
+        env = dict(os.environ)
+        if job.cores:
+            for var in THREAD_ENV_VARS:
+                env[var] = str(len(job.cores))
+        try:
+            with tempfile.TemporaryFile(mode='w+') as stderr:
+                proc = subprocess.Popen(self._command(job), cwd=HERE, env=env, stdout=subprocess.PIPE,
+                                        stderr=stderr, text=True, bufsize=1)
+                job.pid = proc.pid
+                for line in proc.stdout:
+                    if line.startswith(PROGRESS_PREFIX):
+                        self._on_event(job, json.loads(line[len(PROGRESS_PREFIX):]))
+                returncode = proc.wait()
+                if returncode != 0:
+                    stderr.seek(0)
+                    raise RuntimeError(f"worker exited with {returncode}: {stderr.read().strip()[-2000:]}")
+            if job.version is None:
+                raise RuntimeError("worker finished without publishing an artifact")
+
+            job.status = 'swapping'
+            job.stage = 'swapping'
+            self.registry.reload(job.name)
+            job.status = 'completed'
+            job.stage = 'completed'
+            job.progress = 1.0
+            logger.info(f"Retraining for {job.name} completed: now serving {job.version}")
+        except Exception as e:
+            job.status = 'failed'
+            job.error = str(e)
+            logger.error(f"Retraining failed for {job.name}: {e}")
+        finally:
+            job.finished_at = datetime.now()
+            job.duration_seconds = round(time.perf_counter() - start, 3)
+
+    def _on_event(self, job: RetrainJob, event: Dict[str, Any]):
+        job.stage = event.get('stage', job.stage)
+        job.progress = event.get('progress', job.progress)
+        for key in ('train_seconds', 'version', 'result'):
+            if key in event:
+                setattr(job, key, event[key])
+
+
+# --- Worker process --------------------------------------------------------
+
+def _emit(stage: str, progress: float, **extra):
+    print(PROGRESS_PREFIX + json.dumps(dict(extra, stage=stage, progress=progress), default=str), flush=True)
+
+
+def _limit_resources(nice: int, cores: Optional[List[int]]):
+    if nice and hasattr(os, 'nice'):
+        try:
+            os.nice(nice)
+        except OSError as e:
+            logger.warning(f"Could not renice retraining worker: {e}")
+    if cores and hasattr(os, 'sched_setaffinity'):
+        try:
+            os.sched_setaffinity(0, cores)
+        except OSError as e:
+            logger.warning(f"Could not set CPU affinity {cores}: {e}")
+
+
+def run_worker(name: str, module_name: str, class_name: str, nice: int = DEFAULT_NICE,
+               cores: Optional[List[int]] = None) -> str:
+    """Train a fresh model and publish it to the store; returns the new version"""
+    _limit_resources(parse_nice(nice), cores)
+    _emit('importing', 0.05)
+
+    if HERE not in sys.path:
+        sys.path.insert(0, HERE)
+    from model_registry import import_model_module
+    from model_store import publish_version, reserve_version
+
+    model = getattr(import_model_module(module_name), class_name)()
+    _emit('training', 0.1)
+    start = time.perf_counter()
+    result = model.train()
+    train_seconds = round(time.perf_counter() - start, 3)
+    _emit('saving', 0.85, train_seconds=train_seconds, result=result)
+
+    version, model_file = reserve_version(name)
+    model.save_model(model_file, metrics=result if isinstance(result, dict) else None)
+    publish_version(name, version)
+    _emit('published', 0.95, version=version)
+    return version
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Retraining worker (started by the API server)')
+    parser.add_argument('--name', required=True, help='Registry / model store name')
+    parser.add_argument('--module', required=True, help='Module that defines the model class')
+    parser.add_argument('--class', dest='class_name', required=True)
+    parser.add_argument('--nice', type=parse_nice, default=DEFAULT_NICE,
+                        help=f'Niceness increment for the worker (0-{MAX_NICE})')
+    parser.add_argument('--cores', default=None, help='CPU ids to pin the worker to, e.g. 0,1 or 2-3')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    run_worker(args.name, args.module, args.class_name, args.nice, parse_cores(args.cores))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,12 +4,57 @@ from sklearn.ensemble import IsolationForest
 from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report
-import joblib
+from model_store import dump_artifact, load_file
 import logging
 from datetime import datetime, timedelta
 import warnings
 warnings.filterwarnings('ignore')
 
+SYNTHETIC_SEED = 42
+SYNTHETIC_CHUNK_ROWS = 1_000_000
+ANOMALY_FRACTION = 0.05
+# Hours from 2020-01-01 that still fit a datetime64[ns] timestamp
+MAX_NS_HOURS = int((np.datetime64('2262-04-11', 'h') - np.datetime64('2020-01-01T00', 'h')).astype(np.int64))
+SYNTHETIC_DTYPES = {
+    'sea_level_height': np.float64, 'atmospheric_pressure': np.float64, 'wind_speed': np.float64,
+    'wind_direction': np.float64, 'air_temperature': np.float64, 'water_temperature': np.float64,
+    'tidal_residual': np.float64, 'significant_wave_height': np.float64, 'storm_surge_component': np.float64,
+    'rainfall_24h': np.float64, 'moon_phase': np.float64, 'seasonal_component': np.int64,
+    'el_nino_index': np.float64, 'pressure_trend_3h': np.float64, 'temperature_gradient': np.float64,
+    'is_anomaly': np.int64,
+}
+# Per anomaly type: column -> ('add', low, high) adds a uniform draw, ('set', low, high)
+# replaces the value with one and ('choice', a, b) replaces it with a or b
+ANOMALY_EFFECTS = [
+    {  # Storm surge anomaly
+        'sea_level_height': ('add', 300, 800),
+        'atmospheric_pressure': ('add', -50, -20),
+        'wind_speed': ('add', 15, 35),
+        'significant_wave_height': ('add', 3, 8),
+    },
+    {  # King tide anomaly
+        'sea_level_height': ('add', 200, 400),
+        'moon_phase': ('set', 0.8, 1.0),
+        'tidal_residual': ('add', 100, 200),
+    },
+    {  # Low pressure system
+        'atmospheric_pressure': ('add', -45, -25),
+        'sea_level_height': ('add', 150, 300),
+        'pressure_trend_3h': ('add', -10, -5),
+    },
+    {  # Climate oscillation anomaly
+        'el_nino_index': ('choice', -2.5, 2.5),
+        'sea_level_height': ('add', -200, 400),
+        'water_temperature': ('add', -3, 5),
+    },
+]
+
+
+def _timestamp_unit(n_samples):
+    # Timestamps are hourly from 2020; past ~2.1M rows they no longer fit datetime64[ns]
+    return 'ns' if n_samples <= MAX_NS_HOURS else 's'
+
+
 class SeaLevelAnomalyDetector:
     def __init__(self):
         self.anomaly_detector = IsolationForest(
@@ -50,77 +95,79 @@ class SeaLevelAnomalyDetector:
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(__name__)
 
-    def generate_synthetic_data(self, n_samples=5000):
-        """Generate synthetic sea level data with anomalies"""
-        np.random.seed(42)
-        
-        # Generate normal sea level patterns
-        data = {
-            'sea_level_height': np.random.normal(0, 150, n_samples),  # mm
-            'atmospheric_pressure': np.random.normal(1013, 15, n_samples),  # hPa
-            'wind_speed': np.random.exponential(8, n_samples),  # m/s
-            'wind_direction': np.random.uniform(0, 360, n_samples),  # degrees
-            'air_temperature': np.random.normal(25, 5, n_samples),  # °C
-            'water_temperature': np.random.normal(24, 3, n_samples),  # °C
-            'tidal_residual': np.random.normal(0, 50, n_samples),  # mm
-            'significant_wave_height': np.random.exponential(1.5, n_samples),  # m
-            'storm_surge_component': np.random.normal(0, 30, n_samples),  # mm
-            'rainfall_24h': np.random.exponential(10, n_samples),  # mm
-            'moon_phase': np.random.uniform(0, 1, n_samples),  # 0-1
-            'seasonal_component': np.random.choice([0, 1, 2, 3], n_samples),  # seasons
-            'el_nino_index': np.random.normal(0, 1, n_samples),  # standardized
-            'pressure_trend_3h': np.random.normal(0, 2, n_samples),  # hPa/3h
-            'temperature_gradient': np.random.normal(1, 2, n_samples)  # °C
+    def generate_synthetic_data(self, n_samples=5000, seed=SYNTHETIC_SEED):
+        """Generate synthetic sea level data with anomalies
+
+        Rows are built in chunks of SYNTHETIC_CHUNK_ROWS (see
+        iter_synthetic_data) and written into preallocated columns, so tens of
+        millions of rows cost one copy of the data. The result depends only on
+        n_samples and seed.
+        """
+        columns = {name: np.empty(n_samples, dtype=dtype) for name, dtype in SYNTHETIC_DTYPES.items()}
+        columns['timestamp'] = np.empty(n_samples, dtype=f'datetime64[{_timestamp_unit(n_samples)}]')
+        for start, chunk in self._synthetic_chunks(n_samples, seed):
+            for name, values in chunk.items():
+                columns[name][start:start + len(values)] = values
+        return pd.DataFrame(columns, copy=False)
+
+    def iter_synthetic_data(self, n_samples=5000, seed=SYNTHETIC_SEED):
+        """generate_synthetic_data as a sequence of DataFrames of up to SYNTHETIC_CHUNK_ROWS rows"""
+        for start, chunk in self._synthetic_chunks(n_samples, seed):
+            yield pd.DataFrame(chunk, index=pd.RangeIndex(start, start + len(chunk['is_anomaly'])), copy=False)
+
+    def _synthetic_chunks(self, n_samples, seed):
+        unit = _timestamp_unit(n_samples)
+        for k, start in enumerate(range(0, n_samples, SYNTHETIC_CHUNK_ROWS)):
+            stop = min(start + SYNTHETIC_CHUNK_ROWS, n_samples)
+            # Chunk k draws from the k-th child of SeedSequence(seed), however many chunks there are
+            rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(k,)))
+            yield start, self._synthetic_chunk(rng, start, stop, unit)
+
+    def _synthetic_chunk(self, rng, start, stop, unit):
+        n = stop - start
+        # Generate normal sea level patterns, in realistic ranges
+        chunk = {
+            'sea_level_height': np.clip(rng.normal(0, 150, n), -500, 1000),  # mm
+            'atmospheric_pressure': np.clip(rng.normal(1013, 15, n), 950, 1050),  # hPa
+            'wind_speed': np.clip(rng.exponential(8, n), 0, 50),  # m/s
+            'wind_direction': rng.uniform(0, 360, n),  # degrees
+            'air_temperature': np.clip(rng.normal(25, 5, n), 10, 45),  # °C
+            'water_temperature': np.clip(rng.normal(24, 3, n), 15, 35),  # °C
+            'tidal_residual': rng.normal(0, 50, n),  # mm
+            'significant_wave_height': np.clip(rng.exponential(1.5, n), 0, 15),  # m
+            'storm_surge_component': rng.normal(0, 30, n),  # mm
+            'rainfall_24h': np.clip(rng.exponential(10, n), 0, 200),  # mm
+            'moon_phase': rng.uniform(0, 1, n),  # 0-1
+            'seasonal_component': rng.integers(0, 4, n),  # seasons
+            'el_nino_index': rng.normal(0, 1, n),  # standardized
+            'pressure_trend_3h': rng.normal(0, 2, n),  # hPa/3h
+            'temperature_gradient': rng.normal(1, 2, n)  # °C
         }
-        
-        df = pd.DataFrame(data)
-        
-        # Ensure realistic ranges
-        df['sea_level_height'] = np.clip(df['sea_level_height'], -500, 1000)
-        df['atmospheric_pressure'] = np.clip(df['atmospheric_pressure'], 950, 1050)
-        df['wind_speed'] = np.clip(df['wind_speed'], 0, 50)
-        df['air_temperature'] = np.clip(df['air_temperature'], 10, 45)
-        df['water_temperature'] = np.clip(df['water_temperature'], 15, 35)
-        df['significant_wave_height'] = np.clip(df['significant_wave_height'], 0, 15)
-        df['rainfall_24h'] = np.clip(df['rainfall_24h'], 0, 200)
-        
-        # Create anomalous conditions (5% of data)
-        n_anomalies = int(0.05 * n_samples)
-        anomaly_indices = np.random.choice(n_samples, n_anomalies, replace=False)
-        
-        # Add different types of anomalies
-        for i, idx in enumerate(anomaly_indices):
-            anomaly_type = i % 4
-            
-            if anomaly_type == 0:  # Storm surge anomaly
-                df.at[idx, 'sea_level_height'] += np.random.uniform(300, 800)
-                df.at[idx, 'atmospheric_pressure'] -= np.random.uniform(20, 50)
-                df.at[idx, 'wind_speed'] += np.random.uniform(15, 35)
-                df.at[idx, 'significant_wave_height'] += np.random.uniform(3, 8)
-                
-            elif anomaly_type == 1:  # King tide anomaly
-                df.at[idx, 'sea_level_height'] += np.random.uniform(200, 400)
-                df.at[idx, 'moon_phase'] = np.random.uniform(0.8, 1.0)
-                df.at[idx, 'tidal_residual'] += np.random.uniform(100, 200)
-                
-            elif anomaly_type == 2:  # Low pressure system
-                df.at[idx, 'atmospheric_pressure'] -= np.random.uniform(25, 45)
-                df.at[idx, 'sea_level_height'] += np.random.uniform(150, 300)
-                df.at[idx, 'pressure_trend_3h'] -= np.random.uniform(5, 10)
-                
-            elif anomaly_type == 3:  # Climate oscillation anomaly
-                df.at[idx, 'el_nino_index'] = np.random.choice([-2.5, 2.5])
-                df.at[idx, 'sea_level_height'] += np.random.uniform(-200, 400)
-                df.at[idx, 'water_temperature'] += np.random.uniform(-3, 5)
-        
+
+        # Anomalous conditions: 5% of the rows overall, spread evenly over the chunks
+        first = int(ANOMALY_FRACTION * start)
+        anomaly_indices = rng.choice(n, int(ANOMALY_FRACTION * stop) - first, replace=False)
+        # The four types take turns, as if numbered across the whole dataset
+        anomaly_types = (first + np.arange(len(anomaly_indices))) % 4
+
+        for anomaly_type, effects in enumerate(ANOMALY_EFFECTS):
+            idx = anomaly_indices[anomaly_types == anomaly_type]
+            for column, (kind, low, high) in effects.items():
+                if kind == 'set':
+                    chunk[column][idx] = rng.uniform(low, high, len(idx))
+                elif kind == 'choice':
+                    chunk[column][idx] = rng.choice([low, high], len(idx))
+                else:
+                    chunk[column][idx] += rng.uniform(low, high, len(idx))
+
         # Add labels (1 for anomaly, 0 for normal)
-        df['is_anomaly'] = 0
-        df.loc[anomaly_indices, 'is_anomaly'] = 1
-        
+        chunk['is_anomaly'] = np.zeros(n, dtype=np.int64)
+        chunk['is_anomaly'][anomaly_indices] = 1
+
         # Add timestamp
-        df['timestamp'] = pd.date_range(start='2020-01-01', periods=n_samples, freq='H')
-        
-        return df
+        hours = np.datetime64('2020-01-01T00', 'h') + np.arange(start, stop)
+        chunk['timestamp'] = hours.astype(f'datetime64[{unit}]')
+        return chunk
 
     def preprocess_data(self, data):
         """Preprocess input data for model"""
@@ -289,8 +336,8 @@ class SeaLevelAnomalyDetector:
         
         return recommendations
 
-    def save_model(self, filepath):
-        """Save trained model"""
+    def save_model(self, filepath, metrics=None):
+        """Save trained model (uncompressed, with a manifest sidecar)"""
         if not self.is_trained:
             raise ValueError("Model must be trained before saving")
         
@@ -301,12 +348,12 @@ class SeaLevelAnomalyDetector:
             'thresholds': self.thresholds
         }
         
-        joblib.dump(model_data, filepath)
+        dump_artifact(model_data, filepath, feature_names=self.feature_names, metrics=metrics)
         self.logger.info(f"Model saved to {filepath}")
 
-    def load_model(self, filepath):
-        """Load trained model"""
-        model_data = joblib.load(filepath)
+    def load_model(self, filepath, mmap_mode='r'):
+        """Load trained model (memory-mapped when the file is uncompressed)"""
+        model_data = load_file(filepath, mmap_mode=mmap_mode)
         
         self.anomaly_detector = model_data['anomaly_detector']
         self.scaler = model_data['scaler']
@@ -0,0 +1,128 @@
+"""
+CTAS Startup Profiler
+Import-time breakdown (python -X importtime) and time-to-first-request for the API servers
+
+Usage:
+    python startup_profile.py --module api.main --top 25
+    python startup_profile.py --module predict_weather_api --first-request "GET /api/health"
+"""
+
+import json
+import os
+import re
+import subprocess
+import sys
+from typing import Dict, List
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+_IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$')
+
+
+def parse_importtime(stderr: str) -> List[Dict]:
+    """Parse -X importtime output into rows of {module, self_ms, cumulative_ms, depth}"""
+    rows = []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, module = match.groups()
+        rows.append({
+            'module': module,
+            'self_ms': int(self_us) / 1000.0,
+            'cumulative_ms': int(cumulative_us) / 1000.0,
+            'depth': (len(indent) - 1) // 2,
+        })
+    return rows
+
+
+def profile_imports(module: str = 'api.main', top: int = 25) -> Dict:
+    """Import `module` in a fresh interpreter under -X importtime and summarize the cost"""
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                          cwd=HERE, capture_output=True, text=True)
+    rows = parse_importtime(proc.stderr)
+    target = next((r for r in reversed(rows) if r['module'] == module), None)
+    top_level = sorted((r for r in rows if r['depth'] == 0), key=lambda r: r['cumulative_ms'], reverse=True)
+    by_self = sorted(rows, key=lambda r: r['self_ms'], reverse=True)
+    return {
+        'module': module,
+        'ok': proc.returncode == 0,
+        'total_ms': target['cumulative_ms'] if target else sum(r['self_ms'] for r in rows),
+        'modules_imported': len(rows),
+        'top_cumulative': top_level[:top],
+        'top_self': by_self[:top],
+    }
+
+
+_FIRST_REQUEST_SNIPPET = r"""
+import asyncio, importlib, json, sys, time
+t0 = time.perf_counter()
+sys.path.insert(0, {here!r})
+app = importlib.import_module({module!r}).app
+t_import = time.perf_counter()
+from asgi_client import ASGIClient, split_target
+method, path = split_target({target!r})
+
+async def main():
+    async with ASGIClient(app) as client:
+        t_startup = time.perf_counter()
+        response = await client.request(method, path, json_body={body!r})
+        t_first = time.perf_counter()
+    return t_startup, t_first, response.status_code
+
+t_startup, t_first, status = asyncio.run(main())
+print(json.dumps({{'import_s': t_import - t0, 'startup_s': t_startup - t_import,
+                  'first_request_s': t_first - t_startup, 'time_to_first_request_s': t_first - t0,
+                  'status_code': status}}))
+"""
+
+
+def measure_first_request(module: str = 'api.main', target: str = 'GET /api/health', body=None) -> Dict:
+    """Time import -> startup -> first response in a fresh interpreter"""
+    snippet = _FIRST_REQUEST_SNIPPET.format(here=HERE, module=module, target=target, body=body)
+    proc = subprocess.run([sys.executable, '-c', snippet], cwd=HERE, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"First request run failed: {proc.stderr.strip()[-2000:]}")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result.update({'module': module, 'target': target})
+    return result
+
+
+def print_import_report(report: Dict):
+    print(f"Import of {report['module']}: {report['total_ms']:.1f} ms across {report['modules_imported']} modules")
+    print(f"\n{'cumulative ms':>14}  {'self ms':>9}  top-level import")
+    for row in report['top_cumulative']:
+        print(f"{row['cumulative_ms']:14.1f}  {row['self_ms']:9.1f}  {row['module']}")
+    print(f"\n{'self ms':>9}  slowest individual modules")
+    for row in report['top_self']:
+        print(f"{row['self_ms']:9.1f}  {row['module']}")
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Profile API import time and time to first request')
+    parser.add_argument('--module', default='api.main', help='App module, importable from ai-models/')
+    parser.add_argument('--top', type=int, default=25)
+    parser.add_argument('--first-request', default=None, metavar='"METHOD /path"',
+                        help='Also time the first request to this route')
+    parser.add_argument('--json', action='store_true', help='Emit JSON instead of a table')
+    args = parser.parse_args(argv)
+
+    report = profile_imports(args.module, args.top)
+    if args.first_request:
+        report['first_request'] = measure_first_request(args.module, args.first_request)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_import_report(report)
+        if 'first_request' in report:
+            fr = report['first_request']
+            print(f"\nTime to first request ({fr['target']} -> {fr['status_code']}): "
+                  f"{fr['time_to_first_request_s']:.3f}s (import {fr['import_s']:.3f}s, "
+                  f"startup {fr['startup_s']:.3f}s, request {fr['first_request_s']:.3f}s)")
+    return 0 if report['ok'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""api/main.py: first-use model loading, /predict/coastal-threat and retrain parameter checks"""
+import asyncio
+import os
+import sys
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.join(HERE, 'api'))
+
+import main  # noqa: E402
+import model_store  # noqa: E402
+import prediction_cache  # noqa: E402
+from asgi_client import ASGIClient  # noqa: E402
+from model_registry import ModelRegistry  # noqa: E402
+
+COASTAL_INPUT = {'wave_height': 4.0, 'wind_speed': 60.0, 'atmospheric_pressure': 985.0, 'tide_level': 1.2,
+                 'water_temperature': 27.0, 'rainfall_24h': 40.0, 'storm_distance': 150.0, 'moon_phase': 0.6,
+                 'season': 1, 'coastal_elevation': 2.0, 'vegetation_cover': 0.25, 'human_population': 20000.0}
+
+
+def test_coastal_threat_endpoint_returns_a_prediction(tmp_path, monkeypatch):
+    # A fresh registry and an empty store: startup registers the model, the first request trains it
+    registry = ModelRegistry()
+    monkeypatch.setattr(main, 'registry', registry)
+    monkeypatch.setattr(model_store, 'DEFAULT_STORE_DIR', str(tmp_path))
+    monkeypatch.setattr(prediction_cache, '_caches', {})
+    monkeypatch.setattr(prediction_cache, '_listening', set())
+    monkeypatch.delenv(main.PREWARM_ENV, raising=False)
+
+    async def run():
+        async with ASGIClient(main.app) as client:
+            first = await client.post('/predict/coastal-threat', COASTAL_INPUT)
+            second = await client.post('/predict/coastal-threat', COASTAL_INPUT)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first.status_code == 200, first.content
+    body = first.json()
+    model = registry.peek('coastal_threat')
+    assert hasattr(model, 'predict_threats') and model.is_trained
+    assert body['threat_type'] in model.threat_types
+    assert 0 <= body['severity_score'] <= 100 and body['recommendations']
+    assert second.status_code == 200 and second.json()['threat_type'] == body['threat_type']
+    assert prediction_cache.cache_stats()['coastal_threat']['hits'] == 1
+
+
+def test_first_use_load_runs_off_the_event_loop(monkeypatch):
+    registry = ModelRegistry(retry_seconds=60)
+    monkeypatch.setattr(main, 'registry', registry)
+    loaded_on = []
+
+    def factory():
+        loaded_on.append(threading.get_ident())
+        return 'model'
+    registry.register('slow', factory)
+    registry.register('broken', lambda: 1 / 0)
+
+    async def run():
+        loop_thread = threading.get_ident()
+        model, version = await main.get_model_with_version('slow')
+        # Once loaded, the model is returned without a trip through the executor
+        assert await main.get_model('slow') == model
+        with pytest.raises(HTTPException) as error:
+            await main.get_model('broken')
+        return loop_thread, model, version, error.value
+
+    loop_thread, model, version, error = asyncio.run(run())
+    assert (model, version) == ('model', 1) and len(loaded_on) == 1 and loaded_on[0] != loop_thread
+    assert error.status_code == 503 and 'division by zero' in error.detail
+
+
+def test_retrain_rejects_out_of_range_nice(monkeypatch):
+    monkeypatch.setattr(main, 'registry', ModelRegistry())
+    monkeypatch.delenv(main.PREWARM_ENV, raising=False)
+    submitted = []
+    monkeypatch.setattr(main.retrainer, '_run', submitted.append)
+
+    async def run():
+        async with ASGIClient(main.app) as client:
+            return [await client.post(f'/models/retrain/coastal_threat?nice={nice}') for nice in (-5, 20)]
+
+    for response in asyncio.run(run()):
+        assert response.status_code == 400 and 'nice must be between 0 and 19' in response.json()['detail']
+    assert submitted == []
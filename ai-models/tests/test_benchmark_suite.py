@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Smoke tests for the offline benchmark suite and its result comparison"""
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import benchmark_suite  # noqa: E402
+from benchmark_suite import compare, main, run_suite, save_results, time_callable  # noqa: E402
+
+
+def test_benchmark_names_are_unique():
+    names = [bench.name for bench in benchmark_suite.BENCHMARKS]
+    assert len(names) == len(set(names))
+
+
+def test_time_callable_autoranges():
+    result = time_callable(lambda: sum(range(100)), repeat=3, min_time=0.01)
+    assert result['repeat'] == 3
+    assert result['number'] > 1
+    assert 0 < result['min'] <= result['median']
+
+
+def test_quick_run_offline(tmp_path):
+    cwd = os.getcwd()
+    document = run_suite(['feature_vector', 'live_weather', 'models.alert_model', 'generators.coastal',
+                          'asgi.main.predict_alert.repeated'], quick=True, verbose=False)
+    assert os.getcwd() == cwd
+    results = document['benchmarks']
+    assert {'feature_vector.create_feature_vector', 'live_weather.fetch_current_conditions.miss',
+            'models.alert_model.single', 'asgi.main.predict_alert.repeated'} <= set(results)
+    for name, result in results.items():
+        assert 'error' not in result, (name, result)
+        assert result['median'] > 0
+    assert document['machine']['cpu_count'] == os.cpu_count()
+
+    path = save_results(document, str(tmp_path))
+    assert os.path.basename(path).startswith(document['commit'])
+    with open(path) as f:
+        assert json.load(f)['benchmarks'] == results
+
+
+def _document(commit, **medians):
+    return {'commit': commit, 'dirty': False,
+            'benchmarks': {name: {'median': value} for name, value in medians.items()}}
+
+
+def test_compare_flags_regressions(tmp_path):
+    base = _document('base', a=1.0, b=1.0, c=1.0, only_base=1.0)
+    head = _document('head', a=1.05, b=1.5, c=0.5, only_head=1.0)
+    rows = {row['name']: row for row in compare(base, head, threshold=0.1)}
+    assert set(rows) == {'a', 'b', 'c'}
+    assert not rows['a']['regression'] and not rows['a']['improvement']
+    assert rows['b']['regression']
+    assert rows['c']['improvement']
+
+    base_path, head_path = tmp_path / 'base.json', tmp_path / 'head.json'
+    base_path.write_text(json.dumps(base))
+    head_path.write_text(json.dumps(head))
+    assert main(['--compare', str(base_path), str(head_path)]) == 0
+    assert main(['--compare', str(base_path), str(head_path), '--fail-on-regression']) == 1
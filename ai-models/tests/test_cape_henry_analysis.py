@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""cape_henry_analysis: one-pass accumulators and the parallel batch CLI"""
+import csv
+import json
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cape_henry_analysis as cha  # noqa: E402
+from upstream_stub import noaa_currents_xml  # noqa: E402
+
+
+def _accumulate(observations):
+    accumulator = cha.CurrentAccumulator()
+    for obs in observations:
+        accumulator.add(obs['timestamp'], obs['speed_knots'], obs['direction_degrees'])
+    return accumulator
+
+
+def _close(a, b):
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(_close(a[k], b[k]) for k in a)
+    if isinstance(a, float):
+        return b == pytest.approx(a, rel=1e-9, abs=1e-12)
+    return a == b
+
+
+def test_accumulator_matches_sample_analysis():
+    observations, analysis = cha.parse_cape_henry_data()
+    streamed = _accumulate(observations).analysis(analysis['station_info'])
+    for section in ('current_statistics', 'trend_analysis', 'threat_assessment', 'tidal_indicators'):
+        assert _close(analysis[section], streamed[section]), section
+    assert streamed['data_summary']['duration_minutes'] == 156.0
+
+
+@pytest.mark.parametrize('cuts', [(1,), (2, 3), (5, 6, 7, 20), (12,)])
+def test_merging_runs_equals_single_pass(cuts):
+    observations, _ = cha.parse_cape_henry_data()
+    single = _accumulate(observations)
+    bounds = (0,) + cuts + (len(observations),)
+    merged = cha.CurrentAccumulator()
+    for start, stop in zip(bounds, bounds[1:]):
+        merged.merge(_accumulate(observations[start:stop]))
+    station = {'id': 'cb0102'}
+    assert _close(single.analysis(station), merged.analysis(station))
+    assert merged.std_speed_ms() == pytest.approx(single.std_speed_ms())
+
+
+def test_batch_cli_writes_daily_summary_and_ctas_json(tmp_path):
+    archive = tmp_path / 'archive'
+    (archive / 'sf').mkdir(parents=True)
+    # cb0102 split over two files that share a day; sf0101 in one file; one CSV export
+    (archive / 'cb_a.xml').write_text(noaa_currents_xml('cb0102', datetime(2025, 8, 1), datetime(2025, 8, 2, 11, 54)))
+    (archive / 'cb_b.xml').write_text(noaa_currents_xml('cb0102', datetime(2025, 8, 2, 12), datetime(2025, 8, 3, 23, 54)))
+    (archive / 'sf' / 'sf.xml').write_text(noaa_currents_xml('sf0101', datetime(2025, 8, 1), datetime(2025, 8, 1, 23, 54)))
+    with open(archive / 'lb0201.csv', 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['station_id', 'station_name', 'timestamp', 'current_speed_knots', 'current_direction_degrees'])
+        writer.writerows([['lb0201', 'Long Bay', f'2025-08-01 {h:02d}:00:00', 0.5 + h / 100, 90] for h in range(24)])
+    (archive / 'broken.xml').write_text('<data><observations><cu t="2025')
+
+    summary, ctas = tmp_path / 'summary.csv', tmp_path / 'ctas.json'
+    assert cha.main([str(archive), '--workers', '2', '--summary', str(summary), '--json', str(ctas)]) == 0
+
+    with open(summary) as f:
+        rows = list(csv.DictReader(f))
+    assert [(r['station_id'], r['date']) for r in rows] == [
+        ('cb0102', '2025-08-01'), ('cb0102', '2025-08-02'), ('cb0102', '2025-08-03'),
+        ('lb0201', '2025-08-01'), ('sf0101', '2025-08-01')]
+    assert all(int(r['measurements']) == 240 for r in rows if r['station_id'] != 'lb0201')
+
+    report = json.load(open(ctas))
+    assert set(report['stations']) == {'cb0102', 'lb0201', 'sf0101'} and report['files_processed'] == 5
+    assert list(report['errors']) == [str(archive / 'broken.xml')]
+
+    # The per-station analysis equals a single pass over all of cb0102's observations
+    single = cha.CurrentAccumulator()
+    station = {}
+    for path in (archive / 'cb_a.xml', archive / 'cb_b.xml'):
+        for row in cha._iter_xml_observations(str(path), station):
+            single.add(*row)
+    expected = json.loads(json.dumps(single.analysis(report['stations']['cb0102']['station_info'])))
+    assert _close(expected, report['stations']['cb0102'])
+    assert report['stations']['cb0102']['data_summary']['total_measurements'] == 720
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""StationCurrentAnalytics: streaming results match the batch analysis"""
+import os
+import sys
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from current_analytics import RollingMoments, StationCurrentAnalytics  # noqa: E402
+from noaa_current_parser import NOAACurrentDataParser  # noqa: E402
+from noaa_fetcher import NOAACurrentFetcher  # noqa: E402
+from upstream_stub import UpstreamStub, noaa_currents_xml  # noqa: E402
+
+
+def _series(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    times = pd.date_range('2025-08-28', periods=n_rows, freq='6min')
+    phase = np.arange(n_rows) * 0.1 / 12.42 * 2 * np.pi
+    speed = np.abs(0.6 * np.sin(phase) + rng.normal(0, 0.08, n_rows)) + 0.05
+    direction = np.where(np.sin(phase) > 0, 100.0, 280.0) + rng.normal(0, 10, n_rows)
+    return pd.DataFrame({'station_id': 'cb0102', 'station_name': 'Cape Henry LB 2CH', 'latitude': 36.9594,
+                         'longitude': -76.0128, 'timestamp': times, 'current_speed_ms': speed,
+                         'current_direction_degrees': np.mod(direction, 360)})
+
+
+def test_rolling_moments_match_numpy():
+    values = np.random.default_rng(1).normal(5, 2, 300)
+    moments = RollingMoments()
+    for i, x in enumerate(values):
+        moments.add(x)
+        if i >= 50:
+            moments.remove(values[i - 50])
+    assert moments.n == 50
+    assert moments.mean == pytest.approx(values[-50:].mean(), rel=1e-12)
+    assert moments.std() == pytest.approx(values[-50:].std(ddof=1), rel=1e-9)
+
+
+def test_matches_batch_analysis_over_sliding_window():
+    df = _series(700)
+    engine = StationCurrentAnalytics(window_hours=24)
+    parser = NOAACurrentDataParser()
+    for stop in (100, 400, 700):
+        engine.update_frame(df.iloc[stop - (100 if stop == 100 else 300):stop])
+        window = df.iloc[:stop]
+        window = window[window['timestamp'] >= window['timestamp'].iloc[-1] - pd.Timedelta(hours=24)]
+        assert len(engine) == len(window)
+        streaming, batch = engine.analysis(), parser.analyze_current_patterns(window.reset_index(drop=True))
+
+        for key, value in batch['current_statistics'].items():
+            assert streaming['current_statistics'][key] == pytest.approx(value, rel=1e-9), key
+        for key, value in batch['tidal_analysis'].items():
+            assert streaming['tidal_analysis'][key] == pytest.approx(value, rel=1e-9, abs=1e-12), key
+        assert streaming['anomaly_detection']['thresholds'] == pytest.approx(batch['anomaly_detection']['thresholds'])
+        assert streaming['threat_indicators'] == batch['threat_indicators']
+        assert streaming['time_range'] == batch['time_range']
+
+
+def test_flags_anomalies_as_they_arrive():
+    df = _series(300)
+    engine = StationCurrentAnalytics()
+    engine.update_frame(df)
+    last = int(df['timestamp'].iloc[-1].value)
+    assert engine.update(last + 360 * 10 ** 9, 3.0, 100.0) is True
+    detection = engine.analysis()['anomaly_detection']
+    assert detection['latest_is_anomaly'] and detection['high_speed_anomalies'] >= 1
+    assert engine.analysis()['threat_indicators']['rip_current_risk'] == 'high'
+    # Out-of-order readings are ignored
+    assert engine.update(last, 9.0, 0.0) is False and engine.current_statistics()['max_speed_ms'] == 3.0
+
+
+def test_analyze_station_reads_only_new_readings(tmp_path):
+    end = datetime(2025, 8, 30, 12, 0)
+    with UpstreamStub(seed=0) as stub:
+        parser = NOAACurrentDataParser(store_dir=str(tmp_path))
+        parser._fetcher = NOAACurrentFetcher(parser=parser, base_url=stub.environ()['NOAA_API_URL'],
+                                             rate_per_host=0)
+        parser.analyze_station('cb0102', hours_back=24, end=end)
+        later = end + timedelta(minutes=30)
+        streaming = parser.analyze_station('cb0102', hours_back=24, end=later)
+        parser.fetcher.close()
+
+    engine = parser.analytics[('cb0102', 24)]
+    assert engine._count == 241 + 5 and len(engine) == 241
+    batch = parser.analyze_current_patterns(parser.parse_xml_current_data(
+        noaa_currents_xml('cb0102', later - timedelta(hours=24), later)))
+    assert streaming['threat_indicators'] == batch['threat_indicators']
+    assert streaming['current_statistics']['mean_speed_ms'] == pytest.approx(
+        batch['current_statistics']['mean_speed_ms'], rel=1e-6)
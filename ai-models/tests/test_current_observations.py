@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""CurrentObservations: compact columns, zero-copy pandas view and row dicts"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark_suite import noaa_currents_xml  # noqa: E402
+from current_observations import CurrentObservations, StationInfo, parse_current_xml  # noqa: E402
+from noaa_current_parser import NOAACurrentDataParser  # noqa: E402
+
+XML = """<?xml version="1.0" encoding="UTF-8"?>
+<data>
+<metadata id="cb0102" name="Cape Henry LB 2CH" lat="36.9594" lon="-76.0128"/>
+<observations>
+<cu t="2025-08-30 00:08" s="0.809" d="99" b="4"/>
+<cu t="2025-08-30 00:14" s="0.848" d="104" b="4"/>
+<cu t="2025-08-30 00:20" s="0.84" d="118" b="4"/>
+</observations>
+</data>"""
+
+
+def test_pandas_view_shares_the_columns():
+    observations = parse_current_xml(XML)
+    df = observations.to_pandas()
+
+    assert np.shares_memory(df['timestamp'].to_numpy().view(np.int64), observations.timestamp_ns)
+    assert np.shares_memory(df['current_speed_knots'].to_numpy(), observations.speed_knots)
+    assert np.shares_memory(df['bin_depth'].to_numpy(), observations.bin_depth)
+    # Station labels are categoricals over one shared int8 code array; the position stays numeric
+    for column in ('station_id', 'station_name'):
+        assert np.shares_memory(df[column].cat.codes.to_numpy(), observations.station_codes)
+    assert df['latitude'].dtype == np.float64 and df['longitude'].dtype == np.float64
+    assert df['latitude'].mean() == 36.9594 and df['longitude'].mean() == -76.0128
+    assert df['latitude'].iloc[0] == 36.9594 and df['station_name'].iloc[0] == 'Cape Henry LB 2CH'
+    assert list(observations.to_pandas(derived=False).columns) == list(df.columns[:8])
+
+
+def test_matches_previous_dense_frame_and_is_smaller():
+    xml = noaa_currents_xml(5000)
+    df = NOAACurrentDataParser().parse_xml_current_data(xml)
+    observations = parse_current_xml(xml)
+
+    dense = df.astype({'station_id': object, 'station_name': object})
+    assert (dense['latitude'] == 36.9594).all() and (dense['station_id'] == 'cb0102').all()
+    assert np.allclose(df['current_u'], observations.components()[0])
+    # 19 bytes per observation in the container; the DataFrame adds the float64 position and derived columns
+    assert observations.nbytes == 19 * len(observations)
+    assert df.memory_usage(deep=True).sum() / len(df) < 64
+
+
+def test_rows_keep_the_reported_values():
+    observations = parse_current_xml(XML)
+    assert observations[0] == {'timestamp': '2025-08-30 00:08', 'speed_knots': 0.809, 'direction_degrees': 99.0,
+                               'bin_depth': 4, 'speed_ms': 0.809 * 0.514444}
+    assert observations[-1]['speed_knots'] == 0.84
+    assert [row['timestamp'] for row in observations[1:]] == ['2025-08-30 00:14', '2025-08-30 00:20']
+    assert observations.to_dicts() == list(observations)
+    with pytest.raises(IndexError):
+        observations[3]
+
+
+def test_concat_remaps_station_codes():
+    a = parse_current_xml(XML)
+    b = parse_current_xml(noaa_currents_xml(4, station_id='sf0101'))
+    merged = CurrentObservations.concat([a, b, a])
+
+    assert [station.id for station in merged.stations] == ['cb0102', 'sf0101']
+    assert merged.station_codes.tolist() == [0, 0, 0, 1, 1, 1, 1, 0, 0, 0]
+    df = merged.to_pandas()
+    assert df['station_id'].tolist()[2:5] == ['cb0102', 'sf0101', 'sf0101']
+    assert len(df.groupby('station_id', observed=True)) == 2
+
+
+def test_repeated_or_missing_station_attributes():
+    stations = [StationInfo('a', 'Same', 1.0, 2.0), StationInfo('b', 'Same', None, 2.0)]
+    observations = CurrentObservations(stations, [0, 1, 1], [0, 1, 2], [0.1, 0.2, 0.3], [0, 90, 180], [4, 4, 4])
+    df = observations.to_pandas()
+    assert df['station_name'].tolist() == ['Same'] * 3
+    assert df['latitude'].iloc[0] == 1.0 and df['latitude'].isna().tolist() == [False, True, True]
+
+
+def test_parse_errors_surface_as_empty_results():
+    parser = NOAACurrentDataParser()
+    assert parser.parse_xml_current_data('<data><observations/></data>').empty
+    assert len(parser.parse_xml_current_observations('<data><cu')) == 0
+    with pytest.raises(ValueError):
+        parse_current_xml('<data><observations/></data>')
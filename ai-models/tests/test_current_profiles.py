@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""CurrentProfile: time x depth grid, per-depth statistics, depth averages, shear and queries"""
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark_suite import noaa_profile_observations  # noqa: E402
+from current_observations import CurrentObservations, StationInfo  # noqa: E402
+from current_profiles import CurrentProfile  # noqa: E402
+from noaa_current_parser import NOAACurrentDataParser  # noqa: E402
+from noaa_store import CurrentObservationStore  # noqa: E402
+
+
+def test_grid_matches_per_bin_groupby():
+    observations = noaa_profile_observations(480, 12)
+    profile = CurrentProfile.from_observations(observations)
+    df = observations.to_pandas()
+
+    assert profile.shape == (480, 12) and profile.mask.sum() == 480 * 12 - len(observations)
+    stats = profile.depth_statistics()
+    expected = df.groupby('bin_depth')['current_speed_ms'].agg(['count', 'mean', 'std', 'max', 'min'])
+    assert (stats['observations'] == expected['count']).all()
+    for column, name in (('mean_speed_ms', 'mean'), ('std_speed_ms', 'std'), ('max_speed_ms', 'max'),
+                         ('min_speed_ms', 'min')):
+        np.testing.assert_allclose(stats[column], expected[name], rtol=1e-5)
+    np.testing.assert_allclose(stats['mean_u_ms'], df.groupby('bin_depth')['current_u'].mean(), atol=1e-6)
+    # The flow weakens with depth
+    assert stats['mean_speed_ms'].is_monotonic_decreasing
+
+    # Back to long form without losing a cell
+    long = profile.to_observations()
+    assert len(long) == len(observations)
+    np.testing.assert_array_equal(long.speed_knots, observations.speed_knots)
+
+
+def test_depth_average_and_shear():
+    observations = noaa_profile_observations(240, 6, missing=0.2)
+    profile = CurrentProfile.from_observations(observations)
+    df = observations.to_pandas()
+
+    averaged = profile.depth_averaged().to_pandas().set_index('timestamp')
+    expected = df.groupby('timestamp')[['current_u', 'current_v']].mean()
+    np.testing.assert_allclose(averaged['current_u'], expected['current_u'], atol=1e-5)
+    np.testing.assert_allclose(averaged['current_v'], expected['current_v'], atol=1e-5)
+    assert (averaged['bin_depth'] == -1).all()
+    assert len(profile.depth_averaged(min_bins=6)) == int((~profile.mask).all(axis=1).sum())
+
+    shear = profile.shear(bin_size_m=0.5)
+    u, v = profile.components()
+    assert shear.shape == (240, 5)
+    np.testing.assert_allclose(shear[:, 0], np.hypot(u[:, 1] - u[:, 0], v[:, 1] - v[:, 0]) / 0.5, rtol=1e-5)
+    assert (np.isnan(shear[:, 0]) == (profile.mask[:, 0] | profile.mask[:, 1])).all()
+
+
+def test_query_returns_views_of_the_window():
+    profile = CurrentProfile.from_observations(noaa_profile_observations(2400, 30))
+    window = profile.query(start='2025-06-02 00:00', end=datetime(2025, 6, 2, 6), min_depth=5, max_depth=9)
+
+    assert window.depths.tolist() == [5, 6, 7, 8, 9] and len(window) == 61
+    assert window.timestamps[0] == np.datetime64('2025-06-02T00:00')
+    assert np.shares_memory(window.speed_knots, profile.speed_knots)
+    assert window.depth_statistics().index.tolist() == [5, 6, 7, 8, 9]
+    assert len(profile.query(min_depth=100)) == 2400 and profile.query(min_depth=100).shape[1] == 0
+    series = profile.at_depth(7)
+    assert (series.bin_depth == 7).all() and len(series) == (~profile.mask[:, 6]).sum()
+    with pytest.raises(KeyError):
+        profile.at_depth(99)
+
+
+def test_parser_analyses_depth_averaged_series(tmp_path):
+    parser = NOAACurrentDataParser(store_dir=str(tmp_path))
+    observations = noaa_profile_observations(241, 8)
+    df = observations.to_pandas()
+
+    analysis = parser.analyze_current_patterns(df)
+    assert analysis['depth_profile']['bins'] == list(range(1, 9))
+    assert 'max_mean_shear' in analysis['depth_profile']
+    averaged = CurrentProfile.from_frame(df).depth_averaged().to_pandas()
+    assert analysis['current_statistics']['mean_speed_ms'] == pytest.approx(averaged['current_speed_ms'].mean())
+    assert analysis['station_info']['station_id'] == 'cb0102'
+
+    # A single bin is analyzed as before, without a profile section
+    single = parser.analyze_current_patterns(df[df['bin_depth'] == 3].reset_index(drop=True))
+    assert 'depth_profile' not in single
+
+    # Multi-bin observations survive the store and come back as a profile
+    store = CurrentObservationStore(str(tmp_path))
+    assert store.append(df) == len(df)
+    stored = CurrentProfile.from_observations(store.read_observations('cb0102'))
+    np.testing.assert_array_equal(stored.speed_knots, CurrentProfile.from_frame(df).speed_knots)
+
+
+def test_rejects_several_stations():
+    a = noaa_profile_observations(10, 2)
+    b = CurrentObservations.for_station(StationInfo('other'), a.timestamp_ns, a.speed_knots,
+                                        a.direction, a.bin_depth)
+    with pytest.raises(ValueError):
+        CurrentProfile.from_observations(CurrentObservations.concat([a, b]))
+    assert pd.isna(CurrentProfile.from_observations(a).query(end='2020-01-01').depth_statistics()['mean_speed_ms']).all()
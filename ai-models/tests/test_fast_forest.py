@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Parity tests: fast_forest must reproduce sklearn forest outputs bit for bit"""
+import os
+import sys
+
+import numpy as np
+import pytest
+from sklearn.ensemble import (ExtraTreesClassifier, ExtraTreesRegressor, IsolationForest,
+                              RandomForestClassifier, RandomForestRegressor)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fast_forest  # noqa: E402
+from fast_forest import CompiledForest, accelerate, compile_forest  # noqa: E402
+
+
+def make_data(n_rows=600, n_features=6, n_classes=2, seed=0, with_nan=False):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, n_features)) * rng.uniform(0.1, 1000, size=n_features)
+    y = (X[:, 0] / X[:, 0].std() + rng.normal(scale=0.5, size=n_rows) > 0).astype(int)
+    if n_classes > 2:
+        y = np.digitize(X[:, 1] + X[:, 0], np.quantile(X[:, 1] + X[:, 0], np.linspace(0, 1, n_classes + 1)[1:-1]))
+    if with_nan:
+        X[rng.random(X.shape) < 0.05] = np.nan
+    return X, y
+
+
+def assert_bit_identical(expected, actual):
+    assert expected.dtype == actual.dtype
+    assert expected.shape == actual.shape
+    assert expected.tobytes() == actual.tobytes()
+
+
+CLASSIFIERS = [
+    RandomForestClassifier(n_estimators=40, random_state=1),
+    RandomForestClassifier(n_estimators=25, max_depth=6, max_features=0.5, random_state=2),
+    ExtraTreesClassifier(n_estimators=30, random_state=3),
+]
+
+
+@pytest.mark.parametrize('model', CLASSIFIERS, ids=lambda m: f"{type(m).__name__}-{m.max_depth}")
+@pytest.mark.parametrize('n_classes', [2, 4])
+def test_classifier_probabilities_bit_identical(model, n_classes):
+    X, y = make_data(n_classes=n_classes)
+    model.fit(X[:400], y[:400])
+    compiled = compile_forest(model)
+    assert isinstance(compiled, CompiledForest)
+
+    X_test = X[400:]
+    assert_bit_identical(model.predict_proba(X_test), compiled.predict_proba(X_test))
+    assert np.array_equal(model.predict(X_test), compiled.predict(X_test))
+    for i in range(10):
+        row = X_test[i:i + 1]
+        assert_bit_identical(model.predict_proba(row), compiled.predict_proba(row))
+
+
+@pytest.mark.parametrize('model_class', [RandomForestRegressor, ExtraTreesRegressor])
+def test_regressor_predictions_bit_identical(model_class):
+    X, _ = make_data(seed=4)
+    y = X[:, 0] * 0.01 + np.sin(X[:, 1])
+    model = model_class(n_estimators=30, random_state=5).fit(X[:400], y[:400])
+    compiled = compile_forest(model)
+    assert_bit_identical(model.predict(X[400:]), compiled.predict(X[400:]))
+    assert_bit_identical(model.predict(X[400:401]), compiled.predict(X[400:401]))
+
+
+def test_missing_values_follow_sklearn_routing():
+    X, y = make_data(seed=6, with_nan=True)
+    model = RandomForestClassifier(n_estimators=30, random_state=7).fit(X[:400], y[:400])
+    compiled = compile_forest(model)
+    assert np.isnan(X[400:]).any()
+    assert_bit_identical(model.predict_proba(X[400:]), compiled.predict_proba(X[400:]))
+
+
+def test_float32_threshold_edges():
+    # Inputs on and around split thresholds exercise the float32 cast sklearn applies
+    X, y = make_data(seed=8)
+    model = RandomForestClassifier(n_estimators=20, random_state=9).fit(X, y)
+    thresholds = model.estimators_[0].tree_.threshold
+    features = model.estimators_[0].tree_.feature
+    edges = np.repeat(X[:1], 3 * (features >= 0).sum(), axis=0)
+    k = 0
+    for feature, threshold in zip(features, thresholds):
+        if feature < 0:
+            continue
+        for value in (threshold, np.nextafter(threshold, np.inf), np.nextafter(threshold, -np.inf)):
+            edges[k, feature] = value
+            k += 1
+    compiled = compile_forest(model)
+    assert_bit_identical(model.predict_proba(edges), compiled.predict_proba(edges))
+
+
+def test_accepts_lists_like_the_api():
+    X, y = make_data(seed=10)
+    model = RandomForestClassifier(n_estimators=10, random_state=11).fit(X, y)
+    row = [list(X[0])]
+    assert_bit_identical(model.predict_proba(row), accelerate(model).predict_proba(row))
+
+
+def test_wrong_feature_count_raises():
+    X, y = make_data(seed=12)
+    compiled = compile_forest(RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y))
+    with pytest.raises(ValueError):
+        compiled.predict_proba(X[:, :3])
+
+
+def test_unsupported_models_fall_back_to_sklearn():
+    X, y = make_data(seed=13)
+    isolation = IsolationForest(n_estimators=10, random_state=0).fit(X)
+    assert compile_forest(isolation) is None
+    assert accelerate(isolation) is isolation
+    assert accelerate(None) is None
+
+
+def test_backend_env_disables_compilation(monkeypatch):
+    X, y = make_data(seed=14)
+    model = RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y)
+    monkeypatch.setenv(fast_forest.BACKEND_ENV, 'sklearn')
+    assert accelerate(model) is model
+    monkeypatch.setenv(fast_forest.BACKEND_ENV, 'compiled')
+    assert isinstance(accelerate(model), CompiledForest)
+
+
+def test_cache_recompiles_after_refit():
+    X, y = make_data(seed=15)
+    model = RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y)
+    first = accelerate(model)
+    assert accelerate(model) is first
+    model.set_params(n_estimators=8).fit(X[::-1], y[::-1])
+    second = accelerate(model)
+    assert second is not first
+    assert_bit_identical(model.predict_proba(X), second.predict_proba(X))
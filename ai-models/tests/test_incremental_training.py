@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""incremental_training: resume from the stored byte offset, publish improvements, reject regressions"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import model_store  # noqa: E402
+from incremental_training import OnlineClassifier, incremental_update, publish, read_appended_rows  # noqa: E402
+from model_registry import ModelRegistry  # noqa: E402
+
+FEATURES = ['x0', 'x1']
+COLUMNS = FEATURES + ['label']
+
+
+def _rows(n, seed, flip=False):
+    rng = np.random.default_rng(seed)
+    X = rng.uniform(0, 1, (n, 2))
+    y = (X.sum(axis=1) > 1).astype(int)
+    return pd.DataFrame({'x0': X[:, 0], 'x1': X[:, 1], 'label': 1 - y if flip else y})
+
+
+def _append(csv_path, df):
+    df.to_csv(csv_path, mode='a', header=False, index=False)
+
+
+@pytest.fixture
+def published(tmp_path):
+    """A forest trained on the first 600 rows of a CSV, with 400 rows held out"""
+    csv_path = str(tmp_path / 'history.csv')
+    _rows(1000, 0).to_csv(csv_path, index=False)
+    data = pd.read_csv(csv_path)
+    X, y = data[FEATURES].to_numpy(), data['label'].to_numpy()
+    model = RandomForestClassifier(n_estimators=10, random_state=0).fit(X[:600], y[:600])
+    store = str(tmp_path / 'store')
+    publish('m', model, FEATURES, {}, csv_path, os.path.getsize(csv_path), X[600:], y[600:], COLUMNS,
+            store_dir=store)
+    return csv_path, store
+
+
+def _state(store):
+    return model_store.load_artifact('m', store_dir=store)[1]['incremental']
+
+
+def test_read_appended_rows_leaves_a_partial_line(tmp_path):
+    path = tmp_path / 'rows.csv'
+    path.write_bytes(b'x0,x1,label\n0.1,0.2,0\n0.3,0.4')
+    df, offset = read_appended_rows(str(path), 12, COLUMNS)
+    assert df.values.tolist() == [[0.1, 0.2, 0]] and offset == 22
+    assert read_appended_rows(str(path), offset, COLUMNS)[0].empty
+
+
+def test_updates_resume_from_the_published_offset(published):
+    csv_path, store = published
+    registry = ModelRegistry()
+    registry.register('m', lambda: model_store.load_artifact('m', store_dir=store)[0])
+    base = registry.get('m')
+    assert incremental_update('m', FEATURES, 'label', store_dir=store)['status'] == 'no_new_data'
+
+    _append(csv_path, _rows(300, 1))
+    result = incremental_update('m', FEATURES, 'label', store_dir=store, registry=registry, trees_per_window=5)
+    assert result['status'] == 'published' and result['version'] == 'v2' and result['new_rows'] == 300
+    assert result['mode'] == 'warm_start' and result['holdout_rows'] == 460
+    assert _state(store)['byte_offset'] == os.path.getsize(csv_path) and _state(store)['windows'] == 1
+    assert len(registry.get('m').estimators_) == 15 and registry.get('m') is not base
+
+    # Only the rows after the new offset are read; an unfinished line waits for the next run
+    _append(csv_path, _rows(50, 2))
+    with open(csv_path, 'a') as f:
+        f.write('0.5,0.9')
+    result = incremental_update('m', FEATURES, 'label', store_dir=store, trees_per_window=5, tolerance=0.05)
+    assert result['new_rows'] == 50 and result['version'] == 'v3'
+    assert _state(store)['byte_offset'] == os.path.getsize(csv_path) - len('0.5,0.9')
+
+
+def test_a_regressing_candidate_is_not_published(published):
+    csv_path, store = published
+    # A window with inverted labels; the candidate keeps only trees fitted on it
+    _append(csv_path, _rows(200, 3, flip=True))
+    result = incremental_update('m', FEATURES, 'label', store_dir=store, trees_per_window=10, max_trees=10)
+    assert result['status'] == 'rejected' and not result['published']
+    assert result['candidate_accuracy'] < result['current_accuracy']
+    assert model_store.latest_version('m', store) == 'v1'
+    # The offset did not move, so the same window is offered again next time
+    assert incremental_update('m', FEATURES, 'label', store_dir=store, trees_per_window=10,
+                              max_trees=10)['new_rows'] == 200
+
+
+def test_online_classifier_uses_partial_fit(tmp_path):
+    csv_path = str(tmp_path / 'history.csv')
+    _rows(400, 0).to_csv(csv_path, index=False)
+    data = pd.read_csv(csv_path)
+    X, y = data[FEATURES].to_numpy(), data['label'].to_numpy()
+    model = OnlineClassifier().partial_fit(X[:300], y[:300])
+    store = str(tmp_path / 'store')
+    publish('m', model, FEATURES, {}, csv_path, os.path.getsize(csv_path), X[300:], y[300:], COLUMNS,
+            store_dir=store)
+
+    _append(csv_path, _rows(200, 1))
+    result = incremental_update('m', FEATURES, 'label', store_dir=store, tolerance=0.05)
+    assert result['mode'] == 'partial_fit' and result['status'] == 'published'
+    assert result['candidate_accuracy'] > 0.8
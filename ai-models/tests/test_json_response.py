@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""json_response: encoder conversions and FastJSONRoute behaviour"""
+import asyncio
+import datetime
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json_response  # noqa: E402
+from asgi_client import ASGIClient  # noqa: E402
+from benchmark_suite import _legacy_sanitize  # noqa: E402
+from json_response import FastJSONRoute, dumps  # noqa: E402
+
+
+def test_nan_numpy_and_datetimes():
+    payload = {
+        'nan': float('nan'), 'inf': float('-inf'), 'np_nan': np.float64('nan'), 'f32': np.float32(1.5),
+        'i64': np.int64(7), 'flag': np.bool_(True), 'array': np.array([1.0, np.nan, np.inf]),
+        'ts': pd.Timestamp('2024-05-01 12:30'), 'nat': pd.NaT, 'date': datetime.date(2024, 5, 1),
+        'objects': np.array(['a', None], dtype=object), 3: 'int key',
+    }
+    decoded = json.loads(dumps(payload))
+    assert decoded['nan'] is None and decoded['inf'] is None and decoded['np_nan'] is None
+    assert decoded['f32'] == 1.5 and decoded['i64'] == 7 and decoded['flag'] is True
+    assert decoded['array'] == [1.0, None, None]
+    assert decoded['ts'].startswith('2024-05-01T12:30') and decoded['nat'] is None
+    assert decoded['date'] == '2024-05-01' and decoded['objects'] == ['a', None] and decoded['3'] == 'int key'
+
+
+def test_matches_legacy_sanitize_path():
+    payload = {'features': {'temperature_current': np.float64(301.5), 'humidity_current': np.nan,
+                            'timestamp': pd.Timestamp('2024-05-01 12:30')},
+               'alerts': [{'value': np.float64(0.9), 'n': np.int64(3)}, {'value': float('inf')}],
+               'forecast': [{'water_level': np.nan}, {'water_level': 1.25}]}
+    legacy = json.loads(json.dumps(jsonable_encoder(_legacy_sanitize(payload))))
+    assert json.loads(dumps(payload)) == legacy
+
+
+def test_stdlib_fallback(monkeypatch):
+    monkeypatch.setattr(json_response, 'orjson', None)
+    decoded = json.loads(dumps({'x': np.float64('nan'), 'y': [np.int64(2)], 1: pd.Timestamp('2024-01-01')}))
+    assert decoded == {'x': None, 'y': [2], '1': '2024-01-01T00:00:00'}
+
+
+class Item(BaseModel):
+    value: float
+
+
+def _app():
+    app = FastAPI()
+    app.router.route_class = FastJSONRoute
+
+    @app.get('/plain/{n}')
+    async def plain(n: int, scale: float = 1.0):
+        return {'values': np.arange(n) * scale, 'missing': np.nan}
+
+    @app.post('/created', status_code=201)
+    def created(item: Item):
+        return {'value': np.float64(item.value)}
+
+    @app.get('/text')
+    def text():
+        return PlainTextResponse('ok')
+
+    @app.get('/model', response_model=Item)
+    def model():
+        return {'value': 2.5, 'dropped': True}
+
+    return app
+
+
+def test_route_class_serializes_handler_output():
+    async def run():
+        async with ASGIClient(_app()) as client:
+            plain = await client.get('/plain/3?scale=0.5')
+            created = await client.post('/created', {'value': 1.5})
+            text = await client.get('/text')
+            model = await client.get('/model')
+        return plain, created, text, model
+
+    plain, created, text, model = asyncio.run(run())
+    assert plain.status_code == 200 and plain.json() == {'values': [0.0, 0.5, 1.0], 'missing': None}
+    assert created.status_code == 201 and created.json() == {'value': 1.5}
+    assert text.content == b'ok'
+    # response_model routes are still validated and filtered by FastAPI
+    assert model.json() == {'value': 2.5}
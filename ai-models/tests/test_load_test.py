@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""Upstream stub and load generator: offline end-to-end checks"""
+import os
+import sys
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import live_weather  # noqa: E402
+from load_test import distinct_coordinate, run_in_process  # noqa: E402
+from upstream_stub import UpstreamStub  # noqa: E402
+
+
+def test_live_weather_uses_stub(monkeypatch):
+    with UpstreamStub(seed=0) as stub:
+        for key, value in stub.environ().items():
+            monkeypatch.setenv(key, value)
+        monkeypatch.delenv('OPENWEATHER_API_KEY', raising=False)
+        live_weather._CACHE.clear()
+        weather = live_weather.fetch_current_conditions(12.5, 80.25)
+        assert weather['temperature'] is not None and weather['humidity'] is not None
+
+        monkeypatch.setenv('OPENWEATHER_API_KEY', 'stub')
+        live_weather._CACHE.clear()
+        assert live_weather.fetch_current_conditions(12.5, 80.25)['wind_speed'] is not None
+        assert stub.counts()['open_meteo']['requests'] == 1
+        assert stub.counts()['openweather']['requests'] == 1
+    live_weather._CACHE.clear()
+
+
+def test_stub_error_injection_and_config():
+    with UpstreamStub(config={'open_meteo': {'error_rate': 1.0, 'error_status': 502}}, seed=0) as stub:
+        url = stub.environ()['OPEN_METEO_URL']
+        assert requests.get(url, params={'latitude': 1, 'longitude': 2}, timeout=5).status_code == 502
+        assert requests.post(f"{stub.url}/__stub/config", json={'open_meteo': {'error_rate': 0.0}},
+                             timeout=5).status_code == 200
+        assert requests.get(url, params={'latitude': 1, 'longitude': 2}, timeout=5).status_code == 200
+        assert requests.post(f"{stub.url}/__stub/config", json={'nope': {}}, timeout=5).status_code == 400
+        counts = stub.counts()['open_meteo']
+        assert (counts['requests'], counts['errors']) == (2, 1) and counts['bytes'] > 0
+
+
+def test_distinct_coordinates_do_not_share_cache_cells():
+    cells = {live_weather._cache_key(*distinct_coordinate(i)) for i in range(1000)}
+    assert len(cells) == 1000
+
+
+def test_in_process_scenarios_report_upstream_calls():
+    reports = run_in_process(['burst', 'distinct'], 'alert', {'default': {'latency_ms': 1.0}},
+                             burst_size=5, waves=2, interval=0.0, requests=10, concurrency=4)
+    burst, distinct = reports
+    assert burst['requests'] == 10 and distinct['requests'] == 10
+    assert burst['errors'] == 0 and distinct['errors'] == 0
+    # Five cities, then the weather cache answers the second wave
+    assert burst['upstream_calls']['open_meteo']['requests'] == 5
+    assert distinct['upstream_calls']['open_meteo']['requests'] == 10
+    assert set(distinct['latency_ms']) >= {'p50', 'p99', 'max'}
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""MangroveHealthModel batch and raster scoring against the single-row API"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model_registry import import_model_module  # noqa: E402
+
+mangrove = import_model_module('mangrove-health-model')
+
+
+@pytest.fixture(scope='module')
+def model():
+    model = mangrove.MangroveHealthModel()
+    model.train(model.generate_synthetic_data(400))
+    return model
+
+
+@pytest.fixture(scope='module')
+def data(model):
+    df = model.generate_synthetic_data(300)
+    # Push some rows into every threat band
+    df.loc[::7, 'ndvi'] = 0.25
+    df.loc[::5, 'turbidity'] = 45.0
+    df.loc[::3, 'human_activity_index'] = 80.0
+    df.loc[::4, 'water_temp'] = 33.0
+    return df
+
+
+def test_batch_matches_single_row_predictions(model, data):
+    scores = model.score_batch(data)
+    assert scores['health_score'].dtype == np.float32 and scores['threats'].shape == (300, 4)
+
+    for i in range(0, 300, 10):
+        features = data.iloc[i][model.feature_names].to_dict()
+        single = model.predict_health(features)
+        threats = model.assess_threats(features, single['health_score'])
+        assert scores['health_score'][i] == pytest.approx(single['health_score'], abs=1e-3)
+        assert mangrove.HEALTH_CATEGORIES[scores['health_category'][i]] == single['health_category']
+        assert bool(scores['is_anomaly'][i]) == single['is_anomaly']
+        assert scores['confidence'][i] == pytest.approx(single['confidence'], abs=1e-3)
+        assert mangrove.THREAT_LEVELS[scores['threat_level'][i]] == threats['overall_threat_level']
+        flagged = [(mangrove.THREAT_TYPES[j], mangrove.THREAT_SEVERITIES[code])
+                   for j, code in enumerate(scores['threats'][i]) if code]
+        assert flagged == [(t['type'], t['severity']) for t in threats['threats']]
+
+
+def test_assess_threats_handles_dataframes(model, data):
+    assessments = model.assess_threats(data)
+    assert len(assessments) == len(data)
+    assert sum(bool(a['threats']) for a in assessments) > 100
+    first = data.iloc[0][model.feature_names].to_dict()
+    single = model.assess_threats(first, model.predict_health(first)['health_score'])
+    assert assessments[0]['threats'] == single['threats']
+    assert sorted(assessments[0]['recommendations']) == sorted(single['recommendations'])
+
+
+def test_raster_tiles_match_the_flat_batch(model, data):
+    rows = data.iloc[:240]
+    bands = {feature: rows[feature].to_numpy().reshape(12, 20) for feature in model.feature_names}
+    bands['rainfall'] = 150.0  # one value for the whole scene
+    bands['ndvi'] = bands['ndvi'].copy()
+    bands['ndvi'][0, :3] = np.nan  # nodata cells
+
+    raster = model.score_raster(bands, tile_size=8)
+    flat = rows[model.feature_names].copy()
+    flat['rainfall'] = 150.0
+    flat.loc[flat.index[:3], 'ndvi'] = np.nan
+    expected = model.score_batch(flat)
+
+    assert raster['health_score'].shape == (12, 20) and raster['threats'].shape == (12, 20, 4)
+    for key, values in expected.items():
+        np.testing.assert_array_equal(raster[key].reshape(values.shape), values)
+    assert np.isnan(raster['health_score'][0, :3]).all() and (raster['health_category'][0, :3] == -1).all()
+    assert not raster['is_anomaly'][0, :3].any()
+
+    stacked = np.stack([np.broadcast_to(bands[feature], (12, 20)) for feature in model.feature_names])
+    results = dict(model.score_tiles([('a', stacked), ('b', stacked[:, :4, :4])], tile_size=16))
+    np.testing.assert_array_equal(results['a']['health_category'], raster['health_category'])
+    assert results['b']['health_score'].shape == (4, 4)
+    with pytest.raises(ValueError):
+        model.score_raster({'ndvi': bands['ndvi']})
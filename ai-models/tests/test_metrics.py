@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""metrics: Prometheus text rendering, the timed decorator and the /metrics endpoint"""
+import asyncio
+import os
+import sys
+
+import pytest
+from fastapi import FastAPI
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import metrics  # noqa: E402
+from asgi_client import ASGIClient  # noqa: E402
+from metrics import Counter, Gauge, Histogram, MetricsRegistry, instrument, timed  # noqa: E402
+
+
+def test_text_format():
+    registry = MetricsRegistry()
+    requests = registry.add(Counter('t_requests', 'Requests', ('route',)))
+    depth = registry.add(Gauge('t_depth', 'Queue depth', ('model',), collect=lambda: {('b',): 3, ('c',): None}))
+    latency = registry.add(Histogram('t_latency', 'Latency', buckets=(0.1, 1.0)))
+    # Registering a name twice returns the first metric
+    assert registry.add(Counter('t_requests', 'Other')) is requests
+
+    requests.inc(route='/a "quoted"')
+    requests.inc(2, route='/a "quoted"')
+    depth.set(1.5, model='a')
+    for value in (0.05, 0.5, 5.0):
+        latency.observe(value)
+    lines = registry.render().splitlines()
+
+    assert lines[:2] == ['# HELP t_requests Requests', '# TYPE t_requests counter']
+    assert 't_requests_total{route="/a \\"quoted\\""} 3.0' in lines
+    assert 't_depth{model="a"} 1.5' in lines and 't_depth{model="b"} 3' in lines
+    assert not any(line.startswith('t_depth{model="c"}') for line in lines)
+    assert ['t_latency_bucket{le="0.1"} 1', 't_latency_bucket{le="1.0"} 2', 't_latency_bucket{le="+Inf"} 3',
+            't_latency_sum 5.55', 't_latency_count 3'] == lines[-5:]
+    with pytest.raises(ValueError):
+        requests.inc(path='/a')
+
+
+def test_timed_records_outcomes_for_sync_and_async_functions():
+    histogram = Histogram('t_timed', 'Timed', ('function', 'outcome'))
+
+    @timed('work', metric=histogram)
+    def work(fail=False):
+        if fail:
+            raise RuntimeError('boom')
+        return 'done'
+
+    @timed(metric=histogram)
+    async def async_work():
+        return 'async done'
+
+    assert work() == 'done' and asyncio.run(async_work()) == 'async done'
+    with pytest.raises(RuntimeError):
+        work(fail=True)
+    counts = {key: state[2] for key, state in histogram._values.items()}
+    assert counts == {('work', 'ok'): 1, ('work', 'error'): 1,
+                      ('test_timed_records_outcomes_for_sync_and_async_functions.<locals>.async_work', 'ok'): 1}
+
+
+def test_metrics_endpoint_labels_requests_by_route_template():
+    app = FastAPI()
+
+    @app.get('/items/{item_id}')
+    def item(item_id: int):
+        return {'id': item_id}
+
+    instrument(app, 'metrics_test')
+
+    async def run():
+        async with ASGIClient(app) as client:
+            await client.get('/items/1')
+            await client.get('/items/2')
+            await client.get('/missing')
+            return await client.get('/metrics')
+
+    response = asyncio.run(run())
+    assert response.status_code == 200 and response.headers['content-type'].startswith('text/plain')
+    body = response.content.decode()
+    assert ('ctas_http_request_duration_seconds_count{app="metrics_test",method="GET",route="/items/{item_id}",'
+            'status="200"} 2') in body
+    assert 'route="unmatched",status="404"' in body
+    assert 'ctas_process_uptime_seconds ' in body and metrics.resident_memory_bytes() > 0
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""MicroBatcher: coalescing concurrent rows, grouping by model and propagating errors"""
+import asyncio
+import os
+import sys
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from micro_batcher import MicroBatcher, predict_with_proba  # noqa: E402
+
+
+class Recorder:
+    """Batch function that remembers every call"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, model, rows):
+        self.calls.append((model, list(rows)))
+        return [f"{model}:{row}" for row in rows]
+
+
+def test_concurrent_rows_share_one_call():
+    fn = Recorder()
+    batcher = MicroBatcher(fn, max_batch_size=64, max_wait_ms=20)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit('m', i) for i in range(10)))
+
+    assert asyncio.run(run()) == [f"m:{i}" for i in range(10)]
+    assert fn.calls == [('m', list(range(10)))]
+    stats = batcher.stats()
+    assert stats['batches'] == 1 and stats['rows'] == 10 and stats['max_batch'] == 10
+    assert stats['queue_depth'] == 0 and stats['in_flight'] == 0
+
+
+def test_full_batches_flush_without_waiting():
+    fn = Recorder()
+    # The window is far longer than the test could wait: only the size limit can flush
+    batcher = MicroBatcher(fn, max_batch_size=4, max_wait_ms=60000)
+
+    async def run():
+        return await asyncio.wait_for(asyncio.gather(*(batcher.submit('m', i) for i in range(8))), 5)
+
+    assert asyncio.run(run())[-1] == 'm:7'
+    assert [rows for _, rows in fn.calls] == [[0, 1, 2, 3], [4, 5, 6, 7]]
+
+
+def test_rows_are_grouped_by_model_object():
+    fn = Recorder()
+    batcher = MicroBatcher(fn, max_batch_size=64, max_wait_ms=20)
+    old, new = 'old', 'new'
+
+    async def run():
+        # Requests that took the model before and after a swap never share a call
+        return await asyncio.gather(batcher.submit(old, 1), batcher.submit(new, 2), batcher.submit(old, 3))
+
+    assert asyncio.run(run()) == ['old:1', 'new:2', 'old:3']
+    assert sorted(fn.calls) == [('new', [2]), ('old', [1, 3])]
+
+
+def test_errors_reach_every_caller_in_the_batch():
+    def broken(model, rows):
+        raise ValueError('model exploded')
+
+    def short(model, rows):
+        return rows[:1]
+
+    async def run(fn):
+        batcher = MicroBatcher(fn, max_batch_size=64, max_wait_ms=5)
+        return await asyncio.gather(*(batcher.submit('m', i) for i in range(3)), return_exceptions=True)
+
+    errors = asyncio.run(run(broken))
+    assert all(isinstance(e, ValueError) and str(e) == 'model exploded' for e in errors)
+    errors = asyncio.run(run(short))
+    assert all(isinstance(e, RuntimeError) and 'returned 1 results for 3 rows' in str(e) for e in errors)
+
+
+def test_batch_size_one_scores_inline():
+    fn = Recorder()
+    batcher = MicroBatcher(fn, max_batch_size=1)
+    assert asyncio.run(batcher.submit('m', 5)) == 'm:5' and batcher.stats()['batches'] == 1
+    inline = MicroBatcher(lambda model, rows: [int(row) for row in rows], max_batch_size=1)
+    with pytest.raises(ValueError):
+        asyncio.run(inline.submit('m', 'not a number'))
+
+
+def test_predict_with_proba_matches_the_model():
+    rng = np.random.default_rng(0)
+    X = rng.uniform(0, 1, (200, 3))
+    model = RandomForestClassifier(n_estimators=10, random_state=0).fit(X, (X[:, 0] > 0.5).astype(int))
+    results = predict_with_proba(model, X[:20].tolist())
+    assert [int(pred) for pred, _ in results] == model.predict(X[:20]).tolist()
+    np.testing.assert_allclose(np.array([proba for _, proba in results]), model.predict_proba(X[:20]))
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""ModelRegistry: lazy loads, failed-load backoff, file dedup, atomic swaps and refresh on publish"""
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import model_registry  # noqa: E402
+import model_store  # noqa: E402
+from model_registry import ModelRegistry  # noqa: E402
+
+
+def test_failed_load_retries_after_a_growing_backoff(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, 'monotonic', lambda: now[0])
+    registry = ModelRegistry(retry_seconds=10)
+    attempts = []
+
+    def factory():
+        attempts.append(now[0])
+        if len(attempts) < 3:
+            raise OSError('artifact not published yet')
+        return 'model'
+    registry.register('m', factory)
+
+    with pytest.raises(RuntimeError, match='artifact not published yet'):
+        registry.get('m')
+    # Inside the backoff the recorded error is raised without calling the factory again
+    now[0] += 9
+    with pytest.raises(RuntimeError, match='artifact not published yet'):
+        registry.get('m')
+    assert attempts == [1000.0]
+    assert registry.status('m')['status'] == 'error' and registry.status('m')['retry_in_seconds'] == 1.0
+
+    now[0] += 1
+    with pytest.raises(RuntimeError):
+        registry.get('m')
+    # The second failure doubles the wait
+    now[0] += 19
+    with pytest.raises(RuntimeError):
+        registry.get('m')
+    assert attempts == [1000.0, 1010.0]
+    now[0] += 1
+    assert registry.get_with_version('m') == ('model', 1)
+    assert attempts == [1000.0, 1010.0, 1030.0] and 'error' not in registry.status('m')
+
+
+def test_retry_seconds_from_the_environment(monkeypatch):
+    monkeypatch.setenv(model_registry.RETRY_ENV, '5')
+    assert ModelRegistry().retry_seconds == 5.0
+    monkeypatch.setenv(model_registry.RETRY_ENV, 'soon')
+    assert ModelRegistry().retry_seconds == model_registry.DEFAULT_RETRY_SECONDS
+
+
+def test_files_are_shared_by_real_path_and_content(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_store, 'DEFAULT_STORE_DIR', str(tmp_path / 'store'))
+    model_store.dump_artifact({'weights': np.arange(3.0)}, str(tmp_path / 'model.pkl'))
+    os.symlink(tmp_path / 'model.pkl', tmp_path / 'link.pkl')
+    model_store.dump_artifact({'weights': np.arange(3.0)}, str(tmp_path / 'copy.pkl'))
+    model_store.dump_artifact({'weights': np.arange(4.0)}, str(tmp_path / 'other.pkl'))
+
+    registry = ModelRegistry()
+    loads = []
+
+    def loader(path):
+        loads.append(path)
+        return model_store.load_file(path)
+    for name, filename in (('a', 'model.pkl'), ('b', 'link.pkl'), ('c', 'copy.pkl'), ('d', 'other.pkl')):
+        registry.register_file(name, str(tmp_path / filename), loader)
+    # Declaring the same file again keeps the registered entry
+    registry.register_file('a', str(tmp_path / 'model.pkl'), loader)
+
+    a, b, c, d = (registry.get(name) for name in 'abcd')
+    assert a is b is c and a is not d
+    assert loads == [str(tmp_path / 'model.pkl'), str(tmp_path / 'other.pkl')]
+    assert registry.status('a')['sha256'] == registry.status('c')['sha256'] != registry.status('d')['sha256']
+    # Shared objects are counted once in the process total
+    report = registry.memory_report()
+    assert report['total']['mapped_bytes'] == report['models']['a']['mapped_bytes'] + report['models']['d']['mapped_bytes']
+
+
+def test_file_models_pick_up_versions_published_by_another_process(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_store, 'DEFAULT_STORE_DIR', str(tmp_path / 'store'))
+    model_store.dump_artifact({'weights': np.arange(3.0)}, str(tmp_path / 'alert.pkl'))
+    registry = ModelRegistry(refresh_seconds=0.05)
+    registry.register_file('alert', str(tmp_path / 'alert.pkl'))
+    first = registry.get('alert')
+    assert not registry.refresh('alert')
+
+    # What `train_alert_model.py --incremental` does from its own process: publish the next store version
+    model_store.save_artifact('alert', {'weights': np.arange(5.0)})
+    time.sleep(0.1)
+    # The request that notices keeps its model; the reload happens in the background
+    assert registry.get('alert') is first
+    deadline = time.monotonic() + 5
+    while registry.version('alert') == 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert registry.version('alert') == 2 and len(registry.get('alert')['weights']) == 5
+    assert not registry.refresh('alert')
+
+    model_store.save_artifact('alert', {'weights': np.arange(6.0)})
+    assert registry.refresh('alert') and len(registry.get('alert')['weights']) == 6
+    assert ModelRegistry(refresh_seconds=0).refresh_seconds == 0
+
+
+def test_swap_is_atomic_and_notifies_listeners():
+    registry = ModelRegistry()
+    builds = iter(['v1', 'v2'])
+    registry.register('m', lambda: next(builds))
+    swaps = []
+    registry.on_swap(lambda name, version: swaps.append((name, version)))
+    registry.on_swap(lambda name, version: 1 / 0)  # a failing listener does not stop the swap
+
+    assert registry.version('m') == 0 and registry.peek('m') is None and not registry.is_loaded('m')
+    in_flight = registry.get('m')
+    assert registry.get_with_version('m') == ('v1', 1)
+
+    assert registry.swap('m', 'hot') == 2
+    assert in_flight == 'v1' and registry.get('m') == 'hot'
+    assert registry.reload('m') == 3 and registry.get('m') == 'v2'
+    assert swaps == [('m', 2), ('m', 3)]
+    assert registry.status('m')['status'] == 'ready' and registry.status('m')['version'] == 3
+    with pytest.raises(KeyError):
+        registry.get('unknown')
+
+
+def test_concurrent_first_use_builds_once():
+    registry = ModelRegistry()
+    started = threading.Event()
+    builds = []
+
+    def factory():
+        builds.append(1)
+        started.wait(1)
+        return object()
+    registry.register('m', factory)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get('m'))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    started.set()
+    for thread in threads:
+        thread.join()
+    assert len(builds) == 1 and len({id(result) for result in results}) == 1
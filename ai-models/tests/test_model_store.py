@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""model_store: versioned artifacts, LATEST, manifests and memory-mapped loads"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import model_store  # noqa: E402
+from model_store import (artifact_path, data_fingerprint, latest_version, list_versions, load_artifact,  # noqa: E402
+                         load_model_file, publish_version, reserve_version, save_artifact)
+
+
+def test_versions_and_latest(tmp_path):
+    store = str(tmp_path)
+    assert latest_version('m', store) is None and artifact_path('m', store_dir=store) is None
+
+    first = save_artifact('m', {'weights': np.arange(4.0)}, feature_names=['a', 'b'], store_dir=store)
+    second = save_artifact('m', {'weights': np.arange(8.0)}, metrics={'accuracy': np.float64(0.9)},
+                           store_dir=store)
+    assert (first['version'], second['version']) == ('v1', 'v2')
+    assert list_versions('m', store) == ['v1', 'v2'] and latest_version('m', store) == 'v2'
+    assert (tmp_path / 'm' / 'LATEST').read_text() == 'v2'
+    assert second['metrics'] == {'accuracy': 0.9} and first['feature_names'] == ['a', 'b']
+
+    # A version published without make_latest is stored but not served
+    save_artifact('m', {'weights': np.zeros(2)}, store_dir=store, make_latest=False)
+    assert list_versions('m', store) == ['v1', 'v2', 'v3'] and latest_version('m', store) == 'v2'
+
+    obj, manifest = load_artifact('m', store_dir=store)
+    assert len(obj['weights']) == 8 and manifest['version'] == 'v2' and manifest['name'] == 'm'
+    assert isinstance(obj['weights'], np.memmap)
+    obj, _ = load_artifact('m', version='v1', mmap_mode=None, store_dir=store)
+    assert not isinstance(obj['weights'], np.memmap) and len(obj['weights']) == 4
+    assert not (tmp_path / 'm' / 'v2' / 'model.joblib.manifest.json').exists()
+    with pytest.raises(FileNotFoundError):
+        load_artifact('missing', store_dir=store)
+
+
+def test_without_latest_file_the_highest_version_wins(tmp_path):
+    store = str(tmp_path)
+    for _ in range(2):
+        save_artifact('m', [1], store_dir=store)
+    (tmp_path / 'm' / 'LATEST').unlink()
+    assert latest_version('m', store) == 'v2'
+    # Empty version directories (reserved, never written) are not versions
+    version, model_file = reserve_version('m', store)
+    assert version == 'v3' and not os.path.exists(model_file)
+    assert list_versions('m', store) == ['v1', 'v2']
+    model_store.dump_artifact([3], model_file)
+    assert publish_version('m', version, store)['version'] == 'v3' and latest_version('m', store) == 'v3'
+
+
+def test_legacy_pickle_paths_prefer_the_store(tmp_path):
+    store = str(tmp_path / 'store')
+    legacy = tmp_path / 'alert_model.pkl'
+    model_store.dump_artifact('legacy', str(legacy))
+    assert load_model_file(str(legacy), store_dir=store) == 'legacy'
+    save_artifact('alert_model', 'published', store_dir=store)
+    assert load_model_file(str(legacy), store_dir=store) == 'published'
+
+
+def test_data_fingerprint():
+    a = np.arange(6.0)
+    assert data_fingerprint(a) == data_fingerprint(a.copy()) != data_fingerprint(a.reshape(2, 3))
+    assert data_fingerprint(None) is None and data_fingerprint('/no/such/file') is None
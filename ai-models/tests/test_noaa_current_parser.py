@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""NOAACurrentDataParser: streaming XML ingestion"""
+import io
+import os
+import sys
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from current_observations import CurrentColumns  # noqa: E402
+from noaa_current_parser import NOAACurrentDataParser  # noqa: E402
+
+HEADER = ('<?xml version="1.0" encoding="UTF-8"?>\n<data>\n'
+          '<metadata id="cb0102" name="Cape Henry LB 2CH" lat="36.9594" lon="-76.0128"/>\n<observations>\n')
+FOOTER = '</observations>\n</data>\n'
+
+
+def make_xml(n_rows, start='2025-08-30T00:08'):
+    times = (np.datetime64(start) + np.arange(n_rows) * np.timedelta64(6, 'm')).astype(str)
+    rows = ''.join(f'<cu t="{t[:10]} {t[11:16]}" s="{0.3 + (i % 50) / 100:.3f}" d="{(i * 7) % 360}" b="4"/>\n'
+                   for i, t in enumerate(times))
+    return HEADER + rows + FOOTER
+
+
+def test_parses_columns_with_typed_buffers():
+    df = NOAACurrentDataParser().parse_xml_current_data(make_xml(3))
+    assert list(df.columns) == ['station_id', 'station_name', 'latitude', 'longitude', 'timestamp',
+                                'current_speed_knots', 'current_direction_degrees', 'bin_depth',
+                                'current_speed_ms', 'current_u', 'current_v']
+    assert df['station_id'].iloc[0] == 'cb0102' and df['latitude'].iloc[0] == 36.9594
+    assert list(df['timestamp']) == list(pd.to_datetime(['2025-08-30 00:08', '2025-08-30 00:14',
+                                                         '2025-08-30 00:20']))
+    assert df['current_speed_knots'].dtype == np.float32 and df['bin_depth'].dtype == np.int16
+    np.testing.assert_allclose(df['current_speed_ms'], np.array([0.3, 0.31, 0.32]) * 0.514444, rtol=1e-6)
+    np.testing.assert_allclose(df['current_u'], df['current_speed_ms'] * np.sin(np.radians([0, 7, 14])))
+
+
+def test_bytes_file_and_chunk_boundaries(tmp_path):
+    xml = make_xml(2500)
+    path = tmp_path / 'currents.xml'
+    path.write_text(xml)
+    parser = NOAACurrentDataParser()
+    from_text = parser.parse_xml_current_data(xml)
+    pd.testing.assert_frame_equal(from_text, parser.parse_xml_current_data(xml.encode()))
+    pd.testing.assert_frame_equal(from_text, parser.parse_xml_current_file(path))
+
+    columns = CurrentColumns(chunk_rows=1000)
+    for i in range(2500):
+        columns.append('2025-08-30 00:08', str(i), '90', '4')
+    epoch, speed, direction, bins = columns.arrays()
+    assert len(columns) == len(epoch) == 2500 and (np.diff(epoch) == 0).all()
+    np.testing.assert_array_equal(speed, np.arange(2500, dtype=np.float32))
+
+
+def test_missing_values_and_bad_timestamps():
+    xml = HEADER + ('<cu t="2025-08-30 00:08" s="" d="99"/>\n'
+                    '<cu t="not a time" s="0.5" d="x" b="3"/>\n') + FOOTER
+    df = NOAACurrentDataParser().parse_xml_current_data(xml)
+    assert np.isnan(df['current_speed_knots'].iloc[0]) and np.isnan(df['current_direction_degrees'].iloc[1])
+    assert list(df['bin_depth']) == [-1, 3]
+    assert df['timestamp'].iloc[0] == pd.Timestamp('2025-08-30 00:08') and pd.isna(df['timestamp'].iloc[1])
+
+
+def test_error_documents_return_empty_frame():
+    parser = NOAACurrentDataParser()
+    assert parser.parse_xml_current_data('<data><error>No data was found.</error></data>').empty
+    assert parser.parse_xml_current_data('<data><metadata id="x"').empty
+    assert parser.parse_xml_current_data(HEADER + FOOTER).empty
+
+
+def test_memory_overhead_does_not_grow_with_document():
+    """Peak allocations beyond the output columns stay flat as the document grows 10x"""
+    def overhead(n_rows):
+        data = make_xml(n_rows).encode()
+        tracemalloc.start()
+        df = NOAACurrentDataParser().parse_xml_current_data(io.BytesIO(data))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return peak - df.memory_usage(deep=True).sum()
+
+    small, large = overhead(20_000), overhead(200_000)
+    assert large < small * 3
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""NOAACurrentFetcher against the local NOAA stub"""
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from noaa_current_parser import NOAACurrentDataParser  # noqa: E402
+from noaa_fetcher import NOAACurrentFetcher, RateLimiter  # noqa: E402
+from upstream_stub import NOAA_STATIONS, UpstreamStub  # noqa: E402
+
+END = datetime(2025, 8, 30, 12, 0)
+
+
+def _fetcher(stub, **options):
+    options = dict({'rate_per_host': 0, 'retries': 2, 'timeout': 5, 'deadline': 10, 'seed': 0}, **options)
+    return NOAACurrentFetcher(base_url=stub.environ()['NOAA_API_URL'], **options)
+
+
+def test_all_stations_concurrently_over_pooled_connections():
+    with UpstreamStub(config={'noaa': {'latency_ms': 100}}, seed=0) as stub, \
+            _fetcher(stub, max_workers=5, chunk_hours=0) as fetcher:
+        started = time.perf_counter()
+        frames = fetcher.fetch_stations(hours_back=24, end=END)
+        elapsed = time.perf_counter() - started
+        second = fetcher.fetch_stations(hours_back=24, end=END)
+        concurrency = stub.concurrency()['noaa']
+
+    assert set(frames) == set(NOAA_STATIONS)
+    for station, df in frames.items():
+        assert len(df) == 241 and df['station_id'].iloc[0] == station
+        pd.testing.assert_frame_equal(df, second[station])
+    # Five 100 ms requests in parallel, not back to back
+    assert elapsed < 0.4 and concurrency['max_in_flight'] >= 3
+    # Ten requests reuse the pooled keep-alive connections
+    assert concurrency['connections'] <= 5
+    assert fetcher.stats()['requests'] == 10 and fetcher.stats()['failures'] == 0
+
+
+def test_long_windows_are_chunked_and_merged():
+    with UpstreamStub(seed=0) as stub, _fetcher(stub, chunk_hours=24) as fetcher:
+        chunked = fetcher.fetch_station('cb0102', hours_back=72, end=END)
+        requests_made = stub.counts()['noaa']['requests']
+        whole = fetcher.fetch_window('cb0102', END - pd.Timedelta(hours=72), END)
+
+    assert requests_made == 3
+    pd.testing.assert_frame_equal(chunked, whole)
+    assert chunked['timestamp'].is_monotonic_increasing and not chunked['timestamp'].duplicated().any()
+
+
+def test_failed_chunks_trim_ranges_towards_the_stored_side(monkeypatch):
+    with UpstreamStub(seed=0) as stub, _fetcher(stub, chunk_hours=4) as fetcher:
+        fetch_window = fetcher.fetch_window
+
+        def flaky(station_id, begin, end, deadline=None):
+            if begin == END - pd.Timedelta(hours=8):
+                raise RuntimeError('chunk lost')
+            return fetch_window(station_id, begin, end, deadline)
+
+        monkeypatch.setattr(fetcher, 'fetch_window', flaky)
+        ranges = {'cb0102': (END - pd.Timedelta(hours=12), END)}
+        forward = fetcher.fetch_ranges(ranges, contiguous=True)['cb0102']
+        backward = fetcher.fetch_ranges(ranges, backfill=True)['cb0102']
+
+    # A forward range keeps what precedes the hole, a backfill range what follows it
+    assert forward['timestamp'].max() < END - pd.Timedelta(hours=8)
+    assert backward['timestamp'].min() >= END - pd.Timedelta(hours=4)
+    assert backward['timestamp'].max() == END
+
+
+def test_windows_cover_range_without_overlap():
+    fetcher = NOAACurrentFetcher(chunk_hours=10)
+    windows = fetcher.windows(datetime(2025, 1, 1), datetime(2025, 1, 2))
+    assert windows[0][0] == datetime(2025, 1, 1) and windows[-1][1] == datetime(2025, 1, 2)
+    assert all((b - a).total_seconds() == 60 for (_, a), (b, _) in zip(windows, windows[1:]))
+    assert len(windows) == 3
+    fetcher.close()
+
+    # Automatic chunking fills the worker pool and never goes below MIN_CHUNK_HOURS
+    auto = NOAACurrentFetcher(max_workers=8, chunk_hours=0)
+    assert len(auto.windows(datetime(2025, 1, 1), datetime(2025, 1, 4), n_stations=2)) == 4
+    assert len(auto.windows(datetime(2025, 1, 1), datetime(2025, 1, 4), n_stations=8)) == 1
+    assert len(auto.windows(datetime(2025, 1, 1), datetime(2025, 1, 1, 12), n_stations=1)) == 2
+    auto.close()
+
+
+def test_retries_transient_errors_then_gives_up_per_station():
+    with UpstreamStub(config={'noaa': {'error_rate': 0.5}}, seed=1) as stub, \
+            _fetcher(stub, retries=8) as fetcher:
+        frames = fetcher.fetch_stations(['cb0102', 'sf0101'], hours_back=6, end=END)
+        assert all(len(df) == 61 for df in frames.values())
+        assert fetcher.stats()['retries'] == stub.counts()['noaa']['errors'] > 0
+
+    with UpstreamStub(config={'noaa': {'error_rate': 1.0}}, seed=0) as stub, \
+            _fetcher(stub, retries=1) as fetcher:
+        frames = fetcher.fetch_stations(['cb0102'], hours_back=6, end=END)
+        assert frames['cb0102'].empty and fetcher.stats()['failures'] == 1
+        assert stub.counts()['noaa']['requests'] == 2
+
+
+def test_deadline_bounds_total_time():
+    with UpstreamStub(config={'noaa': {'latency_ms': 2000}}, seed=0) as stub, \
+            _fetcher(stub, deadline=0.5, timeout=5) as fetcher:
+        started = time.perf_counter()
+        frames = fetcher.fetch_stations(['cb0102', 'lb0201'], hours_back=6, end=END)
+        assert time.perf_counter() - started < 1.5
+    assert all(df.empty for df in frames.values())
+
+
+def test_rate_limiter_spaces_requests_per_host():
+    limiter = RateLimiter(rate=20, burst=2)
+    started = time.perf_counter()
+    for _ in range(6):
+        limiter.acquire('noaa')
+    limiter.acquire('other')
+    # Two from the burst, then four at 20/s; the other host is not held back
+    assert 0.18 < time.perf_counter() - started < 0.5
+
+
+def test_parser_fetches_through_env_configured_stub(monkeypatch, tmp_path):
+    with UpstreamStub(seed=0) as stub:
+        monkeypatch.setenv('NOAA_API_URL', stub.environ()['NOAA_API_URL'])
+        monkeypatch.setenv('CTAS_NOAA_STORE', str(tmp_path))
+        parser = NOAACurrentDataParser()
+        frames = parser.fetch_all_stations(hours_back=3)
+        parser.fetcher.close()
+    assert set(frames) == set(parser.current_stations)
+    assert all(np.isfinite(df['current_speed_ms']).all() and len(df) >= 30 for df in frames.values())
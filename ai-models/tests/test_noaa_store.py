@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""CurrentObservationStore: partitions, de-duplication and gap-only syncing"""
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark_suite import noaa_profile_observations  # noqa: E402
+from noaa_current_parser import NOAACurrentDataParser  # noqa: E402
+from noaa_fetcher import NOAACurrentFetcher  # noqa: E402
+from noaa_store import RECORD_DTYPE, CurrentObservationStore  # noqa: E402
+from upstream_stub import UpstreamStub, noaa_currents_xml  # noqa: E402
+
+END = datetime(2025, 8, 30, 12, 0)
+
+
+def _observations(begin, end, station='cb0102'):
+    return NOAACurrentDataParser().parse_xml_current_data(noaa_currents_xml(station, begin, end))
+
+
+def test_round_trip_partitions_and_dedup(tmp_path):
+    store = CurrentObservationStore(str(tmp_path))
+    df = _observations(datetime(2025, 8, 29, 20, 0), datetime(2025, 8, 30, 4, 0))
+    assert store.append(df) == len(df) == 81
+    assert [os.path.basename(p) for _, p in store.partitions('cb0102')] == ['20250829.bin', '20250830.bin']
+    pd.testing.assert_frame_equal(store.read('cb0102'), df)
+
+    # Overlapping and repeated rows are dropped; only the new tail is written
+    overlap = _observations(datetime(2025, 8, 30, 3, 0), datetime(2025, 8, 30, 5, 0))
+    assert store.append(pd.concat([overlap, overlap])) == 10
+    assert store.append(overlap) == 0
+    window = store.read('cb0102', datetime(2025, 8, 30, 0, 0), datetime(2025, 8, 30, 5, 0))
+    pd.testing.assert_frame_equal(window, _observations(datetime(2025, 8, 30, 0, 0), datetime(2025, 8, 30, 5, 0)))
+
+    # A fresh store instance sees the same last timestamp on disk
+    assert CurrentObservationStore(str(tmp_path)).last_timestamp('cb0102') == pd.Timestamp('2025-08-30 05:00')
+
+
+def test_partial_trailing_record_is_ignored(tmp_path):
+    store = CurrentObservationStore(str(tmp_path))
+    store.append(_observations(datetime(2025, 8, 30, 0, 0), datetime(2025, 8, 30, 1, 0)))
+    _, path = store.partitions('cb0102')[-1]
+    with open(path, 'ab') as f:
+        f.write(b'\x00' * (RECORD_DTYPE.itemsize // 2))
+    assert len(CurrentObservationStore(str(tmp_path)).read('cb0102')) == 11
+
+
+def test_prune_drops_old_days(tmp_path):
+    store = CurrentObservationStore(str(tmp_path))
+    store.append(_observations(datetime(2025, 8, 28, 0, 0), datetime(2025, 8, 30, 1, 0)))
+    assert store.prune(datetime(2025, 8, 30)) == 2
+    assert store.read('cb0102')['timestamp'].min() == pd.Timestamp('2025-08-30')
+
+
+def test_sync_downloads_only_the_gap(tmp_path):
+    with UpstreamStub(seed=0) as stub:
+        parser = NOAACurrentDataParser(store_dir=str(tmp_path))
+        parser._fetcher = NOAACurrentFetcher(parser=parser, base_url=stub.environ()['NOAA_API_URL'],
+                                             rate_per_host=0)
+        first = parser.fetch_stations(['cb0102', 'sf0101'], hours_back=24, end=END)
+        first_bytes = stub.counts()['noaa']['bytes']
+        polls = [parser.fetch_stations(['cb0102', 'sf0101'], hours_back=24, end=END + timedelta(minutes=6 * i))
+                 for i in range(1, 4)]
+        poll_bytes = (stub.counts()['noaa']['bytes'] - first_bytes) / 3
+        with NOAACurrentFetcher(base_url=stub.environ()['NOAA_API_URL'], rate_per_host=0) as direct:
+            expected = direct.fetch_station('cb0102', hours_back=24, end=END + timedelta(minutes=18))
+        parser.fetcher.close()
+
+    assert len(first['cb0102']) == 241 and len(polls[-1]['sf0101']) == 241
+    assert poll_bytes < 0.1 * first_bytes
+    pd.testing.assert_frame_equal(polls[-1]['cb0102'], expected)
+    analysis = parser.analyze_current_patterns(polls[-1]['cb0102'])
+    assert analysis['time_range']['duration_hours'] == 24.0 and analysis['threat_indicators']
+
+
+def test_other_bins_at_the_last_timestamp_are_kept(tmp_path):
+    df = noaa_profile_observations(20, 6).to_pandas()
+    cut = df['timestamp'].unique()[9]
+    # The first response stops part-way through the profile at `cut`
+    first = df[(df['timestamp'] < cut) | ((df['timestamp'] == cut) & (df['bin_depth'] <= 2))]
+    assert set(first.loc[first['timestamp'] == cut, 'bin_depth']) == {1, 2}
+    store = CurrentObservationStore(str(tmp_path))
+    assert store.append(first) == len(first)
+
+    # The next one repeats `cut` in full: only its bins 3..6 and the later rows are new
+    rest = df[df['timestamp'] >= cut]
+    assert store.append(rest) == len(df) - len(first)
+    assert store.append(rest) == 0
+    # The same holds when the last timestamp's bins are read back from disk
+    assert CurrentObservationStore(str(tmp_path)).append(df) == 0
+    stored = store.read('cb0102')
+    assert len(stored) == len(df)
+    assert not stored.duplicated(['timestamp', 'bin_depth']).any()
+
+    fresh = CurrentObservationStore(str(tmp_path / 'fresh'))
+    fresh.append(first)
+    assert CurrentObservationStore(str(tmp_path / 'fresh')).append(rest) == len(df) - len(first)
+
+
+def test_widening_the_window_backfills_before_the_first_stored_row(tmp_path):
+    with UpstreamStub(seed=0) as stub:
+        parser = NOAACurrentDataParser(store_dir=str(tmp_path))
+        parser._fetcher = NOAACurrentFetcher(parser=parser, base_url=stub.environ()['NOAA_API_URL'],
+                                             rate_per_host=0)
+        narrow = parser.fetch_stations(['cb0102'], hours_back=6, end=END)
+        requests = stub.counts()['noaa']['requests']
+        wide = parser.fetch_stations(['cb0102'], hours_back=48, end=END)
+        backfill_requests = stub.counts()['noaa']['requests'] - requests
+        with NOAACurrentFetcher(base_url=stub.environ()['NOAA_API_URL'], rate_per_host=0) as direct:
+            expected = direct.fetch_station('cb0102', hours_back=48, end=END)
+        requests = stub.counts()['noaa']['requests']
+        again = parser.fetch_stations(['cb0102'], hours_back=48, end=END)
+        repeat_requests = stub.counts()['noaa']['requests'] - requests
+        parser.fetcher.close()
+
+    assert len(narrow['cb0102']) == 61 and len(wide['cb0102']) == 481
+    assert backfill_requests > 0 and repeat_requests == 0
+    pd.testing.assert_frame_equal(wide['cb0102'], expected)
+    pd.testing.assert_frame_equal(again['cb0102'], expected)
+    store = CurrentObservationStore(str(tmp_path))
+    assert store.first_timestamp('cb0102') == pd.Timestamp(END - timedelta(hours=48))
+    assert store.last_timestamp('cb0102') == pd.Timestamp(END)
+    # Every partition is still in time order after the backfill
+    for _, path in store.partitions('cb0102'):
+        assert (pd.Series(store._load(path)['t']).diff().dropna() > 0).all()
+
+
+def test_backfill_appends_keep_both_ends(tmp_path):
+    store = CurrentObservationStore(str(tmp_path))
+    store.append(_observations(datetime(2025, 8, 30, 6, 0), datetime(2025, 8, 30, 8, 0)))
+    # One response spanning the stored rows on both sides adds only what is outside them
+    wide = _observations(datetime(2025, 8, 29, 22, 0), datetime(2025, 8, 30, 9, 0))
+    assert store.append(wide) == len(wide) - 21
+    pd.testing.assert_frame_equal(store.read('cb0102'), wide)
+    assert store.gaps(['cb0102'], 11, datetime(2025, 8, 30, 9, 0)) == ({}, {})
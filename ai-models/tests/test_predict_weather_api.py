@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""predict_weather_api: model snapshots load lazily and recover from failed loads"""
+import asyncio
+import os
+import sys
+import threading
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import model_store  # noqa: E402
+import predict_weather_api  # noqa: E402
+from model_registry import ModelRegistry  # noqa: E402
+
+
+def test_models_missing_at_startup_are_loaded_once_published(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_store, 'DEFAULT_STORE_DIR', str(tmp_path / 'store'))
+    registry = ModelRegistry(retry_seconds=0)
+    monkeypatch.setattr(predict_weather_api, 'registry', registry)
+    for name, filename in predict_weather_api.WEATHER_MODELS.items():
+        registry.register_file(name, str(tmp_path / filename))
+
+    assert predict_weather_api.current_models() == (None, None, None, None)
+    assert registry.status('rain_classifier')['status'] == 'error'
+
+    model_store.dump_artifact({'weights': np.arange(3.0)}, str(tmp_path / 'rain_classifier.pkl'))
+    rain_clf, temp_reg, _, _ = predict_weather_api.current_models()
+    assert list(rain_clf['weights']) == [0.0, 1.0, 2.0] and temp_reg is None
+
+
+def test_async_snapshot_loads_off_the_event_loop(tmp_path, monkeypatch):
+    registry = ModelRegistry()
+    monkeypatch.setattr(predict_weather_api, 'registry', registry)
+    loaded_on = []
+
+    def factory():
+        loaded_on.append(threading.get_ident())
+        return 'model'
+    for name in predict_weather_api.WEATHER_MODELS:
+        registry.register(name, factory)
+
+    async def run():
+        return threading.get_ident(), await predict_weather_api.current_models_async()
+
+    loop_thread, models = asyncio.run(run())
+    assert models == ('model',) * 4 and len(loaded_on) == 4 and loop_thread not in loaded_on
+    # Once everything is loaded the snapshot is taken inline
+    assert asyncio.run(predict_weather_api.current_models_async()) == models and len(loaded_on) == 4
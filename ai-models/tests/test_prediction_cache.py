@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""prediction_cache: keys, LRU/TTL expiry and invalidation when the registry swaps a model"""
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import prediction_cache  # noqa: E402
+from model_registry import ModelRegistry  # noqa: E402
+from prediction_cache import PredictionCache, cached_prediction, quantize  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def fresh_caches(monkeypatch):
+    monkeypatch.setattr(prediction_cache, '_caches', {})
+    monkeypatch.setattr(prediction_cache, '_listening', set())
+
+
+def _predict(model, calls):
+    async def compute():
+        calls.append(model)
+        return model
+    return compute
+
+
+def test_swap_between_fetch_and_lookup_never_caches_the_old_model():
+    registry = ModelRegistry()
+    registry.register('m', lambda: 'old')
+    calls = []
+
+    async def run():
+        model, version = registry.get_with_version('m')
+        registry.swap('m', 'new')
+        # The old model answers this request, but its result must not be cached for version 2
+        first = await cached_prediction('m', registry, [1.0], _predict(model, calls), version=version)
+        model, version = registry.get_with_version('m')
+        second = await cached_prediction('m', registry, [1.0], _predict(model, calls), version=version)
+        third = await cached_prediction('m', registry, [1.0], _predict(model, calls), version=version)
+        return first, second, third
+
+    assert asyncio.run(run()) == ('old', 'new', 'new')
+    assert calls == ['old', 'new']
+    assert registry.get_with_version('m') == ('new', 2)
+
+
+def test_keys_quantize_features_per_precision(monkeypatch):
+    monkeypatch.setenv(prediction_cache.PRECISION_ENV, 'b=0, default=2, bogus=x')
+    cache = PredictionCache('m', feature_names=['a', 'b'], precision={'a': 3})
+    assert cache.precision == {'a': 3, 'b': 0} and cache.default_decimals == 2
+    assert cache.key(1, {'a': 0.12341, 'b': 7.4}) == cache.key(1, [0.12339, 6.6]) == (1, (123, 7))
+    assert cache.key(1, [0.1234, 7.4]) != cache.key(2, [0.1234, 7.4])
+    assert quantize(float('nan'), 2) == 'nan' and quantize('north', 2) == 'north' and quantize(None, 2) is None
+
+
+def test_lru_and_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(time, 'monotonic', lambda: now[0])
+    cache = PredictionCache('m', maxsize=2, ttl_seconds=10)
+    cache.put((1, ('a',)), 'A')
+    cache.put((1, ('b',)), 'B')
+    assert cache.get((1, ('a',))) == 'A'
+    cache.put((1, ('c',)), 'C')  # evicts 'b', the least recently used
+    assert cache.get((1, ('b',))) is None and cache.get((1, ('a',))) == 'A'
+
+    now[0] += 10.5
+    assert cache.get((1, ('a',)), 'expired') == 'expired' and len(cache) == 1
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['evictions'], stats['expirations']) == (2, 2, 1, 1)
+    assert not PredictionCache('off', maxsize=0).enabled
+
+
+def test_swaps_drop_entries_of_other_versions():
+    registry = ModelRegistry()
+    registry.register('m', lambda: 'v1')
+    calls = []
+
+    async def predict(features):
+        model, version = registry.get_with_version('m')
+        return await cached_prediction('m', registry, features, _predict(model, calls), version=version)
+
+    async def run():
+        return [await predict([1.0]), await predict([1.00001]), await predict([2.0])]
+
+    assert asyncio.run(run()) == ['v1', 'v1', 'v1'] and calls == ['v1', 'v1']
+    cache = prediction_cache.get_cache('m')
+    assert len(cache) == 2
+    registry.swap('m', 'v2')
+    assert len(cache) == 0 and cache.stats()['invalidations'] == 1
+    assert asyncio.run(predict([1.0])) == 'v2' and calls[-1] == 'v2'
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""profiling: spans, token-gated request profiles and capture rotation"""
+import asyncio
+import os
+import sys
+import time
+
+from fastapi import FastAPI
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import profiling  # noqa: E402
+from asgi_client import ASGIClient  # noqa: E402
+from profiling import RequestProfile, prune_profiles, span, traced  # noqa: E402
+
+
+def test_only_the_newest_captures_are_kept(tmp_path, monkeypatch):
+    monkeypatch.setenv(profiling.DIR_ENV, str(tmp_path))
+    monkeypatch.setenv(profiling.KEEP_ENV, '3')
+    (tmp_path / 'notes.txt').write_text('not a capture')
+    paths = []
+    for i in range(5):
+        profile = RequestProfile(interval_seconds=0.001)
+        path = profile.finish()
+        # Distinct, increasing modification times regardless of filesystem resolution
+        os.utime(path, ns=(i * 10 ** 9, i * 10 ** 9))
+        paths.append(path)
+    # finish() prunes as it writes
+    assert len([name for name in os.listdir(tmp_path) if name.endswith('.collapsed')]) == 3
+    prune_profiles(str(tmp_path), profiling.profiles_to_keep())
+
+    assert sorted(os.listdir(tmp_path)) == sorted([os.path.basename(p) for p in paths[-3:]] + ['notes.txt'])
+    assert prune_profiles(str(tmp_path), 1) == 2 and os.path.exists(paths[-1])
+    monkeypatch.setenv(profiling.KEEP_ENV, 'all')
+    assert profiling.profiles_to_keep() == profiling.DEFAULT_KEEP
+
+
+def _app():
+    app = FastAPI()
+
+    @app.get('/work')
+    @traced('handler')
+    async def work():
+        with span('model'):
+            time.sleep(0.01)
+        return {'ok': True}
+
+    return profiling.install(app)
+
+
+def _get(app, url, headers=None):
+    async def run():
+        async with ASGIClient(app) as client:
+            return await client.get(url, headers=headers)
+    return asyncio.run(run())
+
+
+def test_spans_are_free_outside_a_profiled_request():
+    assert profiling.current_profile() is None
+    with span('ignored'):
+        pass
+
+    @traced('sync')
+    def add(a, b):
+        return a + b
+    assert add(1, 2) == 3 and add.__name__ == 'add'
+
+
+def test_requests_without_the_token_are_not_profiled(tmp_path, monkeypatch):
+    monkeypatch.setenv(profiling.DIR_ENV, str(tmp_path))
+    monkeypatch.delenv(profiling.TOKEN_ENV, raising=False)
+    app = _app()
+    # Profiling is off entirely until a token is configured
+    response = _get(app, '/work', {'X-CTAS-Profile': 'anything'})
+    assert response.json() == {'ok': True} and 'server-timing' not in response.headers
+
+    monkeypatch.setenv(profiling.TOKEN_ENV, 'secret')
+    assert 'server-timing' not in _get(app, '/work', {'X-CTAS-Profile': 'wrong'}).headers
+    assert _get(app, '/debug/profiles/abc').status_code == 403
+    assert os.listdir(tmp_path) == []
+
+
+def test_profiled_request_reports_spans_and_stacks(tmp_path, monkeypatch):
+    monkeypatch.setenv(profiling.DIR_ENV, str(tmp_path))
+    monkeypatch.setenv(profiling.TOKEN_ENV, 'secret')
+    app = _app()
+
+    response = _get(app, '/work', {'X-CTAS-Profile': 'secret'})
+    assert response.status_code == 200
+    body = response.json()
+    summary = body.pop('_profile')
+    assert body == {'ok': True} and summary['samples'] > 0
+    spans = {s['name']: s for s in summary['spans']}
+    assert {'handler', 'model', 'serialization'} <= set(spans) and spans['model']['duration_ms'] >= 10
+    timing = response.headers['server-timing']
+    assert timing.startswith('model;dur=') and 'handler;dur=' in timing and 'total;dur=' in timing
+    assert int(response.headers['content-length']) == len(response.content)
+
+    profile_id = response.headers['x-ctas-profile-id']
+    assert summary['profile_url'] == f"/debug/profiles/{profile_id}"
+    stacks = _get(app, f"/debug/profiles/{profile_id}?profile=secret")
+    assert stacks.status_code == 200
+    assert all(line.rsplit(' ', 1)[1].isdigit() for line in stacks.content.decode().splitlines())
+    assert _get(app, '/debug/profiles/0000?profile=secret').status_code == 404
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""RetrainManager: worker subprocess, publish to the store and hot swap into the registry"""
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import model_store  # noqa: E402
+from model_registry import ModelRegistry  # noqa: E402
+from retrain_jobs import RetrainManager, parse_cores, parse_nice  # noqa: E402
+
+TINY_MODEL = '''
+import os
+from model_store import dump_artifact
+
+
+class TinyModel:
+    def train(self):
+        if os.environ.get('TINY_MODEL_FAIL'):
+            raise ValueError('no training data')
+        self.weights = [1.0, 2.0]
+        return {'accuracy': 0.75}
+
+    def save_model(self, filepath, metrics=None):
+        dump_artifact(self.weights, filepath, metrics=metrics)
+'''
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    (tmp_path / 'tiny_retrain_model.py').write_text(TINY_MODEL)
+    store = str(tmp_path / 'store')
+    # The worker inherits the environment: it finds the model module and publishes into this store
+    monkeypatch.setenv('PYTHONPATH', str(tmp_path))
+    monkeypatch.setenv('CTAS_MODEL_STORE', store)
+
+    def factory():
+        if model_store.artifact_path('tiny', store_dir=store) is None:
+            return 'untrained'
+        return model_store.load_artifact('tiny', store_dir=store)[0]
+    registry = ModelRegistry()
+    registry.register('tiny', factory)
+    return RetrainManager(registry)
+
+
+def _wait(job, timeout=60):
+    deadline = time.monotonic() + timeout
+    while job.active and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not job.active, job.describe()
+
+
+def test_parse_cores():
+    assert parse_cores('0,1,4-5') == [0, 1, 4, 5]
+    assert parse_cores([3, 1, 1]) == [1, 3]
+    assert parse_cores('') is None and parse_cores(None) is None
+
+
+def test_negative_nice_is_rejected(manager):
+    assert parse_nice('0') == 0 and parse_nice(19) == 19
+    for nice in (-5, 20):
+        with pytest.raises(ValueError):
+            manager.submit('tiny', 'tiny_retrain_model', 'TinyModel', nice=nice)
+    assert manager.jobs() == []
+
+
+def test_retrain_publishes_and_swaps(manager):
+    registry = manager.registry
+    assert registry.get('tiny') == 'untrained'
+    job = manager.submit('tiny', 'tiny_retrain_model', 'TinyModel', nice=5)
+    # One job per model at a time
+    with pytest.raises(RuntimeError):
+        manager.submit('tiny', 'tiny_retrain_model', 'TinyModel')
+    _wait(job)
+
+    assert job.status == 'completed' and job.version == 'v1' and job.progress == 1.0
+    assert job.result == {'accuracy': 0.75} and job.train_seconds is not None and job.pid
+    assert registry.get('tiny') == [1.0, 2.0] and registry.version('tiny') == 2
+    assert manager.latest('tiny')['status'] == 'completed' and manager.jobs()[0]['job_id'] == job.job_id
+
+
+def test_failed_worker_keeps_the_serving_model(manager, monkeypatch):
+    monkeypatch.setenv('TINY_MODEL_FAIL', '1')
+    registry = manager.registry
+    assert registry.get('tiny') == 'untrained'
+    job = manager.submit('tiny', 'tiny_retrain_model', 'TinyModel')
+    _wait(job)
+
+    assert job.status == 'failed' and 'no training data' in job.error and job.version is None
+    assert registry.get('tiny') == 'untrained' and registry.version('tiny') == 1
+    # A finished job no longer blocks a new one
+    monkeypatch.delenv('TINY_MODEL_FAIL')
+    retry = manager.submit('tiny', 'tiny_retrain_model', 'TinyModel')
+    _wait(retry)
+    assert retry.status == 'completed' and registry.get('tiny') == [1.0, 2.0]
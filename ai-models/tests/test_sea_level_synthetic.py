@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""SeaLevelAnomalyDetector.generate_synthetic_data: chunked, seeded and distributed like the per-row original"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sea_level_anomaly_detector as sla  # noqa: E402
+from sea_level_anomaly_detector import SeaLevelAnomalyDetector  # noqa: E402
+
+
+def _legacy_generate(n_samples):
+    """The per-row df.at anomaly injection generate_synthetic_data used before vectorizing"""
+    np.random.seed(42)
+    df = pd.DataFrame({
+        'sea_level_height': np.random.normal(0, 150, n_samples),
+        'atmospheric_pressure': np.random.normal(1013, 15, n_samples),
+        'wind_speed': np.random.exponential(8, n_samples),
+        'wind_direction': np.random.uniform(0, 360, n_samples),
+        'air_temperature': np.random.normal(25, 5, n_samples),
+        'water_temperature': np.random.normal(24, 3, n_samples),
+        'tidal_residual': np.random.normal(0, 50, n_samples),
+        'significant_wave_height': np.random.exponential(1.5, n_samples),
+        'storm_surge_component': np.random.normal(0, 30, n_samples),
+        'rainfall_24h': np.random.exponential(10, n_samples),
+        'moon_phase': np.random.uniform(0, 1, n_samples),
+        'seasonal_component': np.random.choice([0, 1, 2, 3], n_samples),
+        'el_nino_index': np.random.normal(0, 1, n_samples),
+        'pressure_trend_3h': np.random.normal(0, 2, n_samples),
+        'temperature_gradient': np.random.normal(1, 2, n_samples)
+    })
+    for column, low, high in (('sea_level_height', -500, 1000), ('atmospheric_pressure', 950, 1050),
+                              ('wind_speed', 0, 50), ('air_temperature', 10, 45), ('water_temperature', 15, 35),
+                              ('significant_wave_height', 0, 15), ('rainfall_24h', 0, 200)):
+        df[column] = np.clip(df[column], low, high)
+    anomaly_indices = np.random.choice(n_samples, int(0.05 * n_samples), replace=False)
+    for i, idx in enumerate(anomaly_indices):
+        anomaly_type = i % 4
+        if anomaly_type == 0:
+            df.at[idx, 'sea_level_height'] += np.random.uniform(300, 800)
+            df.at[idx, 'atmospheric_pressure'] -= np.random.uniform(20, 50)
+            df.at[idx, 'wind_speed'] += np.random.uniform(15, 35)
+            df.at[idx, 'significant_wave_height'] += np.random.uniform(3, 8)
+        elif anomaly_type == 1:
+            df.at[idx, 'sea_level_height'] += np.random.uniform(200, 400)
+            df.at[idx, 'moon_phase'] = np.random.uniform(0.8, 1.0)
+            df.at[idx, 'tidal_residual'] += np.random.uniform(100, 200)
+        elif anomaly_type == 2:
+            df.at[idx, 'atmospheric_pressure'] -= np.random.uniform(25, 45)
+            df.at[idx, 'sea_level_height'] += np.random.uniform(150, 300)
+            df.at[idx, 'pressure_trend_3h'] -= np.random.uniform(5, 10)
+        elif anomaly_type == 3:
+            df.at[idx, 'el_nino_index'] = np.random.choice([-2.5, 2.5])
+            df.at[idx, 'sea_level_height'] += np.random.uniform(-200, 400)
+            df.at[idx, 'water_temperature'] += np.random.uniform(-3, 5)
+    df['is_anomaly'] = 0
+    df.loc[anomaly_indices, 'is_anomaly'] = 1
+    df['timestamp'] = pd.date_range(start='2020-01-01', periods=n_samples, freq='h')
+    return df
+
+
+def test_same_shape_and_distributions_as_the_per_row_version():
+    legacy = _legacy_generate(40000)
+    data = SeaLevelAnomalyDetector().generate_synthetic_data(40000)
+
+    assert list(data.columns) == list(legacy.columns)
+    assert (data.dtypes == legacy.dtypes).all()
+    assert data['timestamp'].equals(legacy['timestamp'])
+    assert data['is_anomaly'].sum() == legacy['is_anomaly'].sum() == 2000
+    assert sorted(data['seasonal_component'].unique()) == [0, 1, 2, 3]
+    # Normal rows and injected anomalies are each drawn from the same distributions
+    for label in (0, 1):
+        ours, theirs = data[data['is_anomaly'] == label], legacy[legacy['is_anomaly'] == label]
+        for column in sla.SYNTHETIC_DTYPES:
+            if column != 'is_anomaly':
+                assert stats.ks_2samp(ours[column], theirs[column]).pvalue > 0.001, (label, column)
+    anomalies = data[data['is_anomaly'] == 1]
+    assert (anomalies['el_nino_index'].isin([-2.5, 2.5])).sum() == 500
+
+
+def test_chunked_generation_is_deterministic(monkeypatch):
+    detector = SeaLevelAnomalyDetector()
+    monkeypatch.setattr(sla, 'SYNTHETIC_CHUNK_ROWS', 1000)
+    data = detector.generate_synthetic_data(4500, seed=7)
+    chunks = list(detector.iter_synthetic_data(4500, seed=7))
+
+    assert [len(chunk) for chunk in chunks] == [1000, 1000, 1000, 1000, 500]
+    pd.testing.assert_frame_equal(pd.concat(chunks), data)
+    pd.testing.assert_frame_equal(detector.generate_synthetic_data(4500, seed=7), data)
+    assert not detector.generate_synthetic_data(4500, seed=8).equals(data)
+    # A chunk depends only on its position, so a longer run starts with the same rows
+    pd.testing.assert_frame_equal(detector.generate_synthetic_data(6000, seed=7).iloc[:4000], data.iloc[:4000])
+    # Anomalies stay at 5% overall and cycle through the four types across chunks
+    assert data['is_anomaly'].sum() == 225
+    assert [int(chunk['is_anomaly'].sum()) for chunk in chunks] == [50, 50, 50, 50, 25]
+    assert data['el_nino_index'].isin([-2.5, 2.5]).sum() == 56
+
+
+def test_timestamps_switch_to_seconds_past_the_nanosecond_range(monkeypatch):
+    monkeypatch.setattr(sla, 'MAX_NS_HOURS', 100)
+    data = SeaLevelAnomalyDetector().generate_synthetic_data(150)
+    assert data['timestamp'].dtype == 'datetime64[s]'
+    assert data['timestamp'].iloc[149] == pd.Timestamp('2020-01-07 05:00')
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""HarmonicTidalModel: constituent recovery, incremental updates and forecasts"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from noaa_current_parser import NOAACurrentDataParser  # noqa: E402
+from tidal_harmonics import CONSTITUENTS, EPOCH_NS, NS_PER_HOUR, HarmonicTidalModel  # noqa: E402
+
+TRUTH = {'M2': (0.8, 40.0), 'S2': (0.25, 110.0), 'K1': (0.15, 200.0), 'O1': (0.1, 300.0)}
+
+
+def _currents(times_ns, noise=0.0, seed=0):
+    hours = (times_ns - EPOCH_NS) / NS_PER_HOUR
+    u = np.full(len(hours), 0.05)
+    for name, (amplitude, phase) in TRUTH.items():
+        u += amplitude * np.cos(np.radians(CONSTITUENTS[name]) * hours - np.radians(phase))
+    v = 0.4 * u - 0.02
+    if noise:
+        rng = np.random.default_rng(seed)
+        u, v = u + rng.normal(0, noise, len(u)), v + rng.normal(0, noise, len(v))
+    return u, v
+
+
+def _times(days, start='2025-07-01', step_minutes=6):
+    times = pd.date_range(start, periods=int(days * 24 * 60 / step_minutes), freq=f'{step_minutes}min')
+    return times.to_numpy('datetime64[ns]').view(np.int64)
+
+
+def test_recovers_constituents_from_irregular_timestamps():
+    times = _times(30)
+    keep = np.random.default_rng(1).random(len(times)) > 0.3  # drop 30% of readings, with gaps
+    keep[2000:2600] = False
+    times = times[keep]
+    model = HarmonicTidalModel()
+    model.update(times, *_currents(times, noise=0.05))
+    fitted = model.constituents()
+    for name, (amplitude, phase) in TRUTH.items():
+        assert fitted[name]['amplitude_u'] == pytest.approx(amplitude, abs=0.01)
+        assert fitted[name]['phase_u'] == pytest.approx(phase, abs=3.0)
+        assert fitted[name]['amplitude_v'] == pytest.approx(0.4 * amplitude, abs=0.01)
+    assert fitted['N2']['amplitude_u'] < 0.02
+
+
+def test_incremental_updates_match_single_fit():
+    times = _times(20)
+    u, v = _currents(times, noise=0.05)
+    whole = HarmonicTidalModel()
+    whole.update(times, u, v)
+    chunked = HarmonicTidalModel()
+    for chunk in np.array_split(np.arange(len(times)), 7):
+        chunked.update(times[chunk], u[chunk], v[chunk])
+    assert chunked.update(times[:100], u[:100], v[:100]) == 0  # already absorbed
+    np.testing.assert_allclose(chunked.solve()[1], whole.solve()[1], atol=1e-9)
+
+    future = _times(3, start='2025-07-21')
+    np.testing.assert_allclose(whole.predict(future), np.column_stack(_currents(future)), atol=0.02)
+
+
+def test_short_records_only_fit_resolvable_constituents():
+    model = HarmonicTidalModel()
+    times = _times(1.5)
+    model.update(times, *_currents(times))
+    assert model.resolvable() == ['M2', 'K1', 'M4', 'M6']
+    times = _times(16)
+    model = HarmonicTidalModel()
+    model.update(times, *_currents(times))
+    assert {'M2', 'S2', 'K1', 'O1'} <= set(model.resolvable())
+    with pytest.raises(ValueError):
+        HarmonicTidalModel(['M2', 'Z9'])
+
+
+def test_parser_forecast_uses_cached_model():
+    times = _times(16)
+    u, v = _currents(times)
+    speed = np.hypot(u, v)
+    direction = np.degrees(np.arctan2(u, v)) % 360
+    df = pd.DataFrame({'station_id': 'cb0102', 'timestamp': times.view('datetime64[ns]'),
+                       'current_speed_ms': speed, 'current_direction_degrees': direction,
+                       'current_u': u, 'current_v': v})
+    parser = NOAACurrentDataParser()
+    first = parser.generate_current_forecast(df.iloc[:3000], hours_ahead=12)
+    assert first['model_type'] == 'harmonic' and len(first['predicted_speeds_ms']) == 120
+    forecast = parser.generate_current_forecast(df, hours_ahead=12)
+    assert parser.tidal_models['cb0102'].n == len(df)
+
+    future = times[-1] + np.arange(1, 121) * 6 * 60 * 10 ** 9
+    fu, fv = _currents(future)
+    np.testing.assert_allclose(forecast['predicted_speeds_ms'], np.hypot(fu, fv), atol=1e-6)
+    assert forecast['timestamps'][0] == str(future[:1].view('datetime64[ns]').astype('datetime64[s]')[0])
+    assert parser.generate_current_forecast(df.iloc[:0])['error']
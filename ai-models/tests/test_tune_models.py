@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""tune_models: grid expansion, Pareto front and a small end-to-end sweep"""
+import json
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tune_models  # noqa: E402
+from tune_models import expand_grid, pareto_front, run_search  # noqa: E402
+
+
+def _tiny_dataset(n_samples=600):
+    rng = np.random.default_rng(0)
+    X = rng.uniform(0, 1, (n_samples, 3))
+    return X, (X[:, 0] + X[:, 1] > 1).astype(int)
+
+
+def _register_tiny(monkeypatch):
+    monkeypatch.setitem(tune_models.DATASETS, 'tiny', {
+        'loader': _tiny_dataset, 'kind': 'classifier',
+        'baseline': {'n_estimators': 10, 'max_depth': None, 'max_features': 'sqrt'}})
+
+
+def test_pareto_front():
+    trials = [
+        {'score': 0.90, 'p99_ms': 1.0, 'size_bytes': 100},
+        {'score': 0.95, 'p99_ms': 2.0, 'size_bytes': 100},
+        {'score': 0.90, 'p99_ms': 2.0, 'size_bytes': 200},  # dominated by the first
+        {'score': 0.80, 'p99_ms': 0.5, 'size_bytes': 300},
+    ]
+    assert pareto_front(trials) == [1, 0, 3]
+    # For RMSE lower is better, which turns the order around
+    assert pareto_front(trials, maximize_score=False) == [3, 0]
+
+
+def test_expand_grid_skips_depth_for_isolation_forests():
+    grid = {'n_estimators': [10, 20], 'max_depth': [None, 4], 'max_features': [1.0]}
+    assert len(expand_grid(grid, 'classifier')) == 4
+    assert expand_grid(grid, 'isolation') == [{'n_estimators': 10, 'max_features': 1.0},
+                                              {'n_estimators': 20, 'max_features': 1.0}]
+    assert [tune_models._parse_grid_value(v) for v in ('none', '8', '0.5', 'sqrt')] == [None, 8, 0.5, 'sqrt']
+    # 'sqrt' is not a valid IsolationForest max_features, and a grid of only invalid values falls back to 1.0
+    assert expand_grid({'n_estimators': [10], 'max_features': ['sqrt', 0.5, 2]}, 'isolation') == [
+        {'n_estimators': 10, 'max_features': 0.5}, {'n_estimators': 10, 'max_features': 2}]
+    assert expand_grid({'n_estimators': [10], 'max_features': ['log2']}, 'isolation') == [
+        {'n_estimators': 10, 'max_features': 1.0}]
+
+
+def test_default_grid_sweeps_the_isolation_dataset(monkeypatch):
+    monkeypatch.setattr(tune_models, 'DEFAULT_GRID', dict(tune_models.DEFAULT_GRID, n_estimators=[10]))
+    results = run_search('sea_level', n_jobs=1, n_samples=600)
+    params = [trial['params'] for trial in results['trials']]
+    assert {p['max_features'] for p in params} == {0.5, 1.0} and all('max_depth' not in p for p in params)
+    assert sum(trial['baseline'] for trial in results['trials']) == 1 and results['score_name'] == 'f1'
+
+
+def test_search_records_every_objective_and_the_baseline(monkeypatch):
+    _register_tiny(monkeypatch)
+    results = run_search('tiny', {'n_estimators': [5, 20], 'max_depth': [None, 3], 'max_features': ['sqrt']},
+                         n_jobs=1)
+
+    # The four grid points plus the hard-coded baseline, which is not in the grid
+    assert len(results['trials']) == 5 and results['n_test'] == 120 and results['score_name'] == 'accuracy'
+    assert sum(trial['baseline'] for trial in results['trials']) == 1
+    for trial in results['trials']:
+        assert 0.5 < trial['score'] <= 1.0 and trial['size_bytes'] > 0 and 'model' not in trial
+        assert 0 < trial['p50_ms'] <= trial['p99_ms'] and trial['rows_per_second'] > 0
+    assert results['pareto_front'] and all(trial.get('pareto') for trial in results['pareto_front'])
+
+
+def test_main_writes_results(tmp_path, monkeypatch, capsys):
+    _register_tiny(monkeypatch)
+    output = tmp_path / 'tuning.json'
+    assert tune_models.main(['--dataset', 'tiny', '--n-estimators', '5', '--max-depth', 'none', '4',
+                             '--max-features', 'sqrt', '--jobs', '1', '--output', str(output)]) == 0
+    results = json.loads(output.read_text())
+    assert [trial['params']['max_depth'] for trial in results['trials']] == [None, 4, None]
+    assert 'Pareto front for tiny' in capsys.readouterr().out
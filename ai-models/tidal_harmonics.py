@@ -0,0 +1,160 @@
+"""
+CTAS Tidal Harmonics
+Multi-constituent harmonic model of tidal currents, fitted incrementally by least squares
+
+The east (u) and north (v) current components are each modelled as
+
+    mean + sum_k a_k cos(w_k t) + b_k sin(w_k t)
+
+over the standard constituents (M2, S2, N2, K2, K1, O1, P1, Q1 and the
+shallow-water M4, MS4, M6), with t the actual observation time in hours.
+Fitting the components rather than speed keeps flood and ebb as opposite
+signs of one harmonic signal; forecast speed and direction come from the
+predicted (u, v).
+
+`HarmonicTidalModel.update()` folds new observations into the normal
+equations (X'X and X'[u v]), so a model cached per station absorbs each
+new batch in O(batch) time and never refits the history. `solve()` picks
+the constituents the record can separate, following the Rayleigh criterion
+(span x |frequency difference| >= 1 cycle). It then solves that block of
+the normal equations. `predict()` evaluates the fitted series at any
+timestamps with one matrix product.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+NS_PER_HOUR = 3_600 * 10 ** 9
+# Reference time for the phase of every constituent (hours are counted from here)
+EPOCH_NS = np.datetime64('2000-01-01T00:00', 'ns').astype(np.int64)
+RAYLEIGH = 1.0
+
+# Angular speeds in degrees per hour, in the order constituents are admitted
+CONSTITUENTS: Dict[str, float] = {
+    'M2': 28.9841042,
+    'K1': 15.0410686,
+    'S2': 30.0000000,
+    'O1': 13.9430356,
+    'N2': 28.4397295,
+    'M4': 57.9682084,
+    'K2': 30.0821373,
+    'P1': 14.9589314,
+    'Q1': 13.3986609,
+    'MS4': 58.9841042,
+    'M6': 86.9523127,
+}
+
+
+def _hours(times_ns: np.ndarray) -> np.ndarray:
+    return (np.asarray(times_ns, dtype=np.int64) - EPOCH_NS) / NS_PER_HOUR
+
+
+class HarmonicTidalModel:
+    """Least-squares harmonic fit of (u, v) current components, updated through its normal equations"""
+
+    def __init__(self, constituents: Optional[Sequence[str]] = None, rayleigh: float = RAYLEIGH):
+        names = list(constituents) if constituents is not None else list(CONSTITUENTS)
+        unknown = set(names) - set(CONSTITUENTS)
+        if unknown:
+            raise ValueError(f"Unknown tidal constituents: {', '.join(sorted(unknown))}")
+        self.names = names
+        self.rayleigh = rayleigh
+        self.omega = np.radians([CONSTITUENTS[name] for name in names])  # radians per hour
+        size = 1 + 2 * len(names)
+        self.xtx = np.zeros((size, size))
+        self.xty = np.zeros((size, 2))
+        self.n = 0
+        self.first_ns: Optional[int] = None
+        self.last_ns: Optional[int] = None
+        self._solution: Optional[Tuple[List[str], np.ndarray]] = None
+
+    def _design(self, hours: np.ndarray, names: Optional[Sequence[str]] = None) -> np.ndarray:
+        omega = self.omega if names is None else np.radians([CONSTITUENTS[name] for name in names])
+        phase = np.outer(hours, omega)
+        design = np.empty((len(hours), 1 + 2 * phase.shape[1]))
+        design[:, 0] = 1.0
+        design[:, 1::2] = np.cos(phase)
+        design[:, 2::2] = np.sin(phase)
+        return design
+
+    def update(self, times_ns: np.ndarray, u: np.ndarray, v: np.ndarray) -> int:
+        """Add observations (int64 epoch ns, u, v); rows at or before the last update are skipped"""
+        times_ns = np.asarray(times_ns, dtype=np.int64)
+        uv = np.column_stack([np.asarray(u, dtype=np.float64), np.asarray(v, dtype=np.float64)])
+        keep = np.isfinite(uv).all(axis=1) & (times_ns != np.iinfo(np.int64).min)
+        if self.last_ns is not None:
+            keep &= times_ns > self.last_ns
+        if not keep.any():
+            return 0
+        times_ns, uv = times_ns[keep], uv[keep]
+        design = self._design(_hours(times_ns))
+        self.xtx += design.T @ design
+        self.xty += design.T @ uv
+        self.n += len(times_ns)
+        first, last = int(times_ns.min()), int(times_ns.max())
+        self.first_ns = first if self.first_ns is None else min(self.first_ns, first)
+        self.last_ns = last if self.last_ns is None else max(self.last_ns, last)
+        self._solution = None
+        return len(times_ns)
+
+    @property
+    def span_hours(self) -> float:
+        if self.first_ns is None:
+            return 0.0
+        return (self.last_ns - self.first_ns) / NS_PER_HOUR
+
+    def resolvable(self) -> List[str]:
+        """Constituents the record separates from the mean and from each other (Rayleigh criterion)"""
+        span = self.span_hours
+        chosen: List[str] = []
+        frequencies = [0.0]  # cycles per hour, starting with the mean
+        for name in self.names:
+            frequency = CONSTITUENTS[name] / 360.0
+            if all(abs(frequency - other) * span >= self.rayleigh for other in frequencies):
+                chosen.append(name)
+                frequencies.append(frequency)
+        # Two unknowns per constituent plus the mean need enough observations
+        return chosen[:max(0, (self.n - 1) // 2)]
+
+    def solve(self) -> Tuple[List[str], np.ndarray]:
+        """(constituents, coefficients) with coefficients shaped (1 + 2k, 2) for u and v"""
+        if self._solution is None:
+            names = self.resolvable()
+            index = [0] + [1 + 2 * self.names.index(name) + j for name in names for j in (0, 1)]
+            block = self.xtx[np.ix_(index, index)]
+            coefficients = np.linalg.lstsq(block, self.xty[index], rcond=None)[0] if self.n else np.zeros((1, 2))
+            self._solution = (names, coefficients)
+        return self._solution
+
+    def predict(self, times_ns: np.ndarray) -> np.ndarray:
+        """Predicted (u, v) as an (n, 2) array"""
+        names, coefficients = self.solve()
+        return self._design(_hours(times_ns), names) @ coefficients
+
+    def constituents(self) -> Dict[str, Dict[str, float]]:
+        """Amplitude (m/s) and phase (degrees, relative to 2000-01-01 UTC) of each fitted constituent"""
+        names, coefficients = self.solve()
+        result = {}
+        for i, name in enumerate(names):
+            a, b = coefficients[1 + 2 * i], coefficients[2 + 2 * i]
+            result[name] = {
+                'amplitude_u': float(np.hypot(a[0], b[0])),
+                'phase_u': float(np.degrees(np.arctan2(b[0], a[0])) % 360),
+                'amplitude_v': float(np.hypot(a[1], b[1])),
+                'phase_v': float(np.degrees(np.arctan2(b[1], a[1])) % 360),
+            }
+        return result
+
+    def forecast(self, start_ns: int, hours_ahead: float, step_minutes: float = 6) -> Dict[str, np.ndarray]:
+        """Predicted times, u, v, speed (m/s) and direction (degrees toward) after start_ns"""
+        step = int(step_minutes * 60 * 10 ** 9)
+        times = start_ns + step * np.arange(1, int(hours_ahead * 60 / step_minutes) + 1, dtype=np.int64)
+        uv = self.predict(times)
+        return {
+            'timestamps': times.view('datetime64[ns]'),
+            'u': uv[:, 0],
+            'v': uv[:, 1],
+            'speed': np.hypot(uv[:, 0], uv[:, 1]),
+            'direction': np.degrees(np.arctan2(uv[:, 0], uv[:, 1])) % 360,
+        }
@@ -1,12 +1,17 @@
+import argparse
+import os
+import sys
 import pandas as pd
-from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report, accuracy_score
 import joblib
+import incremental_training
+
+parser = incremental_training.add_arguments(argparse.ArgumentParser(description='Train the alert model'))
+args = parser.parse_args()
 
 # Load dataset
 file_path = 'final_training_dataset.csv'  # Adjust path if needed
-df = pd.read_csv(file_path)
 
 # Select relevant features and target
 features = [
@@ -18,6 +23,17 @@ features = [
 ]
 target = 'anomaly'
 
+if args.incremental:
+    # Only rows appended since the published model was trained are read
+    result = incremental_training.incremental_update('alert_model', features, target,
+                                                     trees_per_window=args.trees_per_window,
+                                                     max_trees=args.max_trees, tolerance=args.tolerance)
+    incremental_training.print_update(result)
+    sys.exit(0)
+
+byte_offset = os.path.getsize(file_path)
+df = pd.read_csv(file_path)
+columns = list(df.columns)
 
 # Keep only relevant columns
 df = df[features + [target]]
@@ -29,7 +45,8 @@ print(f"Initial rows: {len(df)}")
 print("Missing values per column:\n", df.isnull().sum())
 
 # Fill missing values in features with mean
-df[features] = df[features].fillna(df[features].mean())
+fill_values = df[features].mean()
+df[features] = df[features].fillna(fill_values)
 
 # Drop rows where target is missing
 df = df.dropna(subset=[target])
@@ -43,15 +60,23 @@ y = df[target]
 # Split data for training and testing
 X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
-# Train RandomForest Classifier
-clf = RandomForestClassifier(n_estimators=100, random_state=42)
+# Train RandomForest Classifier (or an SGD model that supports partial_fit updates)
+clf = incremental_training.build_model(args.family)
 clf.fit(X_train, y_train)
 
 # Evaluate model
 y_pred = clf.predict(X_test)
-print('Accuracy:', accuracy_score(y_test, y_pred))
+accuracy = accuracy_score(y_test, y_pred)
+print('Accuracy:', accuracy)
 print(classification_report(y_test, y_pred))
 
 # Save the trained model
 joblib.dump(clf, 'alert_model.pkl')
 print('Model saved as alert_model.pkl')
+
+# Publish a versioned, mmap-loadable artifact with its manifest; the test split
+# becomes the rolling holdout for later --incremental updates
+manifest = incremental_training.publish('alert_model', clf, features, {'accuracy': accuracy}, file_path,
+                                        byte_offset, X_test.to_numpy(), y_test.to_numpy(), columns,
+                                        fill_values=fill_values.to_dict(), training_data=df)
+print(f"Model published to model store as alert_model/{manifest['version']}")
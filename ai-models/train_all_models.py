@@ -1,67 +1,258 @@
+"""
+CTAS Training Pipeline
+Trains the rain classifier, weather regressors and water-level regressor in parallel
+
+Each CSV is read at most once per run, and the feature matrix of every model is
+cached under .feature_cache/ keyed by the CSV's size/mtime and the model's
+column spec, so unchanged re-runs skip CSV parsing entirely. Independent models
+fit concurrently in worker processes within a CPU budget (the budget is split
+between concurrent fits and each RandomForest's n_jobs). A per-model timing and
+metrics report is written to training_report.json.
+
+Usage:
+    python train_all_models.py
+    python train_all_models.py --cpu-budget 4 --models rain_classifier water_level_regressor
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
 import pandas as pd
 import numpy as np
 from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
 from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report, mean_squared_error
+from sklearn.metrics import classification_report, mean_squared_error, accuracy_score
 import joblib
-from feature_vector import create_feature_vector
+from model_store import save_artifact
 
 # --- CONFIG ---
 HISTORICAL_WEATHER_PATH = 'weather_data_with_rainfall.csv'  # For rain alert
 CURRENTS_DATA_PATH = 'final_training_dataset.csv'           # For currents/sea-level
 CHATBOT_DATA_PATH = 'Dataset_for_chatbot.csv'               # For additional features
+FEATURE_CACHE_DIR = '.feature_cache'
+REPORT_PATH = 'training_report.json'
+N_ESTIMATORS = 100
 
-# --- 1. Rain Alert Classifier ---
-def train_rain_classifier():
-    df = pd.read_csv(HISTORICAL_WEATHER_PATH)
-    # Drop rows with missing rainfall
-    df = df.dropna(subset=['rainfall'])
-    # Binary rain label
-    df['rain_label'] = (df['rainfall'] > 0.1).astype(int)
-    features = ['temperature', 'humidity', 'wind_speed']
-    X = df[features]
-    y = df['rain_label']
+# Columns computed from the raw CSV before features are selected
+DERIVED_COLUMNS = {
+    'rain_label': lambda df: (df['rainfall'] > 0.1).astype(int),
+}
+
+# One entry per saved model: where its data comes from and how it is prepared
+TASKS = [
+    {'name': 'rain_classifier', 'title': 'Rain Classifier', 'kind': 'classifier',
+     'data': HISTORICAL_WEATHER_PATH, 'dropna': ['rainfall'],
+     'features': ['temperature', 'humidity', 'wind_speed'], 'target': 'rain_label'},
+    {'name': 'temperature_regressor', 'title': 'Temperature Regressor', 'kind': 'regressor',
+     'data': HISTORICAL_WEATHER_PATH, 'dropna': ['temperature', 'humidity', 'wind_speed'],
+     'features': ['humidity', 'wind_speed'], 'target': 'temperature'},
+    {'name': 'humidity_regressor', 'title': 'Humidity Regressor', 'kind': 'regressor',
+     'data': HISTORICAL_WEATHER_PATH, 'dropna': ['temperature', 'humidity', 'wind_speed'],
+     'features': ['humidity', 'wind_speed'], 'target': 'humidity'},
+    {'name': 'water_level_regressor', 'title': 'Water Level Regressor', 'kind': 'regressor',
+     'data': CURRENTS_DATA_PATH, 'dropna': ['water_level_m', 'wind_speed_m_s', 'air_pressure_hpa'],
+     'features': ['wind_speed_m_s', 'air_pressure_hpa', 'chlorophyll_mg_m3'], 'target': 'water_level_m'},
+]
+
+
+# --- Data loading and feature cache ---
+class DatasetCache:
+    """Read each CSV once per run and remember how long it took"""
+
+    def __init__(self):
+        self.frames = {}
+        self.load_seconds = {}
+
+    def get(self, path):
+        if path not in self.frames:
+            start = time.perf_counter()
+            self.frames[path] = pd.read_csv(path)
+            self.load_seconds[path] = time.perf_counter() - start
+        return self.frames[path]
+
+
+def file_signature(path):
+    """Cheap identity of a data file: absolute path, size and modification time"""
+    stat = os.stat(path)
+    return f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def feature_cache_path(task, cache_dir=FEATURE_CACHE_DIR):
+    spec = {key: task[key] for key in ('dropna', 'features', 'target')}
+    spec['source'] = file_signature(task['data'])
+    key = hashlib.sha1(json.dumps(spec, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{task['name']}-{key}.npz")
+
+
+def build_features(task, datasets):
+    """Select the rows and columns a task trains on; returns (X, y)"""
+    df = datasets.get(task['data']).dropna(subset=task['dropna'])
+    if task['target'] in DERIVED_COLUMNS and task['target'] not in df.columns:
+        df = df.assign(**{task['target']: DERIVED_COLUMNS[task['target']](df)})
+    X = df[task['features']].to_numpy(dtype=np.float64)
+    y = df[task['target']].to_numpy()
+    return X, y
+
+
+def load_features(task, datasets, use_cache=True, cache_dir=FEATURE_CACHE_DIR):
+    """Feature matrix for a task from the cache, or built from the CSV (and cached)"""
+    start = time.perf_counter()
+    path = feature_cache_path(task, cache_dir)
+    if use_cache and os.path.isfile(path):
+        with np.load(path, allow_pickle=False) as cached:
+            X, y = cached['X'], cached['y']
+        return X, y, {'feature_cache': 'hit', 'prepare_seconds': time.perf_counter() - start}
+
+    X, y = build_features(task, datasets)
+    if use_cache:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{path}.tmp.{os.getpid()}.npz"
+        np.savez(tmp_path, X=X, y=y)
+        os.replace(tmp_path, path)
+    return X, y, {'feature_cache': 'miss' if use_cache else 'disabled',
+                  'prepare_seconds': time.perf_counter() - start}
+
+
+# --- Fitting ---
+def fit_task(task, X, y, n_jobs=1):
+    """Fit, evaluate and save one model; runs inside a worker process"""
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-    clf = RandomForestClassifier(n_estimators=100, random_state=42)
-    clf.fit(X_train, y_train)
-    y_pred = clf.predict(X_test)
-    print('Rain Classifier Report:')
-    print(classification_report(y_test, y_pred))
-    joblib.dump(clf, 'rain_classifier.pkl')
-
-# --- 2. Weather Regression (Temperature, Humidity) ---
+    estimator_class = RandomForestClassifier if task['kind'] == 'classifier' else RandomForestRegressor
+    model = estimator_class(n_estimators=N_ESTIMATORS, random_state=42, n_jobs=n_jobs)
+
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    y_pred = model.predict(X_test)
+    predict_seconds = time.perf_counter() - start
+
+    if task['kind'] == 'classifier':
+        print(f"{task['title']} Report:")
+        print(classification_report(y_test, y_pred))
+        metrics = {'accuracy': accuracy_score(y_test, y_pred)}
+    else:
+        metrics = {'rmse': float(np.sqrt(mean_squared_error(y_test, y_pred)))}
+        print(f"{task['title']} RMSE:", metrics['rmse'])
+
+    # Serving code loads with n_jobs=None; the training parallelism is not part of the artifact
+    model.set_params(n_jobs=None)
+    start = time.perf_counter()
+    joblib.dump(model, f"{task['name']}.pkl")
+    manifest = save_artifact(task['name'], model, feature_names=task['features'], metrics=metrics,
+                             training_data=np.column_stack([X, y]))
+    save_seconds = time.perf_counter() - start
+
+    return {
+        'model': task['name'],
+        'metrics': metrics,
+        'n_train': int(len(X_train)),
+        'n_test': int(len(X_test)),
+        'n_jobs': n_jobs,
+        'fit_seconds': round(fit_seconds, 3),
+        'predict_seconds': round(predict_seconds, 4),
+        'save_seconds': round(save_seconds, 3),
+        'version': manifest.get('version'),
+    }
+
+
+def available_cpus():
+    """CPUs this process may run on (respects affinity masks and container CPU sets)"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def plan_cpu_budget(n_tasks, cpu_budget):
+    """Split a CPU budget into (concurrent fits, n_jobs per RandomForest)"""
+    cpu_budget = max(1, cpu_budget)
+    concurrent = max(1, min(n_tasks, cpu_budget))
+    return concurrent, max(1, cpu_budget // concurrent)
+
+
+def train_all(models=None, cpu_budget=None, use_cache=True, cache_dir=FEATURE_CACHE_DIR, report_path=REPORT_PATH):
+    """Train the selected models (default: all) concurrently and write the timing report"""
+    tasks = [task for task in TASKS if models is None or task['name'] in models]
+    if not tasks:
+        raise ValueError(f"No models selected; choose from {[task['name'] for task in TASKS]}")
+    cpu_budget = cpu_budget or available_cpus()
+    concurrent, n_jobs = plan_cpu_budget(len(tasks), cpu_budget)
+    run_start = time.perf_counter()
+
+    datasets = DatasetCache()
+    prepared = []
+    for task in tasks:
+        X, y, info = load_features(task, datasets, use_cache, cache_dir)
+        prepared.append((task, X, y, info))
+
+    print(f"Training {len(tasks)} models: {concurrent} at a time, n_jobs={n_jobs} each (CPU budget {cpu_budget})")
+    results = joblib.Parallel(n_jobs=concurrent)(
+        joblib.delayed(fit_task)(task, X, y, n_jobs) for task, X, y, _ in prepared
+    )
+
+    for (task, _, _, info), result in zip(prepared, results):
+        result.update({key: round(value, 4) if isinstance(value, float) else value for key, value in info.items()})
+        result['data'] = task['data']
+
+    report = {
+        'created_at': datetime.now().isoformat(),
+        'cpu_budget': cpu_budget,
+        'concurrent_fits': concurrent,
+        'dataset_load_seconds': {path: round(seconds, 3) for path, seconds in datasets.load_seconds.items()},
+        'total_seconds': round(time.perf_counter() - run_start, 3),
+        'models': results,
+    }
+    if report_path:
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+def print_report(report):
+    print(f"\n{'model':<24}{'cache':>9}{'prepare s':>11}{'fit s':>9}{'save s':>9}  metrics")
+    for row in report['models']:
+        metrics = ', '.join(f"{key}={value:.4f}" for key, value in row['metrics'].items())
+        print(f"{row['model']:<24}{row['feature_cache']:>9}{row['prepare_seconds']:>11.3f}"
+              f"{row['fit_seconds']:>9.3f}{row['save_seconds']:>9.3f}  {metrics}")
+    for path, seconds in report['dataset_load_seconds'].items():
+        print(f"Loaded {path} in {seconds:.3f}s")
+    print(f"Total: {report['total_seconds']:.3f}s")
+
+
+# --- Single-model entry points (kept for scripts that call them directly) ---
+def train_rain_classifier():
+    return train_all(['rain_classifier'])
+
+
 def train_weather_regressors():
-    df = pd.read_csv(HISTORICAL_WEATHER_PATH)
-    df = df.dropna(subset=['temperature', 'humidity', 'wind_speed'])
-    features = ['humidity', 'wind_speed']
-    targets = ['temperature', 'humidity']
-    for target in targets:
-        X = df[features]
-        y = df[target]
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-        reg = RandomForestRegressor(n_estimators=100, random_state=42)
-        reg.fit(X_train, y_train)
-        y_pred = reg.predict(X_test)
-        print(f'{target.capitalize()} Regressor RMSE:', np.sqrt(mean_squared_error(y_test, y_pred)))
-        joblib.dump(reg, f'{target}_regressor.pkl')
-
-# --- 3. Currents/Sea Level Regression ---
+    return train_all(['temperature_regressor', 'humidity_regressor'])
+
+
 def train_currents_regressor():
-    df = pd.read_csv(CURRENTS_DATA_PATH)
-    df = df.dropna(subset=['water_level_m', 'wind_speed_m_s', 'air_pressure_hpa'])
-    features = ['wind_speed_m_s', 'air_pressure_hpa', 'chlorophyll_mg_m3']
-    target = 'water_level_m'
-    X = df[features]
-    y = df[target]
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-    reg = RandomForestRegressor(n_estimators=100, random_state=42)
-    reg.fit(X_train, y_train)
-    y_pred = reg.predict(X_test)
-    print('Water Level Regressor RMSE:', np.sqrt(mean_squared_error(y_test, y_pred)))
-    joblib.dump(reg, 'water_level_regressor.pkl')
+    return train_all(['water_level_regressor'])
 
-if __name__ == '__main__':
-    train_rain_classifier()
-    train_weather_regressors()
-    train_currents_regressor()
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Train all CTAS weather models in parallel')
+    parser.add_argument('--models', nargs='+', default=None, choices=[task['name'] for task in TASKS])
+    parser.add_argument('--cpu-budget', type=int, default=None, help='CPUs to use in total (default: all available)')
+    parser.add_argument('--no-cache', action='store_true', help='Rebuild feature matrices from the CSVs')
+    parser.add_argument('--cache-dir', default=FEATURE_CACHE_DIR)
+    parser.add_argument('--report', default=REPORT_PATH, help='Where to write the timing/metrics report')
+    args = parser.parse_args(argv)
+
+    report = train_all(args.models, args.cpu_budget, not args.no_cache, args.cache_dir, args.report)
+    print_report(report)
     print('All models trained and saved.')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
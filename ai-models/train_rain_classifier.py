@@ -1,16 +1,24 @@
+import argparse
+import os
+import sys
 import pandas as pd
-from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 import joblib
+import incremental_training
+
+parser = incremental_training.add_arguments(argparse.ArgumentParser(description='Train the rain classifier'))
+args = parser.parse_args()
 
 # Load your historical weather data
 # Make sure the file path is correct
 # You can adjust the filename if needed
+file_path = 'weatherHistory.csv'
+
 
-df = pd.read_csv('weatherHistory.csv')
+def add_rain_label(df):
+    # Create a binary target: 1 if 'Precip Type' is 'rain', else 0
+    return df.assign(rain=(df['Precip Type'].str.lower() == 'rain').astype(int))
 
-# Create a binary target: 1 if 'Precip Type' is 'rain', else 0
-df['rain'] = (df['Precip Type'].str.lower() == 'rain').astype(int)
 
 # Select features for prediction (add/remove as needed)
 features = [
@@ -18,6 +26,19 @@ features = [
     'Wind Speed (km/h)', 'Wind Bearing (degrees)', 'Visibility (km)',
     'Pressure (millibars)'
 ]
+
+if args.incremental:
+    # Only rows appended since the published model was trained are read
+    result = incremental_training.incremental_update('rain_classifier', features, 'rain', derive=add_rain_label,
+                                                     trees_per_window=args.trees_per_window,
+                                                     max_trees=args.max_trees, tolerance=args.tolerance)
+    incremental_training.print_update(result)
+    sys.exit(0)
+
+byte_offset = os.path.getsize(file_path)
+df = pd.read_csv(file_path)
+columns = list(df.columns)
+df = add_rain_label(df)
 df = df.dropna(subset=features + ['rain'])
 
 X = df[features]
@@ -25,13 +46,22 @@ y = df['rain']
 
 # Split and train
 X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-clf = RandomForestClassifier(n_estimators=100, random_state=42)
+clf = incremental_training.build_model(args.family)
 clf.fit(X_train, y_train)
 
 # Evaluate (optional)
-print("Train accuracy:", clf.score(X_train, y_train))
-print("Test accuracy:", clf.score(X_test, y_test))
+train_accuracy = clf.score(X_train, y_train)
+test_accuracy = clf.score(X_test, y_test)
+print("Train accuracy:", train_accuracy)
+print("Test accuracy:", test_accuracy)
 
 # Save the model
 joblib.dump(clf, 'rain_classifier.pkl')
 print("Model saved as rain_classifier.pkl")
+
+# The test split becomes the rolling holdout for later --incremental updates
+manifest = incremental_training.publish('rain_classifier', clf, features,
+                                        {'train_accuracy': train_accuracy, 'test_accuracy': test_accuracy},
+                                        file_path, byte_offset, X_test.to_numpy(), y_test.to_numpy(), columns,
+                                        training_data=df[features + ['rain']])
+print(f"Model published to model store as rain_classifier/{manifest['version']}")
@@ -0,0 +1,321 @@
+"""
+CTAS Model Tuning Harness
+Sweep forest size, depth and max_features with inference latency as a first-class objective
+
+For every trial the harness records:
+    score            accuracy (classifiers), F1 on labelled anomalies (IsolationForest) or RMSE (regressors)
+    p50_ms / p99_ms  single-row predict latency, i.e. the API hot path
+    rows_per_second  batch prediction throughput
+    size_bytes       serialized (pickled) model size
+
+Trials are fitted in parallel across cores; latency is then measured one trial
+at a time in the parent process so timings are not distorted by concurrent
+fits. The Pareto front over (score, p99 latency, size) is printed and saved
+with the full results, and the configuration currently hard-coded in the
+model is marked as the baseline.
+
+Usage:
+    python tune_models.py --dataset coastal_threat
+    python tune_models.py --dataset alert --n-estimators 25 50 100 --max-depth none 8 12 --jobs 4
+"""
+
+import json
+import os
+import pickle
+import sys
+import time
+from datetime import datetime
+from itertools import product
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import IsolationForest, RandomForestClassifier, RandomForestRegressor
+from sklearn.metrics import accuracy_score, f1_score, mean_squared_error
+from sklearn.model_selection import train_test_split
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+if HERE not in sys.path:
+    sys.path.insert(0, HERE)
+
+DEFAULT_GRID = {
+    'n_estimators': [25, 50, 100, 200],
+    'max_depth': [None, 8, 12, 16],
+    'max_features': ['sqrt', 0.5, 1.0],
+}
+LATENCY_CALLS = 200
+BATCH_ROWS = 2000
+
+
+# --- Datasets --------------------------------------------------------------
+
+def _synthetic(module_name: str, class_name: str, n_samples: int):
+    from model_registry import import_model_module
+    model = getattr(import_model_module(module_name), class_name)()
+    data = model.generate_synthetic_data(n_samples)
+    return model, data
+
+
+def load_coastal_threat(n_samples: int = 4000):
+    model, data = _synthetic('coastal-threat-model', 'CoastalThreatModel', n_samples)
+    return model.preprocess_data(data), data['threat_type'].values
+
+
+def load_cyclone(n_samples: int = 5000):
+    model, data = _synthetic('cyclone_trajectory_model', 'CycloneTrajectoryModel', n_samples)
+    return model.preprocess_data(data), data['next_lat_24h'].values
+
+
+def load_sea_level(n_samples: int = 5000):
+    model, data = _synthetic('sea_level_anomaly_detector', 'SeaLevelAnomalyDetector', n_samples)
+    return model.preprocess_data(data), data['is_anomaly'].values
+
+
+def load_alert(n_samples: Optional[int] = None):
+    features = ['water_level_m', 'wind_speed_m_s', 'air_pressure_hpa', 'chlorophyll_mg_m3', 'rainfall']
+    df = pd.read_csv(os.path.join(HERE, 'final_training_dataset.csv'), nrows=n_samples)
+    df[features] = df[features].fillna(df[features].mean())
+    df = df.dropna(subset=['anomaly'])
+    return df[features].to_numpy(dtype=np.float64), df['anomaly'].to_numpy()
+
+
+def load_rain(n_samples: Optional[int] = None):
+    features = ['Temperature (C)', 'Apparent Temperature (C)', 'Humidity', 'Wind Speed (km/h)',
+                'Wind Bearing (degrees)', 'Visibility (km)', 'Pressure (millibars)']
+    df = pd.read_csv(os.path.join(HERE, 'weatherHistory.csv'), nrows=n_samples)
+    df['rain'] = (df['Precip Type'].str.lower() == 'rain').astype(int)
+    df = df.dropna(subset=features + ['rain'])
+    return df[features].to_numpy(dtype=np.float64), df['rain'].to_numpy()
+
+
+# kind: classifier / regressor / isolation; baseline: what the model hard-codes today
+DATASETS = {
+    'coastal_threat': {'loader': load_coastal_threat, 'kind': 'classifier',
+                       'baseline': {'n_estimators': 200, 'max_depth': None, 'max_features': 'sqrt'}},
+    'cyclone': {'loader': load_cyclone, 'kind': 'regressor',
+                'baseline': {'n_estimators': 150, 'max_depth': None, 'max_features': 1.0}},
+    'sea_level': {'loader': load_sea_level, 'kind': 'isolation',
+                  'baseline': {'n_estimators': 200, 'max_features': 1.0}},
+    'alert': {'loader': load_alert, 'kind': 'classifier',
+              'baseline': {'n_estimators': 100, 'max_depth': None, 'max_features': 'sqrt'}},
+    'rain': {'loader': load_rain, 'kind': 'classifier',
+             'baseline': {'n_estimators': 100, 'max_depth': None, 'max_features': 'sqrt'}},
+}
+
+SCORE_NAMES = {'classifier': 'accuracy', 'regressor': 'rmse', 'isolation': 'f1'}
+
+
+def higher_is_better(kind: str) -> bool:
+    return kind != 'regressor'
+
+
+# --- Trials ----------------------------------------------------------------
+
+def build_estimator(kind: str, params: Dict[str, Any], random_state: int = 42):
+    if kind == 'isolation':
+        # IsolationForest has no max_depth; its depth follows max_samples
+        params = {k: v for k, v in params.items() if k != 'max_depth'}
+        return IsolationForest(contamination=0.05, random_state=random_state, **params)
+    estimator_class = RandomForestClassifier if kind == 'classifier' else RandomForestRegressor
+    return estimator_class(random_state=random_state, **params)
+
+
+def score_model(kind: str, model, X_test, y_test) -> float:
+    y_pred = model.predict(X_test)
+    if kind == 'classifier':
+        return float(accuracy_score(y_test, y_pred))
+    if kind == 'isolation':
+        return float(f1_score(y_test, (y_pred == -1).astype(int)))
+    return float(np.sqrt(mean_squared_error(y_test, y_pred)))
+
+
+def fit_trial(kind: str, params: Dict[str, Any], X_train, y_train, X_test, y_test) -> Dict[str, Any]:
+    """Fit and score one configuration; runs in a worker process"""
+    model = build_estimator(kind, params)
+    start = time.perf_counter()
+    if kind == 'isolation':
+        model.fit(X_train)
+    else:
+        model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+    return {
+        'params': params,
+        'score': score_model(kind, model, X_test, y_test),
+        'fit_seconds': round(fit_seconds, 3),
+        'size_bytes': len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)),
+        'model': model,
+    }
+
+
+def measure_latency(kind: str, model, X_test, calls: int = LATENCY_CALLS, batch_rows: int = BATCH_ROWS) -> Dict:
+    """Single-row p50/p99 of the serving call and batch throughput"""
+    predict = model.predict_proba if kind == 'classifier' else model.predict
+    rows = X_test[np.arange(calls) % len(X_test)]
+    predict(rows[:1])  # warm up
+    timings = np.empty(calls)
+    for i in range(calls):
+        start = time.perf_counter()
+        predict(rows[i:i + 1])
+        timings[i] = time.perf_counter() - start
+    batch = X_test[np.arange(batch_rows) % len(X_test)]
+    start = time.perf_counter()
+    predict(batch)
+    batch_seconds = time.perf_counter() - start
+    return {
+        'p50_ms': round(float(np.percentile(timings, 50)) * 1000, 4),
+        'p99_ms': round(float(np.percentile(timings, 99)) * 1000, 4),
+        'rows_per_second': round(batch_rows / batch_seconds, 1),
+    }
+
+
+def pareto_front(trials: List[Dict], maximize_score: bool = True) -> List[int]:
+    """Indices of trials not dominated on (score, p99_ms, size_bytes)"""
+    def objectives(trial):
+        score = -trial['score'] if maximize_score else trial['score']
+        return (score, trial['p99_ms'], trial['size_bytes'])
+
+    points = [objectives(t) for t in trials]
+    front = []
+    for i, p in enumerate(points):
+        dominated = any(
+            all(a <= b for a, b in zip(q, p)) and any(a < b for a, b in zip(q, p))
+            for j, q in enumerate(points) if j != i
+        )
+        if not dominated:
+            front.append(i)
+    return sorted(front, key=lambda i: points[i])
+
+
+def _isolation_max_features(value) -> bool:
+    """IsolationForest takes a feature count or a fraction in (0, 1], not 'sqrt'/'log2'"""
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, int):
+        return value >= 1
+    return isinstance(value, float) and 0.0 < value <= 1.0
+
+
+def expand_grid(grid: Dict[str, List], kind: str) -> List[Dict[str, Any]]:
+    grid = dict(grid)
+    if kind == 'isolation':
+        grid.pop('max_depth', None)
+        if 'max_features' in grid:
+            grid['max_features'] = [v for v in grid['max_features'] if _isolation_max_features(v)] or [1.0]
+    keys = list(grid)
+    configs = [dict(zip(keys, values)) for values in product(*(grid[k] for k in keys))]
+    return configs
+
+
+def run_search(dataset: str, grid: Optional[Dict[str, List]] = None, n_jobs: int = -1,
+               n_samples: Optional[int] = None, test_size: float = 0.2) -> Dict[str, Any]:
+    """Run the sweep for one dataset and return results with the Pareto front"""
+    import joblib
+
+    spec = DATASETS[dataset]
+    kind = spec['kind']
+    X, y = spec['loader'](n_samples) if n_samples else spec['loader']()
+    stratify = None
+    if kind == 'classifier':
+        _, counts = np.unique(y, return_counts=True)
+        stratify = y if len(counts) > 1 and counts.min() >= 2 else None
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=42,
+                                                        stratify=stratify)
+
+    configs = expand_grid(grid or DEFAULT_GRID, kind)
+    baseline = {k: v for k, v in spec['baseline'].items() if k in configs[0]}
+    if baseline not in configs:
+        configs.append(baseline)
+
+    start = time.perf_counter()
+    trials = joblib.Parallel(n_jobs=n_jobs)(
+        joblib.delayed(fit_trial)(kind, params, X_train, y_train, X_test, y_test) for params in configs
+    )
+    search_seconds = time.perf_counter() - start
+
+    for trial in trials:
+        trial.update(measure_latency(kind, trial.pop('model'), X_test))
+        trial['baseline'] = trial['params'] == baseline
+
+    front = pareto_front(trials, maximize_score=higher_is_better(kind))
+    for i in front:
+        trials[i]['pareto'] = True
+    return {
+        'dataset': dataset,
+        'kind': kind,
+        'score_name': SCORE_NAMES[kind],
+        'higher_is_better': higher_is_better(kind),
+        'created_at': datetime.now().isoformat(),
+        'n_train': int(len(y_train)),
+        'n_test': int(len(y_test)),
+        'search_seconds': round(search_seconds, 2),
+        'trials': trials,
+        'pareto_front': [trials[i] for i in front],
+    }
+
+
+def _format_params(params: Dict[str, Any]) -> str:
+    return ' '.join(f"{k}={v}" for k, v in params.items())
+
+
+def print_results(results: Dict[str, Any], show_all: bool = False):
+    rows = results['trials'] if show_all else results['pareto_front']
+    title = 'All trials' if show_all else 'Pareto front'
+    print(f"\n{title} for {results['dataset']} ({results['score_name']}, "
+          f"{'higher' if results['higher_is_better'] else 'lower'} is better; "
+          f"{len(results['trials'])} trials in {results['search_seconds']}s)")
+    print(f"{results['score_name']:>9} {'p50 ms':>8} {'p99 ms':>8} {'rows/s':>10} {'size KB':>9}  params")
+    for trial in rows:
+        marker = ' *baseline' if trial['baseline'] else ''
+        print(f"{trial['score']:9.4f} {trial['p50_ms']:8.3f} {trial['p99_ms']:8.3f} {trial['rows_per_second']:10.0f} "
+              f"{trial['size_bytes'] / 1024:9.1f}  {_format_params(trial['params'])}{marker}")
+    baseline = next((t for t in results['trials'] if t['baseline']), None)
+    if baseline is not None and not show_all and not baseline.get('pareto'):
+        print(f"{baseline['score']:9.4f} {baseline['p50_ms']:8.3f} {baseline['p99_ms']:8.3f} "
+              f"{baseline['rows_per_second']:10.0f} {baseline['size_bytes'] / 1024:9.1f}  "
+              f"{_format_params(baseline['params'])} *baseline (dominated)")
+
+
+def _parse_grid_value(value: str):
+    if value.lower() == 'none':
+        return None
+    for cast in (int, float):
+        try:
+            return cast(value)
+        except ValueError:
+            pass
+    return value
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Accuracy vs latency vs size sweep for CTAS forests')
+    parser.add_argument('--dataset', choices=sorted(DATASETS), default='coastal_threat')
+    parser.add_argument('--n-estimators', nargs='+', type=int, default=None)
+    parser.add_argument('--max-depth', nargs='+', default=None, help="Depths to try; 'none' for unlimited")
+    parser.add_argument('--max-features', nargs='+', default=None, help="e.g. sqrt 0.5 1.0")
+    parser.add_argument('--samples', type=int, default=None, help='Rows to generate/read')
+    parser.add_argument('--jobs', type=int, default=-1, help='Parallel trials (default: all cores)')
+    parser.add_argument('--output', default=None, help='Results JSON (default: tuning_<dataset>.json)')
+    parser.add_argument('--all', action='store_true', help='Print every trial, not just the Pareto front')
+    args = parser.parse_args(argv)
+
+    grid = dict(DEFAULT_GRID)
+    if args.n_estimators:
+        grid['n_estimators'] = args.n_estimators
+    if args.max_depth:
+        grid['max_depth'] = [_parse_grid_value(v) for v in args.max_depth]
+    if args.max_features:
+        grid['max_features'] = [_parse_grid_value(v) for v in args.max_features]
+
+    results = run_search(args.dataset, grid, args.jobs, args.samples)
+    output = args.output or f"tuning_{args.dataset}.json"
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, default=str)
+    print_results(results, show_all=args.all)
+    print(f"\nResults written to {output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
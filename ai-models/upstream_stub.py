@@ -0,0 +1,396 @@
+"""
+CTAS Upstream Stub
+Local stand-in for Open-Meteo, OpenWeather, the OpenAI chat API and NOAA CO-OPS, for offline load tests
+
+Serves the endpoints the apps call, with payloads shaped like the real
+services (values vary smoothly with latitude/longitude so distinct coordinates
+get distinct answers):
+
+    GET  /v1/forecast            Open-Meteo current weather + hourly humidity/precipitation
+    GET  /data/2.5/weather       OpenWeather current weather
+    POST /v1/chat/completions    OpenAI chat completion (echoes the last user message)
+    GET  /api/datagetter         NOAA currents XML, one 6-minute observation per step between
+                                 begin_date and end_date (inclusive); values depend only on the
+                                 timestamp, so split windows merge back into the same series
+
+Each service has a configurable latency (`latency_ms` + uniform `jitter_ms`),
+`error_rate` (fraction of requests answered with `error_status`) and `payload`
+overrides merged into the generated response. Settings come from --config
+(JSON: {"default": {...}, "open_meteo": {...}, "openweather": {...}, "openai": {...},
+"noaa": {...}}) and can be changed while running with POST /__stub/config (same shape).
+GET /__stub/stats returns per-service request, error and response byte counts, plus
+the peak number of requests in flight and distinct client connections per service;
+POST /__stub/reset clears them.
+
+Point the apps at the stub with the environment printed on start-up
+(OPEN_METEO_URL, OPENWEATHER_URL, OPENAI_API_URL, NOAA_API_URL):
+
+    python upstream_stub.py --port 8090 --latency-ms 80 --error-rate 0.02
+"""
+
+import copy
+import json
+import logging
+import random
+import sys
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+logger = logging.getLogger(__name__)
+
+SERVICES = ('open_meteo', 'openweather', 'openai', 'noaa')
+ROUTES = {
+    ('GET', '/v1/forecast'): 'open_meteo',
+    ('GET', '/data/2.5/weather'): 'openweather',
+    ('POST', '/v1/chat/completions'): 'openai',
+    ('GET', '/api/datagetter'): 'noaa',
+}
+NOAA_STATIONS = {
+    'cb0102': ('Cape Henry LB 2CH', 36.9594, -76.0128),
+    'cb0201': ('Chesapeake Bay Bridge Tunnel', 36.9667, -76.1167),
+    'cb1001': ('Patapsco River', 39.2167, -76.5833),
+    'lb0201': ('Long Bay', 33.8400, -78.4850),
+    'sf0101': ('San Francisco Bay', 37.8063, -122.4659),
+}
+NOAA_STEP_MINUTES = 6
+NOAA_DATE_FORMAT = '%Y%m%d %H:%M'
+DEFAULT_SETTINGS = {'latency_ms': 0.0, 'jitter_ms': 0.0, 'error_rate': 0.0, 'error_status': 503, 'payload': {}}
+
+
+def _merge(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def open_meteo_payload(lat: float, lon: float) -> Dict[str, Any]:
+    temperature = round(30.0 - 0.4 * abs(lat) + 0.01 * lon, 2)
+    humidity = [round(min(100.0, 55.0 + 0.5 * abs(lat) + h), 1) for h in range(24)]
+    return {
+        'latitude': lat,
+        'longitude': lon,
+        'generationtime_ms': 0.2,
+        'current_weather': {'temperature': temperature, 'windspeed': round(10.0 + abs(lon) % 15, 2),
+                            'winddirection': round(lon % 360, 1), 'weathercode': 3},
+        'hourly': {'time': [f"2024-01-01T{h:02d}:00" for h in range(24)],
+                   'relativehumidity_2m': humidity,
+                   'precipitation': [round((abs(lat + lon) % 7) / 3.0, 2)] * 24},
+    }
+
+
+def openweather_payload(lat: float, lon: float) -> Dict[str, Any]:
+    return {
+        'coord': {'lat': lat, 'lon': lon},
+        'weather': [{'main': 'Clouds', 'description': 'scattered clouds'}],
+        'main': {'temp': round(30.0 - 0.4 * abs(lat), 2), 'humidity': int(55 + 0.5 * abs(lat)),
+                 'pressure': 1008},
+        'wind': {'speed': round(3.0 + abs(lon) % 5, 2)},
+        'rain': {'1h': round((abs(lat + lon) % 7) / 3.0, 2)},
+        'dt': int(time.time()),
+    }
+
+
+def noaa_currents_xml(station_id: str, begin: datetime, end: datetime,
+                      step_minutes: int = NOAA_STEP_MINUTES) -> str:
+    """NOAA datagetter currents XML for the step_minutes grid points in [begin, end]"""
+    import numpy as np
+
+    if station_id not in NOAA_STATIONS:
+        return '<?xml version="1.0" encoding="UTF-8"?>\n<data>\n<error>No data was found.</error>\n</data>\n'
+    name, lat, lon = NOAA_STATIONS[station_id]
+    step = np.timedelta64(step_minutes, 'm')
+    first = np.datetime64(begin, 'm')
+    first = first + (-first.astype(np.int64)) % step_minutes * np.timedelta64(1, 'm')
+    times = np.arange(first, np.datetime64(end, 'm') + np.timedelta64(1, 'm'), step)
+    # Semidiurnal (M2) flood/ebb cycle: speed and direction depend only on the timestamp
+    phase = 2 * np.pi * (times.astype(np.int64) / 60.0) / 12.42
+    flow = 0.15 + 0.8 * np.sin(phase) + 0.05 * np.sin(phase / 2 + sum(map(ord, station_id)) % 7)
+    speed = np.abs(flow)
+    direction = np.where(flow >= 0, 105, 285) + (times.astype(np.int64) // step_minutes) % 11
+    stamps = times.astype(str)
+    rows = ''.join(f'<cu t="{t[:10]} {t[11:16]}" s="{v:.3f}" d="{d}" b="4"/>\n'
+                   for t, v, d in zip(stamps, speed, direction))
+    return ('<?xml version="1.0" encoding="UTF-8"?>\n<data>\n'
+            f'<metadata id="{station_id}" name="{name}" lat="{lat}" lon="{lon}"/>\n'
+            f'<observations>\n{rows}</observations>\n</data>\n')
+
+
+def openai_payload(body: Dict[str, Any]) -> Dict[str, Any]:
+    messages = body.get('messages') or [{}]
+    prompt = str(messages[-1].get('content', ''))
+    return {
+        'id': 'chatcmpl-stub',
+        'object': 'chat.completion',
+        'model': body.get('model', 'stub'),
+        'choices': [{'index': 0, 'finish_reason': 'stop',
+                     'message': {'role': 'assistant', 'content': f"Stub answer to: {prompt[:200]}"}}],
+        'usage': {'prompt_tokens': len(prompt.split()), 'completion_tokens': 8,
+                  'total_tokens': len(prompt.split()) + 8},
+    }
+
+
+class StubState:
+    """Per-service settings and counters shared by the handler threads"""
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None, seed: Optional[int] = None):
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self.settings = {service: dict(DEFAULT_SETTINGS) for service in SERVICES}
+        self.reset()
+        if config:
+            self.configure(config)
+
+    def configure(self, config: Dict[str, Any]):
+        """Apply {"default": {...}, "<service>": {...}}; unknown keys raise ValueError"""
+        unknown = set(config) - set(SERVICES) - {'default'}
+        if unknown:
+            raise ValueError(f"Unknown stub services: {', '.join(sorted(unknown))}")
+        with self._lock:
+            for service in SERVICES:
+                for section in (config.get('default'), config.get(service)):
+                    if section:
+                        bad = set(section) - set(DEFAULT_SETTINGS)
+                        if bad:
+                            raise ValueError(f"Unknown stub settings: {', '.join(sorted(bad))}")
+                        self.settings[service] = _merge(self.settings[service], section)
+
+    def reset(self):
+        with self._lock:
+            self.counts = {service: {'requests': 0, 'errors': 0, 'bytes': 0} for service in SERVICES}
+            self._in_flight = {service: 0 for service in SERVICES}
+            self._max_in_flight = {service: 0 for service in SERVICES}
+            self._connections = {service: set() for service in SERVICES}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            concurrency = {service: {'max_in_flight': self._max_in_flight[service],
+                                     'connections': len(self._connections[service])} for service in SERVICES}
+            return {'counts': copy.deepcopy(self.counts), 'concurrency': concurrency,
+                    'settings': copy.deepcopy(self.settings)}
+
+    def plan(self, service: str, client: Optional[tuple] = None):
+        """(delay seconds, error status or None, payload overrides) for the next request
+
+        Every plan() must be paired with a finish() once the response is written.
+        """
+        with self._lock:
+            settings = self.settings[service]
+            self.counts[service]['requests'] += 1
+            self._in_flight[service] += 1
+            self._max_in_flight[service] = max(self._max_in_flight[service], self._in_flight[service])
+            if client is not None:
+                self._connections[service].add(client)
+            delay = max(0.0, settings['latency_ms'] + self._random.uniform(0, settings['jitter_ms'])) / 1000.0
+            failed = self._random.random() < settings['error_rate']
+            if failed:
+                self.counts[service]['errors'] += 1
+            return delay, (settings['error_status'] if failed else None), settings['payload']
+
+    def finish(self, service: str, sent_bytes: int):
+        with self._lock:
+            self._in_flight[service] -= 1
+            self.counts[service]['bytes'] += sent_bytes
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'CTASUpstreamStub/1.0'
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def _send_json(self, status: int, payload: Any) -> int:
+        return self._send_body(status, json.dumps(payload).encode('utf-8'), 'application/json')
+
+    def _send_body(self, status: int, body: bytes, content_type: str) -> int:
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        return len(body)
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return {}
+        return json.loads(self.rfile.read(length))
+
+    def _handle(self, method: str):
+        state: StubState = self.server.state
+        parsed = urlparse(self.path)
+        try:
+            body = self._read_json() if method == 'POST' else {}
+        except ValueError:
+            self._send_json(400, {'error': 'invalid JSON body'})
+            return
+
+        if parsed.path.startswith('/__stub/'):
+            self._control(method, parsed.path, body)
+            return
+
+        service = ROUTES.get((method, parsed.path))
+        if service is None:
+            self._send_json(404, {'error': f"no stub for {method} {parsed.path}"})
+            return
+        delay, error_status, overrides = state.plan(service, self.client_address)
+        sent = 0
+        try:
+            if delay:
+                time.sleep(delay)
+            if error_status is not None:
+                sent = self._send_json(error_status, {'error': 'injected upstream failure', 'service': service})
+            else:
+                sent = self._respond(service, parse_qs(parsed.query), body, overrides)
+        finally:
+            state.finish(service, sent)
+
+    def _respond(self, service: str, params: Dict[str, list], body: Dict[str, Any], overrides: Dict[str, Any]) -> int:
+        query = {key: values[0] for key, values in params.items()}
+        try:
+            if service == 'noaa':
+                begin = datetime.strptime(query['begin_date'], NOAA_DATE_FORMAT)
+                end = datetime.strptime(query['end_date'], NOAA_DATE_FORMAT)
+                xml = noaa_currents_xml(query.get('station', ''), begin, end)
+                return self._send_body(200, xml.encode('utf-8'), 'text/xml')
+            if service == 'openai':
+                payload = openai_payload(body)
+            else:
+                lat = float(query.get('latitude', query.get('lat')))
+                lon = float(query.get('longitude', query.get('lon')))
+                payload = (open_meteo_payload if service == 'open_meteo' else openweather_payload)(lat, lon)
+        except KeyError:
+            return self._send_json(400, {'error': 'begin_date and end_date query parameters required'})
+        except (TypeError, ValueError):
+            return self._send_json(400, {'error': 'latitude/longitude (or NOAA date) query parameters invalid'})
+        return self._send_json(200, _merge(payload, overrides) if overrides else payload)
+
+    def _control(self, method: str, path: str, body: Dict[str, Any]):
+        state: StubState = self.server.state
+        if method == 'GET' and path == '/__stub/stats':
+            self._send_json(200, state.stats())
+        elif method == 'POST' and path == '/__stub/reset':
+            state.reset()
+            self._send_json(200, state.stats())
+        elif method == 'POST' and path == '/__stub/config':
+            try:
+                state.configure(body)
+            except ValueError as e:
+                self._send_json(400, {'error': str(e)})
+                return
+            self._send_json(200, state.stats())
+        else:
+            self._send_json(404, {'error': f"unknown control endpoint {method} {path}"})
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+
+class UpstreamStub:
+    """Stub server on a background thread; use as a context manager
+
+        with UpstreamStub(config={'default': {'latency_ms': 50}}) as stub:
+            os.environ.update(stub.environ())
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, config: Optional[Dict[str, Any]] = None,
+                 seed: Optional[int] = None):
+        self.state = StubState(config, seed=seed)
+        self.server = ThreadingHTTPServer((host, port), StubHandler)
+        self.server.daemon_threads = True
+        self.server.state = self.state
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def environ(self) -> Dict[str, str]:
+        """Environment variables that point live_weather, /ai/chat and the NOAA fetcher at this stub"""
+        return {
+            'OPEN_METEO_URL': f"{self.url}/v1/forecast",
+            'OPENWEATHER_URL': f"{self.url}/data/2.5/weather",
+            'OPENAI_API_URL': f"{self.url}/v1/chat/completions",
+            'NOAA_API_URL': f"{self.url}/api/datagetter",
+        }
+
+    def configure(self, config: Dict[str, Any]):
+        self.state.configure(config)
+
+    def counts(self) -> Dict[str, Dict[str, int]]:
+        return self.state.stats()['counts']
+
+    def concurrency(self) -> Dict[str, Dict[str, int]]:
+        return self.state.stats()['concurrency']
+
+    def start(self) -> 'UpstreamStub':
+        self._thread = threading.Thread(target=self.server.serve_forever, name='ctas-upstream-stub', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> 'UpstreamStub':
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Local stand-in for Open-Meteo, OpenWeather, OpenAI and NOAA CO-OPS')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--config', help='JSON file with default/per-service settings')
+    parser.add_argument('--latency-ms', type=float, default=None, help='Base latency for every service')
+    parser.add_argument('--jitter-ms', type=float, default=None, help='Extra uniform random latency')
+    parser.add_argument('--error-rate', type=float, default=None, help='Fraction of requests that fail')
+    parser.add_argument('--error-status', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    config: Dict[str, Any] = {}
+    if args.config:
+        with open(args.config) as f:
+            config = json.load(f)
+    overrides = {key: value for key, value in (('latency_ms', args.latency_ms), ('jitter_ms', args.jitter_ms),
+                                               ('error_rate', args.error_rate), ('error_status', args.error_status))
+                 if value is not None}
+    if overrides:
+        config['default'] = dict(config.get('default', {}), **overrides)
+
+    stub = UpstreamStub(args.host, args.port, config=config, seed=args.seed)
+    print(f"Upstream stub listening on {stub.url}; point the apps at it with:")
+    for key, value in stub.environ().items():
+        print(f"  export {key}={value}")
+    print("  export OPENAI_API_KEY=stub  # /ai/chat refuses to run without a key")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stub.server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())